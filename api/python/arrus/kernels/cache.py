@@ -0,0 +1,223 @@
+"""
+Cache of the sequence conversion results (see Session.upload).
+
+The results of a kernel (raw TX/RX sequence, constants) depend only on
+the kernel execution context: the sequence, device (probe models, sampling
+frequency), medium, digital down conversion and constants. So the results
+are cached: in memory (the most recently used results) and, optionally,
+in the given directory on disk, under the hash of the context.
+The memory cache also keeps the sequences converted to the core (C++ API)
+objects, so that uploading the same scheme again requires no conversion at all.
+
+The cached results are read-only (numpy arrays are not writeable).
+"""
+import collections
+import copy
+import dataclasses
+import enum
+import hashlib
+import os
+import pickle
+import threading
+from numbers import Number
+
+import numpy as np
+
+import arrus
+import arrus.framework
+import arrus.logging
+from arrus.kernels.kernel import KernelExecutionContext, ConversionResults
+
+# Should be incremented each time the format of the cached results
+# changes (invalidates the results stored on disk).
+CACHE_VERSION = 1
+# The maximum number of conversion results kept in memory.
+MEMORY_CACHE_SIZE = 16
+
+
+@dataclasses.dataclass
+class _CacheEntry:
+    results: ConversionResults
+    core_sequence: object = None
+
+
+_memory_cache = collections.OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+
+def get_context_hash(context: KernelExecutionContext):
+    """
+    Returns the hash (hex string) of the given kernel execution context.
+
+    The hash depends on the type of the sequence and the values of all
+    the context fields. None is returned when the context contains values
+    of unsupported types (the results for such context will not be cached).
+    """
+    h = hashlib.sha256()
+    h.update(f"conversion_results:{CACHE_VERSION}:{arrus.__version__}".encode())
+    try:
+        _update_hash(h, context)
+    except TypeError:
+        return None
+    return h.hexdigest()
+
+
+def get_conversion_results(key, compute, cache_dir=None) -> ConversionResults:
+    """
+    Returns the conversion results for the given key.
+
+    The results are looked up in memory and then in the cache directory
+    (if provided); the results are computed (and stored in the cache)
+    only when they are not available in any of them.
+
+    :param key: the context hash, see get_context_hash; None means that
+      the results should be computed and not cached
+    :param compute: a function that computes the results (no parameters)
+    :param cache_dir: path to the on-disk cache directory; None means
+      that only the memory cache will be used
+    :return: ConversionResults, the arrays are read-only
+    """
+    if key is None:
+        return compute()
+    with _memory_cache_lock:
+        entry = _memory_cache.get(key, None)
+        if entry is not None:
+            _memory_cache.move_to_end(key)
+            return _get_results_copy(entry.results)
+    results = None
+    if cache_dir is not None:
+        results = _load(_get_path(cache_dir, key))
+    if results is None:
+        results = compute()
+        if cache_dir is not None:
+            _save(_get_path(cache_dir, key), results)
+    # The results can share arrays with the input sequence, which should
+    # remain writeable.
+    results = copy.deepcopy(results)
+    _set_read_only(results)
+    with _memory_cache_lock:
+        _memory_cache[key] = _CacheEntry(results=results)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+    return _get_results_copy(results)
+
+
+def get_core_sequence(key, convert):
+    """
+    Returns the core (C++ API) sequence for the conversion results
+    with the given key.
+
+    The core sequence is kept in memory only, together with the
+    conversion results (see get_conversion_results).
+
+    :param key: the context hash, see get_context_hash
+    :param convert: a function that converts the raw sequence to the core
+      sequence (no parameters)
+    """
+    with _memory_cache_lock:
+        entry = _memory_cache.get(key, None)
+        if entry is not None and entry.core_sequence is not None:
+            return entry.core_sequence
+    core_sequence = convert()
+    with _memory_cache_lock:
+        entry = _memory_cache.get(key, None)
+        if entry is not None:
+            entry.core_sequence = core_sequence
+    return core_sequence
+
+
+def clear_memory_cache():
+    """
+    Removes all conversion results from the memory cache.
+    """
+    with _memory_cache_lock:
+        _memory_cache.clear()
+
+
+def _get_results_copy(results: ConversionResults):
+    # NOTE: the Constant attributes can be changed, so each client gets
+    # its own constants.
+    return dataclasses.replace(
+        results, constants=[copy.copy(c) for c in results.constants])
+
+
+def _set_read_only(value):
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif dataclasses.is_dataclass(value):
+        for f in dataclasses.fields(value):
+            _set_read_only(getattr(value, f.name))
+    elif isinstance(value, arrus.framework.Constant):
+        _set_read_only(value.value)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _set_read_only(v)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _set_read_only(v)
+
+
+def _update_hash(h, value):
+    if value is None:
+        h.update(b"None;")
+    elif isinstance(value, (str, enum.Enum)):
+        h.update(f"str:{value};".encode())
+    elif dataclasses.is_dataclass(value) \
+            or isinstance(value, arrus.framework.Constant):
+        h.update(f"{type(value).__module__}.{type(value).__qualname__}("
+                 .encode())
+        if dataclasses.is_dataclass(value):
+            names = [f.name for f in dataclasses.fields(value)]
+        else:
+            names = ["value", "placement", "name"]
+        for name in names:
+            h.update(f"{name}=".encode())
+            _update_hash(h, getattr(value, name))
+        h.update(b");")
+    elif isinstance(value, (list, tuple)):
+        h.update(f"list:{len(value)}[".encode())
+        for v in value:
+            _update_hash(h, v)
+        h.update(b"];")
+    elif isinstance(value, dict):
+        h.update(f"dict:{len(value)}{{".encode())
+        for k in sorted(value.keys(), key=str):
+            _update_hash(h, k)
+            _update_hash(h, value[k])
+        h.update(b"};")
+    elif isinstance(value, (np.ndarray, np.generic, Number)):
+        value = np.ascontiguousarray(value)
+        if value.dtype.hasobject:
+            raise TypeError("Object arrays are not supported.")
+        h.update(f"array:{value.dtype.str}:{value.shape}:".encode())
+        h.update(value.tobytes())
+    else:
+        raise TypeError(f"Unsupported type: {type(value)}")
+
+
+def _get_path(cache_dir, key):
+    return os.path.join(cache_dir, f"conversion_results_{key}.pkl")
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError,
+            ImportError, ValueError) as e:
+        arrus.logging.log(arrus.logging.WARNING,
+                          f"Invalid conversion results cache file: {path} "
+                          f"({e}), the results will be computed again.")
+        return None
+
+
+def _save(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Save to a temporary file first, so the other processes never read
+    # a partially written file.
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(results, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,178 @@
+import dataclasses
+import tempfile
+import unittest
+
+import numpy as np
+
+import arrus.kernels.cache
+import arrus.kernels.tx_rx_sequence
+from arrus.kernels.cache import (
+    get_context_hash, get_conversion_results, get_core_sequence,
+    clear_memory_cache
+)
+from arrus.kernels.kernel import KernelExecutionContext
+from arrus.ops.us4r import TxRxSequence, Tx, Rx, TxRx, Pulse, Aperture
+from arrus.devices.probe import ProbeModelId, ProbeModel
+from arrus.framework import Constant
+
+
+@dataclasses.dataclass(frozen=True)
+class ProbeMock:
+    model: ProbeModel
+
+
+@dataclasses.dataclass(frozen=True)
+class DeviceMock:
+    probe: ProbeMock
+    sampling_frequency: float = 65e6
+
+    def get_probe_by_id(self, id):
+        return self.probe
+
+
+class ConversionResultsCacheTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        clear_memory_cache()
+        probe = ProbeModel(model_id=ProbeModelId("a", "a"), pitch=1,
+                           n_elements=8, curvature_radius=0.0)
+        self.device = DeviceMock(probe=ProbeMock(model=probe))
+        self.sequence = self.get_sequence(angle=0.0)
+
+    def tearDown(self) -> None:
+        clear_memory_cache()
+
+    def get_sequence(self, angle):
+        excitation = Pulse(center_frequency=1, n_periods=1, inverse=False)
+        ops = [
+            TxRx(
+                tx=Tx(aperture=Aperture(center_element=3.5, size=8),
+                      excitation=excitation, focus=np.inf, angle=angle,
+                      speed_of_sound=1),
+                rx=Rx(aperture=np.ones(8, dtype=bool), sample_range=(0, 8)),
+                pri=1)
+        ]
+        return TxRxSequence(ops=ops, tgc_curve=np.zeros(8))
+
+    def get_context(self, sequence, constants=()):
+        return KernelExecutionContext(
+            device=self.device, medium=None, op=sequence, custom={},
+            constants=constants)
+
+    def convert(self, context):
+        return arrus.kernels.tx_rx_sequence.process_tx_rx_sequence(context)
+
+    def test_context_hash(self):
+        # Given
+        context = self.get_context(self.sequence)
+        same_context = self.get_context(self.get_sequence(angle=0.0))
+        other_context = self.get_context(self.get_sequence(angle=0.1))
+        constant = Constant(value=10e-3, placement="/Us4R:0", name="tx_focus")
+        context_with_constant = self.get_context(self.sequence, [constant])
+        # Expect
+        self.assertEqual(get_context_hash(context),
+                         get_context_hash(same_context))
+        self.assertNotEqual(get_context_hash(context),
+                            get_context_hash(other_context))
+        self.assertNotEqual(get_context_hash(context),
+                            get_context_hash(context_with_constant))
+
+    def test_context_hash_unsupported_type(self):
+        # Given
+        context = dataclasses.replace(
+            self.get_context(self.sequence), custom={"value": object()})
+        # Expect
+        self.assertIsNone(get_context_hash(context))
+
+    def test_memory_cache(self):
+        # Given
+        context = self.get_context(self.sequence)
+        key = get_context_hash(context)
+        n_calls = []
+
+        def compute():
+            n_calls.append(1)
+            return self.convert(context)
+
+        # Run
+        results1 = get_conversion_results(key, compute)
+        results2 = get_conversion_results(key, compute)
+        core_sequence1 = get_core_sequence(key, lambda: object())
+        core_sequence2 = get_core_sequence(key, lambda: object())
+        # Expect
+        self.assertEqual(len(n_calls), 1)
+        self.assertIs(results1.sequence, results2.sequence)
+        self.assertIs(core_sequence1, core_sequence2)
+
+    def test_read_only_results(self):
+        # Given
+        constant = Constant(value=10e-3, placement="/Us4R:0", name="tx_focus")
+        context = self.get_context(self.sequence, [constant])
+        key = get_context_hash(context)
+        # Run
+        results1 = get_conversion_results(key, lambda: self.convert(context))
+        results2 = get_conversion_results(key, lambda: self.convert(context))
+        # Expect
+        tx = results1.sequence.ops[0].tx
+        self.assertFalse(tx.delays.flags.writeable)
+        self.assertFalse(results1.constants[0].value.flags.writeable)
+        # Each client gets its own constants.
+        self.assertIsNot(results1.constants[0], results2.constants[0])
+        # The input sequence arrays remain writeable.
+        self.assertTrue(self.sequence.ops[0].rx.aperture.flags.writeable)
+
+    def test_memory_cache_size(self):
+        # Given
+        keys = [f"key{i}"
+                for i in range(arrus.kernels.cache.MEMORY_CACHE_SIZE+1)]
+        results = self.convert(self.get_context(self.sequence))
+        # Run
+        for key in keys:
+            get_conversion_results(key, lambda: results)
+        # Expect
+        # The least recently used results should be removed.
+        n_calls = []
+        get_conversion_results(keys[0], lambda: n_calls.append(1) or results)
+        self.assertEqual(len(n_calls), 1)
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Given
+            context = self.get_context(self.sequence)
+            key = get_context_hash(context)
+            expected = get_conversion_results(
+                key, lambda: self.convert(context), cache_dir=cache_dir)
+            clear_memory_cache()
+
+            def compute():
+                raise AssertionError("The results should be read from disk.")
+
+            # Run
+            results = get_conversion_results(key, compute,
+                                             cache_dir=cache_dir)
+            # Expect
+            expected_op = expected.sequence.ops[0]
+            op = results.sequence.ops[0]
+            np.testing.assert_equal(op.tx.aperture, expected_op.tx.aperture)
+            np.testing.assert_equal(op.tx.delays, expected_op.tx.delays)
+            np.testing.assert_equal(op.rx.aperture, expected_op.rx.aperture)
+            self.assertEqual(op.rx.sample_range, expected_op.rx.sample_range)
+
+    def test_invalid_disk_cache_file(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Given
+            context = self.get_context(self.sequence)
+            key = get_context_hash(context)
+            path = arrus.kernels.cache._get_path(cache_dir, key)
+            with open(path, "wb") as f:
+                f.write(b"invalid")
+            # Run
+            results = get_conversion_results(
+                key, lambda: self.convert(context), cache_dir=cache_dir)
+            # Expect
+            # The results should be computed again.
+            self.assertEqual(len(results.sequence.ops), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
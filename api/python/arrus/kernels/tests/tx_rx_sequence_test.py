@@ -1,6 +1,7 @@
 import numpy as np
 import math
 import arrus.kernels.tx_rx_sequence
+import arrus.framework
 import arrus.ops.imaging
 import arrus.medium
 from arrus.kernels.kernel import KernelExecutionContext
@@ -608,5 +609,170 @@ class StaSequenceTest(SimpleTxRxSequenceTest):
                                            center_elements=np.arange(45, 146, 10))
 
 
+
+class TxDelaysTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.probe = ProbeModel(model_id=ProbeModelId("a", "a"), pitch=1,
+                                n_elements=8, curvature_radius=0.0)
+        self.excitation = arrus.ops.us4r.Pulse(
+            center_frequency=1, n_periods=1, inverse=False)
+
+    def get_mask(self, start, end):
+        mask = np.zeros(self.probe.n_elements, dtype=bool)
+        mask[start:end] = True
+        return mask
+
+    def get_tx(self, aperture, focus):
+        return Tx(aperture=aperture, excitation=self.excitation,
+                  focus=focus, angle=0.0, speed_of_sound=1)
+
+    def get_op(self, txs, rx_aperture):
+        return TxRx(tx=txs, rx=Rx(aperture=rx_aperture, sample_range=(0, 8)),
+                    pri=1)
+
+    def get_delays(self, ops):
+        sequence = TxRxSequence(ops=ops, tgc_curve=[])
+        seq_with_masks = arrus.kernels.tx_rx_sequence.set_aperture_masks(
+            sequence=sequence, probe_tx=self.probe, probe_rx=self.probe)
+        return arrus.kernels.tx_rx_sequence.get_tx_delays(
+            self.probe, sequence, seq_with_masks)
+
+    def test_multi_tx_and_diverging_wave(self):
+        # Given
+        ops = [
+            # Multi-TX: focused wave (left) + plane wave (right).
+            self.get_op([self.get_tx(self.get_mask(4, 8), np.inf),
+                         self.get_tx(self.get_mask(0, 4), 2)],
+                        rx_aperture=self.get_mask(0, 8)),
+            # Diverging wave.
+            self.get_op([self.get_tx(self.get_mask(4, 8), -2)],
+                        rx_aperture=self.get_mask(0, 8)),
+        ]
+        # Run
+        delays, center_delay = self.get_delays(ops)
+        # Expect
+        # Focused TX: center delay 0.5, equal to the op center delay.
+        d = 2.5-np.sqrt(4.25)
+        np.testing.assert_almost_equal(delays[0][0], [0, d, d, 0])
+        # PWI: moved to the op center delay.
+        np.testing.assert_almost_equal(delays[0][1], [0.5]*4)
+        # Diverging wave: moved to the sequence center delay.
+        d = np.sqrt(4.25)-1.5
+        np.testing.assert_almost_equal(delays[1][0], [1, d, d, 1])
+        self.assertAlmostEqual(center_delay, 0.5)
+
+    def test_raw_delays_and_empty_aperture(self):
+        # Given
+        raw_delays = np.arange(4)
+        ops = [
+            self.get_op([Tx(aperture=self.get_mask(2, 6),
+                            excitation=self.excitation, delays=raw_delays)],
+                        rx_aperture=self.get_mask(0, 8)),
+            self.get_op([self.get_tx(self.get_mask(0, 0), np.inf)],
+                        rx_aperture=self.get_mask(0, 8)),
+        ]
+        # Run
+        delays, center_delay = self.get_delays(ops)
+        # Expect
+        np.testing.assert_equal(delays[0][0], raw_delays)
+        self.assertEqual(len(delays[1][0]), 0)
+        self.assertIsNone(center_delay)
+
+    def test_single_element_raw_delays_and_focus(self):
+        # Given
+        ops = [
+            # Multi-TX: focused wave + single element TX with raw delays.
+            self.get_op([self.get_tx(self.get_mask(0, 4), 2),
+                         Tx(aperture=self.get_mask(6, 7),
+                            excitation=self.excitation,
+                            delays=np.array([0.25]))],
+                        rx_aperture=self.get_mask(0, 8)),
+            self.get_op([self.get_tx(self.get_mask(0, 8), 2)],
+                        rx_aperture=self.get_mask(0, 8)),
+        ]
+        # Run
+        delays, center_delay = self.get_delays(ops)
+        # Expect
+        # Raw delays: moved by the shift of the op center delay (0.5)
+        # to the sequence center delay.
+        expected_center_delay = np.sqrt(16.25)-2
+        np.testing.assert_almost_equal(
+            delays[0][1], [0.25+expected_center_delay-0.5])
+        self.assertAlmostEqual(center_delay, expected_center_delay)
+
+    def test_full_tx_delays_for_focuses(self):
+        # Given
+        ops = [
+            self.get_op([self.get_tx(self.get_mask(4, 8), 2),
+                         self.get_tx(self.get_mask(0, 4), 2)],
+                        rx_aperture=self.get_mask(0, 8)),
+            self.get_op([self.get_tx(self.get_mask(2, 6), 2)],
+                        rx_aperture=self.get_mask(0, 8)),
+        ]
+        sequence = arrus.kernels.tx_rx_sequence._sort_txs_by_aperture(
+            TxRxSequence(ops=ops, tgc_curve=[]), self.probe)
+        seq_with_masks = arrus.kernels.tx_rx_sequence.set_aperture_masks(
+            sequence=sequence, probe_tx=self.probe, probe_rx=self.probe)
+        focuses = [np.inf, 2, -3]
+        arrus.kernels.tx_rx_sequence.clear_tx_delays_cache()
+        # Run
+        delays = arrus.kernels.tx_rx_sequence.get_full_tx_delays_for_focuses(
+            self.probe, sequence, seq_with_masks, focuses)
+        cached_delays = arrus.kernels.tx_rx_sequence.get_full_tx_delays_for_focuses(
+            self.probe, sequence, seq_with_masks, focuses[::-1])
+        # Expect
+        self.assertEqual(delays.shape, (3, 2, 8))
+        self.assertEqual(delays.dtype, np.float32)
+        for focus, focus_delays in zip(focuses, delays):
+            expected_delays, _ = arrus.kernels.tx_rx_sequence.get_tx_delays_for_focuses(
+                self.probe, sequence, seq_with_masks,
+                [[focus]*len(op.tx) for op in sequence.ops])
+            np.testing.assert_almost_equal(
+                focus_delays[0],
+                np.concatenate(expected_delays[0]), decimal=6)
+            np.testing.assert_almost_equal(
+                focus_delays[1][2:6], expected_delays[1][0], decimal=6)
+            np.testing.assert_equal(focus_delays[1][[0, 1, 6, 7]], 0)
+        np.testing.assert_equal(cached_delays, delays[::-1])
+        # The cached delays should not be views of the batch array.
+        for cached in arrus.kernels.tx_rx_sequence._tx_delays_cache.values():
+            self.assertIsNone(cached.base)
+
+    def test_tx_focus_constants(self):
+        # Given
+        ops = [
+            self.get_op([self.get_tx(Aperture(center_element=3.5, size=4), 2)],
+                        rx_aperture=Aperture(center_element=3.5, size=8)),
+        ]
+        sequence = TxRxSequence(ops=ops, tgc_curve=[])
+        constants = [arrus.framework.Constant(value=f, placement="/Us4R:0",
+                                              name="tx_focus")
+                     for f in (1, 2)]
+        device = DeviceMock(probe=ProbeMock(model=self.probe))
+        context = ContextMock(device=device, medium=None, op=sequence,
+                              constants=constants)
+        # Run
+        result = arrus.kernels.tx_rx_sequence.process_tx_rx_sequence(context)
+        # Expect
+        self.assertEqual([c.name for c in result.constants],
+                         ["sequence/txDelays:0", "sequence/txDelays:1"])
+        delays = result.constants[1].value
+        self.assertEqual(delays.shape, (1, 8))
+        np.testing.assert_almost_equal(delays[0, 2:6],
+                                       result.sequence.ops[0].tx.delays,
+                                       decimal=6)
+
+    def test_non_continuous_aperture(self):
+        # Given
+        aperture = self.get_mask(0, 8)
+        aperture[3] = False
+        ops = [self.get_op([self.get_tx(aperture, np.inf)],
+                           rx_aperture=self.get_mask(0, 8))]
+        # Expect
+        with self.assertRaises(ValueError):
+            self.get_delays(ops)
+
+
 if __name__ == "__main__":
     unittest.main()
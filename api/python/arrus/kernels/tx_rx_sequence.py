@@ -2,7 +2,10 @@
 In some time this module probably will not be needed anymore,
 as all of the below functionality will be moved to C++ API.
 """
+import collections
 import dataclasses
+import hashlib
+import threading
 import typing
 
 import numpy as np
@@ -10,14 +13,23 @@ from arrus.ops.us4r import (
     TxRxSequence, Tx, Rx, TxRx, Aperture
 )
 from arrus.kernels.kernel import KernelExecutionContext, ConversionResults
+from arrus.devices.probe import ProbeModel
 from arrus.framework import Constant
 
+# The maximum number of (sequence, focus) TX delay arrays kept in memory.
+TX_DELAYS_CACHE_SIZE = 64
+# The maximum number of (focus, op, tx, element) delays computed at once.
+TX_DELAYS_CHUNK_SIZE = 2**23
+
+_tx_delays_cache = collections.OrderedDict()
+_tx_delays_cache_lock = threading.Lock()
+
 
 def _sort_txs_by_aperture(sequence, probe_tx):
 
     def get_aperture_left(aperture):
         mask, _, = get_new_masked_aperture_if_necessary(aperture, probe_tx)
-        active_elements = np.argwhere(mask.flatten()).squeeze()
+        active_elements = np.flatnonzero(mask)
         if len(active_elements) > 0:
             return np.min(active_elements)
         else:
@@ -94,19 +106,6 @@ def convert_to_us4r_sequence(sequence: TxRxSequence, probe_tx, probe_rx, fs: flo
     return seq, center_delay
 
 
-def _get_full_tx_delays(constant_delays, sequence_with_masks):
-    """
-    :return: array (n ops, n elements)
-    """
-    output_array = []
-    for i, op in enumerate(sequence_with_masks.ops):
-        tx = op.tx
-        core_delays = np.zeros(tx.aperture.shape, dtype=np.float32)
-        core_delays[tx.aperture] = constant_delays[i]
-        output_array.append(core_delays)
-    return np.stack(output_array)
-
-
 def __merge_txs(txs):
     """
     NOTE: assuming TXs are already sorted by the position of the first active element!
@@ -133,8 +132,7 @@ def __merge_txs(txs):
     delays[:] = np.nan
     for tx in txs:
         aperture = np.logical_or(aperture, tx.aperture)
-        for d, i in zip(tx.delays, np.argwhere(tx.aperture).flatten().tolist()):
-            delays[i] = d
+        delays[np.asarray(tx.aperture, dtype=bool).reshape(-1)] = tx.delays
     # Remove unused elements
     delays = delays[np.logical_not(np.isnan(delays))]
     return dataclasses.replace(ref_tx, aperture=aperture, delays=delays)
@@ -188,24 +186,23 @@ def convert_to_us4r_sequence_with_constants(
     sequence = dataclasses.replace(sequence, ops=new_ops)
 
     output_constants = []
-    for i, tx_focus_const in enumerate(tx_focus_constants):
-        focus = tx_focus_const.value
-        focuses = [focus]*len(sequence_with_masks.ops)
-        constant_delays, _ = get_tx_delays_for_focuses(
+    tx_focus_constants = list(tx_focus_constants)
+    if len(tx_focus_constants) > 0:
+        full_tx_delays = get_full_tx_delays_for_focuses(
             probe=probe_tx,
             sequence=original_sequence,
             seq_with_masks=sequence_with_masks,
-            tx_focuses=focuses
+            focuses=[c.value for c in tx_focus_constants]
         )
-        full_tx_delays = _get_full_tx_delays(
-            constant_delays, sequence_with_masks)
-        output_constants.append(
-            Constant(
-                value=full_tx_delays,
-                placement=tx_focus_const.placement,
-                name=f"sequence/txDelays:{i}"
+        for i, (tx_focus_const, delays) in enumerate(
+                zip(tx_focus_constants, full_tx_delays)):
+            output_constants.append(
+                Constant(
+                    value=delays,
+                    placement=tx_focus_const.placement,
+                    name=f"sequence/txDelays:{i}"
+                )
             )
-        )
     return sequence, tx_center_delay, output_constants
 
 
@@ -226,127 +223,155 @@ def get_tx_delays(
     return _get_tx_delays_internal(probe, sequence, seq_with_masks)
 
 
-def get_tx_delays_for_focuses(
-        probe, sequence: TxRxSequence, seq_with_masks: TxRxSequence,
-        tx_focuses
-):
+@dataclasses.dataclass(frozen=True)
+class _TxParameters:
     """
-    Returns tx_center_delay = None when all TXs have empty aperture.
+    TX parameters of all the sequence ops, as (n_ops, n_tx) arrays, where
+    n_tx is the maximum number of TXs of a single op. Ops with less TXs
+    are padded with invalid TXs.
+    """
+    is_valid: np.ndarray  # (n_ops, n_tx)
+    is_raw: np.ndarray  # (n_ops, n_tx), TXs with raw delays
+    masks: np.ndarray  # (n_ops, n_tx, n_elements)
+    center_elements: np.ndarray  # (n_ops, n_tx)
+    angles: np.ndarray  # (n_ops, n_tx)
+    speeds_of_sound: np.ndarray  # (n_ops, n_tx)
+    is_rx_active: np.ndarray  # (n_ops, )
+
+
+def _get_tx_parameters(probe, sequence: TxRxSequence,
+                       seq_with_masks: TxRxSequence):
+    n_ops = len(sequence.ops)
+    n_txs = np.asarray([len(op.tx) for op in sequence.ops], dtype=np.int64)
+    n_tx = max(np.max(n_txs, initial=0), 1)
+    n_elements = probe.n_elements
+    # Indices of the valid TXs.
+    op_idx = np.repeat(np.arange(n_ops), n_txs)
+    tx_idx = np.arange(len(op_idx)) - np.repeat(np.cumsum(n_txs) - n_txs,
+                                                n_txs)
+    txs = [tx for op in sequence.ops for tx in op.tx]
+    txs_with_masks = [tx for op in seq_with_masks.ops for tx in op.tx]
+
+    def to_array(values, dtype, fill_value):
+        result = np.full((n_ops, n_tx), fill_value, dtype=dtype)
+        result[op_idx, tx_idx] = np.asarray(values, dtype=dtype)
+        return result
+
+    is_valid = to_array([True]*len(txs), bool, False)
+    is_raw = to_array([tx.delays is not None for tx in txs], bool, False)
+    angles = to_array([tx.angle for tx in txs], np.float64, np.nan)
+    speeds_of_sound = to_array([tx.speed_of_sound for tx in txs],
+                               np.float64, np.nan)
+    masks = np.zeros((n_ops, n_tx, n_elements), dtype=bool)
+    if len(txs) > 0:
+        masks[op_idx, tx_idx] = np.stack([
+            np.asarray(tx.aperture, dtype=bool).reshape(-1)
+            for tx in txs_with_masks])
+    # Aperture center elements.
+    n_active = np.sum(masks, axis=-1)
+    first = np.argmax(masks, axis=-1)
+    last = n_elements - 1 - np.argmax(masks[..., ::-1], axis=-1)
+    center_elements = np.where(n_active > 0, (first + last) / 2, 0.0)
+    is_computed = np.logical_and(is_valid, np.logical_not(is_raw))
+    if np.any(is_computed & (n_active != last - first + 1) & (n_active > 0)):
+        raise ValueError("Continuous TX aperture is required "
+                         "for focus, angle, speed of sound "
+                         "combination.")
+    # Apertures defined by the center element/center position.
+    for i, j, tx in zip(op_idx, tx_idx, txs):
+        if isinstance(tx.aperture, Aperture) and tx.delays is None:
+            center_elements[i, j] = __get_aperture_center_element(
+                tx.aperture, probe)
+    is_rx_active = np.zeros(n_ops, dtype=bool)
+    if n_ops > 0:
+        rx_apertures = np.stack([np.asarray(op.rx.aperture).reshape(-1)
+                                 for op in seq_with_masks.ops])
+        is_rx_active = np.sum(rx_apertures, axis=-1) > 0
+    return _TxParameters(
+        is_valid=is_valid,
+        is_raw=is_raw,
+        masks=masks,
+        center_elements=center_elements,
+        angles=angles,
+        speeds_of_sound=speeds_of_sound,
+        is_rx_active=is_rx_active
+    )
 
-    For ops with multiple TX: the TX delays will be equalized to the MAXIMUM CENTER DELAY of the whole op.
+
+def _get_tx_focuses_array(tx_focuses, params: _TxParameters):
     """
-    # COMPUTE TX APERTURE CENTERS.
-    tx_aperture_center_element = []
-    for op in sequence.ops:
-        op_centers = []
-        for tx in op.tx:
-            if tx.delays is not None:
-                # custom delays
-                ap_cent_elem = np.nan
-            else:
-                ap_cent_elem = __get_center_element(
-                    tx.aperture, probe_model=probe
-                )
-            op_centers.append(ap_cent_elem)
-        tx_aperture_center_element.append(np.asarray(op_centers))
-
-    # COMPUTE TX DELAYS.
-    tx_center_angles, tx_center_x, tx_center_z = \
-        get_aperture_center(tx_aperture_center_element, probe)
-    tx_delays = []  # (ntx,), each element: list of (n_elem delays). NOTE: n_elem is the number of probe elements
-    center_delays = []  # (ntx, )
-    element_x, element_z = probe.element_pos_x, probe.element_pos_z
-    element_x, element_z = np.atleast_2d(element_x), np.atleast_2d(element_z)  # [1, n_elem]
-    # Compute tx_delays
-    for i, op in enumerate(sequence.ops):
-        op_delays = []
-        op_center_delays = []
-        for j, tx in enumerate(op.tx):
-            if tx.delays is not None:
-                # RAW DELAYS
-                delays = tx.delays
-                center_delay = None
-            else:
-                tx_angle = tx.angle + tx_center_angles[i][j]
-                tx_cent_x = tx_center_x[i][j]
-                tx_cent_z = tx_center_z[i][j]
-                c = tx.speed_of_sound
-                tx_focus = tx_focuses[i][j]
-                if np.isinf(tx_focus):
-                    # PWI
-                    delays = (element_x * np.sin(tx_angle)
-                              + element_z * np.cos(tx_angle)) / c  # [1, n_elem]
-                    center_delay = (tx_cent_x * np.sin(tx_angle)
-                                    + tx_cent_z * np.cos(tx_angle)) / c  # scalar
-                else:
-                    # Virtual source/focus
-                    focus_x = tx_cent_x + tx_focus * np.sin(tx_angle)  # scalar
-                    focus_z = tx_cent_z + tx_focus * np.cos(tx_angle)  # scalar
-                    delays = np.sqrt((focus_x - element_x) ** 2
-                                     + (focus_z - element_z) ** 2) / c  # [1, n_elem]
-                    center_delay = np.sqrt((focus_x - tx_cent_x) ** 2
-                                           + (focus_z - tx_cent_z) ** 2) / c  # scalar
-                    foc_defoc = 1 - 2*float(tx_focus > 0)
-                    delays = delays * foc_defoc
-                    center_delay = center_delay * foc_defoc
-
-            op_delays.append(np.squeeze(delays))
-            op_center_delays.append(center_delay)
-        tx_delays.append(op_delays)
-        # EQUALIZE TO THE MAXIMUM CENTER DELAY OF THE WHOLE OPERATION
-        center_delays.append(op_center_delays)
-
-    normalized_delays = []
-    normalized_center_delays = []
-
-    # Equalize delays to the TX center.
-    for i, op in enumerate(sequence.ops):
-        op_normalized_delays = []
-        op_normalized_center_delays = []
-        for j, tx in enumerate(op.tx):
-            op_center_delay = center_delays[i][j]
-            op_delays = tx_delays[i][j]
-            tx_aperture_mask = seq_with_masks.ops[i].tx[j].aperture
-            if op_center_delay is None:
-                # RAW DELAYS pass-through. We do not equalize them.
-                op_normalized_delays.append(op_delays)
-                op_normalized_center_delays.append(np.nan)  # Do not equalize through the whole sequence
-            else:
-                # Delays calculated based on the focus,angle, sos.
-                # Use only delays for the active elements.
-                op_delays = op_delays[tx_aperture_mask]
-                if len(op_delays) == 0:
-                    # Empty TX aperture.
-                    op_normalized_delays.append(op_delays)
-                    op_normalized_center_delays.append(np.nan)
-                else:
-                    # Move tx delays to bias = 0.
-                    delays_min = np.min(op_delays).item()
-                    op_delays = op_delays - delays_min
-                    op_center_delay = op_center_delay - delays_min
-                    op_normalized_delays.append(op_delays)
-                    op_normalized_center_delays.append(op_center_delay)
-        normalized_delays.append(op_normalized_delays)
-        normalized_center_delays.append(op_normalized_center_delays)
-
-    # NOTE: HERE THE NORMALIZED_CENTER_DELAYS BECOME A LIST OF FLOAT VALUES (N_TX, )
-    # Equalize TX delays for each op to have the same delay in the center of the aperture
-    for i, op in enumerate(sequence.ops):
-        if np.isnan(normalized_center_delays[i]).all():
-            # Nothing to equalize, pass-through delays
-            normalized_center_delays[i] = np.nan
-        else:
-            max_center_delay = np.nanmax(normalized_center_delays[i])
-            for j, tx in enumerate(op.tx):
-                if not np.isnan(normalized_center_delays[i][j]):
-                    d = normalized_delays[i][j]
-                    # Move back to the zero in the center of the aperture
-                    d = d - normalized_center_delays[i][j]
-                    # Move center delay to the maximum value
-                    d = d + max_center_delay
-                    normalized_delays[i][j] = d
-
-            normalized_center_delays[i] = max_center_delay
+    Converts the list of op TX focuses to (n_ops, n_tx) array. A single
+    value for a given op is applied to all TXs of that op.
+    """
+    n_ops, n_tx = params.is_valid.shape
+    n_txs = np.sum(params.is_valid, axis=-1)
+    focuses = np.full((n_ops, n_tx), np.nan)
+    for i, (f, n) in enumerate(zip(tx_focuses, n_txs)):
+        focuses[i, :n] = np.asarray(f, dtype=np.float64)
+    return focuses
+
+
+def _compute_tx_delays(probe, params: _TxParameters, focuses):
+    """
+    Computes TX delays for all the sequence TXs in a single pass.
+
+    The focuses array can have additional leading dimensions (e.g. a batch
+    of focuses (n_focuses, n_ops, n_tx)), the output arrays will have
+    the same leading dimensions.
+
+    :return: a tuple: TX delays (..., n_ops, n_tx, n_elements), valid only
+      for the active elements of TXs without raw delays; sequence TX
+      center delay (...) (None when all TXs have empty aperture); the
+      value that should be added to the raw TX delays of each
+      op (..., n_ops), NaN means no shift
+    """
+    is_computed = np.logical_and(params.is_valid,
+                                 np.logical_not(params.is_raw))
+    tx_center_angles, tx_center_x, tx_center_z = _interp_aperture_center(
+        params.center_elements, probe)
+    element_x = np.asarray(probe.element_pos_x).reshape(-1)
+    element_z = np.asarray(probe.element_pos_z).reshape(-1)
+
+    tx_angle = params.angles + tx_center_angles
+    tx_angle, c, tx_center_x, tx_center_z, focuses = np.broadcast_arrays(
+        tx_angle, params.speeds_of_sound, tx_center_x, tx_center_z, focuses)
+    sin, cos = np.sin(tx_angle), np.cos(tx_angle)
+    is_pwi = np.isinf(focuses)
+    is_focused = np.logical_not(is_pwi)
+    delays = np.empty(is_pwi.shape + (len(element_x), ), dtype=np.float64)
+    center_delays = np.empty(is_pwi.shape, dtype=np.float64)
+    # PWI
+    delays[is_pwi] = (
+        element_x * sin[is_pwi][:, np.newaxis]
+        + element_z * cos[is_pwi][:, np.newaxis]
+    ) / c[is_pwi][:, np.newaxis]
+    center_delays[is_pwi] = (
+        tx_center_x[is_pwi] * sin[is_pwi]
+        + tx_center_z[is_pwi] * cos[is_pwi]) / c[is_pwi]
+    # Virtual source/focus
+    focus = focuses[is_focused]
+    cent_x, cent_z = tx_center_x[is_focused], tx_center_z[is_focused]
+    focus_x = cent_x + focus * sin[is_focused]
+    focus_z = cent_z + focus * cos[is_focused]
+    foc_defoc = 1 - 2*(focus > 0)
+    delays[is_focused] = np.sqrt(
+        (focus_x[:, np.newaxis] - element_x) ** 2
+        + (focus_z[:, np.newaxis] - element_z) ** 2
+    ) / c[is_focused][:, np.newaxis] * foc_defoc[:, np.newaxis]
+    center_delays[is_focused] = np.sqrt(
+        (focus_x - cent_x) ** 2 + (focus_z - cent_z) ** 2
+    ) / c[is_focused] * foc_defoc
+
+    # Move tx delays to bias = 0 (active elements only).
+    is_active = np.logical_and(params.masks, is_computed[..., np.newaxis])
+    is_nonempty = np.any(is_active, axis=-1)
+    delays_min = np.min(delays, axis=-1, where=is_active, initial=np.inf)
+    center_delays = np.where(is_nonempty, center_delays - delays_min, np.nan)
+    # Equalize TX delays for each op to the maximum center delay of that op.
+    is_op_equalized = np.any(is_nonempty, axis=-1)
+    op_center_delays = np.max(center_delays, axis=-1, where=is_nonempty,
+                              initial=-np.inf)
+    op_center_delays = np.where(is_op_equalized, op_center_delays, np.nan)
 
     # Equalize through the whole sequence (NOTE: RX active operations only!)
     # The common delay applied for center of each TX aperture
@@ -354,36 +379,198 @@ def get_tx_delays_for_focuses(
     # The center of transmit will be in the same position for all TX/RXs.
     # Note: in the case when all TXs have empty TX aperture, None should be
     # returned.
-    is_nothing_to_equalize = np.asarray([
-        np.isnan(d) for d in normalized_center_delays
-    ]).all()
-
-    non_empty_rx_ops = [i for i, op in enumerate(seq_with_masks.ops) if np.sum(op.rx.aperture) > 0]
-
-    if is_nothing_to_equalize:
+    op_delays = op_center_delays.copy()  # The final op center delays.
+    raw_delays_shift = np.full(op_delays.shape, np.nan)
+    if not np.any(is_op_equalized):
         tx_center_delay = None
     else:
-        tx_center_delay = np.nanmax(np.asarray(normalized_center_delays)[non_empty_rx_ops])
-    equalized_tx_delays = []
+        tx_center_delay = np.nanmax(
+            op_center_delays[..., params.is_rx_active], axis=-1)
+        is_shifted = np.logical_and(is_op_equalized, params.is_rx_active)
+        op_delays[..., is_shifted] = np.expand_dims(tx_center_delay, -1)
+        raw_delays_shift[..., is_shifted] = \
+            np.expand_dims(tx_center_delay, -1) \
+            - op_center_delays[..., is_shifted]
+    # All the above steps, applied to the delays of each TX at once.
+    offsets = op_delays[..., np.newaxis] - center_delays - delays_min
+    delays += np.where(is_nonempty, offsets, 0.0)[..., np.newaxis]
+    return delays, tx_center_delay, raw_delays_shift
+
+
+def get_tx_delays_for_focuses(
+        probe, sequence: TxRxSequence, seq_with_masks: TxRxSequence,
+        tx_focuses
+):
+    """
+    Returns tx_center_delay = None when all TXs have empty aperture.
 
-    for i, (op, op_with_mask) in enumerate(zip(sequence.ops, seq_with_masks.ops)):
+    For ops with multiple TX: the TX delays will be equalized to the MAXIMUM CENTER DELAY of the whole op.
+    """
+    params = _get_tx_parameters(probe, sequence, seq_with_masks)
+    focuses = _get_tx_focuses_array(tx_focuses, params)
+    delays, tx_center_delay, raw_delays_shift = _compute_tx_delays(
+        probe, params, focuses)
+    # Delays of the active elements, for each TX.
+    is_computed = np.logical_and(params.is_valid,
+                                 np.logical_not(params.is_raw))
+    is_active = np.logical_and(params.masks, is_computed[..., np.newaxis])
+    n_active = np.sum(is_active, axis=-1)[params.is_valid]
+    active_delays = np.split(delays[is_active], np.cumsum(n_active)[:-1])
+    active_delays = iter(active_delays)
+
+    equalized_tx_delays = []
+    for i, op in enumerate(sequence.ops):
         op_equalized_tx_delays = []
-        for j, tx in enumerate(op.tx):
-            d = normalized_delays[i][j]
-            cd = normalized_center_delays[i]
-            if not np.isnan(cd) and len(d) > 0 and np.sum(op_with_mask.rx.aperture) > 0:
-                # Non-empty delays.
-                d = d - normalized_center_delays[i] + tx_center_delay
+        for tx in op.tx:
+            d = next(active_delays)
+            if tx.delays is not None:
+                # RAW DELAYS pass-through, shifted only when the op
+                # has also TXs defined by focus, angle, speed of sound.
+                d = np.atleast_1d(np.squeeze(tx.delays))
+                if not np.isnan(raw_delays_shift[i]) and len(d) > 0:
+                    d = d + raw_delays_shift[i]
             op_equalized_tx_delays.append(d)
         equalized_tx_delays.append(op_equalized_tx_delays)
-
     return equalized_tx_delays, tx_center_delay
 
 
-def get_aperture_center(tx_aperture_center_element, probe):
+def get_full_tx_delays_for_focuses(
+        probe, sequence: TxRxSequence, seq_with_masks: TxRxSequence,
+        focuses
+):
     """
-    Interpolates given TX aperture center elements into the positions
-    in a probe's coordinate system.
+    Returns TX delays of the sequence for each of the given focuses.
+
+    Each focus is applied to all ops of the sequence (it can be a single
+    value or a value for each TX of an op). The delays of all TXs of a
+    single op are merged into a single array of probe element delays,
+    equal to 0 for the inactive elements.
+
+    The delays are cached in memory, under the hash of the probe,
+    sequence TX parameters and the focus value.
+
+    :return: array (n focuses, n ops, n elements), float32
+    """
+    params = _get_tx_parameters(probe, sequence, seq_with_masks)
+    raw_delays = _get_raw_tx_delays(sequence, params)
+    sequence_hash = _get_tx_delays_hash(probe, params, raw_delays)
+    focuses = [np.asarray(f, dtype=np.float64) for f in focuses]
+    keys = [_get_tx_delays_hash(sequence_hash, f) for f in focuses]
+
+    result = [None]*len(keys)
+    with _tx_delays_cache_lock:
+        for i, key in enumerate(keys):
+            delays = _tx_delays_cache.get(key, None)
+            if delays is not None:
+                _tx_delays_cache.move_to_end(key)
+                result[i] = delays
+    missing = [i for i, delays in enumerate(result) if delays is None]
+    # The missing focuses are computed in batches.
+    n_ops, n_tx = params.is_valid.shape
+    batch_size = max(TX_DELAYS_CHUNK_SIZE // max(params.masks.size, 1), 1)
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start:(start+batch_size)]
+        batch_focuses = np.stack([
+            np.broadcast_to(focuses[i], (n_tx, )) for i in batch])
+        batch_focuses = np.where(params.is_valid,
+                                 batch_focuses[:, np.newaxis, :], np.nan)
+        delays = _compute_full_tx_delays(probe, params, batch_focuses,
+                                         raw_delays)
+        with _tx_delays_cache_lock:
+            for i, d in zip(batch, delays):
+                # A copy, so that the cached delays do not keep
+                # the whole batch array alive.
+                d = d.copy()
+                result[i] = d
+                _tx_delays_cache[keys[i]] = d
+            while len(_tx_delays_cache) > TX_DELAYS_CACHE_SIZE:
+                _tx_delays_cache.popitem(last=False)
+    n_elements = probe.n_elements
+    return np.stack(result) if len(result) > 0 \
+        else np.zeros((0, len(sequence.ops), n_elements), dtype=np.float32)
+
+
+def clear_tx_delays_cache():
+    """
+    Removes all TX delays from the memory cache.
+    """
+    with _tx_delays_cache_lock:
+        _tx_delays_cache.clear()
+
+
+def _get_raw_tx_delays(sequence: TxRxSequence, params: _TxParameters):
+    """
+    Returns raw TX delays (n_ops, n_tx, n_elements) for the active elements
+    of TXs with raw delays, None if there are no such TXs.
+    """
+    if not np.any(params.is_raw):
+        return None
+    delays = np.zeros(params.masks.shape, dtype=np.float64)
+    delays[np.logical_and(params.masks, params.is_raw[..., np.newaxis])] = \
+        np.concatenate([np.asarray(tx.delays, dtype=np.float64).reshape(-1)
+                        for op in sequence.ops for tx in op.tx
+                        if tx.delays is not None])
+    return delays
+
+
+def _compute_full_tx_delays(probe, params: _TxParameters, focuses,
+                            raw_delays):
+    """
+    :return: array (n focuses, n ops, n elements), float32
+    """
+    delays, _, raw_delays_shift = _compute_tx_delays(probe, params, focuses)
+    is_computed = np.logical_and(params.is_valid,
+                                 np.logical_not(params.is_raw))
+    is_active = np.logical_and(params.masks, is_computed[..., np.newaxis])
+    full_delays = np.where(is_active, delays, 0.0)
+    if raw_delays is not None:
+        raw_delays_shift = np.nan_to_num(raw_delays_shift)
+        is_raw = np.logical_and(params.masks,
+                                params.is_raw[..., np.newaxis])
+        full_delays = np.where(
+            is_raw,
+            raw_delays + raw_delays_shift[..., np.newaxis, np.newaxis],
+            full_delays)
+    # TX apertures of a single op are disjoint.
+    return np.sum(full_delays, axis=-2).astype(np.float32)
+
+
+def _get_tx_delays_hash(*params):
+    """
+    Returns the hash (hex string) of the given TX delays parameters.
+    """
+    h = hashlib.sha256()
+    for value in params:
+        if isinstance(value, _TxParameters):
+            _get_tx_delays_hash_update(
+                h, *(getattr(value, f.name)
+                     for f in dataclasses.fields(value)))
+        elif isinstance(value, ProbeModel):
+            _get_tx_delays_hash_update(
+                h, value.n_elements, value.pitch, value.curvature_radius,
+                value.element_pos_x, value.element_pos_z)
+        else:
+            _get_tx_delays_hash_update(h, value)
+    return h.hexdigest()
+
+
+def _get_tx_delays_hash_update(h, *values):
+    for value in values:
+        if value is None:
+            h.update(b"None")
+        elif isinstance(value, str):
+            h.update(value.encode())
+        else:
+            value = np.ascontiguousarray(value)
+            h.update(f"{value.dtype.str}:{value.shape}".encode())
+            h.update(value.tobytes())
+
+
+def _interp_aperture_center(center_elements, probe):
+    """
+    Interpolates an array of TX aperture center elements into the positions
+    in a probe's coordinate system. The output arrays have the same shape
+    as the input.
     """
     n_elements = probe.n_elements
     pitch = probe.pitch
@@ -394,51 +581,30 @@ def get_aperture_center(tx_aperture_center_element, probe):
         angle = np.zeros(n_elements)
     else:
         angle = element_position / curvature_radius
+    elements = np.arange(0, n_elements)
+    ap_angle = np.interp(center_elements, elements, angle)
+    ap_center_z = np.interp(center_elements, elements,
+                            np.squeeze(probe.element_pos_z))
+    ap_center_x = np.interp(center_elements, elements,
+                            np.squeeze(probe.element_pos_x))
+    return ap_angle, ap_center_x, ap_center_z
+
 
+def get_aperture_center(tx_aperture_center_element, probe):
+    """
+    Interpolates given TX aperture center elements into the positions
+    in a probe's coordinate system.
+    """
     tx_aperture_center_angle, tx_aperture_center_x, tx_aperture_center_z = [], [], []
     for center_elements in tx_aperture_center_element:
-        ap_angle = np.interp(center_elements,
-                             np.arange(0, n_elements), angle)
-        ap_center_z = np.interp(center_elements,
-                             np.arange(0, n_elements),
-                             np.squeeze(probe.element_pos_z))
-        ap_center_x = np.interp(center_elements,
-                             np.arange(0, n_elements),
-                             np.squeeze(probe.element_pos_x))
+        ap_angle, ap_center_x, ap_center_z = _interp_aperture_center(
+            center_elements, probe)
         tx_aperture_center_angle.append(ap_angle)
         tx_aperture_center_z.append(ap_center_z)
         tx_aperture_center_x.append(ap_center_x)
     return tx_aperture_center_angle, tx_aperture_center_x, tx_aperture_center_z
 
 
-def __get_center_element(aperture, probe_model):
-    tx_ap_cent_elem = 0
-    if isinstance(aperture, Aperture):
-        return __get_aperture_center_element(aperture, probe_model)
-    else:
-        # aperture should be a numpy.ndarray
-        if np.sum(aperture) == 0:
-            # For empty TX aperture, we will eventually
-            # get an empty array of delays (see the code
-            # below, i.e. the part responsible for taking
-            # delays for the aperture elements). So the
-            # value below should not matter.
-            tx_ap_cent_elem = 0
-        elif np.sum(aperture) == 1:
-            tx_ap_cent_elem = np.argwhere(aperture)
-        else:
-            ap_elems = np.argwhere(aperture).squeeze()
-            loc_diff = set(np.diff(ap_elems))
-            if loc_diff != {1}:
-                raise ValueError("Continuous TX aperture is required "
-                                 "for focus, angle, speed of sound "
-                                 "combination.")
-            tx_ap_start = np.min(ap_elems)
-            tx_ap_end = np.max(ap_elems)
-            tx_ap_cent_elem = (tx_ap_start + tx_ap_end) / 2
-    return tx_ap_cent_elem
-
-
 def get_apertures_center_elements(apertures: typing.Iterable[Aperture],
                                   probe_model):
     return np.asarray([
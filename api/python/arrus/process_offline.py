@@ -20,8 +20,7 @@ pipeline = Pipeline(
         BandpassFilter(),
         QuadratureDemodulation(),
         Decimation(decimation_factor=4, cic_order=2),
-        ReconstructLri(x_grid=x_grid, z_grid=z_grid),
-        Mean(axis=1), 
+        ReconstructLri(x_grid=x_grid, z_grid=z_grid, compound=True),
         EnvelopeDetection(),
         Mean(axis=0),
         Transpose(),
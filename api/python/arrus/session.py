@@ -22,6 +22,7 @@ import arrus.ops.imaging
 import arrus.ops.tgc
 import arrus.kernels.tgc
 import arrus.kernels.kernel
+import arrus.kernels.cache
 import arrus.utils
 import arrus.utils.core
 import arrus.framework
@@ -69,17 +70,22 @@ class Session(AbstractSession):
     """
 
     def __init__(self, cfg_path: str = "us4r.prototxt",
-                 medium: arrus.medium.Medium = None):
+                 medium: arrus.medium.Medium = None,
+                 upload_cache_dir: str = None):
         """
         Session constructor.
 
         :param cfg_path: a path to configuration file
         :param medium: medium description to set in context
+        :param upload_cache_dir: a path to the directory, where the converted
+          sequences should be stored (see arrus.kernels.cache); None means
+          that the converted sequences will be cached in memory only
         """
         super().__init__()
         import arrus.logging
         self._session_handle = arrus.core.createSessionSharedHandle(cfg_path)
         self._context = SessionContext(medium=medium)
+        self._upload_cache_dir = upload_cache_dir
         self._py_devices = self._create_py_devices()
         self._current_processing = None
         # Current metadata (for the full sequence)
@@ -112,6 +118,7 @@ class Session(AbstractSession):
             )
 
         raw_seqs = []
+        core_seqs = []
         tx_delay_constants = ()
         # TODO make sure all sequences have the same TGC (different TGCs are not supported)
         # Convert to raw sequences and upload.
@@ -126,9 +133,17 @@ class Session(AbstractSession):
                 scheme.digital_down_conversion,
                 constants
             )
-            conversion_results = arrus.kernels.get_kernel(type(sequence))(kernel_context)
+            # The conversion results are cached under the hash of the
+            # kernel context, so the same sequence is converted only once.
+            key = arrus.kernels.cache.get_context_hash(kernel_context)
+            kernel = arrus.kernels.get_kernel(type(sequence))
+            conversion_results = arrus.kernels.cache.get_conversion_results(
+                key, lambda: kernel(kernel_context),
+                cache_dir=self._upload_cache_dir)
             raw_seq = conversion_results.sequence
             raw_seqs.append(raw_seq)
+            core_seqs.append(arrus.kernels.cache.get_core_sequence(
+                key, lambda: arrus.utils.core.convert_to_core_sequence(raw_seq)))
             tx_delay_constants = conversion_results.constants
 
         actual_scheme = dataclasses.replace(
@@ -136,7 +151,8 @@ class Session(AbstractSession):
             tx_rx_sequence=raw_seqs,
             constants=tx_delay_constants
         )
-        core_scheme = arrus.utils.core.convert_to_core_scheme(actual_scheme)
+        core_scheme = arrus.utils.core.convert_to_core_scheme(
+            actual_scheme, core_sequences=core_seqs)
         upload_result = self._session_handle.upload(core_scheme)
         # Update the DTO with the new data sampling frequency (determined by the scheme).
         us_device_dto = dataclasses.replace(
@@ -288,6 +304,14 @@ class Session(AbstractSession):
         if self._current_processing is not None:
             return self._current_processing.get_parameters()
 
+    def get_processing_stats(self):
+        """
+        Returns the execution statistics of the current processing.
+        The processing should be created with profiling=True.
+        """
+        if self._current_processing is not None:
+            return self._current_processing.get_stats()
+
     def get_session_context(self):
         return self._context
 
@@ -0,0 +1,432 @@
+"""
+NumPy implementation of the beamforming kernels (CPU).
+
+The functions in this module compute the same values as the CUDA kernels
+from rx_beamforming.cu, iq_raw_2_lri.cu and das_lut.cu (up to the
+float32 precision). The computations are vectorized over the RX elements
+and chunks of the output grid points; the transmits (frames) can be
+processed in parallel by the given thread pool (numpy releases the GIL
+in the array operations).
+"""
+import numpy as np
+
+
+# The (approximate) maximum number of the RX element-grid point pairs,
+# processed in a single step. Determines the size of temporary arrays.
+DEFAULT_CHUNK_SIZE = 2**17
+
+
+def _get_chunks(n, chunk_size):
+    chunk_size = max(1, chunk_size)
+    return [slice(i, min(i+chunk_size, n)) for i in range(0, n, chunk_size)]
+
+
+def _run_parallel(executor, func, n):
+    if executor is None:
+        for i in range(n):
+            func(i)
+    else:
+        # Note: list() propagates the exceptions raised in the workers.
+        list(executor.map(func, range(n)))
+
+
+def _interpolate(data, sample, weight, is_valid):
+    """
+    Linearly interpolates data[..., rx, sample] for each (rx, grid point).
+
+    :param data: array (n_seq, n_rx, n_samples)
+    :param sample: integer sample numbers, (n_rx, n_points)
+    :param weight: interpolation weights (n_rx, n_points)
+    :param is_valid: (n_rx, n_points) mask, the invalid points will be
+      interpolated from the first sample (the caller should discard them)
+    :return: array (n_seq, n_rx, n_points)
+    """
+    n_samples = data.shape[-1]
+    sample = np.where(is_valid, sample, 0)[np.newaxis, ...]
+    next_sample = np.minimum(sample+1, n_samples-1)
+    a = np.take_along_axis(data, sample, axis=-1)
+    b = np.take_along_axis(data, next_sample, axis=-1)
+    return a*(1-weight) + b*weight
+
+
+def _get_mod_factor(omega, time):
+    return np.exp(1j*(omega*time)).astype(np.complex64)
+
+
+def rx_beamform(output, data, tx_angles, init_delay, start_time,
+                c, fs, fc, max_tang, x_elem, z_elem, angle_elem,
+                executor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Classical RX beamforming (scanline by scanline), see rx_beamforming.cu.
+
+    :param output: output array (n_seq, n_tx, n_samples), complex64
+    :param data: input array (n_seq, n_tx, n_rx, n_samples), complex64
+    :param x_elem, z_elem, angle_elem: position and orientation of the
+      RX aperture elements, relative to the aperture center
+    :param executor: thread pool, on which the transmits should be
+      processed; None means that the processing will be done in
+      the current thread
+    """
+    n_seq, n_tx, n_rx, n_samples = data.shape
+    x_elem = np.asarray(x_elem, dtype=np.float32).reshape(-1, 1)
+    z_elem = np.asarray(z_elem, dtype=np.float32).reshape(-1, 1)
+    angle_elem = np.asarray(angle_elem, dtype=np.float32).reshape(-1, 1)
+    tx_angles = np.asarray(tx_angles, dtype=np.float32)
+    c, fs = np.float32(c), np.float32(fs)
+    omega = np.float32(2*np.pi*fc)
+    chunks = _get_chunks(n_samples, chunk_size//max(n_rx, 1))
+
+    def beamform_tx(tx):
+        tx_data = data[:, tx]
+        for chunk in chunks:
+            sample = np.arange(chunk.start, chunk.stop, dtype=np.float32)
+            r = (sample/fs + np.float32(start_time))*c/2
+            point_x = r*np.sin(tx_angles[tx])
+            point_z = r*np.cos(tx_angles[tx])
+            dx = point_x - x_elem
+            dz = point_z - z_elem
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rx_tang = np.tan(np.arctan2(dx, dz) - angle_elem)
+                time = (r + np.hypot(dx, dz))/c + np.float32(init_delay)
+                s = time*fs
+                # Truncation towards zero, the same as the (int) cast.
+                s_int = np.trunc(s)
+                is_valid = ((np.abs(rx_tang) <= max_tang)
+                            & (s_int >= 0) & (s_int <= n_samples-1))
+                s_int = np.where(is_valid, s_int, 0).astype(np.int64)
+            ratio = np.where(s_int == n_samples-1, 0, s-s_int).astype(np.float32)
+            value = _interpolate(tx_data, s_int, ratio, is_valid)
+            mod_factor = _get_mod_factor(omega, time)*is_valid
+            result = np.sum(value*mod_factor, axis=1)
+            n_valid = np.sum(is_valid, axis=0)
+            output[:, tx, chunk] = np.where(
+                n_valid > 0, result/np.maximum(n_valid, 1), 0)
+
+    if n_samples == 0:
+        return output
+    _run_parallel(executor, beamform_tx, n_tx)
+    return output
+
+
+def get_lri_tx_geometry(xp, zp, x_elem, z_elem, tx_foc, tx_ang_zx,
+                        tx_ap_cent_z, tx_ap_cent_x,
+                        tx_ap_first_elem, tx_ap_last_elem):
+    """
+    Returns the TX distance and the (binary) TX apodization for the given
+    grid points and a single transmit, see iq_raw_2_lri.cu.
+
+    :param xp, zp: grid points coordinates
+    :param x_elem, z_elem: position of each probe element
+    :return: a pair: TX distance (float32), TX apodization (bool)
+    """
+    foc = tx_foc
+    sin_ang, cos_ang = np.sin(tx_ang_zx), np.cos(tx_ang_zx)
+    cent_x, cent_z = tx_ap_cent_x, tx_ap_cent_z
+    first, last = tx_ap_first_elem, tx_ap_last_elem
+    if not np.isinf(foc):
+        # STA
+        z_foc = cent_z + foc*cos_ang
+        x_foc = cent_x + foc*sin_ang
+        if foc <= 0:
+            # Virtual point source behind the probe surface.
+            arrang = np.float32(1)
+        else:
+            # Virtual point source in front of the probe surface.
+            arrang = np.where(((zp-z_foc)*(z_foc-cent_z)
+                               + (xp-x_foc)*(x_foc-cent_x)) >= 0,
+                              np.float32(1), np.float32(-1))
+        tx_dist = np.hypot(zp-z_foc, xp-x_foc)*arrang + foc
+        tx_apod = (((-(x_elem[first]-x_foc)*(zp-z_foc)
+                     + (z_elem[first]-z_foc)*(xp-x_foc))*arrang >= 0)
+                   & (((x_elem[last]-x_foc)*(zp-z_foc)
+                       - (z_elem[last]-z_foc)*(xp-x_foc))*arrang >= 0))
+    else:
+        # PWI
+        tx_dist = (zp-cent_z)*cos_ang + (xp-cent_x)*sin_ang
+        tx_apod = (((-(zp-z_elem[first])*sin_ang
+                     + (xp-x_elem[first])*cos_ang) >= 0)
+                   & (((zp-z_elem[last])*sin_ang
+                       - (xp-x_elem[last])*cos_ang) >= 0))
+    return tx_dist.astype(np.float32), tx_apod
+
+
+def get_lri_rx_geometry(xp, zp, x_elem, z_elem, tang_elem,
+                        min_tang, max_tang):
+    """
+    Returns the RX distance and the RX apodization for the given grid
+    points and RX elements, see iq_raw_2_lri.cu.
+
+    :param xp, zp: grid points coordinates, (n_points, )
+    :param x_elem, z_elem, tang_elem: position and the tangent of
+      orientation angle of the RX elements, (n_elements, 1)
+    :return: a pair: RX distance, RX apodization, (n_elements, n_points)
+      float32 arrays; the apodization is equal to 0 outside the
+      [min_tang, max_tang] RX angle limits
+    """
+    n_sigma = 3  # number of sigmas in half of the apodization Gaussian curve
+    two_sig_sqr_inv = np.float32(n_sigma*n_sigma*0.5)
+    rng_rx_tang_inv = np.float32(2/(max_tang-min_tang))
+    cent_rx_tang = np.float32((max_tang+min_tang)*0.5)
+    dx = xp - x_elem
+    dz = zp - z_elem
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rx_dist = np.hypot(dx, dz)
+        rx_tang = dx/dz
+        rx_tang = (rx_tang-tang_elem)/(1+rx_tang*tang_elem)
+        rx_apod = (rx_tang-cent_rx_tang)*rng_rx_tang_inv
+        rx_apod = np.exp(-rx_apod*rx_apod*two_sig_sqr_inv)
+        is_valid = (rx_tang >= min_tang) & (rx_tang <= max_tang)
+    rx_apod = np.where(is_valid, rx_apod, 0)
+    return rx_dist.astype(np.float32), rx_apod.astype(np.float32)
+
+
+def _reconstruct(output, n_seq, n_tx, n_points, chunks, reconstruct_tx,
+                 tx_weights, executor):
+    """
+    Runs the low-resolution image reconstruction.
+
+    :param reconstruct_tx: function (tx, chunk) -> (n_seq, chunk size)
+      array, reconstructs the given transmit and chunk of grid points
+    :param tx_weights: None (output: low-resolution images, (n_seq, n_tx,
+      n_points)) or TX weights (output: the weighted sum of low-resolution
+      images, (n_seq, n_points))
+    """
+    if tx_weights is None:
+        output_points = output.reshape(n_seq, n_tx, n_points)
+
+        def process_tx(tx):
+            for chunk in chunks:
+                output_points[:, tx, chunk] = reconstruct_tx(tx, chunk)
+
+        _run_parallel(executor, process_tx, n_tx)
+    else:
+        output_points = output.reshape(n_seq, n_points)
+        tx_weights = np.asarray(tx_weights, dtype=np.float32)
+
+        def process_chunk(i):
+            chunk = chunks[i]
+            value = np.zeros((n_seq, chunk.stop-chunk.start), dtype=np.complex64)
+            for tx in range(n_tx):
+                if tx_weights[tx] != 0:
+                    value += tx_weights[tx]*reconstruct_tx(tx, chunk)
+            output_points[:, chunk] = value
+
+        _run_parallel(executor, process_chunk, len(chunks))
+    return output
+
+
+def _get_rx_elements(rx_ap_origin, n_rx, n_elements):
+    elements = rx_ap_origin + np.arange(n_rx)
+    is_valid = ((elements >= 0) & (elements < n_elements))[:, np.newaxis]
+    return np.clip(elements, 0, n_elements-1), is_valid
+
+
+def _sum_rx(data, time, rx_apod, is_valid, fs, omega):
+    """
+    Returns the weighted (rx_apod) mean of the RX signals, delayed by
+    the given time, (n_seq, n_points).
+    """
+    n_samples = data.shape[-1]
+    i_samp = time*fs
+    is_valid = (is_valid & (rx_apod != 0)
+                & (i_samp >= 0) & (i_samp < n_samples-1))
+    i_int = np.where(is_valid, np.floor(i_samp), 0).astype(np.int64)
+    weight = (i_samp-i_int).astype(np.float32)
+    rx_apod = np.where(is_valid, rx_apod, 0).astype(np.float32)
+    samp = _interpolate(data, i_int, weight, is_valid)
+    pix = np.sum(samp*(_get_mod_factor(omega, time)*rx_apod), axis=1)
+    pix_wgh = np.sum(rx_apod, axis=0)
+    return np.where(pix_wgh != 0, pix/np.where(pix_wgh != 0, pix_wgh, 1), 0)
+
+
+def reconstruct_lri(output, data, x_pix, z_pix, x_elem, z_elem, tang_elem,
+                    tx_foc, tx_ang_zx, tx_ap_cent_z, tx_ap_cent_x,
+                    tx_ap_first_elem, tx_ap_last_elem, rx_ap_origin,
+                    sos, fs, fn, min_tang, max_tang, init_delay,
+                    tx_weights=None,
+                    executor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Low-resolution image reconstruction (synthetic aperture imaging),
+    see iq_raw_2_lri.cu.
+
+    :param output: output array (n_seq, n_tx, n_x, n_z), complex64;
+      (n_seq, n_x, n_z) when tx_weights are provided
+    :param data: input array (n_seq, n_tx, n_rx, n_samples), complex64
+    :param x_elem, z_elem, tang_elem: position and the tangent of
+      orientation angle of each probe element
+    :param tx_weights: TX weights, optional; if provided, the weighted sum
+      of the low-resolution images is computed (see iqRaw2Hri)
+    :param executor: thread pool, on which the transmits (chunks of grid
+      points, when tx_weights are provided) should be processed; None means
+      that the processing will be done in the current thread
+    """
+    n_seq, n_tx, n_rx, n_samples = data.shape
+    x_pix = np.asarray(x_pix, dtype=np.float32)
+    z_pix = np.asarray(z_pix, dtype=np.float32)
+    n_x, n_z = len(x_pix), len(z_pix)
+    # Grid points in the output order ([x, z]).
+    x_points = np.repeat(x_pix, n_z)
+    z_points = np.tile(z_pix, n_x)
+    x_elem = np.asarray(x_elem, dtype=np.float32).reshape(-1)
+    z_elem = np.asarray(z_elem, dtype=np.float32).reshape(-1)
+    tang_elem = np.asarray(tang_elem, dtype=np.float32).reshape(-1)
+    n_elements = len(x_elem)
+    sos, fs = np.float32(sos), np.float32(fs)
+    omega = np.float32(2*np.pi*fn)
+    chunks = _get_chunks(n_x*n_z, chunk_size//max(n_rx, 1))
+
+    def reconstruct_tx(tx, chunk):
+        elements, is_elem_valid = _get_rx_elements(
+            rx_ap_origin[tx], n_rx, n_elements)
+        xp, zp = x_points[chunk], z_points[chunk]
+        tx_dist, tx_apod = get_lri_tx_geometry(
+            xp, zp, x_elem=x_elem, z_elem=z_elem, tx_foc=tx_foc[tx],
+            tx_ang_zx=tx_ang_zx[tx], tx_ap_cent_z=tx_ap_cent_z[tx],
+            tx_ap_cent_x=tx_ap_cent_x[tx],
+            tx_ap_first_elem=tx_ap_first_elem[tx],
+            tx_ap_last_elem=tx_ap_last_elem[tx])
+        rx_dist, rx_apod = get_lri_rx_geometry(
+            xp, zp, x_elem=x_elem[elements][:, np.newaxis],
+            z_elem=z_elem[elements][:, np.newaxis],
+            tang_elem=tang_elem[elements][:, np.newaxis],
+            min_tang=min_tang, max_tang=max_tang)
+        with np.errstate(invalid="ignore"):
+            time = (tx_dist + rx_dist)/sos + np.float32(init_delay)
+            return _sum_rx(data[:, tx], time, rx_apod,
+                           is_elem_valid & tx_apod, fs, omega)
+
+    if n_samples < 2:
+        output[:] = 0
+        return output
+    return _reconstruct(output, n_seq, n_tx, n_x*n_z, chunks, reconstruct_tx,
+                        tx_weights, executor)
+
+
+def reconstruct_lri_lut(output, data, tx_delays, tx_apodization,
+                        rx_delays, rx_apodization, rx_ap_origin,
+                        fs, fn, init_delay, tx_weights=None,
+                        executor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Low-resolution image reconstruction using look-up tables
+    (see arrus.utils.lut), see iqRaw2LriLut in iq_raw_2_lri.cu.
+
+    :param output: output array (n_seq, n_tx, n_x, n_z), complex64;
+      (n_seq, n_x, n_z) when tx_weights are provided
+    :param data: input array (n_seq, n_tx, n_rx, n_samples), complex64
+    :param tx_delays, tx_apodization: arrays (n_tx, n_x, n_z)
+    :param rx_delays, rx_apodization: arrays (n_elements, n_x, n_z)
+    :param rx_ap_origin: the probe element of the first RX channel,
+      for each transmit
+    :param tx_weights: TX weights, optional; if provided, the weighted sum
+      of the low-resolution images is computed (see iqRaw2HriLut)
+    :param executor: thread pool, on which the transmits (chunks of grid
+      points, when tx_weights are provided) should be processed; None means
+      that the processing will be done in the current thread
+    """
+    n_seq, n_tx, n_rx, n_samples = data.shape
+    n_elements = rx_delays.shape[0]
+    n_points = int(np.prod(tx_delays.shape[1:]))
+    tx_delays = tx_delays.reshape(n_tx, n_points)
+    tx_apodization = tx_apodization.reshape(n_tx, n_points)
+    rx_delays = rx_delays.reshape(n_elements, n_points)
+    rx_apodization = rx_apodization.reshape(n_elements, n_points)
+    fs = np.float32(fs)
+    omega = np.float32(2*np.pi*fn)
+    chunks = _get_chunks(n_points, chunk_size//max(n_rx, 1))
+
+    def reconstruct_tx(tx, chunk):
+        elements, is_elem_valid = _get_rx_elements(
+            rx_ap_origin[tx], n_rx, n_elements)
+        tx_apod = tx_apodization[tx, chunk] != 0
+        time = (np.float32(init_delay) + tx_delays[tx, chunk]
+                + rx_delays[elements, chunk])
+        return _sum_rx(data[:, tx], time, rx_apodization[elements, chunk],
+                       is_elem_valid & tx_apod, fs, omega)
+
+    if n_samples < 2:
+        output[:] = 0
+        return output
+    return _reconstruct(output, n_seq, n_tx, n_points, chunks, reconstruct_tx,
+                        tx_weights, executor)
+
+
+def delay_and_sum_lut(output, data, tx_delays, rx_delays,
+                      tx_apodization, rx_apodization,
+                      init_delay, fs, fc, output_type="hri",
+                      executor=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Delay and sum using look-up tables, see das_lut.cu.
+
+    :param output: output array, (n_seq, n_y, n_x, n_z) for the "hri"
+      output type, (n_seq, n_tx, n_y, n_x, n_z) for "lri", complex64
+    :param data: input array (n_seq, n_tx, n_rx, n_samples), complex64
+    :param tx_delays, tx_apodization: arrays (n_tx, n_y, n_x, n_z)
+    :param rx_delays, rx_apodization: arrays (n_rx, n_y, n_x, n_z)
+    :param executor: thread pool, on which the transmits (lri) or
+      chunks of grid points (hri) should be processed; None means that the
+      processing will be done in the current thread
+    """
+    n_seq, n_tx, n_rx, n_samples = data.shape
+    n_points = int(np.prod(tx_delays.shape[1:]))
+    tx_delays = tx_delays.reshape(n_tx, n_points)
+    tx_apodization = tx_apodization.reshape(n_tx, n_points)
+    rx_delays = rx_delays.reshape(n_rx, n_points)
+    rx_apodization = rx_apodization.reshape(n_rx, n_points)
+    fs = np.float32(fs)
+    omega = np.float32(2*np.pi*fc)
+    chunks = _get_chunks(n_points, chunk_size//max(n_rx, 1))
+
+    def sum_tx(tx, chunk):
+        """
+        Returns the sum of the delayed RX signals for the given transmit
+        and the sum of the weights.
+        """
+        tx_weight = tx_apodization[tx, chunk] == 1
+        rx_weight = rx_apodization[:, chunk]*tx_weight
+        delay = np.float32(init_delay) + tx_delays[tx, chunk] + rx_delays[:, chunk]
+        sample = delay*fs
+        with np.errstate(invalid="ignore"):
+            # Truncation towards zero, the same as modff.
+            sample_int = np.trunc(sample)
+            # Note: the samples after the last but one are extrapolated
+            # with zeros.
+            is_valid = ((rx_weight != 0) & (sample_int >= 0)
+                        & (sample_int < n_samples-1))
+        sample_int = np.where(is_valid, sample_int, 0).astype(np.int64)
+        weight = (sample-sample_int).astype(np.float32)
+        value = _interpolate(data[:, tx], sample_int, weight, is_valid)
+        mod_factor = _get_mod_factor(omega, delay)*np.where(is_valid, rx_weight, 0)
+        return np.sum(value*mod_factor, axis=1), np.sum(rx_weight, axis=0)
+
+    if output_type == "lri":
+        output_points = output.reshape(n_seq, n_tx, n_points)
+
+        def process_tx(tx):
+            for chunk in chunks:
+                output_points[:, tx, chunk], _ = sum_tx(tx, chunk)
+
+        process, n_tasks = process_tx, n_tx
+    elif output_type == "hri":
+        output_points = output.reshape(n_seq, n_points)
+
+        def process_chunk(i):
+            chunk = chunks[i]
+            pixel_value = np.zeros((n_seq, chunk.stop-chunk.start),
+                                   dtype=np.complex64)
+            pixel_weight = np.zeros(chunk.stop-chunk.start, dtype=np.float32)
+            for tx in range(n_tx):
+                value, weight = sum_tx(tx, chunk)
+                pixel_value += value
+                pixel_weight += weight
+            output_points[:, chunk] = np.where(
+                pixel_weight != 0,
+                pixel_value/np.where(pixel_weight != 0, pixel_weight, 1), 0)
+
+        process, n_tasks = process_chunk, len(chunks)
+    else:
+        raise ValueError(f"Unsupported output type: {output_type}")
+    if n_samples < 2:
+        output[:] = 0
+        return output
+    _run_parallel(executor, process, n_tasks)
+    return output
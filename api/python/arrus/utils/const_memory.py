@@ -0,0 +1,241 @@
+"""
+Allocation of the small look-up tables (e.g. probe element positions)
+in the GPU constant memory.
+
+A single __constant__ array of a kernel module is shared by all operators
+that use the module. The allocator keeps a host copy of the array and
+manages its regions: identical tables are stored only once (reference
+counting), freed regions are reused, and only the modified regions are
+copied to the device. When there is no free region of the required size,
+the table is stored in the fallback (global device or host) memory.
+"""
+import abc
+import dataclasses
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+import arrus
+import arrus.logging
+
+
+class ConstMemoryBackend(abc.ABC):
+    """
+    The memory, in which the allocator places the tables.
+
+    :param size: the number of array elements
+    :param dtype: data type of the array elements
+    """
+
+    def __init__(self, size, dtype):
+        self.size = size
+        self.dtype = np.dtype(dtype)
+
+    @abc.abstractmethod
+    def write(self, offset, values):
+        """
+        Copies the given values to the memory, starting from
+        the given offset [elements].
+        """
+        raise ValueError("Calling abstract method")
+
+
+class HostConstMemoryBackend(ConstMemoryBackend):
+    """
+    Host (numpy) array backend.
+    """
+
+    def __init__(self, size, dtype):
+        super().__init__(size, dtype)
+        self.array = np.zeros(size, dtype=dtype)
+
+    def write(self, offset, values):
+        self.array[offset:offset+len(values)] = values
+
+
+class GpuConstMemoryBackend(ConstMemoryBackend):
+    """
+    The __constant__ array of the given cupy.RawModule.
+
+    :param kernel_module: cupy.RawModule
+    :param variable_name: name of the __constant__ array
+    """
+
+    def __init__(self, kernel_module, variable_name, size, dtype):
+        super().__init__(size, dtype)
+        import cupy as cp
+        device_props = cp.cuda.runtime.getDeviceProperties(0)
+        if device_props["totalConstMem"] < size*self.dtype.itemsize:
+            raise ValueError(f"There is not enough constant memory "
+                             f"available for {variable_name}!")
+        self.variable_name = variable_name
+        self.array = cp.ndarray(shape=(size, ), dtype=dtype,
+                                memptr=kernel_module.get_global(variable_name))
+
+    def write(self, offset, values):
+        self.array[offset:offset+len(values)].set(values)
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class ConstMemoryBlock:
+    """
+    A table allocated by the ConstMemoryAllocator.
+
+    :param offset: offset of the table in the constant memory [elements];
+      None if the table is stored in the fallback memory
+    :param size: the number of table elements
+    :param array: the table stored in the fallback memory; None if the table
+      is stored in the constant memory
+    """
+    offset: Optional[int]
+    size: int
+    array: object = None
+
+    @property
+    def is_const(self):
+        return self.offset is not None
+
+
+class ConstMemoryAllocator:
+    """
+    Allocator of 1D tables in a fixed-size (constant) memory.
+
+    :param backend: the memory, in which the tables are placed
+    :param fallback: function that copies the given (numpy) array to
+      the memory used when there is no space left in the backend;
+      None means that the tables will be kept in host memory
+    """
+
+    def __init__(self, backend: ConstMemoryBackend,
+                 fallback: Callable[[np.ndarray], object] = None):
+        self.backend = backend
+        self.fallback = fallback
+        self.reference_array = np.zeros(backend.size, dtype=backend.dtype)
+        # Sorted, coalesced list of free regions: [start, end).
+        self._free = [(0, backend.size)]
+        # Table content -> [offset, the number of references].
+        self._blocks = {}
+        # Regions of the reference array not copied to the backend yet.
+        self._dirty = []
+        self._lock = threading.Lock()
+
+    def allocate(self, values) -> ConstMemoryBlock:
+        """
+        Stores the given 1D array in the memory.
+
+        An identical table that is already stored is shared. When there is
+        no free region of the required size, the table is copied to
+        the fallback memory.
+
+        :param values: 1D array to store
+        :return: allocated block, should be released with the free method
+        """
+        values = np.ascontiguousarray(values, dtype=self.backend.dtype)
+        if values.ndim != 1:
+            raise ValueError("Only 1D arrays are supported.")
+        key = values.tobytes()
+        with self._lock:
+            if key in self._blocks:
+                block = self._blocks[key]
+                block[1] += 1
+                return ConstMemoryBlock(offset=block[0], size=len(values))
+            offset = self._reserve(len(values))
+            if offset is not None:
+                self.reference_array[offset:offset+len(values)] = values
+                self._dirty.append((offset, offset+len(values)))
+                self._blocks[key] = [offset, 1]
+                self._flush()
+                return ConstMemoryBlock(offset=offset, size=len(values))
+        arrus.logging.log(
+            arrus.logging.WARNING,
+            f"Exceeded maximum const memory ({self.backend.size} elements, "
+            f"free: {self.n_free}), the table of {len(values)} elements will "
+            f"be stored in the fallback memory.")
+        array = values.copy() if self.fallback is None else self.fallback(values)
+        return ConstMemoryBlock(offset=None, size=len(values), array=array)
+
+    def free(self, block: ConstMemoryBlock):
+        """
+        Releases the given block. The memory region is reused when
+        there are no more references to the table.
+        """
+        if not block.is_const:
+            return
+        with self._lock:
+            start, end = block.offset, block.offset + block.size
+            key = self.reference_array[start:end].tobytes()
+            ref = self._blocks.get(key, None)
+            if ref is None or ref[0] != start:
+                raise ValueError(f"Block not allocated: {block}")
+            ref[1] -= 1
+            if ref[1] == 0:
+                del self._blocks[key]
+                self._release(start, end)
+
+    @property
+    def n_free(self):
+        """
+        The number of free elements.
+        """
+        return sum(end-start for start, end in self._free)
+
+    def _reserve(self, size):
+        # First fit.
+        for i, (start, end) in enumerate(self._free):
+            if end - start >= size:
+                if end - start == size:
+                    del self._free[i]
+                else:
+                    self._free[i] = (start + size, end)
+                return start
+        return None
+
+    def _release(self, start, end):
+        free = sorted(self._free + [(start, end)])
+        # Coalesce the adjacent regions.
+        self._free = [free[0]]
+        for s, e in free[1:]:
+            last_s, last_e = self._free[-1]
+            if s == last_e:
+                self._free[-1] = (last_s, e)
+            else:
+                self._free.append((s, e))
+
+    def _flush(self):
+        # Copies only the modified regions to the backend.
+        for start, end in self._dirty:
+            self.backend.write(start, self.reference_array[start:end])
+        self._dirty = []
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def get_gpu_allocator(kernel_module, variable_name, size, dtype):
+    """
+    Returns the allocator for the given __constant__ array of the kernel
+    module; the allocator is created on the first call, and then shared
+    by all the callers. The tables that do not fit into the constant
+    memory are stored in the global device memory.
+    """
+    key = (id(kernel_module), variable_name)
+    with _allocators_lock:
+        allocator = _allocators.get(key, None)
+        if allocator is None:
+            import cupy as cp
+            backend = GpuConstMemoryBackend(kernel_module, variable_name,
+                                            size, dtype)
+            allocator = ConstMemoryAllocator(backend, fallback=cp.asarray)
+            _allocators[key] = allocator
+        return allocator
+
+
+def reset_gpu_allocators():
+    """
+    Removes all the allocators (all the tables should be released
+    before calling this function).
+    """
+    with _allocators_lock:
+        _allocators.clear()
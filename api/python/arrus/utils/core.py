@@ -156,7 +156,16 @@ def convert_array_to_vector_float(array):
     return result
 
 
-def convert_to_core_scheme(scheme):
+def convert_to_core_scheme(scheme, core_sequences=None):
+    """
+    Converts given scheme to arrus.core.Scheme.
+
+    :param scheme: arrus.ops.us4r.Scheme
+    :param core_sequences: the scheme sequences already converted to
+      arrus.core.TxRxSequence (see convert_to_core_sequence); None means
+      that all the sequences will be converted
+    :return: arrus.core.Scheme
+    """
     builder = arrus.core.SchemeBuilder()
     seqs = scheme.tx_rx_sequence
     if not isinstance(seqs, Iterable):
@@ -173,8 +182,10 @@ def convert_to_core_scheme(scheme):
     builder.withRxBufferSize(rx_buffer_size)
     builder.withOutputBufferDefinition(data_buffer_spec)
     # Convert sequence to core sequence.
-    for s in seqs:
-        core_seq = arrus.utils.core.convert_to_core_sequence(s)
+    if core_sequences is None:
+        core_sequences = [arrus.utils.core.convert_to_core_sequence(s)
+                          for s in seqs]
+    for core_seq in core_sequences:
         builder.addSequence(core_seq)
 
     core_work_mode = {
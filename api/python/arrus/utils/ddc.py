@@ -0,0 +1,74 @@
+"""
+Cupy implementation of the fused digital down conversion
+(quadrature demodulation, low-pass FIR filtering and decimation).
+"""
+import cupy as cp
+
+
+_ddc_kernel_str = r'''
+    #include <cupy/complex.cuh>
+    extern "C" __global__
+    void ddc_kernel_%%dtype_name%%(
+            complex<float>* __restrict__ output, const %%dtype%%* __restrict__ input,
+            const unsigned long long nRows, const int nSamples, const int nOutputSamples,
+            const float* __restrict__ tapsRe, const float* __restrict__ tapsIm, const int nTaps,
+            const complex<float>* __restrict__ phasor,
+            const int decimationFactor, const int shift) {
+
+        unsigned long long idx = (unsigned long long)blockDim.x*blockIdx.x + threadIdx.x;
+        if(idx >= nRows*nOutputSamples) {
+            return;
+        }
+        unsigned long long row = idx / nOutputSamples;
+        int sample = idx % nOutputSamples;
+        const %%dtype%%* rowInput = input + row*nSamples;
+        // The input sample corresponding to the output sample and tap 0.
+        int center = sample*decimationFactor + shift;
+        int firstTap = max(0, center-(nSamples-1));
+        int lastTap = min(nTaps-1, center);
+        float re = 0.0f, im = 0.0f;
+        for(int j = firstTap; j <= lastTap; ++j) {
+            float value = (float)rowInput[center-j];
+            re += tapsRe[j]*value;
+            im += tapsIm[j]*value;
+        }
+        output[idx] = phasor[sample]*complex<float>(re, im);
+    }'''
+
+_ddc_kernel_int16 = cp.RawKernel(_ddc_kernel_str
+                                 .replace("%%dtype%%", "short")
+                                 .replace("%%dtype_name%%", "int16"),
+                                 "ddc_kernel_int16")
+_ddc_kernel_float32 = cp.RawKernel(_ddc_kernel_str
+                                   .replace("%%dtype%%", "float")
+                                   .replace("%%dtype_name%%", "float32"),
+                                   "ddc_kernel_float32")
+
+
+def ddc(input_data, output_data, taps_re, taps_im, phasor,
+        decimation_factor, shift):
+    """
+    Runs the fused DDC on the given input data:
+
+    output[..., k] = phasor[k] * sum_j (taps_re[j] + 1j*taps_im[j]) * input[..., k*decimation_factor + shift - j]
+
+    :param input_data: (..., n_samples) int16 or float32 array
+    :param output_data: (..., n_output_samples) complex64 array
+    """
+    input_data = cp.ascontiguousarray(input_data)
+    n_samples = input_data.shape[-1]
+    n_output_samples = output_data.shape[-1]
+    n_rows = input_data.size // n_samples
+    n_taps = len(taps_re)
+    block_size = (256, )
+    grid_size = (int((n_rows*n_output_samples-1) // block_size[0] + 1), )
+    params = (output_data, input_data, cp.uint64(n_rows), cp.int32(n_samples),
+              cp.int32(n_output_samples), taps_re, taps_im, cp.int32(n_taps),
+              phasor, cp.int32(decimation_factor), cp.int32(shift))
+    if input_data.dtype == cp.int16:
+        _ddc_kernel_int16(grid_size, block_size, params)
+    elif input_data.dtype == cp.float32:
+        _ddc_kernel_float32(grid_size, block_size, params)
+    else:
+        raise ValueError(f"Unsupported data type: {input_data.dtype}")
+    return output_data
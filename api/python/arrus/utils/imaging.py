@@ -1,4 +1,5 @@
 import abc
+import copy
 from abc import abstractmethod
 
 import re
@@ -17,6 +18,9 @@ import arrus.ops.us4r
 import queue
 import dataclasses
 import threading
+import time
+import concurrent.futures
+import traceback
 from collections import deque
 from pathlib import Path
 import os
@@ -24,6 +28,11 @@ import importlib.util
 from enum import Enum
 import arrus.kernels.simple_tx_rx_sequence
 import arrus.kernels.tx_rx_sequence
+import arrus.utils.memory
+import arrus.utils.beamforming_cpu
+import arrus.utils.lut
+import arrus.utils.const_memory
+from arrus.utils.profiling import OperationProfiler, AllocationChecker
 from numbers import Number
 from typing import Sequence, Dict, Callable, Union, Tuple, List, Optional, Set, Iterable
 from arrus.params import ParameterDef, Unit, Box
@@ -31,6 +40,7 @@ from collections import defaultdict
 from arrus.ops.us4r import TxRxSequence
 from arrus.ops.imaging import SimpleTxRxSequence
 from functools import reduce
+import functools
 import arrus.ops.us4r
 
 
@@ -76,6 +86,12 @@ def _get_const_memory_array(module, name, input_array):
     return const_arr
 
 
+def _get_const_offset(block):
+    # The kernels ignore the offset, when the table is stored
+    # in the global memory.
+    return block.offset if block.is_const else 0
+
+
 def _assert_unique_property_for_rx_active_ops(seq: TxRxSequence, getter: Callable, name: str):
     """
     Asserts if the given sequence has a given unique property (determined by
@@ -88,41 +104,6 @@ def _assert_unique_property_for_rx_active_ops(seq: TxRxSequence, getter: Callabl
                          f"{s}")
 
 
-class GpuConstMemoryPool:
-
-    def __init__(self, kernel_module, variable_name, total_size: int, dtype):
-        if is_package_available("cupy"):
-            import cupy as cp
-            device_props = cp.cuda.runtime.getDeviceProperties(0)
-            if device_props["totalConstMem"] < total_size*dtype(1).itemsize:
-                raise ValueError(f"There is not enough constant memory available for {variable_name}!")
-        self.total_size = total_size
-        self.variable_name = variable_name
-        self.reference_array = np.zeros((self.total_size, ), dtype=dtype)  # Global memory
-        self.const_array = _get_const_memory_array(kernel_module, variable_name, self.reference_array)
-        self.currently_reserved = 0  # [the number of input array elements]
-        self.lock = threading.Lock()
-
-    def reserve_new_array(self, input_array) -> int:
-        """
-        :return: offset relative to the global constant pool
-        """
-        with self.lock:
-            assert len(input_array.shape) == 1, "Only 1D arrays are supported"
-            array_len = input_array.shape[0]
-            a, b = self.currently_reserved, self.currently_reserved + array_len
-            if b > self.total_size:
-                raise ValueError(f"Exceeded maximum const memory "
-                                 f"for {self.variable_name} "
-                                 f"currently reserved: {a}, to be reserved: {b}, "
-                                 f"total size: {self.total_size} ")
-            self.reference_array[a:b] = input_array
-            # Update const array TODO consider updating only the modified part
-            self.const_array.set(self.reference_array)
-            self.currently_reserved = b
-            return a
-
-
 def get_extent(x_grid, z_grid):
     """
     A simple utility tool to get output image extents:
@@ -181,10 +162,8 @@ def get_bmode_imaging(sequence, grid, placement="/GPU:0",
                 QuadratureDemodulation(),
                 Decimation(decimation_factor=decimation_factor,
                            cic_order=decimation_cic_order),
-                # Data beamforming.
-                ReconstructLri(x_grid=x_grid, z_grid=z_grid),
-                # IQ compounding
-                Mean(axis=1),  # Along tx axis.
+                # Data beamforming and IQ compounding (along tx axis).
+                ReconstructLri(x_grid=x_grid, z_grid=z_grid, compound=True),
                 # Post-processing to B-mode image.
                 EnvelopeDetection(),
                 # Envelope compounding
@@ -366,14 +345,301 @@ class Graph:
         return dict((op.name, op) for op in self.operations)
 
 
+@dataclasses.dataclass(frozen=True)
+class _GraphSchedule:
+    """
+    Describes how the sorted graph nodes should be executed.
+
+    Independent graph branches (e.g. B-mode and Doppler pipelines fed with
+    the same input) are assigned to different branch numbers, and can be
+    run concurrently (e.g. on separate CUDA streams or CPU threads).
+
+    :param order: positions of the ops to run (excluding the source node),
+      in the topological order
+    :param branches: branch number for each op
+    :param preds: for each op, positions of the ops it depends on
+    :param sync_preds: for each op, positions of the ops from the other
+      branches, that should be completed before the op is run
+    :param record: for each op, whether the op completion should be
+      signaled to the other branches
+    :param n_branches: the number of branches
+    """
+    order: List[int]
+    branches: List[int]
+    preds: List[Set[int]]
+    sync_preds: List[List[int]]
+    record: List[bool]
+    n_branches: int
+
+
+def _get_processing_device_type(processing):
+    """
+    Returns the type of device ("GPU" or "CPU") on which the given
+    processing should be executed.
+
+    The device is determined by the placement of the pipelines included in the
+    processing graph. By default (i.e. when no placement was set), GPU is used.
+    """
+    placements = {op._placement for op in processing.graph.operations
+                  if isinstance(op, Pipeline) and op._placement is not None}
+    if len(placements) > 1:
+        raise ValueError("All pipelines should be placed on the "
+                         f"same processing device, got: {placements}")
+    if len(placements) == 0:
+        return "GPU"
+    return next(iter(placements))
+
+
+class _GpuProcessingBackend:
+    """
+    Executes ProcessingRunner graph on the GPU:0 (cupy).
+
+    The processing is a 3-stage pipeline: host PC -> GPU transfers are
+    performed on the data stream, all the operators are executed on the
+    processing stream, GPU -> host PC transfers are performed on the egress
+    stream. The stages are synchronized using CUDA events, so the transfer
+    of frame k+1 and frame k-1 can overlap with the processing of frame k.
+    """
+
+    def __init__(self):
+        import cupy as cp
+        self.cp = cp
+        self.num_pkg = cp
+        self.device_name = "GPU"
+        self._log_gpu_info()
+        # host PC -> GPU RAM stream
+        self.data_stream = cp.cuda.Stream(non_blocking=True)
+        # kernel execution stream
+        self.processing_stream = cp.cuda.Stream(non_blocking=True)
+        # GPU RAM -> host PC stream
+        self.egress_stream = cp.cuda.Stream(non_blocking=True)
+        # Kernel execution streams for the independent graph branches,
+        # the branch 0 is always run on the processing stream.
+        self._branch_streams = [self.processing_stream]
+
+    def create_input_enqueue(self, buffer):
+        return EnqueueToGPU(
+            buffer,
+            data_stream=self.data_stream,
+            processing_stream=self.processing_stream,
+            name=f"{buffer.name}Enqueue",
+        )
+
+    def create_output_enqueue(self, input_buffer, output_buffer, callback):
+        # GPU staging area for the processing results: the egress stream
+        # copies data from the staging buffer, so the next frame can be
+        # processed while the previous one is still being transferred.
+        arrays = output_buffer.elements[0].arrays
+        staging_buffer = Buffer(
+            name="OutputBufferGPU",
+            n_elements=output_buffer.n_elements,
+            type="locked",
+            shapes=[a.shape for a in arrays],
+            dtypes=[a.dtype for a in arrays],
+            math_pkg=self.cp)
+        return EnqueueGPUtoCPU(
+            input_gpu_buffer=input_buffer,
+            output_buffer=output_buffer,
+            stream=self.processing_stream,
+            name=f"{output_buffer.name}Enqueue",
+            callback=callback,
+            staging_buffer=staging_buffer,
+            egress_stream=self.egress_stream
+        )
+
+    def prepared(self):
+        self.cp.cuda.Stream.null.synchronize()
+
+    def submit(self, stages, arg):
+        # Stages are only enqueued here, the actual pipelining is done
+        # by the CUDA streams.
+        with self.processing_stream:
+            for stage in stages:
+                arg = stage(arg)
+
+    def run_ops(self, run_op, schedule):
+        for _ in range(len(self._branch_streams), schedule.n_branches):
+            self._branch_streams.append(self.cp.cuda.Stream(non_blocking=True))
+        events = [None]*len(schedule.branches)
+        if schedule.record[0]:
+            events[0] = self.processing_stream.record()
+        for pos in schedule.order:
+            stream = self._branch_streams[schedule.branches[pos]]
+            for pred in schedule.sync_preds[pos]:
+                stream.wait_event(events[pred])
+            with stream:
+                run_op(pos)
+            if schedule.record[pos]:
+                events[pos] = stream.record()
+
+    def sync(self):
+        self.data_stream.synchronize()
+        for stream in self._branch_streams:
+            stream.synchronize()
+        self.egress_stream.synchronize()
+
+    def register_buffer(self, buffer, data_getter):
+        for e in buffer.elements:
+            self.cp.cuda.runtime.hostRegister(data_getter(e).ctypes.data, e.size, 1)
+        return buffer
+
+    def unregister_buffer(self, buffer, data_getter):
+        for element in buffer.elements:
+            self.cp.cuda.runtime.hostUnregister(data_getter(element).ctypes.data)
+
+    def close(self):
+        pass
+
+    def _log_gpu_info(self):
+        import arrus.logging
+        ngpus = self.cp.cuda.runtime.getDeviceCount()
+        arrus.logging.log(arrus.logging.INFO, f"NVIDIA CUDA Toolkit version: {self.cp.cuda.runtime.runtimeGetVersion()}")
+        arrus.logging.log(arrus.logging.INFO, f"NVIDIA CUDA driver version: {self.cp.cuda.runtime.driverGetVersion()}")
+        arrus.logging.log(arrus.logging.INFO, f"Detected NVIDIA GPU(s): {ngpus}")
+        for i in range(ngpus):
+            props = self.cp.cuda.runtime.getDeviceProperties(i)
+            free_mem, total_mem = self.cp.cuda.runtime.memGetInfo()
+            arrus.logging.log(
+                arrus.logging.DEBUG,
+                f"""
+f=== GPU #{i} ===
+Name:                 {props['name'].decode('utf-8')}
+Multiprocessors:      {props['multiProcessorCount']}
+Total memory:         {props['totalGlobalMem'] // (1024**2)} MiB
+Free memory:          {free_mem // (1024**2)} MiB
+Compute capability:   {props['major']}.{props['minor']}
+Clock:                {props['clockRate'] / 1000} MHz
+                """
+            )
+
+
+class _CpuProcessingBackend:
+    """
+    Executes ProcessingRunner graph on the CPU (numpy, scipy.ndimage).
+
+    The processing is an N-stage pipeline: each stage (e.g. ingest,
+    compute, egress) is executed by a separate worker thread, so the
+    producer's (e.g. us4R data buffer) callback returns immediately, and
+    frame k+1 can be ingested while frame k is processed. A stage passes the
+    element to the next stage when it is completed. Consecutive input
+    elements are processed in the FIFO order by each stage.
+
+    The independent graph branches are run concurrently by a separate
+    pool of worker threads.
+
+    :param n_stages: number of pipeline stages (worker threads); the last
+      stage is reserved for egress (output callbacks)
+    """
+
+    def __init__(self, n_stages=3):
+        self.num_pkg = np
+        self.device_name = "CPU"
+        self._executors = [
+            concurrent.futures.ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix=f"ProcessingRunnerCPU:{i}")
+            for i in range(n_stages)
+        ]
+        self._branch_executor = None
+
+    def create_input_enqueue(self, buffer):
+        return EnqueueToCPU(buffer, name=f"{buffer.name}Enqueue")
+
+    def create_output_enqueue(self, input_buffer, output_buffer, callback):
+        return EnqueueCPUtoCPU(
+            input_cpu_buffer=input_buffer,
+            output_buffer=output_buffer,
+            name=f"{output_buffer.name}Enqueue",
+            callback=callback,
+            executor=self._executors[-1]
+        )
+
+    def prepared(self):
+        pass
+
+    def submit(self, stages, arg):
+        if len(stages) > len(self._executors) - 1:
+            raise ValueError(f"Too many stages: {len(stages)}")
+        self._submit_stage(0, stages, arg)
+
+    def _submit_stage(self, i, stages, arg):
+        self._executors[i].submit(self._run_stage, i, stages, arg)
+
+    def _run_stage(self, i, stages, arg):
+        try:
+            result = stages[i](arg)
+        except Exception as e:
+            print(e)
+            traceback.print_exc()
+            return
+        if i + 1 < len(stages):
+            self._submit_stage(i + 1, stages, result)
+
+    def run_ops(self, run_op, schedule):
+        if schedule.n_branches == 1:
+            for pos in schedule.order:
+                run_op(pos)
+            return
+        if self._branch_executor is None:
+            self._branch_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=schedule.n_branches,
+                thread_name_prefix="ProcessingRunnerCPU:branch")
+        # Run each op as soon as all the ops it depends on are completed.
+        n_remaining_preds = {pos: len(schedule.preds[pos] - {0})
+                             for pos in schedule.order}
+        successors = defaultdict(list)
+        for pos in schedule.order:
+            for pred in schedule.preds[pos]:
+                successors[pred].append(pos)
+            for pred in schedule.sync_preds[pos]:
+                if pred not in schedule.preds[pos]:
+                    successors[pred].append(pos)
+                    n_remaining_preds[pos] += 1
+        running = {}
+        for pos in schedule.order:
+            if n_remaining_preds[pos] == 0:
+                running[self._branch_executor.submit(run_op, pos)] = pos
+        while len(running) > 0:
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                pos = running.pop(future)
+                future.result()  # Propagate exception, if any.
+                for succ in successors[pos]:
+                    n_remaining_preds[succ] -= 1
+                    if n_remaining_preds[succ] == 0:
+                        running[self._branch_executor.submit(run_op, succ)] = succ
+
+    def sync(self):
+        # Each stage submits work to the next one before completing, so
+        # it is enough to wait for the stages in the pipeline order.
+        for executor in self._executors:
+            executor.submit(lambda: None).result()
+
+    def register_buffer(self, buffer, data_getter):
+        # Nothing to do, host memory does not need to be page-locked.
+        return buffer
+
+    def unregister_buffer(self, buffer, data_getter):
+        pass
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+        if self._branch_executor is not None:
+            self._branch_executor.shutdown(wait=True)
+
+
 class ProcessingRunner:
     """
-    Runs processing on a specified processing device (GPU in particular).
+    Runs processing on a specified processing device (GPU or CPU).
 
-    Currently only GPU:0 is supported.
+    Currently only GPU:0 and CPU:0 are supported. The processing device is
+    determined by the placement of the pipelines from the processing graph
+    (GPU:0 by default).
 
     Currently, the input buffer should be located in CPU device,
-    output buffer should be located on GPU.
+    output buffer is always located in the CPU memory.
 
     :param processings: sequence of processings
     :param metadatas: sequence of metadata objects
@@ -383,23 +649,30 @@ class ProcessingRunner:
         CLOSED = 2
 
     def __init__(self, input_buffer, metadata, processing):
-        import cupy as cp
-        self.cp = cp
-        self._log_gpu_info()
+        device_type = _get_processing_device_type(processing)
+        if device_type == "GPU":
+            self._backend = _GpuProcessingBackend()
+        elif device_type == "CPU":
+            self._backend = _CpuProcessingBackend()
+        else:
+            raise ValueError(f"Unsupported processing device: {device_type}")
+        self.num_pkg = self._backend.num_pkg
+        self._profiler = None
+        if processing.profiling:
+            self._profiler = OperationProfiler(num_pkg=self.num_pkg)
+            for op in processing.graph.operations:
+                if isinstance(op, Pipeline):
+                    op.set_profiler(self._profiler)
         # Input buffer, stored in the host PC memory.
         self.host_input_buffer = input_buffer
         self.processing = processing
         self.input_metadata = metadata
         self.output_name_pattern = Graph._output_name_pattern
-        # host PC -> GPU RAM stream
-        self.data_stream = cp.cuda.Stream(non_blocking=True)
-        # kernel execution stream
-        self.processing_stream = cp.cuda.Stream(non_blocking=True)
         # Convert the graph into a sequence of operations to perform.
-        self.gpu_input_buffer, self.output_buffer, self.output_metadata = self._prepare_ops(
+        self.device_input_buffer, self.output_buffer, self.output_metadata = self._prepare_ops(
             self.processing, self.input_metadata
         )
-        cp.cuda.Stream.null.synchronize()
+        self._backend.prepared()
         if processing.callback is not None:
             self.user_out_buffer = None
             self.callback = processing.callback
@@ -408,18 +681,30 @@ class ProcessingRunner:
             self.callback = self.default_processing_output_callback
         self.graph, self.source_node_name = self._preprocess_graph(
             self.processing, self.input_metadata,
-            self.host_input_buffer, self.gpu_input_buffer,
+            self.host_input_buffer, self.device_input_buffer,
             self.output_buffer, self.callback
         )
         self._ops, self._target_pos, self._inputs = self._sort_graph_nodes(
             self.graph, self.source_node_name
         )
+        self._schedule = self._get_schedule(
+            self._ops, self._target_pos,
+            sink_name=f"{self.output_buffer.name}Enqueue"
+        )
         self._register_buffer(self.host_input_buffer, lambda element: element.array)
         self._register_buffer(self.output_buffer, lambda element: element.data)
-        self.host_input_buffer.append_on_new_data_callback(self.process)
         self._state = ProcessingRunner.State.READY
         self._process_lock = threading.Lock()
         self._state_lock = threading.Lock()
+        self.host_input_buffer.append_on_new_data_callback(self.process)
+
+    @property
+    def data_stream(self):
+        return self._backend.data_stream
+
+    @property
+    def processing_stream(self):
+        return self._backend.processing_stream
 
     def get_parameter(self, key):
         return self.processing.get_parameter(key)
@@ -464,11 +749,12 @@ class ProcessingRunner:
                 q.append((op_name, input_nr))
                 metadata_by_target[op_name].append((input_nr, m))
         input_buffer = Buffer(
-            name="InputBufferGPU", n_elements=input_buffer_def.size,
+            name=f"InputBuffer{self._backend.device_name}",
+            n_elements=input_buffer_def.size,
             type=input_buffer_def.type,
             shapes=input_shapes,
             dtypes=input_dtypes,
-            math_pkg=self.cp)
+            math_pkg=self.num_pkg)
         ops_by_name = graph.get_ops_by_name()
         visited_names = set()
         output_shapes = []
@@ -522,24 +808,17 @@ class ProcessingRunner:
         return input_buffer, output_buffer, output_metadata
 
     def _preprocess_graph(self, processing, input_metadata,
-                          host_input_buffer, gpu_input_buffer,
+                          host_input_buffer, device_input_buffer,
                           host_output_buffer, host_output_callback):
         graph = processing.graph
         new_op_by_name = graph.get_ops_by_name()
         new_deps = defaultdict(list)
         metadata_nr_by_sequence_name = dict((m.context.sequence.name, i)
                                          for i, m in enumerate(input_metadata))
-        in_buffer_enqueue = EnqueueToGPU(
-            gpu_input_buffer,
-            data_stream=self.data_stream,
-            processing_stream=self.processing_stream,
-            name=f"{gpu_input_buffer.name}Enqueue",
-        )
-        out_buffer_enqueue = EnqueueGPUtoCPU(
-            input_gpu_buffer=gpu_input_buffer,
+        in_buffer_enqueue = self._backend.create_input_enqueue(device_input_buffer)
+        out_buffer_enqueue = self._backend.create_output_enqueue(
+            input_buffer=device_input_buffer,
             output_buffer=host_output_buffer,
-            stream=self.processing_stream,
-            name=f"{host_output_buffer.name}Enqueue",
             callback=host_output_callback
         )
         new_op_by_name[in_buffer_enqueue.name] = in_buffer_enqueue
@@ -622,25 +901,127 @@ class ProcessingRunner:
         inputs[0] = [None]  # Source node has a single input
         return sequence, target_pos, inputs
 
+    def _get_schedule(self, ops, target_pos, sink_name):
+        """
+        Splits the sorted graph nodes into independent branches.
+
+        An op continues the branch of one of its predecessors, if the
+        predecessor is the last op of that branch; otherwise a new branch
+        is started. The sink node (output buffer enqueue) is run on the
+        branch 0 after all the other branches are completed.
+        """
+        n_ops = len(ops)
+        preds = [set() for _ in range(n_ops)]
+        for s_pos, outputs in enumerate(target_pos):
+            for targets in outputs:
+                for t_pos, _ in targets:
+                    preds[t_pos].add(s_pos)
+        sink_pos = next(i for i, op in enumerate(ops) if op.name == sink_name)
+        # The sink has no successors, so it can be always moved to the end.
+        order = [i for i in range(1, n_ops) if i != sink_pos] + [sink_pos]
+        branches = [0]*n_ops
+        continued = set()
+        n_branches = 1
+        for pos in order[:-1]:
+            tails = [p for p in sorted(preds[pos]) if p not in continued]
+            if len(tails) > 0:
+                branches[pos] = branches[tails[0]]
+                continued.add(tails[0])
+            else:
+                branches[pos] = n_branches
+                n_branches += 1
+        sync_preds = [[p for p in sorted(preds[pos]) if branches[p] != branches[pos]]
+                      for pos in range(n_ops)]
+        # The sink releases the input buffer element, so it should wait
+        # for the last op of each branch.
+        branch_tails = {}
+        for pos in order[:-1]:
+            branch_tails[branches[pos]] = pos
+        branch_tails.pop(0, None)
+        sync_preds[sink_pos] = sorted(set(sync_preds[sink_pos]) | set(branch_tails.values()))
+        record = [False]*n_ops
+        for pos in range(n_ops):
+            for pred in sync_preds[pos]:
+                record[pred] = True
+        return _GraphSchedule(
+            order=order, branches=branches, preds=preds,
+            sync_preds=sync_preds, record=record, n_branches=n_branches)
+
     def _get_ops_sequence(self):
         return [op.name for op in self._ops]
 
     def process(self, input_element):
-        data = None
-        results = None
-        target_pos, target_input_nr = None, None
-        with self._process_lock, self.processing_stream:
-            # feed inputs with the input data
-            self._inputs[0][0] = input_element
-            for source, op in enumerate(self._ops):
-                data = self._inputs[source]
-                results = op.process(data)
-                if results is None:
-                    continue
-                for output, result in enumerate(results):
-                    targets_positions = self._target_pos[source][output]
-                    for target, inp in targets_positions:
-                        self._inputs[target][inp] = result
+        if self._profiler is None:
+            self._backend.submit((self._ingest, self._process), input_element)
+        else:
+            self._backend.submit(
+                (self._profiled_ingest, self._profiled_process),
+                (input_element, time.perf_counter())
+            )
+
+    def _ingest(self, input_element):
+        # NOTE: the ingest stage must not modify the runner state
+        # (e.g. self._inputs), as it may run concurrently with the
+        # processing of the previous element.
+        return self._ops[0].process([input_element])
+
+    def _process(self, source_results):
+        with self._process_lock:
+            self._pass_results(0, source_results)
+            self._backend.run_ops(self._run_op, self._schedule)
+
+    def _run_op(self, pos):
+        results = self._ops[pos].process(self._inputs[pos])
+        self._pass_results(pos, results)
+
+    def _profiled_ingest(self, arg):
+        input_element, submit_time = arg
+        source = self._ops[0]
+        self._profiler.add_sample(
+            source.name, "queue_wait", time.perf_counter()-submit_time)
+        results = self._profiler.run(source.name, source.process, [input_element])
+        return results, time.perf_counter()
+
+    def _profiled_process(self, arg):
+        source_results, ingest_time = arg
+        with self._process_lock:
+            self._profiler.add_sample(
+                "ProcessingRunner", "queue_wait", time.perf_counter()-ingest_time)
+            self._pass_results(0, source_results)
+            self._profiler.run(
+                "ProcessingRunner",
+                lambda schedule: self._backend.run_ops(self._run_op_profiled, schedule),
+                self._schedule)
+
+    def _run_op_profiled(self, pos):
+        op = self._ops[pos]
+        results = self._profiler.run(op.name, op.process, self._inputs[pos])
+        self._pass_results(pos, results)
+
+    def get_stats(self):
+        """
+        Returns the execution statistics of the processing operations.
+
+        Requires the profiling to be turned on (see Processing profiling
+        parameter). See OperationProfiler.get_stats for the output format.
+        The graph nodes are available under their names, the pipeline steps
+        under the "{pipeline name}/{step name}" keys, the whole
+        graph processing under the "ProcessingRunner" key.
+
+        :return: a dictionary: op name -> metric name -> statistics
+        """
+        if self._profiler is None:
+            raise ValueError("Profiling is turned off, please create "
+                             "Processing with profiling=True.")
+        return self._profiler.get_stats()
+
+    def _pass_results(self, source, results):
+        if results is None:
+            return
+        for output, result in enumerate(results):
+            targets_positions = self._target_pos[source][output]
+            for target, inp in targets_positions:
+                self._inputs[target][inp] = result
 
     @property
     def outputs(self):
@@ -674,6 +1055,7 @@ class ProcessingRunner:
             if self._state == ProcessingRunner.State.CLOSED:
                 # Already closed.
                 return
+            self._backend.close()
             self._unregister_buffer(self.host_input_buffer, lambda element: element.array)
             if hasattr(self, "output_buffer") and self.output_buffer:
                 self._unregister_buffer(self.output_buffer, lambda element: element.data)
@@ -682,41 +1064,13 @@ class ProcessingRunner:
             self._state = ProcessingRunner.State.CLOSED
 
     def sync(self):
-        self.data_stream.synchronize()
-        self.processing_stream.synchronize()
+        self._backend.sync()
 
     def _register_buffer(self, buffer, data_getter):
-        import cupy as cp
-        for e in buffer.elements:
-            cp.cuda.runtime.hostRegister(data_getter(e).ctypes.data, e.size, 1)
-        return buffer
+        return self._backend.register_buffer(buffer, data_getter)
 
     def _unregister_buffer(self, buffer, data_getter):
-        import cupy as cp
-        for element in buffer.elements:
-            cp.cuda.runtime.hostUnregister(data_getter(element).ctypes.data)
-
-    def _log_gpu_info(self):
-        import arrus.logging
-        ngpus = self.cp.cuda.runtime.getDeviceCount()
-        arrus.logging.log(arrus.logging.INFO, f"NVIDIA CUDA Toolkit version: {self.cp.cuda.runtime.runtimeGetVersion()}")
-        arrus.logging.log(arrus.logging.INFO, f"NVIDIA CUDA driver version: {self.cp.cuda.runtime.driverGetVersion()}")
-        arrus.logging.log(arrus.logging.INFO, f"Detected NVIDIA GPU(s): {ngpus}")
-        for i in range(ngpus):
-            props = self.cp.cuda.runtime.getDeviceProperties(i)
-            free_mem, total_mem = self.cp.cuda.runtime.memGetInfo()
-            arrus.logging.log(
-                arrus.logging.DEBUG,
-                f"""
-f=== GPU #{i} ===
-Name:                 {props['name'].decode('utf-8')}
-Multiprocessors:      {props['multiProcessorCount']}
-Total memory:         {props['totalGlobalMem'] // (1024**2)} MiB
-Free memory:          {free_mem // (1024**2)} MiB
-Compute capability:   {props['major']}.{props['minor']}
-Clock:                {props['clockRate'] / 1000} MHz
-                """
-            )
+        self._backend.unregister_buffer(buffer, data_getter)
 
 
 class Operation:
@@ -727,6 +1081,15 @@ class Operation:
     :param name: operation name, should be unique in a given context.
         None means that a unique name should be automatically generated.
     """
+    # Names of the attributes with the output buffers, i.e. arrays allocated
+    # in the prepare method and returned by process. The pipeline can move
+    # these buffers to a memory shared with other operations (see
+    # Pipeline memory planning), so the process method should always
+    # overwrite all their elements.
+    _output_buffers = ()
+    # Names of the attributes with the buffers used only within a single
+    # call of the process method.
+    _scratch_buffers = ()
 
     def __init__(self, name=None):
         self.name = name
@@ -745,6 +1108,11 @@ class Operation:
         """
         Function that will be called when new data arrives.
 
+        The operation should write the results to the output buffer
+        allocated in the prepare method (or return a view of the input data),
+        so that no memory is allocated in the steady state. Note: the returned
+        array can be overwritten by the next call of this method.
+
         :param data: input data
         :return: output data
         """
@@ -814,6 +1182,110 @@ def _get_op_context_param_name(op_name: str, param_name: str):
     return f"/{op_name}{param_name}"
 
 
+class _ParameterBuffer:
+    """
+    Double buffer of the operation state, that depends on the parameters
+    which can be changed while the processing is running.
+
+    The new state is computed (and uploaded to the device) in the thread that
+    sets the parameter. The processing thread swaps it in at the beginning
+    of the next frame (see apply), so each frame is processed with
+    a consistent set of parameters, without preparing the pipeline again.
+
+    :param params: initial values of the parameters, dict: name -> value
+    :param compute_state: function: parameters (dict) -> operation attributes
+      to update (dict)
+    """
+
+    def __init__(self, params, compute_state):
+        self._params = dict(params)
+        self._compute_state = compute_state
+        # Serializes the parameter updates.
+        self._update_lock = threading.Lock()
+        # Guards the pending (back buffer) state.
+        self._swap_lock = threading.Lock()
+        self._pending = None
+
+    def get(self, key):
+        return self._params[key]
+
+    def set(self, key, value):
+        with self._update_lock:
+            params = {**self._params, key: value}
+            state = self._compute_state(params)
+            with self._swap_lock:
+                self._params = params
+                self._pending = state
+
+    def apply(self, op):
+        """
+        Updates the operation attributes with the pending state (if any).
+        Should be called by the processing thread, before processing a frame.
+        """
+        if self._pending is None:
+            return
+        with self._swap_lock:
+            state, self._pending = self._pending, None
+        vars(op).update(state)
+
+
+def _get_parameter_buffer(op):
+    parameters = getattr(op, "_parameters", None)
+    if parameters is None:
+        raise ValueError(f"{type(op).__name__}: the parameters can be changed "
+                         f"only after the operation is prepared.")
+    return parameters
+
+
+def _get_grid_parameter(key, value, size):
+    value = np.asarray(value, dtype=np.float64).reshape(-1)
+    if value.shape != (size, ):
+        raise ValueError(f"{key} should have exactly {size} points "
+                         f"(the output shape cannot be changed), "
+                         f"got: {value.size}")
+    return value
+
+
+def _get_speed_of_sound_parameter(value):
+    value = np.float32(np.squeeze(value))
+    if not value > 0:
+        raise ValueError(f"Speed of sound should be positive, got: {value}")
+    return value
+
+
+def _get_grid_parameter_def(name, size):
+    return ParameterDef(
+        name=name,
+        space=Box(
+            shape=(size, ),
+            dtype=np.float32,
+            unit=Unit.m,
+            low=-np.inf,
+            high=np.inf
+        ),
+    )
+
+
+def _get_speed_of_sound_parameter_def():
+    return ParameterDef(
+        name="speed_of_sound",
+        space=Box(
+            shape=(1, ),
+            dtype=np.float32,
+            unit=Unit.mps,
+            low=0,
+            high=np.inf
+        ),
+    )
+
+
+def _synchronize(num_pkg):
+    # Makes sure the arrays uploaded by the current thread are ready,
+    # before they are used by the processing stream.
+    if num_pkg is not np:
+        num_pkg.cuda.get_current_stream().synchronize()
+
+
 class EnqueueToGPU(Operation):
 
     def __init__(self, buffer, data_stream, processing_stream, name=None):
@@ -845,32 +1317,139 @@ class EnqueueToGPU(Operation):
 
 
 class EnqueueGPUtoCPU(Operation):
+    """
+    Transfers the processing results from GPU to the host output buffer.
+
+    The results are first copied to the GPU staging buffer element (on the
+    processing stream), then transferred asynchronously to the (page-locked)
+    host output buffer element on the egress stream. The egress stream
+    waits for the processing to complete using CUDA event, the staging
+    buffer element is released after the transfer is done. This way, the
+    next frame results can be computed while the previous ones are
+    still being transferred.
+
+    When the staging buffer or egress stream is not provided, the results
+    are transferred synchronously.
+    """
 
-    def __init__(self, input_gpu_buffer, output_buffer, stream, callback=None, name=None):
+    def __init__(self, input_gpu_buffer, output_buffer, stream, callback=None,
+                 name=None, staging_buffer=None, egress_stream=None):
         super().__init__(name)
         self.input_gpu_buffer = input_gpu_buffer
         self.output_buffer = output_buffer
         self.stream = stream
         self.callback = callback
+        self.staging_buffer = staging_buffer
+        self.egress_stream = egress_stream
         self._current_pos = 0
 
     def prepare(self, const_metadata):
         return const_metadata
 
     def process(self, data: Tuple) -> None:
+        if self.staging_buffer is None or self.egress_stream is None:
+            return self._process_sync(data)
+        import cupy as cp
+        # Wait until the previous transfer from this staging element is done.
+        staging_element = self.staging_buffer.elements[self._current_pos]
+        staging_element.acquire()
+        for i, arr_gpu in enumerate(data):
+            cp.copyto(staging_element.arrays[i], arr_gpu)
+        compute_done_event = self.stream.record()
+        # Release the GPU input element.
+        self.stream.launch_host_func(lambda buffer: buffer.release_fifo(), self.input_gpu_buffer)
+        element = self.output_buffer.elements[self._current_pos]
+        self.egress_stream.wait_event(compute_done_event)
+        self.egress_stream.launch_host_func(lambda element: element.acquire(), element)
+        for i, arr_gpu in enumerate(staging_element.arrays):
+            arr_gpu.get(stream=self.egress_stream, out=element.arrays[i])
+        self.egress_stream.launch_host_func(lambda e: e.release(), staging_element)
+        if self.callback is not None:
+            self.egress_stream.launch_host_func(lambda e: self.callback(e), element)
+        self._current_pos = (self._current_pos+1)%self.output_buffer.n_elements
+
+    def _process_sync(self, data: Tuple) -> None:
         # Release the GPU input element.
         self.stream.launch_host_func(lambda buffer: buffer.release_fifo(), self.input_gpu_buffer)
         element = self.output_buffer.elements[self._current_pos]
         self.stream.launch_host_func(lambda element: element.acquire(), element)
         for i, arr_gpu in enumerate(data):
-            element.arrays[i] = arr_gpu.get()
-            # TODO the line below causes data incosistency for large output arrays
-            # arr_gpu.get(stream=self.stream, out=element.arrays[i])
+            element.arrays[i][:] = arr_gpu.get()
         if self.callback is not None:
             self.stream.launch_host_func(lambda e: self.callback(e), element)
         self._current_pos = (self._current_pos+1)%self.output_buffer.n_elements
 
 
+class EnqueueToCPU(Operation):
+    """
+    Copies the input host buffer element to the CPU processing buffer.
+
+    The input host buffer element is released immediately after the copy
+    is done.
+    """
+
+    def __init__(self, buffer, name=None):
+        super().__init__(name)
+        self.buffer = buffer
+        self._current_pos = 0
+
+    def prepare(self, const_metadata):
+        return const_metadata
+
+    def process(self, element):
+        """
+        :param element: input host buffer element
+        """
+        element = element[0]
+        cpu_element = self.buffer.acquire(self._current_pos)
+        np.copyto(cpu_element.data, element.array)
+        element.release()
+        self._current_pos = (self._current_pos+1) % self.buffer.n_elements
+        return cpu_element.arrays
+
+
+class EnqueueCPUtoCPU(Operation):
+    """
+    Copies the processing results to the host output buffer.
+
+    The output callback is run by the given executor (egress stage) if
+    provided, otherwise the callback is run by the calling thread.
+    """
+
+    def __init__(self, input_cpu_buffer, output_buffer, callback=None,
+                 name=None, executor=None):
+        super().__init__(name)
+        self.input_cpu_buffer = input_cpu_buffer
+        self.output_buffer = output_buffer
+        self.callback = callback
+        self.executor = executor
+        self._current_pos = 0
+
+    def prepare(self, const_metadata):
+        return const_metadata
+
+    def process(self, data: Tuple) -> None:
+        element = self.output_buffer.elements[self._current_pos]
+        element.acquire()
+        for i, arr in enumerate(data):
+            np.copyto(element.arrays[i], arr)
+        # Release the CPU input element (the output data may refer to it).
+        self.input_cpu_buffer.release_fifo()
+        if self.callback is not None:
+            if self.executor is not None:
+                self.executor.submit(self._run_callback, element)
+            else:
+                self._run_callback(element)
+        self._current_pos = (self._current_pos+1)%self.output_buffer.n_elements
+
+    def _run_callback(self, element):
+        try:
+            self.callback(element)
+        except Exception as e:
+            print(e)
+            traceback.print_exc()
+
+
 class Output(Operation):
     """
     Output node.
@@ -906,14 +1485,32 @@ class Pipeline:
     :param steps: processing steps to run
     :param placement: device on which the processing should take place,
       default: GPU:0
+    :param plan_memory: whether the output buffers of the steps should be
+      placed in a single memory arena, in which the buffers that are not used
+      at the same time share memory (default: False)
+    :param fuse_steps: whether the known sequences of steps should be replaced
+      with a single, equivalent step (e.g. RemapToLogicalOrder followed
+      by Transpose, see _fuse_remap_steps). The fused steps are replaced
+      with a reconfigured copy of the remap step, i.e. the fused
+      Transpose/ToRealOrComplex steps are removed from the pipeline steps;
+      the given step objects are not modified
     """
 
-    def __init__(self, steps, placement=None, name=None):
+    def __init__(self, steps, placement=None, name=None, plan_memory=False,
+                 fuse_steps=True):
+        if fuse_steps:
+            steps = _fuse_remap_steps(steps)
         self.steps: Sequence[Operation] = steps
         self.name = name
+        self._plan_memory = plan_memory
+        self._memory_plan = None
+        self._arena = None
         self._placement = None
         self._processing_stream = None
         self._input_buffer = None
+        self._profiler = None
+        self._allocation_checker = None
+        self._allocation_check_params = None
         if placement is not None:
             self.set_placement(placement)
         self._set_names()
@@ -925,11 +1522,69 @@ class Pipeline:
     def close(self):
         for s in self.steps:
             s.close()
+        if self._allocation_checker is not None:
+            self._allocation_checker.close()
+
+    def set_profiler(self, profiler):
+        """
+        Turns on measuring the execution time of each pipeline step.
+
+        :param profiler: OperationProfiler that should collect the
+          statistics; None turns the profiling off
+        """
+        self._profiler = profiler
+        for step in self.steps:
+            if isinstance(step, Pipeline):
+                step.set_profiler(profiler)
+
+    def set_allocation_check(self, enabled=True, n_warmup_frames=2,
+                             tolerance=65536):
+        """
+        Turns on verification that the pipeline steps do not allocate
+        memory in the steady state, i.e. that each step writes its results
+        to the buffers preallocated in the prepare method.
+
+        If any step allocates more than the given number of bytes after
+        the warm-up phase, the process method raises IllegalStateError.
+        This mode is intended for debugging only, as it slows down the
+        processing.
+
+        :param enabled: whether the check should be turned on or off
+        :param n_warmup_frames: the number of initial frames that should
+          not be checked
+        :param tolerance: the maximum number of bytes each step can allocate
+          per frame
+        """
+        if enabled:
+            self._allocation_check_params = dict(
+                n_warmup_frames=n_warmup_frames, tolerance=tolerance)
+        else:
+            self._allocation_check_params = None
+        self._create_allocation_checker()
+        for step in self.steps:
+            if isinstance(step, Pipeline):
+                step.set_allocation_check(
+                    enabled=enabled, n_warmup_frames=n_warmup_frames,
+                    tolerance=tolerance)
+
+    def _create_allocation_checker(self):
+        if self._allocation_checker is not None:
+            self._allocation_checker.close()
+            self._allocation_checker = None
+        if self._allocation_check_params is not None:
+            # The checker is recreated when the placement changes.
+            num_pkg = self.num_pkg if self._placement is not None else np
+            self._allocation_checker = AllocationChecker(
+                num_pkg=num_pkg, **self._allocation_check_params)
 
     def set_parameter(self, key: str, value: Sequence[Number]):
         """
         Sets the value for parameter with the given name.
-        TODO: note: this method currently is not thread-safe
+
+        The beamforming operations (RxBeamforming, ScanConversion,
+        ReconstructLri) compute the new state in the calling thread and
+        apply it at the beginning of the next frame, so their parameters
+        can be safely changed while the processing is running.
         """
         op, op_param_name = self._param_ops[key]
         op.set_parameter(op_param_name, value)
@@ -952,6 +1607,8 @@ class Pipeline:
             # Backward compatibility
             data = data[0]
         outputs = deque()  # TODO avoid creating deque on each processing step
+        if self._profiler is not None or self._allocation_checker is not None:
+            return self._process_instrumented(data, outputs)
         for step in self.steps:
             if step.endpoint:
                 step_outputs = step.process(data)
@@ -965,6 +1622,31 @@ class Pipeline:
             outputs.appendleft(data)
         return outputs
 
+    def _process_instrumented(self, data, outputs):
+        for step in self.steps:
+            step_name = f"{self.name}/{step.name}"
+            if step.endpoint:
+                step_outputs = self._run_step(step_name, step, data)
+                for output in reversed(step_outputs):
+                    outputs.appendleft(output)
+            else:
+                data = self._run_step(step_name, step, data)
+        if not self._is_last_endpoint:
+            outputs.appendleft(data)
+        return outputs
+
+    def _run_step(self, step_name, step, data):
+        func = step.process
+        # Nested pipelines check their own steps.
+        if self._allocation_checker is not None \
+                and not isinstance(step, Pipeline):
+            func = functools.partial(self._allocation_checker.run,
+                                     step_name, func)
+        if self._profiler is not None:
+            return self._profiler.run(step_name, func, data)
+        else:
+            return func(data)
+
     def __initialize(self, const_metadata):
         if not isinstance(const_metadata, Iterable):
             const_metadata = [const_metadata]
@@ -1002,6 +1684,7 @@ class Pipeline:
             else:
                 current_metadata = step.prepare(current_metadata)
                 step.endpoint = False
+        self._place_buffers()
         # Force cupy to recompile kernels before running the pipeline.
         self.__initialize(const_metadata)
         last_step = self.steps[-1]
@@ -1015,6 +1698,80 @@ class Pipeline:
             m._name = f"{self.name}/Output:{i}"
         return metadatas
 
+    def get_memory_plan(self):
+        """
+        Returns the placement of the step buffers in the memory shared
+        by the steps of this pipeline (nested pipelines have their own plans).
+
+        :return: arrus.utils.memory.MemoryPlan, where the buffer keys are
+          (step name, attribute name) pairs; None if the pipeline was not
+          prepared yet or the memory planning is turned off
+        """
+        return self._memory_plan
+
+    def _place_buffers(self):
+        """
+        Moves the step buffers to a single memory arena.
+
+        The output buffer of a step is used until the next step that
+        produces new output buffer (the steps between, e.g. Transpose,
+        can return views of it). Buffers used until the end of the pipeline
+        or consumed by a branch (nested Pipeline, Output) are never shared,
+        as they are returned to the pipeline client.
+        """
+        self._memory_plan = None
+        self._arena = None
+        if not self._plan_memory or self._placement is None:
+            return
+        n_steps = len(self.steps)
+        buffers = []
+        for i, step in enumerate(self.steps):
+            if isinstance(step, (Pipeline, Output)):
+                continue
+            outputs = self._get_step_buffers(step, "_output_buffers")
+            scratch = self._get_step_buffers(step, "_scratch_buffers")
+            buffers.append((i, step, outputs, scratch))
+        producers = [i for i, _, outputs, _ in buffers if len(outputs) > 0]
+        branches = [i for i, step in enumerate(self.steps)
+                    if isinstance(step, (Pipeline, Output))]
+        requests = []
+        arrays = {}
+        for i, step, outputs, scratch in buffers:
+            end = next((j for j in producers if j > i), n_steps)
+            if any(i < j < end for j in branches):
+                # The branch output may be kept by the client
+                # (e.g. a queue of RF frames).
+                end = n_steps
+            start = 0 if end == n_steps else i
+            for attr, array in outputs:
+                key = (step.name, attr)
+                arrays[key] = (step, attr, array)
+                requests.append(arrus.utils.memory.BufferRequest(
+                    key=key, nbytes=array.nbytes, start=start, end=end))
+            for attr, array in scratch:
+                key = (step.name, attr)
+                arrays[key] = (step, attr, array)
+                requests.append(arrus.utils.memory.BufferRequest(
+                    key=key, nbytes=array.nbytes, start=i, end=i))
+        plan = arrus.utils.memory.plan_memory(requests)
+        arena = self.num_pkg.zeros(plan.nbytes, dtype=np.uint8)
+        for block in plan.blocks:
+            step, attr, array = arrays[block.key]
+            view = arrus.utils.memory.get_view(arena, block, array.shape,
+                                               array.dtype)
+            setattr(step, attr, view)
+        self._memory_plan = plan
+        self._arena = arena
+
+    def _get_step_buffers(self, step, buffers_attr):
+        result = []
+        for attr in getattr(step, buffers_attr, ()):
+            array = getattr(step, attr, None)
+            if isinstance(array, self.num_pkg.ndarray) \
+                    and array.flags.c_contiguous:
+                result.append((attr, array))
+        return result
+
     def set_placement(self, device):
         """
         Sets the pipeline to be executed on a particular device.
@@ -1058,6 +1815,7 @@ class Pipeline:
                 step.set_pkgs(**pkgs)
         self.num_pkg = pkgs['num_pkg']
         self.filter_pkg = pkgs['filter_pkg']
+        self._create_allocation_checker()
 
     def _set_names(self):
         """
@@ -1112,6 +1870,10 @@ class ProcessingBufferDef:
 class Processing:
     """
     A description of complete data processing run in the arrus.utils.imaging.
+
+    :param profiling: whether the execution time of each operation should
+      be measured; the statistics are available via
+      ProcessingRunner.get_stats()
     """
 
     def __init__(
@@ -1120,10 +1882,12 @@ class Processing:
             input_buffer: ProcessingBufferDef = None,
             output_buffer: ProcessingBufferDef = None,
             on_buffer_overflow_callback=None,
-            input_name: str=None
+            input_name: str=None,
+            profiling: bool = False
         ):
         self.graph = self._get_graph(processing=graph, input_name=input_name)
         self.callback = callback
+        self.profiling = profiling
         self.input_buffer = input_buffer if input_buffer is not None else ProcessingBufferDef(size=2, type="locked")
         self.output_buffer = output_buffer if output_buffer is not None else ProcessingBufferDef(size=2, type="locked")
         self.on_buffer_overflow_callback = on_buffer_overflow_callback
@@ -1234,6 +1998,242 @@ def _get_unique_center_frequency(sequence):
         return next(iter(cfs))
 
 
+def _to_host(array):
+    """
+    Returns the given array in the host memory (cupy arrays are copied
+    to numpy arrays, the other objects are returned as they are).
+    """
+    if hasattr(array, "get"):
+        return array.get()
+    return array
+
+
+class _Convolution1D:
+    """
+    FIR filtering (convolution) along the last axis, optionally followed by
+    decimation.
+
+    The result is equal to::
+
+        filter_pkg.convolve1d(data, taps, axis=-1, mode="constant")[..., ::decimation_factor]
+
+    Available methods:
+
+    - "direct": time-domain convolution (filter_pkg.convolve1d),
+    - "fft": FFT overlap-save convolution,
+    - "polyphase": polyphase decomposition, only the samples kept after
+      decimation are computed,
+    - "auto": polyphase for decimation_factor > 1, FFT for the filters with
+      at least FFT_MIN_N_TAPS taps, direct otherwise.
+
+    :param taps: filter coefficients (numpy array); complex coefficients
+      are supported by the polyphase method only
+    :param n_samples: the number of input samples (the size of the last axis)
+    :param decimation_factor: decimation factor to apply
+    :param num_pkg: numerical package to use (numpy or cupy)
+    :param filter_pkg: filter package (scipy.ndimage or cupyx.scipy.ndimage)
+    :param method: convolution method
+    :param output_dtype: output data type, by default: the input data type
+    """
+    FFT_MIN_N_TAPS = 32
+    METHODS = {"auto", "direct", "fft", "polyphase"}
+
+    def __init__(self, taps, n_samples, decimation_factor=1,
+                 num_pkg=np, filter_pkg=scipy.ndimage, method="auto",
+                 output_dtype=None):
+        if method not in _Convolution1D.METHODS:
+            raise ValueError(f"Unsupported convolution method: {method}, "
+                             f"should be one of: {_Convolution1D.METHODS}")
+        self.is_complex_taps = np.iscomplexobj(taps)
+        if self.is_complex_taps and method not in {"auto", "polyphase"}:
+            raise ValueError("Complex filter coefficients are supported "
+                             "by the polyphase method only.")
+        if self.is_complex_taps:
+            method = "polyphase"
+            taps = np.asarray(taps, dtype=np.complex64)
+        else:
+            taps = np.asarray(taps, dtype=np.float32)
+        self.output_dtype = output_dtype
+        self.xp = num_pkg
+        self.filter_pkg = filter_pkg
+        self.n_samples = n_samples
+        self.n_taps = len(taps)
+        self.decimation_factor = decimation_factor
+        self.n_output_samples = math.ceil(n_samples/decimation_factor)
+        # Input sample shift of the filter_pkg.convolve1d output, relative
+        # to the full convolution.
+        self._shift = self.n_taps // 2
+        if method == "auto":
+            method = self._select_method()
+        self.method = method
+        self.taps = num_pkg.asarray(taps)
+        # Work and output arrays, allocated on the first call.
+        self._buffers = {}
+        if method == "fft":
+            self._prepare_fft(taps)
+        elif method == "polyphase":
+            self._prepare_polyphase(taps)
+
+    def _select_method(self):
+        if self.decimation_factor > 1 and self.n_taps > 1:
+            return "polyphase"
+        if self.n_taps >= _Convolution1D.FFT_MIN_N_TAPS and self.n_samples >= 2*self.n_taps:
+            return "fft"
+        return "direct"
+
+    def _prepare_fft(self, taps):
+        m = self.n_taps
+        n_full = self.n_samples + m - 1
+        # FFT size: 8x the filter length (i.e. ~88% of each block is useful),
+        # but no longer than the full convolution.
+        self._nfft = min(2**math.ceil(math.log2(8*m)),
+                         2**math.ceil(math.log2(n_full)))
+        self._block_size = self._nfft - m + 1
+        n_blocks = math.ceil(self.n_samples/self._block_size)
+        self._pad_left = m - 1 - self._shift
+        padded_size = (n_blocks-1)*self._block_size + self._nfft
+        self._pad_right = padded_size - self._pad_left - self.n_samples
+        # (n_blocks, nfft) indices of the overlapping blocks of the padded input
+        self._block_indices = self.xp.asarray(
+            (np.arange(n_blocks)*self._block_size)[:, np.newaxis]
+            + np.arange(self._nfft)[np.newaxis, :])
+        self._taps_rfft = self.xp.fft.rfft(self.xp.asarray(taps), n=self._nfft)
+        self._taps_fft = self.xp.fft.fft(self.xp.asarray(taps), n=self._nfft)
+
+    def _prepare_polyphase(self, taps):
+        d = self.decimation_factor
+        n_phase_taps = math.ceil(self.n_taps/d)
+        # Phase p taps: taps[p::d]
+        polyphase_taps = np.zeros(n_phase_taps*d, dtype=taps.dtype)
+        polyphase_taps[:self.n_taps] = taps
+        polyphase_taps = polyphase_taps.reshape(n_phase_taps, d).T
+        if self.is_complex_taps:
+            # The real and imaginary parts are applied separately.
+            self._polyphase_taps = [(self.xp.asarray(np.ascontiguousarray(t.real)),
+                                     self.xp.asarray(np.ascontiguousarray(t.imag)))
+                                    for t in polyphase_taps]
+        else:
+            self._polyphase_taps = [self.xp.asarray(t) for t in polyphase_taps]
+        # Phase p input: u_p[m] = x[m*d + shift - p],
+        # m = -(n_phase_taps-1), ..., n_output_samples-1
+        n_phase_samples = self.n_output_samples + n_phase_taps - 1
+        self._n_phase_samples = n_phase_samples
+        first = -(n_phase_taps-1)*d + self._shift - np.arange(d)
+        last = first + (n_phase_samples-1)*d
+        self._pad_left = max(0, -int(np.min(first)))
+        self._pad_right = max(0, int(np.max(last)) - (self.n_samples-1))
+        self._phase_slices = [slice(f+self._pad_left, l+self._pad_left+1, d)
+                              for f, l in zip(first, last)]
+        # The output of convolve1d is shifted by n_taps//2 relative
+        # to the full convolution.
+        start = n_phase_taps-1-n_phase_taps//2
+        self._phase_output_slice = slice(start, start+self.n_output_samples)
+
+    def _get_buffer(self, key, shape, dtype):
+        buffer = self._buffers.get(key, None)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self.xp.zeros(shape, dtype=dtype)
+            self._buffers[key] = buffer
+        return buffer
+
+    def _pad(self, data, dtype):
+        # NOTE: only the middle part of the padded buffer is overwritten,
+        # the padding stays equal to zero.
+        padded = self._get_buffer(
+            "padded",
+            data.shape[:-1] + (self._pad_left+self.n_samples+self._pad_right, ),
+            dtype)
+        padded[..., self._pad_left:self._pad_left+self.n_samples] = data
+        return padded
+
+    def _get_output_dtype(self, data):
+        return self.output_dtype if self.output_dtype is not None else data.dtype
+
+    def _to_output_dtype(self, result, data):
+        output_dtype = self._get_output_dtype(data)
+        if result.dtype == output_dtype:
+            return result
+        output = self._get_buffer("output", result.shape, output_dtype)
+        self.xp.copyto(output, result, casting="unsafe")
+        return output
+
+    def __call__(self, data):
+        """
+        Returns the filtered data.
+
+        NOTE: the returned array may be reused by the subsequent calls
+        (except the "fft" method, which allocates the FFT work arrays).
+        """
+        if self.method == "direct":
+            result = self._get_buffer("full", data.shape, data.dtype)
+            self.filter_pkg.convolve1d(data, self.taps, axis=-1,
+                                       mode='constant', output=result)
+            result = result[..., 0::self.decimation_factor]
+            return self._to_output_dtype(result, data)
+        elif self.method == "fft":
+            return self._convolve_fft(data)
+        else:
+            return self._convolve_polyphase(data)
+
+    def _convolve_fft(self, data):
+        xp = self.xp
+        is_complex = xp.iscomplexobj(data)
+        compute_dtype = xp.complex64 if is_complex else xp.float32
+        blocks = self._pad(data, compute_dtype)[..., self._block_indices]
+        if is_complex:
+            result = xp.fft.ifft(xp.fft.fft(blocks, axis=-1)*self._taps_fft, axis=-1)
+        else:
+            result = xp.fft.irfft(xp.fft.rfft(blocks, axis=-1)*self._taps_rfft,
+                                  n=self._nfft, axis=-1)
+        # Overlap-save: keep only the samples not affected by the
+        # circular convolution wrap-around.
+        result = result[..., self.n_taps-1:]
+        result = result.reshape(data.shape[:-1] + (-1, ))[..., :self.n_samples]
+        result = result[..., 0::self.decimation_factor]
+        return result.astype(self._get_output_dtype(data), copy=False)
+
+    def _convolve_polyphase(self, data):
+        # y[k*d] = sum_p (taps_p * u_p)[k], i.e. each phase of the input is
+        # filtered by the corresponding phase of the filter, at the output
+        # sampling rate.
+        xp = self.xp
+        is_complex_data = xp.iscomplexobj(data)
+        compute_dtype = xp.complex64 if is_complex_data else xp.float32
+        result_dtype = xp.complex64 if is_complex_data or self.is_complex_taps else xp.float32
+        padded = self._pad(data, compute_dtype)
+        phase_output = self._get_buffer(
+            "phase", data.shape[:-1] + (self._n_phase_samples, ), compute_dtype)
+        result = self._get_buffer(
+            "result", data.shape[:-1] + (self.n_output_samples, ), result_dtype)
+        result.fill(0)
+        for taps, phase_slice in zip(self._polyphase_taps, self._phase_slices):
+            phase = padded[..., phase_slice]
+            if self.is_complex_taps:
+                taps_re, taps_im = taps
+                r = self._convolve_phase(phase, taps_re, phase_output)
+                if is_complex_data:
+                    xp.add(result, r, out=result)
+                else:
+                    real = result.real
+                    xp.add(real, r, out=real)
+                r = self._convolve_phase(phase, taps_im, phase_output)
+                if is_complex_data:
+                    r *= 1j
+                    xp.add(result, r, out=result)
+                else:
+                    imag = result.imag
+                    xp.add(imag, r, out=imag)
+            else:
+                r = self._convolve_phase(phase, taps, phase_output)
+                xp.add(result, r, out=result)
+        return self._to_output_dtype(result, data)
+
+    def _convolve_phase(self, phase, taps, output):
+        self.filter_pkg.convolve1d(phase, taps, axis=-1, mode='constant',
+                                   output=output)
+        return output[..., self._phase_output_slice]
+
+
 class BandpassFilter(Operation):
     """
     Bandpass filtering to apply to signal data.
@@ -1249,7 +2249,7 @@ class BandpassFilter(Operation):
     """
 
     def __init__(self, order=63, bounds=(0.5, 1.5), filter_type="hamming",
-                 num_pkg=None, filter_pkg=None, **kwargs):
+                 num_pkg=None, filter_pkg=None, method="auto", **kwargs):
         """
         Bandpass filter constructor.
 
@@ -1263,8 +2263,11 @@ class BandpassFilter(Operation):
             [0.5*center_frequency, 1.5*center_frequency].
         :param filter_type: one of "butter" (for Butterworth coefficients)
             or one of windows provided by scipy.signal.get_window
+        :param method: convolution method: "direct", "fft" (overlap-save)
+            or "auto" (selected basing on the number of taps and samples)
         """
         self.taps = None
+        self.method = method
         self.order = order
         self.bound_l, self.bound_r = bounds
         self.filter_type = filter_type
@@ -1295,16 +2298,19 @@ class BandpassFilter(Operation):
                 **self.kwargs
             )
         self.taps = self.xp.asarray(taps).astype(self.xp.float32)
+        self.convolution = _Convolution1D(
+            taps, n_samples=const_metadata.input_shape[-1],
+            num_pkg=self.xp, filter_pkg=self.filter_pkg, method=self.method)
         return const_metadata
 
     def process(self, data):
-        result = self.filter_pkg.convolve1d(data, self.taps, axis=-1,
-                                            mode='constant')
-        return result
+        return self.convolution(data)
 
 
 class FirFilter(Operation):
 
+    _output_buffers = ("fir_output_buffer",)
+
     def __init__(self, taps, num_pkg=None, filter_pkg=None):
         """
         Bandpass filter constructor.
@@ -1336,7 +2342,7 @@ class FirFilter(Operation):
         if total_n_samples == 0:
             raise ValueError("Empty array is not supported")
 
-        fir_output_buffer = cp.zeros(const_metadata.input_shape, dtype=cp.float32)
+        self.fir_output_buffer = cp.zeros(const_metadata.input_shape, dtype=cp.float32)
         from arrus.utils.fir import (
             run_fir_int16,
             get_default_grid_block_size_fir_int16,
@@ -1352,10 +2358,10 @@ class FirFilter(Operation):
             data = cp.ascontiguousarray(data)
             run_fir_int16(
                 grid_size, block_size,
-                (fir_output_buffer, data, n_samples,
+                (self.fir_output_buffer, data, n_samples,
                  total_n_samples, self.taps, n_taps),
                 shared_memory_size)
-            return fir_output_buffer
+            return self.fir_output_buffer
 
         self.convolve1d_func = gpu_convolve1d
         return const_metadata.copy(dtype=self.xp.float32)
@@ -1373,28 +2379,33 @@ class Filter(Operation):
     Currently only FIR filter is available.
     """
 
-    def __init__(self, taps, num_pkg=None, filter_pkg=None):
+    def __init__(self, taps, num_pkg=None, filter_pkg=None, method="auto"):
         """
         Bandpass filter constructor.
 
         :param taps: filter feedforward coefficients
+        :param method: convolution method: "direct", "fft" (overlap-save)
+            or "auto" (selected basing on the number of taps and samples)
         """
         self.taps = taps
         self.xp = num_pkg
         self.filter_pkg = filter_pkg
+        self.method = method
 
     def set_pkgs(self, num_pkg, filter_pkg, **kwargs):
         self.xp = num_pkg
         self.filter_pkg = filter_pkg
 
     def prepare(self, const_metadata: arrus.metadata.ConstMetadata):
-        self.taps = self.xp.asarray(self.taps).astype(self.xp.float32)
+        taps = np.asarray(_to_host(self.taps))
+        self.taps = self.xp.asarray(taps).astype(self.xp.float32)
+        self.convolution = _Convolution1D(
+            taps, n_samples=const_metadata.input_shape[-1],
+            num_pkg=self.xp, filter_pkg=self.filter_pkg, method=self.method)
         return const_metadata
 
     def process(self, data):
-        result = self.filter_pkg.convolve1d(data, self.taps, axis=-1,
-                                            mode='constant')
-        return result
+        return self.convolution(data)
 
 
 class QuadratureDemodulation(Operation):
@@ -1402,6 +2413,8 @@ class QuadratureDemodulation(Operation):
     Quadrature demodulation (I/Q decomposition).
     """
 
+    _output_buffers = ("_output",)
+
     def __init__(self, num_pkg=None):
         self.mod_factor = None
         self.xp = num_pkg
@@ -1424,17 +2437,33 @@ class QuadratureDemodulation(Operation):
         self.mod_factor = (2 * xp.cos(-2 * xp.pi * fc * t)
                            + 2 * xp.sin(-2 * xp.pi * fc * t) * 1j)
         self.mod_factor = self.mod_factor.astype(xp.complex64)
+        output_shape = np.broadcast_shapes(self.mod_factor.shape, input_shape)
+        self._output = xp.zeros(output_shape, dtype=xp.complex64)
         return const_metadata.copy(is_iq_data=True, dtype="complex64")
 
     def process(self, data):
-        return self.mod_factor * data
+        return self.xp.multiply(self.mod_factor, data, out=self._output)
 
 
 class DigitalDownConversion(Operation):
     """
     IQ demodulation, decimation.
+
+    The quadrature demodulation, low-pass FIR filtering and decimation are
+    fused into a single step: instead of demodulating the input signal, the
+    filter coefficients are modulated, i.e.:
+
+    y[k] = 2*exp(-1j*w*(k*D+s)) * sum_j (h[j]*exp(1j*w*j)) * x[k*D+s-j]
+
+    where w = 2*pi*fc/fs, D is the decimation factor and s = len(h)//2,
+    so the complex filter is applied directly to the real input data and
+    only the samples kept after decimation are computed. No full-rate complex
+    arrays are created. On GPU, a dedicated CUDA kernel is used for int16
+    and float32 input data.
     """
 
+    _output_buffers = ("_output",)
+
     def __init__(self, decimation_factor, fir_params=None,
                  fir_cutoff_relative=1.0, fir_order=15, fir_type="hamming"):
         self.decimation_factor = decimation_factor
@@ -1448,7 +2477,6 @@ class DigitalDownConversion(Operation):
         self.filter_pkg = filter_pkg
 
     def prepare(self, const_metadata):
-        self.demodulator = QuadratureDemodulation()
         center_frequency = _get_unique_center_frequency(const_metadata.context.sequence)
         sampling_frequency = const_metadata.data_description.sampling_frequency
         cutoff_freq = center_frequency * self.fir_cutoff_relative
@@ -1460,17 +2488,48 @@ class DigitalDownConversion(Operation):
             pass_zero="lowpass",
             **self.fir_params
         )
-        self.decimator = Decimation(
-            self.decimation_factor,
-            filter_coeffs=fir_coefficients, filter_type="fir")
-        self.demodulator.set_pkgs(num_pkg=self.xp, filter_pkg=self.filter_pkg)
-        self.decimator.set_pkgs(num_pkg=self.xp, filter_pkg=self.filter_pkg)
-        const_metadata = self.demodulator.prepare(const_metadata)
-        return self.decimator.prepare(const_metadata)
+        input_shape = const_metadata.input_shape
+        n_samples = input_shape[-1]
+        if n_samples == 0:
+            raise ValueError("Empty array is not accepted.")
+        d = self.decimation_factor
+        n_output_samples = math.ceil(n_samples/d)
+        # Modulated filter taps and the output sample phasor.
+        n_taps = len(fir_coefficients)
+        shift = n_taps // 2
+        omega = 2*np.pi*center_frequency/sampling_frequency
+        taps = fir_coefficients*np.exp(1j*omega*np.arange(n_taps))
+        phasor = 2*np.exp(-1j*omega*(np.arange(n_output_samples)*d + shift))
+        self._shift = shift
+        self._taps_re = self.xp.asarray(taps.real.astype(np.float32))
+        self._taps_im = self.xp.asarray(taps.imag.astype(np.float32))
+        self._phasor = self.xp.asarray(phasor.astype(np.complex64))
+        self._convolution = _Convolution1D(
+            taps, n_samples=n_samples, decimation_factor=d,
+            num_pkg=self.xp, filter_pkg=self.filter_pkg,
+            method="polyphase", output_dtype=np.complex64)
+        output_shape = input_shape[:-1] + (n_output_samples, )
+        self._is_gpu = self.xp is not np
+        self._output = None
+        if self._is_gpu:
+            self._output = self.xp.zeros(output_shape, dtype=self.xp.complex64)
+        new_signal_description = dataclasses.replace(
+            const_metadata.data_description,
+            sampling_frequency=sampling_frequency/d)
+        return const_metadata.copy(data_desc=new_signal_description,
+                                   input_shape=output_shape,
+                                   is_iq_data=True, dtype="complex64")
 
     def process(self, data):
-        data = self.demodulator.process(data)
-        return self.decimator.process(data)
+        if self._is_gpu and data.dtype in (self.xp.int16, self.xp.float32):
+            import arrus.utils.ddc
+            return arrus.utils.ddc.ddc(
+                data, self._output, taps_re=self._taps_re,
+                taps_im=self._taps_im, phasor=self._phasor,
+                decimation_factor=self.decimation_factor, shift=self._shift)
+        result = self._convolution(data)
+        result *= self._phasor
+        return result
 
 
 class Decimation(Operation):
@@ -1481,13 +2540,18 @@ class Decimation(Operation):
     """
 
     def __init__(self, decimation_factor, filter_type="cic",
-                 filter_coeffs=None, cic_order=2, num_pkg=None):
+                 filter_coeffs=None, cic_order=2, num_pkg=None,
+                 method="auto"):
         """
         Decimation.
 
         :param decimation_factor: decimation factor to apply
+        :param method: convolution method: "direct" (filter all samples,
+            then downsample), "fft" (overlap-save), "polyphase" (compute only
+            the samples kept after downsampling) or "auto"
         """
         self.decimation_factor = decimation_factor
+        self.method = method
         self.xp = num_pkg
         if filter_type == "cic":
             self.filter_coeffs = self._get_cic_filter_coeffs(
@@ -1521,17 +2585,19 @@ class Decimation(Operation):
             sampling_frequency=new_fs)
         input_shape = const_metadata.input_shape
         n_samples = input_shape[-1]
-        self.filter_coeffs = self.xp.asarray(self.filter_coeffs)
+        filter_coeffs = np.asarray(_to_host(self.filter_coeffs))
+        self.filter_coeffs = self.xp.asarray(filter_coeffs)
         self.filter_coeffs = self.filter_coeffs.astype(self.xp.float32)
+        self.convolution = _Convolution1D(
+            filter_coeffs, n_samples=n_samples,
+            decimation_factor=self.decimation_factor,
+            num_pkg=self.xp, filter_pkg=self.filter_pkg, method=self.method)
         output_shape = input_shape[:-1] + (math.ceil(n_samples / self.decimation_factor),)
         return const_metadata.copy(data_desc=new_signal_description,
                                    input_shape=output_shape)
 
     def process(self, data):
-        fir_output = self.filter_pkg.convolve1d(
-            data, self.filter_coeffs, axis=-1, mode='constant')
-        data_out = fir_output[..., 0::self.decimation_factor]
-        return data_out
+        return self.convolution(data)
 
 
 
@@ -1571,22 +2637,35 @@ class RxBeamforming(Operation):
     - tx and rx aperture sizes are equal and constant (i.e. doesn't change from TX/RX to TX/RX),
     - tx and rx aperture centers are equal.
     """
-    X_ELEM_CONST_POOL = GpuConstMemoryPool(RX_BEAMFORMING_KERNEL_MODULE, "xElemConst", 256, np.float32)
-    Z_ELEM_CONST_POOL = GpuConstMemoryPool(RX_BEAMFORMING_KERNEL_MODULE, "zElemConst", 256, np.float32)
-    ANGLE_ELEM_CONST_POOL = GpuConstMemoryPool(RX_BEAMFORMING_KERNEL_MODULE, "angleElemConst", 256, np.float32)
-
-    def close(self):
-        # Clean-up pool.
-        RxBeamforming.X_ELEM_CONST_POOL = GpuConstMemoryPool(RX_BEAMFORMING_KERNEL_MODULE, "xElemConst", 256, np.float32)
-        RxBeamforming.Z_ELEM_CONST_POOL = GpuConstMemoryPool(RX_BEAMFORMING_KERNEL_MODULE, "zElemConst", 256, np.float32)
-        RxBeamforming.ANGLE_ELEM_CONST_POOL = GpuConstMemoryPool(RX_BEAMFORMING_KERNEL_MODULE, "angleElemConst", 256, np.float32)
+    _output_buffers = ("output_buffer",)
 
     def __init__(self, num_pkg=None):
-        import cupy as cp
-        self.num_pkg = cp
+        self.num_pkg = num_pkg
+        self._executor = None
+        self._parameters = None
+        self._elem_const = None
+
+    def set_pkgs(self, num_pkg, **kwargs):
+        self.num_pkg = num_pkg
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._elem_const is not None:
+            self._get_const_allocator().free(self._elem_const)
+            self._elem_const = None
+
+    def _get_const_allocator(self):
+        # x, z, angle tables, 256 elements max.
+        return arrus.utils.const_memory.get_gpu_allocator(
+            RX_BEAMFORMING_KERNEL_MODULE, "elemConst", 3*256, np.float32)
 
     def prepare(self, const_metadata):
-        import cupy as cp
+        if self.num_pkg is None:
+            import cupy as cp
+            self.num_pkg = cp
+        xp = self.num_pkg
         probe_model = get_unique_probe_model(const_metadata)
 
         fs = const_metadata.data_description.sampling_frequency
@@ -1663,33 +2742,33 @@ class RxBeamforming(Operation):
 
         # Validate
         # TODO make sure, rx and tx aperture center elements and sizes are all the same
-        self._kernel_module = RX_BEAMFORMING_KERNEL_MODULE
-        self._kernel = self._kernel_module.get_function("beamform")
         medium = const_metadata.context.medium
         if c is None:
             c = medium.speed_of_sound
         self.n_seq, self.n_tx, self.n_rx, self.n_samples = const_metadata.input_shape
-        self.output_buffer = cp.zeros((self.n_seq, self.n_tx, self.n_samples), dtype=cp.complex64)
+        self.output_buffer = xp.zeros((self.n_seq, self.n_tx, self.n_samples), dtype=xp.complex64)
 
-        self.tx_angles = cp.asarray(angles, dtype=cp.float32)
+        self.tx_angles = xp.asarray(angles, dtype=xp.float32)
         device_fs = const_metadata.context.device.sampling_frequency
         acq_fs = (device_fs / downsampling_factor)
         start_sample, end_sample = rx_sample_range
         init_delay -= start_sample / acq_fs
-        init_delay += rx_time_offset + _get_lens_compensation_time(
-            probe_model=probe_model,
-            assumed_speed_of_sound=c
-        )
-
-        lambd = c/fc
-        max_tang = abs(math.tan(math.asin(min(1, 2/3*lambd/probe_model.pitch))))
-        self.fc = cp.float32(fc)
-        self.fs = cp.float32(fs)
-        self.c = cp.float32(c)
+        init_delay += rx_time_offset
+        # The initial delay, without the lens compensation time (depends
+        # on the speed of sound).
+        self._init_delay = init_delay
+        self._probe_model = probe_model
+        self._center_frequency = fc
+
+        self.fc = np.float32(fc)
+        self.fs = np.float32(fs)
         # the ACQ sampling frequency.
-        self.start_time = cp.float32(start_sample/acq_fs)
-        self.init_delay = cp.float32(init_delay)
-        self.max_tang = cp.float32(max_tang)
+        self.start_time = np.float32(start_sample/acq_fs)
+        # c, init_delay, max_tang
+        self._parameters = _ParameterBuffer(
+            params={"speed_of_sound": np.float32(c)},
+            compute_state=self._get_parameter_state)
+        vars(self).update(self._get_parameter_state({"speed_of_sound": c}))
         sample_block_size = min(self.n_samples, 16)
         scanline_block_size = min(self.n_tx, 16)
         n_seq_block_size = min(self.n_seq, 4)
@@ -1713,17 +2792,64 @@ class RxBeamforming(Operation):
             z_elem = cr * np.cos(angle_elem)
             z_elem = z_elem - np.min(z_elem)
 
-        # check if there is enough constant memory
-        device_props = cp.cuda.runtime.getDeviceProperties(0)
-        if device_props["totalConstMem"] < 256 * 3 * 4:  # 3 float32 arrays, 256 elements max
-            raise ValueError("There is not enough constant memory available!")
-        self.x_elem_const_offset = RxBeamforming.X_ELEM_CONST_POOL.reserve_new_array(np.squeeze(x_elem))
-        self.z_elem_const_offset = RxBeamforming.Z_ELEM_CONST_POOL.reserve_new_array(np.squeeze(z_elem))
-        self.angle_elem_const_offset = RxBeamforming.ANGLE_ELEM_CONST_POOL.reserve_new_array(np.squeeze(angle_elem))
+        if xp is np:
+            self._x_elem = np.squeeze(x_elem)
+            self._z_elem = np.squeeze(z_elem)
+            self._angle_elem = np.squeeze(angle_elem)
+            self._executor = concurrent.futures.ThreadPoolExecutor()
+            self.process = self._process_cpu
+            return const_metadata.copy(input_shape=self.output_buffer.shape)
+
+        self._kernel_module = RX_BEAMFORMING_KERNEL_MODULE
+        self._kernel = self._kernel_module.get_function("beamform")
+        if self._elem_const is not None:
+            self._get_const_allocator().free(self._elem_const)
+        self._elem_const = self._get_const_allocator().allocate(np.concatenate(
+            (np.squeeze(x_elem), np.squeeze(z_elem), np.squeeze(angle_elem))))
 
         return const_metadata.copy(input_shape=self.output_buffer.shape)
 
+    def _get_parameter_state(self, params):
+        c = params["speed_of_sound"]
+        lambd = c/self._center_frequency
+        max_tang = abs(math.tan(math.asin(min(1, 2/3*lambd/self._probe_model.pitch))))
+        init_delay = self._init_delay + _get_lens_compensation_time(
+            probe_model=self._probe_model,
+            assumed_speed_of_sound=c
+        )
+        return dict(
+            c=np.float32(c),
+            init_delay=np.float32(init_delay),
+            max_tang=np.float32(max_tang)
+        )
+
+    def set_parameter(self, key: str, value: Sequence[Number]):
+        if key != "speed_of_sound":
+            raise ValueError(f"{type(self).__name__} has no {key} parameter.")
+        _get_parameter_buffer(self).set(
+            key, _get_speed_of_sound_parameter(value))
+
+    def get_parameter(self, key: str) -> Sequence[Number]:
+        if key != "speed_of_sound":
+            raise ValueError(f"{type(self).__name__} has no {key} parameter.")
+        return _get_parameter_buffer(self).get(key)
+
+    def get_parameters(self) -> Dict[str, ParameterDef]:
+        return {
+            "speed_of_sound": _get_speed_of_sound_parameter_def()
+        }
+
+    def _process_cpu(self, data):
+        self._parameters.apply(self)
+        return arrus.utils.beamforming_cpu.rx_beamform(
+            self.output_buffer, data,
+            tx_angles=self.tx_angles, init_delay=self.init_delay,
+            start_time=self.start_time, c=self.c, fs=self.fs, fc=self.fc,
+            max_tang=self.max_tang, x_elem=self._x_elem, z_elem=self._z_elem,
+            angle_elem=self._angle_elem, executor=self._executor)
+
     def process(self, data):
+        self._parameters.apply(self)
         data = self.num_pkg.ascontiguousarray(data)
         params = (
             self.output_buffer, data,
@@ -1732,9 +2858,8 @@ class RxBeamforming(Operation):
             self.init_delay, self.start_time,
             self.c, self.fs, self.fc,
             self.max_tang,
-            self.x_elem_const_offset,
-            self.z_elem_const_offset,
-            self.angle_elem_const_offset,
+            _get_const_offset(self._elem_const),
+            self._elem_const.array,
         )
         self._kernel(self.grid_size, self.block_size, params)
         return self.output_buffer
@@ -1742,6 +2867,9 @@ class RxBeamforming(Operation):
 
 class RxBeamformingLin(Operation):
 
+    _output_buffers = ("_output",)
+    _scratch_buffers = ("buffer",)
+
     def __init__(self, num_pkg=None):
         import cupy as cp
         self.delays = None
@@ -1794,6 +2922,8 @@ class RxBeamformingLin(Operation):
         self.buffer = self.xp.zeros(
             (self.n_seq * self.n_tx, self.n_rx * self.n_samples),
             dtype=buffer_dtype)
+        self._output = self.xp.zeros(
+            (self.n_seq, self.n_tx, self.n_samples), dtype=buffer_dtype)
 
         # -- Delays
         acq_fs = (const_metadata.context.device.sampling_frequency
@@ -1878,15 +3008,16 @@ class RxBeamformingLin(Operation):
         return const_metadata.copy(input_shape=(self.n_seq, self.n_tx, self.n_samples))
 
     def process(self, data):
-        data = data.copy().reshape(self.n_seq * self.n_tx, self.n_rx * self.n_samples)
+        data = self.xp.ascontiguousarray(data).reshape(
+            self.n_seq * self.n_tx, self.n_rx * self.n_samples)
 
         self.interp1d_func(data, self.delays, self.buffer)
         out = self.buffer.reshape((self.n_seq, self.n_tx, self.n_rx, self.n_samples))
         if self.is_iq:
-            out = out * self.iq_correction
-        out = out * self.rx_apodization
-        out = self.xp.sum(out, axis=2)
-        return out.reshape((self.n_seq, self.n_tx, self.n_samples))
+            self.xp.multiply(out, self.iq_correction, out=out)
+        self.xp.multiply(out, self.rx_apodization, out=out)
+        self.xp.sum(out, axis=2, out=self._output)
+        return self._output
 
 
 class EnvelopeDetection(Operation):
@@ -1896,6 +3027,8 @@ class EnvelopeDetection(Operation):
     Currently this op works only for I/Q data (complex64).
     """
 
+    _output_buffers = ("_output",)
+
     def __init__(self, num_pkg=None):
         self.xp = num_pkg
 
@@ -1907,13 +3040,14 @@ class EnvelopeDetection(Operation):
         n_samples = const_metadata.input_shape[-1]
         if n_samples == 0:
             raise ValueError("Empty array is not accepted.")
+        self._output = self.xp.zeros(const_metadata.input_shape, dtype=self.xp.float32)
         return const_metadata.copy(is_iq_data=False, dtype="float32")
 
     def process(self, data):
         if data.dtype != self.xp.complex64:
             raise ValueError(
                 f"Data type {data.dtype} is currently not supported.")
-        return self.xp.abs(data)
+        return self.xp.abs(data, out=self._output)
 
 
 class Transpose(Operation):
@@ -1933,27 +3067,134 @@ class Transpose(Operation):
         self.xp = num_pkg
 
     def prepare(self, const_metadata):
-        input_shape = const_metadata.input_shape
-        input_spacing = const_metadata.data_description.spacing
-        axes = list(range(len(input_shape)))[::-1] if self.axes is None else self.axes
-        output_shape = tuple(input_shape[ax] for ax in axes)
-        if input_spacing is not None:
-            output_spacing = tuple(input_spacing.coordinates[ax] for ax in axes)
-            new_signal_description = dataclasses.replace(
-                const_metadata.data_description,
-                spacing=arrus.metadata.Grid(
-                    coordinates=output_spacing
-                )
-            )
-            return const_metadata.copy(
-                input_shape=output_shape,
-                data_desc=new_signal_description
+        return _get_transposed_metadata(const_metadata, self.axes)
+
+    def process(self, data):
+        return self.xp.transpose(data, self.axes)
+
+
+def _get_transpose_axes(axes, ndim):
+    """
+    Returns the permutation of axes applied by Transpose(axes)
+    (None means reversing the order of axes).
+    """
+    return tuple(range(ndim))[::-1] if axes is None else tuple(axes)
+
+
+def _get_transposed_metadata(const_metadata, axes):
+    """
+    Returns metadata describing the data transposed with the given axes
+    (see Transpose).
+    """
+    input_shape = const_metadata.input_shape
+    input_spacing = const_metadata.data_description.spacing
+    axes = _get_transpose_axes(axes, len(input_shape))
+    output_shape = tuple(input_shape[ax] for ax in axes)
+    if input_spacing is not None:
+        output_spacing = tuple(input_spacing.coordinates[ax] for ax in axes)
+        new_signal_description = dataclasses.replace(
+            const_metadata.data_description,
+            spacing=arrus.metadata.Grid(
+                coordinates=output_spacing
             )
+        )
+        return const_metadata.copy(
+            input_shape=output_shape,
+            data_desc=new_signal_description
+        )
+    else:
+        return const_metadata.copy(input_shape=output_shape)
+
+
+def _get_linear_interpolation_table(coords, input_shape):
+    """
+    Returns the gather indices and weights for the bilinear interpolation
+    of a 2D input array at the given points.
+
+    The result is equivalent to map_coordinates(order=1, mode="constant",
+    cval=0.0), i.e. points outside the input grid are set to 0.
+
+    :param coords: (2, ...) array of the input array coordinates
+      (row, column) for each output point
+    :param input_shape: shape of the input array (n rows, n columns)
+    :return: a pair: (4, n_points) int32 indices to the flattened input array,
+      (4, n_points) float32 weights of the input values
+    """
+    n_rows, n_cols = input_shape
+    rows = np.asarray(coords[0], dtype=np.float64).reshape(-1)
+    cols = np.asarray(coords[1], dtype=np.float64).reshape(-1)
+    is_valid = (rows >= 0) & (rows <= n_rows-1) & (cols >= 0) & (cols <= n_cols-1)
+    rows = np.where(is_valid, rows, 0)
+    cols = np.where(is_valid, cols, 0)
+    r0 = np.clip(np.floor(rows).astype(np.int64), 0, max(n_rows-2, 0))
+    c0 = np.clip(np.floor(cols).astype(np.int64), 0, max(n_cols-2, 0))
+    r1 = np.minimum(r0+1, n_rows-1)
+    c1 = np.minimum(c0+1, n_cols-1)
+    wr = rows-r0
+    wc = cols-c0
+    indices = np.stack([r0*n_cols+c0, r0*n_cols+c1, r1*n_cols+c0, r1*n_cols+c1])
+    weights = np.stack([(1-wr)*(1-wc), (1-wr)*wc, wr*(1-wc), wr*wc])
+    weights[:, ~is_valid] = 0.0
+    return indices.astype(np.int32), weights.astype(np.float32)
+
+
+class _BatchLinearInterpolator:
+    """
+    Bilinear interpolation of a batch of 2D frames at the fixed points.
+
+    The interpolation indices and weights are computed once, in the
+    constructor. Then all the frames are interpolated at once, either by
+    gathering the 4 neighbouring input samples of each output point, or
+    by multiplying the (n output points, n input samples) CSR sparse matrix
+    by the batch of frames.
+
+    :param coords: (2, ...) array of the input frame coordinates
+      (row, column) for each output point; numpy array
+    :param input_shape: shape of the input frame (n rows, n columns)
+    :param num_pkg: numerical package to use (numpy or cupy)
+    :param use_sparse_matrix: whether the sparse matrix-dense matrix product
+      should be used
+    """
+
+    def __init__(self, coords, input_shape, num_pkg, use_sparse_matrix=False):
+        self.num_pkg = num_pkg
+        self.use_sparse_matrix = use_sparse_matrix
+        indices, weights = _get_linear_interpolation_table(coords, input_shape)
+        if use_sparse_matrix:
+            import scipy.sparse
+            n_points = indices.shape[1]
+            rows = np.tile(np.arange(n_points), (4, 1))
+            # NOTE: duplicate (row, column) entries are summed up.
+            matrix = scipy.sparse.csr_matrix(
+                (weights.reshape(-1), (rows.reshape(-1), indices.reshape(-1))),
+                shape=(n_points, int(np.prod(input_shape))), dtype=np.float32)
+            matrix.eliminate_zeros()
+            if num_pkg is not np:
+                import cupyx.scipy.sparse
+                matrix = cupyx.scipy.sparse.csr_matrix(matrix)
+            self.matrix = matrix
         else:
-            return const_metadata.copy(input_shape=output_shape)
+            self.indices = num_pkg.asarray(indices)
+            self.weights = num_pkg.asarray(weights)
 
-    def process(self, data):
-        return self.xp.transpose(data, self.axes)
+    def __call__(self, data, output):
+        """
+        Interpolates the (n_frames, n_rows, n_columns) data, writes the
+        result to the output (n_frames, ...) array.
+        """
+        n_frames = data.shape[0]
+        data = data.reshape(n_frames, -1)
+        output_flat = output.reshape(n_frames, -1)
+        if self.use_sparse_matrix:
+            data = data.astype(self.matrix.dtype, copy=False)
+            # (n_points, n_frames)
+            result = self.matrix @ data.T
+            output_flat[:] = result.T
+        else:
+            # (n_frames, 4, n_points)
+            samples = data[:, self.indices] * self.weights
+            self.num_pkg.sum(samples, axis=1, out=output_flat)
+        return output
 
 
 class ScanConversion(Operation):
@@ -1963,32 +3204,79 @@ class ScanConversion(Operation):
     Currently linear interpolation is used by default, values outside
     the input mesh will be set to 0.0.
 
-    Currently, the op is (mostly) implemented for CPU only.
-
-    Currently, the op is available only for convex probes.
+    For linear and convex arrays, all the frames are interpolated at once,
+    using the gather indices and weights precomputed in the prepare step.
+    Optionally, the precomputed mapping can be applied as a CSR sparse matrix
+    (n output pixels, n input samples) multiplied by the batch of frames.
     """
 
-    def __init__(self, x_grid, z_grid):
+    _output_buffers = ("buffer", "output_buffer")
+
+    def __init__(self, x_grid, z_grid, use_sparse_matrix=False):
         """
         Scan converter constructor.
 
         :param x_grid: a vector of grid points along OX axis [m]
         :param z_grid: a vector of grid points along OZ axis [m]
+        :param use_sparse_matrix: whether the interpolation should be applied
+          as a sparse matrix-dense matrix product (linear and convex arrays
+          only)
         """
+        self.use_sparse_matrix = use_sparse_matrix
         self.dst_points = None
         self.dst_shape = None
         self.x_grid = x_grid.reshape(1, -1)
         self.z_grid = z_grid.reshape(1, -1)
         self.is_gpu = False
         self.num_pkg = None
+        self._parameters = None
 
     def set_pkgs(self, num_pkg, **kwargs):
         if num_pkg != np:
             self.is_gpu = True
         self.num_pkg = num_pkg
 
+    def set_parameter(self, key: str, value: Sequence[Number]):
+        """
+        Sets the output grid: x_grid or z_grid (the number of grid points
+        cannot be changed).
+
+        The new interpolation table is computed in the calling thread and
+        used starting from the next frame. Note: the output metadata
+        describes the grid set in the prepare step.
+        """
+        if key not in ("x_grid", "z_grid"):
+            raise ValueError(f"{type(self).__name__} has no {key} parameter.")
+        size = getattr(self, key).size
+        _get_parameter_buffer(self).set(
+            key, _get_grid_parameter(key, value, size))
+
+    def get_parameter(self, key: str) -> Sequence[Number]:
+        if key not in ("x_grid", "z_grid"):
+            raise ValueError(f"{type(self).__name__} has no {key} parameter.")
+        return _get_parameter_buffer(self).get(key)
+
+    def get_parameters(self) -> Dict[str, ParameterDef]:
+        return {
+            "x_grid": _get_grid_parameter_def("x_grid", self.x_grid.size),
+            "z_grid": _get_grid_parameter_def("z_grid", self.z_grid.size)
+        }
+
+    def _get_parameter_state(self, params):
+        # Only the attributes that depend on the output grid are computed
+        # (the output buffers remain the same).
+        state = self._get_grid_state(self._input_metadata, params["x_grid"],
+                                     params["z_grid"])
+        _synchronize(self.num_pkg)
+        return state
+
     def prepare(self, const_metadata: arrus.metadata.ConstMetadata):
         probe = get_unique_probe_model(const_metadata)
+        self._input_metadata = const_metadata
+        self._parameters = _ParameterBuffer(
+            params={"x_grid": np.asarray(self.x_grid).reshape(-1),
+                    "z_grid": np.asarray(self.z_grid).reshape(-1)},
+            compute_state=self._get_parameter_state)
 
         new_signal_description = dataclasses.replace(
             const_metadata.data_description,
@@ -2002,9 +3290,11 @@ class ScanConversion(Operation):
         if probe.is_convex_array():
             if probe.curvature_radius > 0:
                 self.process = self._process_convex
+                self._get_grid_state = self._get_convex_grid_state
                 return self._prepare_convex(const_metadata)
             else:
                 self.process = self._process_concave
+                self._get_grid_state = self._get_concave_grid_state
                 return self._prepare_concave(const_metadata)
         else:
             # linear array or phased array
@@ -2020,26 +3310,34 @@ class ScanConversion(Operation):
             # - multiple different angles
             if len(tx_centers) == 1 and len(tx_angles) > 1:
                 self.process = self._process_phased_array
+                self._get_grid_state = self._get_phased_array_grid_state
                 return self._prepare_phased_array(const_metadata)
             # Linear array scanning:
             # - single transmit angle (equal 0)
             # - multiple different aperture positions
             elif len(tx_centers) > 1 and len(tx_angles) == 1:
                 self.process = self._process_linear_array
+                self._get_grid_state = self._get_linear_array_grid_state
                 return self._prepare_linear_array(const_metadata)
             else:
                 raise ValueError("The given combination of TX/RX parameters is "
                                  "not supported by ScanConversion")
 
     def _prepare_linear_array(self, const_metadata: arrus.metadata.ConstMetadata):
-        # Determine interpolation function.
-        if self.num_pkg == np:
-            raise ValueError("Currently scan conversion for linear array "
-                             "probe is implemented only for GPU devices.")
-        import cupy as cp
-        import cupyx.scipy.ndimage
-        self.interp_function = cupyx.scipy.ndimage.map_coordinates
-        self.n_frames, n_samples, n_scanlines = const_metadata.input_shape
+        self.n_frames = const_metadata.input_shape[0]
+        vars(self).update(self._get_linear_array_grid_state(
+            const_metadata, self.x_grid, self.z_grid))
+        self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
+        self.buffer = self.num_pkg.zeros(self.dst_shape, dtype=self.num_pkg.float32)
+        return const_metadata.copy(input_shape=self.dst_shape)
+
+    def _get_linear_array_grid_state(self, const_metadata, x_grid, z_grid):
+        """
+        Returns the attributes that depend on the output grid.
+        """
+        x_grid = x_grid.reshape(1, -1)
+        z_grid = z_grid.reshape(1, -1)
+        _, n_samples, n_scanlines = const_metadata.input_shape
         seq = const_metadata.context.sequence
         if not isinstance(seq, arrus.ops.imaging.LinSequence):
             raise ValueError("Scan conversion works only with LinSequence.")
@@ -2072,35 +3370,51 @@ class ScanConversion(Operation):
         input_z_grid_origin = start_sample / acq_fs * c / 2
         input_z_grid_diff = c / (fs * 2)
         # Map x_grid and z_grid to the RF frame coordinates.
-        interp_x_grid = (self.x_grid - input_x_grid_origin) / input_x_grid_diff
-        interp_z_grid = (self.z_grid - input_z_grid_origin) / input_z_grid_diff
-        self._interp_mesh = cp.asarray(np.meshgrid(interp_z_grid, interp_x_grid, indexing="ij"))
-
-        self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
-        self.buffer = cp.zeros(self.dst_shape, dtype=cp.float32)
-        return const_metadata.copy(input_shape=self.dst_shape)
+        interp_x_grid = (x_grid - input_x_grid_origin) / input_x_grid_diff
+        interp_z_grid = (z_grid - input_z_grid_origin) / input_z_grid_diff
+        interp_mesh = np.meshgrid(interp_z_grid, interp_x_grid, indexing="ij")
+        return dict(
+            x_grid=x_grid, z_grid=z_grid,
+            _interpolator=self._get_interpolator(
+                interp_mesh, (n_samples, n_scanlines))
+        )
 
     def _process_linear_array(self, data):
-        for i in range(self.n_frames):
-            self.buffer[i] = self.interp_function(data[i], self._interp_mesh, order=1)
-        return self.buffer
+        self._parameters.apply(self)
+        return self._interpolate(data, self.buffer)
+
+    def _get_interpolator(self, coords, input_shape):
+        return _BatchLinearInterpolator(
+            coords, input_shape, num_pkg=self.num_pkg,
+            use_sparse_matrix=self.use_sparse_matrix)
+
+    def _interpolate(self, data, output):
+        return self._interpolator(data, output)
 
     def _prepare_convex(self, const_metadata: arrus.metadata.ConstMetadata):
-        if self.num_pkg is np:
-            self.interpolator = scipy.ndimage.map_coordinates
-        else:
-            import cupyx.scipy.ndimage
-            self.interpolator = cupyx.scipy.ndimage.map_coordinates
+        self.n_frames = const_metadata.input_shape[0]
+        vars(self).update(self._get_convex_grid_state(
+            const_metadata, self.x_grid, self.z_grid))
+        self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
+        self.output_buffer = self.num_pkg.zeros(self.dst_shape, dtype=np.float32)
+        return const_metadata.copy(input_shape=self.dst_shape)
+
+    def _get_convex_grid_state(self, const_metadata, x_grid, z_grid):
+        """
+        Returns the attributes that depend on the output grid.
+        """
         probe = get_unique_probe_model(const_metadata)
         medium = const_metadata.context.medium
         data_desc = const_metadata.data_description
-        
+        x_grid = x_grid.reshape(1, -1)
+        z_grid = z_grid.reshape(1, -1)
+
         if not self.num_pkg == np:
             import cupy as cp
-            self.x_grid = self.num_pkg.asarray(self.x_grid).astype(cp.float32)
-            self.z_grid = self.num_pkg.asarray(self.z_grid).astype(cp.float32)
+            x_grid = self.num_pkg.asarray(x_grid).astype(cp.float32)
+            z_grid = self.num_pkg.asarray(z_grid).astype(cp.float32)
 
-        self.n_frames, n_samples, n_scanlines = const_metadata.input_shape
+        _, n_samples, n_scanlines = const_metadata.input_shape
         seq = const_metadata.context.sequence
 
         acq_fs = (const_metadata.context.device.sampling_frequency
@@ -2120,20 +3434,18 @@ class ScanConversion(Operation):
             seq.tx_aperture_center_element, probe)
 
         element_pos_z = probe.element_pos_z.reshape(1, -1)
-        self.radGridIn = ((start_sample / acq_fs + self.num_pkg.arange(0, n_samples)/fs) * c/2)
+        radGridIn = ((start_sample / acq_fs + self.num_pkg.arange(0, n_samples)/fs) * c/2)
 
         # Move the z_grid coordinates to coordinate system located in the
         # probe curvature center.
-        self.z_grid = self.z_grid.T + probe.curvature_radius - self.num_pkg.max(element_pos_z)
-        self.azimuthGridIn = tx_ap_cent_ang
+        z_grid = z_grid.T + probe.curvature_radius - self.num_pkg.max(element_pos_z)
+        azimuthGridIn = tx_ap_cent_ang
 
-        azimuthGridOut = self.num_pkg.arctan2(self.x_grid, self.z_grid)
+        azimuthGridOut = self.num_pkg.arctan2(x_grid, z_grid)
         # radGridIn starts where the image should start, so w subtract r
-        radGridOut = (self.num_pkg.sqrt(self.x_grid ** 2 + self.z_grid ** 2)
+        radGridOut = (self.num_pkg.sqrt(x_grid ** 2 + z_grid ** 2)
                       - probe.curvature_radius)
 
-        self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
-
         dst_points = self.num_pkg.dstack((radGridOut, azimuthGridOut))
         dst_points = self.num_pkg.transpose(dst_points, axes=(2, 0, 1))
 
@@ -2145,34 +3457,50 @@ class ScanConversion(Operation):
                                  f"got {values}")
             return diffs[0]
 
-        dst_points[0] -= self.radGridIn[0]
-        dst_points[0] /= get_equalized_diff(self.radGridIn,
+        dst_points[0] -= radGridIn[0]
+        dst_points[0] /= get_equalized_diff(radGridIn,
                                             "Input radial distance")
-        dst_points[1] -= self.azimuthGridIn[0]
-        dst_points[1] /= get_equalized_diff(self.azimuthGridIn,
+        dst_points[1] -= azimuthGridIn[0]
+        dst_points[1] /= get_equalized_diff(azimuthGridIn,
                                             "Azimuth angle")
-        self.dst_points = self.num_pkg.asarray(dst_points,
-                                               dtype=self.num_pkg.float32)
-        self.output_buffer = self.num_pkg.zeros(self.dst_shape, dtype=np.float32)
-        return const_metadata.copy(input_shape=self.dst_shape)
+        dst_points = self.num_pkg.asarray(dst_points,
+                                          dtype=self.num_pkg.float32)
+        interp_points = dst_points
+        if self.is_gpu:
+            interp_points = interp_points.get()
+        return dict(
+            x_grid=x_grid, z_grid=z_grid, radGridIn=radGridIn,
+            azimuthGridIn=azimuthGridIn, dst_points=dst_points,
+            _interpolator=self._get_interpolator(
+                interp_points, (n_samples, n_scanlines))
+        )
 
     def _process_convex(self, data):
-        data[np.isnan(data)] = 0.0
-        # TODO do batch-wise processing here
-        for i in range(self.n_frames):
-            self.output_buffer[i] = self.interpolator(data[i],
-                                                      self.dst_points,
-                                                      order=1)
-        return self.output_buffer
+        self._parameters.apply(self)
+        data[self.num_pkg.isnan(data)] = 0.0
+        return self._interpolate(data, self.output_buffer)
 
     def _prepare_concave(self, const_metadata: arrus.metadata.ConstMetadata):
         # Currently CPU processing is supported only
         self.num_pkg = np  
+        self.n_frames = const_metadata.input_shape[0]
+        vars(self).update(self._get_concave_grid_state(
+            const_metadata, self.x_grid, self.z_grid))
+        self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
+        self.output_buffer = self.num_pkg.zeros(self.dst_shape, dtype=np.float32)
+        return const_metadata.copy(input_shape=self.dst_shape)
+
+    def _get_concave_grid_state(self, const_metadata, x_grid, z_grid):
+        """
+        Returns the attributes that depend on the output grid.
+        """
         probe = get_unique_probe_model(const_metadata)
         medium = const_metadata.context.medium
         data_desc = const_metadata.data_description
-        
-        self.n_frames, n_samples, n_scanlines = const_metadata.input_shape
+        x_grid = x_grid.reshape(1, -1)
+        z_grid = z_grid.reshape(1, -1)
+
+        _, n_samples, n_scanlines = const_metadata.input_shape
         seq = const_metadata.context.sequence
 
         acq_fs = (const_metadata.context.device.sampling_frequency
@@ -2191,31 +3519,30 @@ class ScanConversion(Operation):
         tx_ap_cent_ang, _, _ = arrus.kernels.tx_rx_sequence.get_aperture_center(
             seq.tx_aperture_center_element, probe)
 
-        element_pos_z = probe.element_pos_z.reshape(1, -1)
-
         max_sampling_time = (start_sample/acq_fs + n_samples/fs)*c/2
-        self.z_grid = max_sampling_time+abs(probe.curvature_radius)-self.z_grid
-        self.z_grid = self.z_grid.T
+        z_grid = max_sampling_time+abs(probe.curvature_radius)-z_grid
+        z_grid = z_grid.T
 
         # 1 coord system: center of the circle determined by the curvature radius and the probe elements (arc)
-        self.azimuthGridIn = np.flip(tx_ap_cent_ang)
-        azimuthGridOut = self.num_pkg.arctan2(self.x_grid, self.z_grid)
+        azimuthGridIn = np.flip(tx_ap_cent_ang)
+        azimuthGridOut = self.num_pkg.arctan2(x_grid, z_grid)
         
         # 2. coordinate system: aperture's center
-        self.radGridIn = ((start_sample / acq_fs + self.num_pkg.arange(0, n_samples)/fs) * c/2)
+        radGridIn = ((start_sample / acq_fs + self.num_pkg.arange(0, n_samples)/fs) * c/2)
         # Assume the 1st coord system
-        radGridOut = self.num_pkg.sqrt(self.x_grid**2 + self.z_grid**2)
+        radGridOut = self.num_pkg.sqrt(x_grid**2 + z_grid**2)
         # Move back to the 2nd coordinat system
         radGridOut = abs(probe.curvature_radius)+max_sampling_time-radGridOut
 
-        self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
         dst_points = self.num_pkg.dstack((radGridOut, azimuthGridOut))
-        self.dst_points = self.num_pkg.asarray(dst_points, dtype=self.num_pkg.float32)
-
-        self.output_buffer = self.num_pkg.zeros(self.dst_shape, dtype=np.float32)
-        return const_metadata.copy(input_shape=self.dst_shape)
+        dst_points = self.num_pkg.asarray(dst_points, dtype=self.num_pkg.float32)
+        return dict(
+            x_grid=x_grid, z_grid=z_grid, radGridIn=radGridIn,
+            azimuthGridIn=azimuthGridIn, dst_points=dst_points
+        )
 
     def _process_concave(self, data):
+        self._parameters.apply(self)
         import cupy as cp
         if self.is_gpu:
             data = data.get()
@@ -2225,10 +3552,23 @@ class ScanConversion(Operation):
         return cp.asarray(self.interpolator(self.dst_points).reshape(self.dst_shape))
 
     def _prepare_phased_array(self, const_metadata: arrus.metadata.ConstMetadata):
+        self.n_frames = const_metadata.input_shape[0]
+        vars(self).update(self._get_phased_array_grid_state(
+            const_metadata, self.x_grid, self.z_grid))
+        self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
+        self.output_buffer = np.zeros(self.dst_shape, dtype=np.float32)
+        return const_metadata.copy(input_shape=self.dst_shape)
+
+    def _get_phased_array_grid_state(self, const_metadata, x_grid, z_grid):
+        """
+        Returns the attributes that depend on the output grid.
+        """
         probe = get_unique_probe_model(const_metadata)
         data_desc = const_metadata.data_description
+        x_grid = x_grid.reshape(1, -1)
+        z_grid = z_grid.reshape(1, -1)
 
-        self.n_frames, n_samples, n_scanlines = const_metadata.input_shape
+        _, n_samples, n_scanlines = const_metadata.input_shape
         seq = const_metadata.context.sequence
         fs = const_metadata.context.device.sampling_frequency
         acq_fs = fs / seq.downsampling_factor
@@ -2250,18 +3590,20 @@ class ScanConversion(Operation):
         tx_ap_cent_z = tx_ap_cent_z.squeeze().item()
         tx_ap_cent_ang = tx_ap_cent_ang.squeeze().item()
 
-        self.radGridIn = (start_time + np.arange(0, n_samples) / fs) * c / 2
-        self.azimuthGridIn = seq.angles + tx_ap_cent_ang
-        azimuthGridOut = np.arctan2((self.x_grid - tx_ap_cent_x), (self.z_grid.T - tx_ap_cent_z))
-        radGridOut = np.sqrt((self.x_grid - tx_ap_cent_x) ** 2 + (self.z_grid.T - tx_ap_cent_z) ** 2)
+        radGridIn = (start_time + np.arange(0, n_samples) / fs) * c / 2
+        azimuthGridIn = seq.angles + tx_ap_cent_ang
+        azimuthGridOut = np.arctan2((x_grid - tx_ap_cent_x), (z_grid.T - tx_ap_cent_z))
+        radGridOut = np.sqrt((x_grid - tx_ap_cent_x) ** 2 + (z_grid.T - tx_ap_cent_z) ** 2)
         dst_points = np.dstack((radGridOut, azimuthGridOut))
         w, h, d = dst_points.shape
-        self.dst_points = dst_points.reshape((w * h, d))
-        self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
-        self.output_buffer = np.zeros(self.dst_shape, dtype=np.float32)
-        return const_metadata.copy(input_shape=self.dst_shape)
+        return dict(
+            x_grid=x_grid, z_grid=z_grid, radGridIn=radGridIn,
+            azimuthGridIn=azimuthGridIn,
+            dst_points=dst_points.reshape((w * h, d))
+        )
 
     def _process_phased_array(self, data):
+        self._parameters.apply(self)
         if self.is_gpu:
             data = data.get()
         data[np.isnan(data)] = 0.0
@@ -2280,13 +3622,24 @@ class ScanConversionV2(Operation):
     Compared to ScanConversion op, this operator allows to scan convert Tx/Rx sequenes
     with the mixed TX angle and aperture centers.
     Still, please consider this implementation as experimental.
+
+    :param x_grid: a vector of grid points along OX axis [m]
+    :param z_grid: a vector of grid points along OZ axis [m]
+    :param use_sparse_matrix: whether the interpolation should be applied
+      as a sparse matrix-dense matrix product
     """
-    def __init__(self, x_grid, z_grid):
+
+    _output_buffers = ("buffer",)
+
+    def __init__(self, x_grid, z_grid, use_sparse_matrix=False):
         super().__init__()
         self.x_grid = x_grid
         self.z_grid = z_grid
-        import cupy as cp
-        self.num_pkg = cp
+        self.use_sparse_matrix = use_sparse_matrix
+        self.num_pkg = None
+
+    def set_pkgs(self, num_pkg, **kwargs):
+        self.num_pkg = num_pkg
 
     def _get_speed_of_sound(self, context):
         seq = context.sequence
@@ -2344,10 +3697,10 @@ class ScanConversionV2(Operation):
             return np.interp(center_element, np.arange(n_elements), elem_pos_x)
 
     def prepare(self, const_metadata):
-        # Determine interpolation function.
-        import cupy as cp
-        import cupyx.scipy.ndimage
-        self.interp_function = cupyx.scipy.ndimage.map_coordinates
+        if self.num_pkg is None:
+            # Backward compatibility: GPU by default.
+            import cupy as cp
+            self.num_pkg = cp
         self.n_frames, n_samples, n_scanlines = const_metadata.input_shape
         seq = const_metadata.context.sequence
         c = self._get_speed_of_sound(const_metadata.context)
@@ -2415,16 +3768,17 @@ class ScanConversionV2(Operation):
                     angle=current_angle, prev_pos=prev_ap_cent,
                     current_pos=current_ap_cent, scanline_nr=scanline_nr,
                     start_time=start_time, c=c, fs=fs)
-        self.coords = cp.asarray(self.coords)
-        self.coords = cp.nan_to_num(self.coords, nan=-1.0)
+        self.coords = np.nan_to_num(self.coords, nan=-1.0)
+        self._interpolator = _BatchLinearInterpolator(
+            self.coords, (n_samples, n_scanlines), num_pkg=self.num_pkg,
+            use_sparse_matrix=self.use_sparse_matrix)
+        self.coords = self.num_pkg.asarray(self.coords)
         self.dst_shape = self.n_frames, len(self.z_grid.squeeze()), len(self.x_grid.squeeze())
-        self.buffer = cp.zeros(self.dst_shape, dtype=cp.float32)
+        self.buffer = self.num_pkg.zeros(self.dst_shape, dtype=self.num_pkg.float32)
         return const_metadata.copy(input_shape=self.dst_shape)
 
     def process(self, data):
-        for i in range(self.n_frames):
-            self.buffer[i] = self.interp_function(data[i], self.coords, order=1)
-        return self.buffer
+        return self._interpolator(data, self.buffer)
 
 
 class LogCompression(Operation):
@@ -2432,6 +3786,8 @@ class LogCompression(Operation):
     Converts data to decibel scale.
     """
 
+    _output_buffers = ("_output",)
+
     def __init__(self):
         self.num_pkg = None
         self.is_gpu = False
@@ -2445,11 +3801,16 @@ class LogCompression(Operation):
         n_samples = const_metadata.input_shape[-1]
         if n_samples == 0:
             raise ValueError("Empty array is not accepted.")
+        self._output = self.num_pkg.zeros(const_metadata.input_shape,
+                                          dtype=const_metadata.dtype)
         return const_metadata
 
     def process(self, data):
-        data[data <= 0] = 1e-9
-        return 20 * self.num_pkg.log10(data)
+        xp = self.num_pkg
+        # Values <= 1e-9 (including non-positive) are clipped to 1e-9.
+        xp.maximum(data, 1e-9, out=self._output)
+        xp.log10(self._output, out=self._output)
+        return xp.multiply(self._output, 20, out=self._output)
 
 
 class DynamicRangeAdjustment(Operation):
@@ -2457,6 +3818,8 @@ class DynamicRangeAdjustment(Operation):
     Clips data values to given range.
     """
 
+    _output_buffers = ("_output",)
+
     def __init__(self, min=20, max=80, name=None):
         """
         Constructor.
@@ -2507,10 +3870,12 @@ class DynamicRangeAdjustment(Operation):
         self.xp = num_pkg
 
     def prepare(self, const_metadata: arrus.metadata.ConstMetadata):
+        self._output = self.xp.zeros(const_metadata.input_shape,
+                                     dtype=const_metadata.dtype)
         return const_metadata
 
     def process(self, data):
-        return self.xp.clip(data, a_min=self.min, a_max=self.max)
+        return self.xp.clip(data, self.min, self.max, out=self._output)
 
 
 class ToGrayscaleImg(Operation):
@@ -2518,6 +3883,9 @@ class ToGrayscaleImg(Operation):
     Converts data to grayscale image (uint8).
     """
 
+    _output_buffers = ("_output",)
+    _scratch_buffers = ("_buffer",)
+
     def __init__(self):
         self.xp = None
 
@@ -2525,12 +3893,23 @@ class ToGrayscaleImg(Operation):
         self.xp = num_pkg
 
     def prepare(self, const_metadata: arrus.metadata.ConstMetadata):
+        xp = self.xp
+        input_dtype = np.result_type(const_metadata.dtype, np.float32)
+        self._buffer = xp.zeros(const_metadata.input_shape, dtype=input_dtype)
+        self._min = xp.zeros((), dtype=input_dtype)
+        self._max = xp.zeros((), dtype=input_dtype)
+        self._output = xp.zeros(const_metadata.input_shape, dtype=xp.uint8)
         return const_metadata.copy(dtype=np.uint8)
 
     def process(self, data):
-        data = data - self.xp.min(data)
-        data = data / self.xp.max(data) * 255
-        return data.astype(self.xp.uint8)
+        xp = self.xp
+        xp.min(data, out=self._min)
+        xp.subtract(data, self._min, out=self._buffer)
+        xp.max(self._buffer, out=self._max)
+        xp.divide(self._buffer, self._max, out=self._buffer)
+        xp.multiply(self._buffer, 255, out=self._buffer)
+        xp.copyto(self._output, self._buffer, casting="unsafe")
+        return self._output
 
 
 class SelectSequenceRaw(Operation):
@@ -2799,35 +4178,63 @@ class ReconstructLri(Operation):
     :param z_grid: output image grid points  (OZ coordinates)
     :param rx_tang_limits: RX apodization angle limits (given as the tangent of the angle), \
       a pair of values (min, max). If not provided or None, [-0.5, 0.5] range will be used
+    :param use_lut: whether to use the precomputed look-up tables of TX/RX delays and \
+      apodization weights, instead of computing them for each frame. The look-up tables \
+      are computed in the prepare step (from the sequence, probe model, grid and speed \
+      of sound) and cached, see arrus.utils.lut. Note: the RX look-up tables require \
+      n_elements*x_grid.size*z_grid.size*8 bytes of the device memory.
+    :param lut_cache_dir: path to the directory, where the look-up tables should be \
+      cached (on disk), optional; the look-up tables are always cached in memory
+    :param compound: whether to compound the low-resolution images, i.e. output \
+      the weighted sum of the images over the transmits (n_seq, x, z), instead of \
+      the (n_seq, n_tx, x, z) array of low-resolution images. By default, the mean \
+      over the transmits is computed (the same result as Mean(axis=1), without the \
+      low-resolution images stored in memory).
+    :param tx_weights: TX weights (TX apodization) used for compounding, an array \
+      with n_tx values; optional, can be provided only if compound is True. By default \
+      1/n_tx is used for each transmit
     """
 
-    Z_ELEM_CONST_POOL = GpuConstMemoryPool(RECONSTRUCT_LRI_KERNEL_MODULE, "zElemConst", 1024, np.float32)
-    X_ELEM_CONST_POOL = GpuConstMemoryPool(RECONSTRUCT_LRI_KERNEL_MODULE, "xElemConst", 1024, np.float32)
-    TANG_ELEM_CONST_POOL = GpuConstMemoryPool(RECONSTRUCT_LRI_KERNEL_MODULE, "tangElemConst", 1024, np.float32)
+    _output_buffers = ("output_buffer",)
 
     def close(self):
-        # Clean-up pool.
-        ReconstructLri.Z_ELEM_CONST_POOL = GpuConstMemoryPool(RECONSTRUCT_LRI_KERNEL_MODULE, "zElemConst", 1024, np.float32)
-        ReconstructLri.X_ELEM_CONST_POOL = GpuConstMemoryPool(RECONSTRUCT_LRI_KERNEL_MODULE, "xElemConst", 1024, np.float32)
-        ReconstructLri.TANG_ELEM_CONST_POOL = GpuConstMemoryPool(RECONSTRUCT_LRI_KERNEL_MODULE, "tangElemConst", 1024, np.float32)
-
-
-    def __init__(self, x_grid, z_grid, rx_tang_limits=None):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._elem_const is not None:
+            self._get_const_allocator().free(self._elem_const)
+            self._elem_const = None
+
+    def _get_const_allocator(self):
+        # z, x, tang tables, 1024 elements max.
+        return arrus.utils.const_memory.get_gpu_allocator(
+            RECONSTRUCT_LRI_KERNEL_MODULE, "elemConst", 3*1024, np.float32)
+
+    def __init__(self, x_grid, z_grid, rx_tang_limits=None,
+                 use_lut=False, lut_cache_dir=None,
+                 compound=False, tx_weights=None):
         super().__init__()
         self.x_grid = x_grid
         self.z_grid = z_grid
-        import cupy as cp
-        self.num_pkg = cp
+        self.num_pkg = None
+        self._executor = None
         self.rx_tang_limits = rx_tang_limits  # Currently used only by Convex PWI implementation
+        self.use_lut = use_lut
+        self.lut_cache_dir = lut_cache_dir
+        if tx_weights is not None and not compound:
+            raise ValueError("TX weights can be provided only for compounding.")
+        self.compound = compound
+        self.tx_weights = tx_weights
+        self._parameters = None
+        self._elem_const = None
 
     def set_pkgs(self, num_pkg, **kwargs):
-        if num_pkg is np:
-            raise ValueError("ReconstructLri operation is implemented for GPU only.")
+        self.num_pkg = num_pkg
 
     def prepare(self, const_metadata):
-        import cupy as cp
-        self._kernel_module = RECONSTRUCT_LRI_KERNEL_MODULE
-        self._kernel = self._kernel_module.get_function("iqRaw2Lri")
+        if self.num_pkg is None:
+            import cupy as cp
+            self.num_pkg = cp
 
         # INPUT PARAMETERS.
         # Input data shape.
@@ -2909,20 +4316,33 @@ class ReconstructLri(Operation):
 
         self.x_size = len(self.x_grid)
         self.z_size = len(self.z_grid)
-        output_shape = (self.n_seq, self.n_tx, self.x_size, self.z_size)
+        if self.compound:
+            output_shape = (self.n_seq, self.x_size, self.z_size)
+            # Kernel grid: z, x, sequence
+            n_images = self.n_seq
+            if self.tx_weights is None:
+                tx_weights = np.full(self.n_tx, 1/self.n_tx)
+            else:
+                tx_weights = np.asarray(self.tx_weights)
+                if tx_weights.shape != (self.n_tx, ):
+                    raise ValueError(f"TX weights should be an array with "
+                                     f"{self.n_tx} values, got shape: "
+                                     f"{tx_weights.shape}")
+            self._tx_weights = self.num_pkg.asarray(tx_weights, dtype=self.num_pkg.float32)
+        else:
+            output_shape = (self.n_seq, self.n_tx, self.x_size, self.z_size)
+            # Kernel grid: z, x, sequence*transmit
+            n_images = self.n_seq * self.n_tx
         self.output_buffer = self.num_pkg.zeros(output_shape, dtype=self.num_pkg.complex64)
         x_block_size = min(self.x_size, 16)
         z_block_size = min(self.z_size, 16)
-        tx_block_size = min(self.n_tx, 4)
+        tx_block_size = min(n_images, 4)
         self.block_size = (z_block_size, x_block_size, tx_block_size)
         self.grid_size = (int((self.z_size - 1) // z_block_size + 1),
                           int((self.x_size - 1) // x_block_size + 1),
-                          int((self.n_seq * self.n_tx - 1) // tx_block_size + 1))
-        self.x_pix = self.num_pkg.asarray(self.x_grid, dtype=self.num_pkg.float32)
-        self.z_pix = self.num_pkg.asarray(self.z_grid, dtype=self.num_pkg.float32)
+                          int((n_images - 1) // tx_block_size + 1))
 
         # System and transmit properties.
-        self.sos = self.num_pkg.float32(tx_op.speed_of_sound)
         self.fn = self.num_pkg.float32(tx_op.excitation.center_frequency)
         self.pitch = self.num_pkg.float32(probe_model.pitch)
         start_sample = rx_sample_range[0]
@@ -2933,17 +4353,29 @@ class ReconstructLri(Operation):
         element_angle_tang = np.tan(probe_model.element_angle)
         self.n_elements = probe_model.n_elements
 
-        device_props = cp.cuda.runtime.getDeviceProperties(0)
-        if device_props["totalConstMem"] < 256 * 3 * 4:  # 3 float32 arrays, 256 elements max
-            raise ValueError("There is not enough constant memory available!")
-
-        x_elem = np.asarray(element_pos_x, dtype=self.num_pkg.float32)
-        z_elem = np.asarray(element_pos_z, dtype=self.num_pkg.float32)
-        tang_elem = np.asarray(element_angle_tang, dtype=self.num_pkg.float32)
+        x_elem = np.asarray(element_pos_x, dtype=np.float32)
+        z_elem = np.asarray(element_pos_z, dtype=np.float32)
+        tang_elem = np.asarray(element_angle_tang, dtype=np.float32)
 
-        self._x_elem_const_offset = ReconstructLri.X_ELEM_CONST_POOL.reserve_new_array(np.squeeze(x_elem))
-        self._z_elem_const_offset = ReconstructLri.Z_ELEM_CONST_POOL.reserve_new_array(np.squeeze(z_elem))
-        self._tang_elem_const_offset = ReconstructLri.TANG_ELEM_CONST_POOL.reserve_new_array(np.squeeze(tang_elem))
+        if self.num_pkg is np:
+            self._x_elem = np.squeeze(x_elem)
+            self._z_elem = np.squeeze(z_elem)
+            self._tang_elem = np.squeeze(tang_elem)
+            self._executor = concurrent.futures.ThreadPoolExecutor()
+            self.process = self._process_lut_cpu if self.use_lut else self._process_cpu
+        elif self.use_lut:
+            self._kernel_module = RECONSTRUCT_LRI_KERNEL_MODULE
+            self._kernel = self._kernel_module.get_function(
+                "iqRaw2HriLut" if self.compound else "iqRaw2LriLut")
+            self.process = self._process_lut
+        else:
+            self._kernel_module = RECONSTRUCT_LRI_KERNEL_MODULE
+            self._kernel = self._kernel_module.get_function(
+                "iqRaw2Hri" if self.compound else "iqRaw2Lri")
+            if self._elem_const is not None:
+                self._get_const_allocator().free(self._elem_const)
+            self._elem_const = self._get_const_allocator().allocate(np.concatenate(
+                (np.squeeze(z_elem), np.squeeze(x_elem), np.squeeze(tang_elem))))
 
         tx_center_angles, tx_center_x, tx_center_z = arrus.kernels.tx_rx_sequence.get_aperture_center(
             tx_centers, probe_model)
@@ -2963,23 +4395,42 @@ class ReconstructLri(Operation):
 
         # Min/max tang
         if self.rx_tang_limits is not None:
-            self.min_tang, self.max_tang = self.rx_tang_limits
+            min_tang, max_tang = self.rx_tang_limits
         else:
             # Default:
-            self.min_tang, self.max_tang = -0.5, 0.5
-
-        self.min_tang = self.num_pkg.float32(self.min_tang)
-        self.max_tang = self.num_pkg.float32(self.max_tang)
+            min_tang, max_tang = -0.5, 0.5
 
         self.tx_foc = self.num_pkg.asarray(focus, dtype=self.num_pkg.float32)
+        # Geometry of the transmits and the probe (the LUT parameters that
+        # do not depend on the grid, speed of sound and rx tang limits).
+        self._lut_geometry = dict(
+            x_elem=np.squeeze(x_elem), z_elem=np.squeeze(z_elem),
+            tang_elem=np.squeeze(tang_elem),
+            tx_foc=np.asarray(focus, dtype=np.float32),
+            tx_ang_zx=np.asarray(tx_center_angles, dtype=np.float32),
+            tx_ap_cent_z=np.asarray(tx_center_z, dtype=np.float32),
+            tx_ap_cent_x=np.asarray(tx_center_x, dtype=np.float32),
+            tx_ap_first_elem=tx_ap_first_elem.astype(np.int32),
+            tx_ap_last_elem=tx_ap_last_elem.astype(np.int32))
+
         burst_factor = tx_op.excitation.n_periods/(2 * self.fn)
-        self.initial_delay = -start_sample/65e6+burst_factor+tx_center_delay
+        initial_delay = -start_sample/65e6+burst_factor+tx_center_delay
         rx_time_offset = const_metadata.data_description.custom.get("rx_offset", 0.0)
-        self.initial_delay += rx_time_offset + _get_lens_compensation_time(
-            probe_model=probe_model,
-            assumed_speed_of_sound=self.sos
-        )
-        self.initial_delay = self.num_pkg.float32(self.initial_delay)
+        # The initial delay, without the lens compensation time (depends
+        # on the speed of sound).
+        self._initial_delay = initial_delay + rx_time_offset
+        self._probe_model = probe_model
+
+        # x_pix, z_pix, sos, min_tang, max_tang, initial_delay, LUTs
+        params = {
+            "x_grid": np.asarray(self.x_grid).reshape(-1),
+            "z_grid": np.asarray(self.z_grid).reshape(-1),
+            "speed_of_sound": np.float32(tx_op.speed_of_sound),
+            "rx_tang_limits": np.asarray([min_tang, max_tang], dtype=np.float32)
+        }
+        self._parameters = _ParameterBuffer(
+            params=params, compute_state=self._get_parameter_state)
+        vars(self).update(self._get_parameter_state(params))
         # Output metadata
         new_signal_description = dataclasses.replace(
             const_metadata.data_description,
@@ -2993,6 +4444,7 @@ class ReconstructLri(Operation):
         )
 
     def process(self, data):
+        self._parameters.apply(self)
         data = self.num_pkg.ascontiguousarray(data)
         params = (
             self.output_buffer,
@@ -3008,14 +4460,149 @@ class ReconstructLri(Operation):
             self.rx_ap_origin, self.n_rx,
             self.min_tang, self.max_tang,
             self.initial_delay,
-            self._z_elem_const_offset,
-            self._x_elem_const_offset,
-            self._tang_elem_const_offset
+            _get_const_offset(self._elem_const),
+            self._elem_const.array
+        )
+        if self.compound:
+            params = params + (self._tx_weights, )
+        self._kernel(self.grid_size, self.block_size, params)
+        return self.output_buffer
+
+    def _process_cpu(self, data):
+        self._parameters.apply(self)
+        return arrus.utils.beamforming_cpu.reconstruct_lri(
+            self.output_buffer, data,
+            x_pix=self.x_pix, z_pix=self.z_pix,
+            x_elem=self._x_elem, z_elem=self._z_elem, tang_elem=self._tang_elem,
+            tx_foc=self.tx_foc, tx_ang_zx=self.tx_ang_zx,
+            tx_ap_cent_z=self.tx_ap_cent_z, tx_ap_cent_x=self.tx_ap_cent_x,
+            tx_ap_first_elem=self.tx_ap_first_elem,
+            tx_ap_last_elem=self.tx_ap_last_elem,
+            rx_ap_origin=self.rx_ap_origin,
+            sos=self.sos, fs=self.fs, fn=self.fn,
+            min_tang=self.min_tang, max_tang=self.max_tang,
+            init_delay=self.initial_delay, tx_weights=self._get_cpu_tx_weights(),
+            executor=self._executor)
+
+    def _process_lut(self, data):
+        self._parameters.apply(self)
+        data = self.num_pkg.ascontiguousarray(data)
+        params = (
+            self.output_buffer,
+            data,
+            self.n_elements,
+            self.n_seq, self.n_tx, self.n_samples,
+            self.z_size, self.x_size,
+            self.fs, self.fn,
+            self.lut_tx_delays, self.lut_tx_apodization,
+            self.lut_rx_delays, self.lut_rx_apodization,
+            self.rx_ap_origin, self.n_rx,
+            self.initial_delay
         )
+        if self.compound:
+            params = params + (self._tx_weights, )
         self._kernel(self.grid_size, self.block_size, params)
         return self.output_buffer
 
+    def _process_lut_cpu(self, data):
+        self._parameters.apply(self)
+        return arrus.utils.beamforming_cpu.reconstruct_lri_lut(
+            self.output_buffer, data,
+            tx_delays=self.lut_tx_delays,
+            tx_apodization=self.lut_tx_apodization,
+            rx_delays=self.lut_rx_delays,
+            rx_apodization=self.lut_rx_apodization,
+            rx_ap_origin=self.rx_ap_origin,
+            fs=self.fs, fn=self.fn,
+            init_delay=self.initial_delay, tx_weights=self._get_cpu_tx_weights(),
+            executor=self._executor)
+
+    def _get_cpu_tx_weights(self):
+        return self._tx_weights if self.compound else None
+
+    def _get_parameter_state(self, params):
+        xp = self.num_pkg
+        sos = np.float32(params["speed_of_sound"])
+        min_tang, max_tang = np.asarray(params["rx_tang_limits"], dtype=np.float32)
+        initial_delay = self._initial_delay + _get_lens_compensation_time(
+            probe_model=self._probe_model,
+            assumed_speed_of_sound=sos
+        )
+        state = dict(
+            x_pix=xp.asarray(params["x_grid"], dtype=xp.float32),
+            z_pix=xp.asarray(params["z_grid"], dtype=xp.float32),
+            sos=xp.float32(sos),
+            min_tang=xp.float32(min_tang),
+            max_tang=xp.float32(max_tang),
+            initial_delay=xp.float32(initial_delay)
+        )
+        if self.use_lut:
+            lut = self._get_lut(
+                x_pix=np.asarray(params["x_grid"], dtype=np.float32),
+                z_pix=np.asarray(params["z_grid"], dtype=np.float32),
+                sos=sos, min_tang=min_tang, max_tang=max_tang,
+                **self._lut_geometry)
+            state.update(
+                lut_tx_delays=xp.asarray(lut.tx_delays),
+                lut_tx_apodization=xp.asarray(lut.tx_apodization),
+                lut_rx_delays=xp.asarray(lut.rx_delays),
+                lut_rx_apodization=xp.asarray(lut.rx_apodization)
+            )
+        _synchronize(xp)
+        return state
+
+    def set_parameter(self, key: str, value: Sequence[Number]):
+        """
+        Sets the value of the reconstruction parameter: x_grid, z_grid
+        (the number of grid points cannot be changed), speed_of_sound or
+        rx_tang_limits.
+
+        The new delays (look-up tables) are computed in the calling thread
+        and used starting from the next frame. Note: the output metadata
+        describes the grid set in the prepare step.
+        """
+        if key == "x_grid":
+            value = _get_grid_parameter(key, value, self.x_size)
+        elif key == "z_grid":
+            value = _get_grid_parameter(key, value, self.z_size)
+        elif key == "speed_of_sound":
+            value = _get_speed_of_sound_parameter(value)
+        elif key == "rx_tang_limits":
+            value = np.asarray(value, dtype=np.float32).reshape(-1)
+            if value.shape != (2, ) or not value[0] < value[1]:
+                raise ValueError("rx_tang_limits should be a pair of values "
+                                 f"(min, max), min < max, got: {value}")
+        else:
+            raise ValueError(f"{type(self).__name__} has no {key} parameter.")
+        _get_parameter_buffer(self).set(key, value)
+
+    def get_parameter(self, key: str) -> Sequence[Number]:
+        if key not in self.get_parameters():
+            raise ValueError(f"{type(self).__name__} has no {key} parameter.")
+        return _get_parameter_buffer(self).get(key)
+
+    def get_parameters(self) -> Dict[str, ParameterDef]:
+        return {
+            "x_grid": _get_grid_parameter_def("x_grid", len(self.x_grid)),
+            "z_grid": _get_grid_parameter_def("z_grid", len(self.z_grid)),
+            "speed_of_sound": _get_speed_of_sound_parameter_def(),
+            "rx_tang_limits": ParameterDef(
+                name="rx_tang_limits",
+                space=Box(
+                    shape=(2, ),
+                    dtype=np.float32,
+                    unit=None,
+                    low=-np.inf,
+                    high=np.inf
+                ),
+            )
+        }
 
+    def _get_lut(self, **geometry):
+        key = arrus.utils.lut.get_geometry_hash(**geometry)
+        return arrus.utils.lut.get_lut(
+            key, lambda: arrus.utils.lut.compute_lri_lut(**geometry),
+            cache_dir=self.lut_cache_dir)
 
     def _get_min_delay(self, raw_sequence):
         all_delays = [np.min(op.tx.delays) for op in raw_sequence.ops]
@@ -3029,6 +4616,8 @@ class Sum(Operation):
     :param axis: axis along which a sum is performed
     """
 
+    _output_buffers = ("_output",)
+
     def __init__(self, axis=-1):
         self.axis = axis
         self.num_pkg = None
@@ -3040,10 +4629,12 @@ class Sum(Operation):
         output_shape = list(const_metadata.input_shape)
         actual_axis = len(output_shape) - 1 if self.axis == -1 else self.axis
         del output_shape[actual_axis]
+        output_dtype = np.sum(np.zeros(1, dtype=const_metadata.dtype)).dtype
+        self._output = self.num_pkg.zeros(tuple(output_shape), dtype=output_dtype)
         return const_metadata.copy(input_shape=tuple(output_shape))
 
     def process(self, data):
-        return self.num_pkg.sum(data, axis=self.axis)
+        return self.num_pkg.sum(data, axis=self.axis, out=self._output)
 
 
 class Mean(Operation):
@@ -3053,6 +4644,8 @@ class Mean(Operation):
     :param axis: axis along which a average is computed
     """
 
+    _output_buffers = ("_output",)
+
     def __init__(self, axis=-1):
         self.axis = axis
         self.num_pkg = None
@@ -3064,10 +4657,12 @@ class Mean(Operation):
         output_shape = list(const_metadata.input_shape)
         actual_axis = len(output_shape) - 1 if self.axis == -1 else self.axis
         del output_shape[actual_axis]
+        output_dtype = np.mean(np.zeros(1, dtype=const_metadata.dtype)).dtype
+        self._output = self.num_pkg.zeros(tuple(output_shape), dtype=output_dtype)
         return const_metadata.copy(input_shape=tuple(output_shape))
 
     def process(self, data):
-        return self.num_pkg.mean(data, axis=self.axis)
+        return self.num_pkg.mean(data, axis=self.axis, out=self._output)
 
 
 def _get_aperture_origin(aperture_center_element, aperture_size):
@@ -3078,77 +4673,172 @@ def _get_aperture_origin(aperture_center_element, aperture_size):
 # CPU remapping tools.
 @dataclasses.dataclass
 class Transfer:
+    """
+    A copy of a contiguous range of channels [start, end) of the given
+    us4OEM physical frame to the logical frame.
+    """
     src_frame: int
     src_range: tuple
     dst_frame: int
     dst_range: tuple
+    us4oem: int = 0
 
 
-def __group_transfers(frame_channel_mapping):
+def _group_transfers(frame_channel_mapping):
+    """
+    Compiles the frame channel mapping into a list of contiguous
+    channel range copies.
+
+    :return: a pair: a list of Transfers, and a pair of arrays
+      (logical frames, logical channels) of the missing channels
+    """
     result = []
     frame_mapping = frame_channel_mapping.frames
     channel_mapping = frame_channel_mapping.channels
+    us4oem_mapping = frame_channel_mapping.us4oems
     if frame_mapping.size == 0 or channel_mapping.size == 0:
         raise RuntimeError("Empty frame channel mappings")
     # Number of logical frames
     n_frames, n_channels = channel_mapping.shape
     for dst_frame in range(n_frames):
-        current_dst_range = None
-        prev_src_frame = None
-        prev_src_channel = None
-        current_src_frame = None
-        current_src_range = None
+        current = None
         for dst_channel in range(n_channels):
-            src_frame = frame_mapping[dst_frame, dst_channel]
-            src_channel = channel_mapping[dst_frame, dst_channel]
+            src_channel = int(channel_mapping[dst_frame, dst_channel])
             if src_channel < 0:
                 # Omit current channel.
                 # Negative src channel means, that the given channel
                 # is not available and should be treated as missing.
+                current = None
                 continue
-            if (prev_src_frame is None  # the first transfer
-                    # new src frame
-                    or src_frame != prev_src_frame
-                    # a gap in current frame
-                    or src_channel != prev_src_channel + 1):
-                # Close current source range
-                if current_src_frame is not None:
-                    transfer = Transfer(
-                        src_frame=current_src_frame,
-                        src_range=tuple(current_src_range),
-                        dst_frame=dst_frame,
-                        dst_range=tuple(current_dst_range)
-                    )
-                    result.append(transfer)
+            src_frame = int(frame_mapping[dst_frame, dst_channel])
+            us4oem = int(us4oem_mapping[dst_frame, dst_channel])
+            if (current is not None
+                    and current.us4oem == us4oem
+                    and current.src_frame == src_frame
+                    and current.src_range[1] == src_channel):
+                # Continue current range
+                current.src_range = (current.src_range[0], src_channel + 1)
+                current.dst_range = (current.dst_range[0], dst_channel + 1)
+            else:
                 # Start a new range
-                current_src_frame = src_frame
-                # [start, end)
-                current_src_range = [src_channel, src_channel + 1]
-                current_dst_range = [dst_channel, dst_channel + 1]
+                current = Transfer(
+                    src_frame=src_frame,
+                    src_range=(src_channel, src_channel + 1),
+                    dst_frame=dst_frame,
+                    dst_range=(dst_channel, dst_channel + 1),
+                    us4oem=us4oem
+                )
+                result.append(current)
+    missing = np.argwhere(channel_mapping < 0)
+    return result, (missing[:, 0], missing[:, 1])
+
+
+def _get_remap_output_dtype(dtype):
+    dtype = np.dtype(np.int16 if dtype is None else dtype)
+    if dtype not in (np.int16, np.float32):
+        raise ValueError(f"Unsupported remap output data type: {dtype}, "
+                         f"should be int16 or float32.")
+    return dtype
+
+
+def _get_remap_axes(axes, ndim):
+    """
+    Returns the permutation of the remap output axes
+    (None means no permutation).
+    """
+    return tuple(range(ndim)) if axes is None else tuple(axes)
+
+
+def _fuse_remap_steps(steps):
+    """
+    Replaces the remap steps followed by the steps that change the layout
+    of the output data with a single, equivalent remap step (a reconfigured
+    copy of the remap step), that writes the data directly in the target
+    layout. The given steps are not modified:
+
+    - RemapToLogicalOrder, Transpose,
+    - RemapToLogicalOrderV2, ToRealOrComplex,
+    - RemapToLogicalOrderV2, Transpose.
+    """
+    result = []
+    for step in steps:
+        previous = result[-1] if len(result) > 0 else None
+        fused = None
+        if isinstance(previous, (RemapToLogicalOrder, RemapToLogicalOrderV2)):
+            fused = previous._fuse(step)
+        if fused is not None:
+            result[-1] = fused
+        else:
+            result.append(step)
+    return tuple(result) if isinstance(steps, tuple) else result
+
+
+class _CpuRemap:
+    """
+    Remaps the data from the physical to logical order on CPU.
+
+    The input data is a batch of us4OEM physical frames
+    (n_samples, n_components, 32): the frames of each us4OEM start at
+    the given frame offset, and for each sequence of the batch
+    the us4OEM acquires the given number of frames. Each of the transfers
+    copies the whole batch at once; the transfers of different us4OEMs can
+    be run in the given executor.
+
+    The output array has shape (batch_size, n_frames, n_samples, n_channels)
+    if transpose is False, (batch_size, n_frames, n_channels, n_samples,
+    n_components) otherwise.
+    """
+
+    def __init__(self, fcm, n_frames_us4oems, n_samples, n_components,
+                 transpose, executor=None):
+        transfers, self._missing = _group_transfers(fcm)
+        self._transfers = {}
+        for t in transfers:
+            self._transfers.setdefault(t.us4oem, []).append(t)
+        self._frame_offsets = fcm.frame_offsets
+        self._n_frames_us4oems = n_frames_us4oems
+        self._batch_size = fcm.batch_size
+        self._frame_shape = (n_samples, n_components, 32)
+        self._transpose = transpose
+        self._executor = executor
+
+    def __call__(self, output, data):
+        data = data.reshape(-1)
+        if self._executor is None:
+            for us4oem, transfers in self._transfers.items():
+                self._run(output, data, us4oem, transfers)
+        else:
+            futures = [
+                self._executor.submit(self._run, output, data, us4oem, transfers)
+                for us4oem, transfers in self._transfers.items()]
+            for future in futures:
+                future.result()
+        # The output buffer can be shared with other operations,
+        # so it is not guaranteed to be zeroed.
+        frames, channels = self._missing
+        if self._transpose:
+            output[:, frames, channels] = 0
+        else:
+            output[:, frames, :, channels] = 0
+
+    def _run(self, output, data, us4oem, transfers):
+        frame_size = int(np.prod(self._frame_shape))
+        n_frames = self._n_frames_us4oems[us4oem]
+        start = self._frame_offsets[us4oem]*frame_size
+        end = start + self._batch_size*n_frames*frame_size
+        # (batch, physical frame, sample, component, physical channel)
+        src = data[start:end].reshape((self._batch_size, n_frames)
+                                      + self._frame_shape)
+        for t in transfers:
+            src_l, src_r = t.src_range
+            dst_l, dst_r = t.dst_range
+            # (batch, sample, component, channel)
+            values = src[:, t.src_frame, :, :, src_l:src_r]
+            if self._transpose:
+                output[:, t.dst_frame, dst_l:dst_r] = \
+                    values.transpose(0, 3, 1, 2)
             else:
-                # Continue current range
-                current_src_range[1] = src_channel + 1
-                current_dst_range[1] = dst_channel + 1
-            prev_src_frame = src_frame
-            prev_src_channel = src_channel
-        # End a range for current frame.
-        current_src_range = int(current_src_range[0]), int(current_src_range[1])
-        transfer = Transfer(
-            src_frame=int(current_src_frame),
-            src_range=tuple(current_src_range),
-            dst_frame=dst_frame,
-            dst_range=tuple(current_dst_range))
-        result.append(transfer)
-    return result
-
-
-def __remap(output_array, input_array, transfers):
-    input_array = input_array
-    for t in transfers:
-        dst_l, dst_r = t.dst_range
-        src_l, src_r = t.src_range
-        output_array[t.dst_frame, :, dst_l:dst_r] = \
-            input_array[t.src_frame, :, src_l:src_r]
+                output[:, t.dst_frame, :, dst_l:dst_r] = values[:, :, 0]
 
 
 class RemapToLogicalOrder(Operation):
@@ -3163,20 +4853,55 @@ class RemapToLogicalOrder(Operation):
     (n_us4oems*n_samples*n_frames*n_batches, 32) will be reordered to
     (batch_size, n_frames, n_samples, n_channels). A list of metadata objects
     will be returned.
+
+    The data can be written directly in a different order of axes and
+    data type, e.g. RemapToLogicalOrder(axes=(0, 1, 3, 2)) is equivalent
+    to RemapToLogicalOrder() followed by Transpose(axes=(0, 1, 3, 2)),
+    but does not require an additional pass over the data.
+
+    :param n_threads: the number of threads used by the CPU implementation
+      (the data of different us4OEMs can be remapped in separate threads)
+    :param axes: permutation of the output (batch, frame, sample, channel)
+      axes; None means no permutation
+    :param dtype: output data type: int16 (default) or float32
     """
 
-    def __init__(self, num_pkg=None):
+    _output_buffers = ("_output_buffer",)
+
+    def __init__(self, num_pkg=None, n_threads=1, axes=None, dtype=None):
         self._transfers = None
         self._output_buffer = None
         self.xp = num_pkg
         self.remap = None
+        self.n_threads = n_threads
+        self.axes = axes
+        self.dtype = dtype
+        self._executor = None
 
     def set_pkgs(self, num_pkg, **kwargs):
         self.xp = num_pkg
 
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     def _is_prepared(self):
         return self._transfers is not None and self._output_buffer is not None
 
+    def _fuse(self, step):
+        if type(step) is Transpose:
+            axes = _get_remap_axes(self.axes, 4)
+            step_axes = _get_transpose_axes(step.axes, 4)
+            fused = copy.copy(self)
+            fused.axes = tuple(axes[ax] for ax in step_axes)
+            return fused
+        return None
+
+    def _get_logical_view(self, output):
+        # (batch, frame, sample, channel)
+        return output.transpose(self._inverse_axes)
+
     def prepare(self, const_metadata: arrus.metadata.ConstMetadata):
         xp = self.xp
         # get shape, create an array with given shape
@@ -3194,16 +4919,43 @@ class RemapToLogicalOrder(Operation):
                 f"samples (actual: {n_samples_set})")
         n_samples = next(iter(n_samples_set))
         batch_size = fcm.batch_size
-        self.output_shape = (batch_size, n_frames, n_samples, n_channels)
-        self._output_buffer = xp.zeros(shape=self.output_shape, dtype=xp.int16)
+        logical_shape = (batch_size, n_frames, n_samples, n_channels)
+        axes = _get_remap_axes(self.axes, len(logical_shape))
+        self._inverse_axes = tuple(int(ax) for ax in np.argsort(axes))
+        dtype = _get_remap_output_dtype(self.dtype)
+        self.output_shape = tuple(logical_shape[ax] for ax in axes)
+        self._output_buffer = xp.zeros(shape=self.output_shape, dtype=dtype)
 
         if xp == np:
             # CPU
-            raise ValueError(f"'{type(self).__name__}' is not implemented for CPU")
+            # For each us4OEM, get number of physical frames this us4OEM gathers
+            # (see the GPU implementation below).
+            n_us4oems = int(np.max(fcm.us4oems)) + 1
+            n_frames_us4oems = [fcm.n_frames[0]//batch_size]
+            for us4oem in range(1, n_us4oems):
+                us4oem_frames = fcm.frames[fcm.us4oems == us4oem]
+                if us4oem_frames.size == 0:
+                    n_frames_us4oems.append(0)
+                else:
+                    n_frames_us4oems.append(int(np.max(us4oem_frames)) + 1)
+            if self.n_threads > 1:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.n_threads)
+            cpu_remap = _CpuRemap(
+                fcm=fcm, n_frames_us4oems=n_frames_us4oems,
+                n_samples=n_samples, n_components=1, transpose=False,
+                executor=self._executor)
+            self._transfers = cpu_remap
+
+            def cpu_remap_fn(data):
+                cpu_remap(self._get_logical_view(self._output_buffer), data)
+
+            self._remap_fn = cpu_remap_fn
         else:
             # GPU
             import cupy as cp
-            from arrus.utils.us4r_remap_gpu import get_default_grid_block_size, run_remap_v1
+            from arrus.utils.us4r_remap_gpu import (
+                get_default_grid_block_size, run_remap_v1, run_remap_to_layout)
             self._fcm_frames = cp.asarray(fcm.frames)
             self._fcm_channels = cp.asarray(fcm.channels)
             self._fcm_us4oems = cp.asarray(fcm.us4oems)
@@ -3241,8 +4993,25 @@ class RemapToLogicalOrder(Operation):
                               self._n_frames_us4oems,
                               batch_size, n_frames, n_samples, n_channels])
 
-            self._remap_fn = gpu_remap_fn
-        return const_metadata.copy(input_shape=self.output_shape)
+            def gpu_remap_to_layout_fn(data):
+                output = self._get_logical_view(self._output_buffer)
+                s_batch, s_frame, s_sample, s_channel = (
+                    st // output.itemsize for st in output.strides)
+                run_remap_to_layout(
+                    self.grid_size, self.block_size,
+                    [output, data,
+                     self._fcm_frames, self._fcm_channels, self._fcm_us4oems,
+                     self._frame_offsets,
+                     self._n_frames_us4oems,
+                     batch_size, n_frames, n_samples, n_channels, 1],
+                    strides=(s_batch, s_frame, s_channel, s_sample, 0))
+
+            if axes == tuple(range(len(axes))) and dtype == np.int16:
+                self._remap_fn = gpu_remap_fn
+            else:
+                self._remap_fn = gpu_remap_to_layout_fn
+        metadata = const_metadata.copy(input_shape=logical_shape, dtype=dtype)
+        return _get_transposed_metadata(metadata, axes)
 
     def process(self, data):
         self._remap_fn(data)
@@ -3261,19 +5030,73 @@ class RemapToLogicalOrderV2(Operation):
     (n_us4oems*n_samples*n_frames*n_batches, n_components, 32) will be reordered
     to (batch_size, n_frames, n_channels, n_samples, n_components).
     A list of metadata objects will be returned.
+
+    The data can be written directly in a different order of axes and
+    data type, e.g. RemapToLogicalOrderV2(to_real_or_complex=True) is
+    equivalent to RemapToLogicalOrderV2() followed by ToRealOrComplex(),
+    but does not require additional passes over the data.
+
+    :param n_threads: the number of threads used by the CPU implementation
+      (the data of different us4OEMs can be remapped in separate threads)
+    :param axes: permutation of the output axes (see to_real_or_complex);
+      None means no permutation
+    :param dtype: output data type of the real data: int16 (default)
+      or float32
+    :param to_real_or_complex: whether the components axis should be
+      converted as in ToRealOrComplex, i.e. the output will be
+      (batch_size, n_frames, n_channels, n_samples) complex64 array for
+      I/Q data, or an array of the given dtype for RF data
     """
 
-    def __init__(self, num_pkg=None):
+    _output_buffers = ("_output_buffer",)
+
+    def __init__(self, num_pkg=None, n_threads=1, axes=None, dtype=None,
+                 to_real_or_complex=False):
         self._output_buffer = None
         self.xp = num_pkg
         self.remap = None
+        self.n_threads = n_threads
+        self.axes = axes
+        self.dtype = dtype
+        self.to_real_or_complex = to_real_or_complex
+        self._executor = None
 
     def set_pkgs(self, num_pkg, **kwargs):
         self.xp = num_pkg
 
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     def _is_prepared(self):
         return self._output_buffer is not None
 
+    def _fuse(self, step):
+        ndim = 4 if self.to_real_or_complex else 5
+        if type(step) is ToRealOrComplex and ndim == 5 and self.axes is None:
+            fused = copy.copy(self)
+            fused.to_real_or_complex = True
+            return fused
+        elif type(step) is Transpose:
+            axes = _get_remap_axes(self.axes, ndim)
+            step_axes = _get_transpose_axes(step.axes, ndim)
+            fused = copy.copy(self)
+            fused.axes = tuple(axes[ax] for ax in step_axes)
+            return fused
+        return None
+
+    def _get_logical_view(self, output):
+        # (batch, frame, channel, sample, component)
+        if self._is_complex:
+            # complex64 -> (..., 2) float32
+            output = output.view(self.xp.float32).reshape(output.shape + (2, ))
+            return output.transpose(self._inverse_axes + (4, ))
+        elif self.to_real_or_complex:
+            return output.transpose(self._inverse_axes)[..., self.xp.newaxis]
+        else:
+            return output.transpose(self._inverse_axes)
+
     def prepare(self, const_metadata: arrus.metadata.ConstMetadata):
         xp = self.xp
         # get shape, create an array with given shape
@@ -3296,15 +5119,48 @@ class RemapToLogicalOrderV2(Operation):
         # Input: RF data: (total_n_samples, 32),
         # IQ data: (total_n_samples, 2, 32)
         n_components = 1 if input_order == 2 else 2
-        self.output_shape = (batch_size, n_frames, n_channels, n_samples, n_components)
-        self._output_buffer = xp.zeros(shape=self.output_shape, dtype=xp.int16)
+        dtype = _get_remap_output_dtype(self.dtype)
+        self._is_complex = self.to_real_or_complex and n_components == 2
+        if self.to_real_or_complex:
+            logical_shape = (batch_size, n_frames, n_channels, n_samples)
+            if self._is_complex:
+                dtype = np.dtype(np.complex64)
+        else:
+            logical_shape = (batch_size, n_frames, n_channels, n_samples, n_components)
+        axes = _get_remap_axes(self.axes, len(logical_shape))
+        self._inverse_axes = tuple(int(ax) for ax in np.argsort(axes))
+        self.output_shape = tuple(logical_shape[ax] for ax in axes)
+        self._output_buffer = xp.zeros(shape=self.output_shape, dtype=dtype)
         if xp == np:
             # CPU
-            raise ValueError(f"'{type(self).__name__}' is not implemented for CPU")
+            # For each us4OEM, get number of physical frames this us4OEM gathers
+            # (see the GPU implementation below).
+            n_us4oems = int(np.max(fcm.us4oems)) + 1
+            n_frames_us4oems = []
+            for us4oem in range(n_us4oems):
+                us4oem_frames = fcm.frames[fcm.us4oems == us4oem]
+                if us4oem_frames.size == 0:
+                    n_frames_us4oems.append(1)
+                else:
+                    n_frames_us4oems.append(int(np.max(us4oem_frames)) + 1)
+            if self.n_threads > 1:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.n_threads)
+            cpu_remap = _CpuRemap(
+                fcm=fcm, n_frames_us4oems=n_frames_us4oems,
+                n_samples=n_samples, n_components=n_components,
+                transpose=True, executor=self._executor)
+
+            def cpu_remap_fn(data):
+                cpu_remap(self._get_logical_view(self._output_buffer), data)
+
+            self._remap_fn = cpu_remap_fn
         else:
             # GPU
             import cupy as cp
-            from arrus.utils.us4r_remap_gpu import get_default_grid_block_size_v2, run_remap_v2
+            from arrus.utils.us4r_remap_gpu import (
+                get_default_grid_block_size, get_default_grid_block_size_v2,
+                run_remap_v2, run_remap_to_layout)
             self._fcm_frames = cp.asarray(fcm.frames)
             self._fcm_channels = cp.asarray(fcm.channels)
             self._fcm_us4oems = cp.asarray(fcm.us4oems)
@@ -3338,8 +5194,29 @@ class RemapToLogicalOrderV2(Operation):
                               batch_size, n_frames, n_samples, n_channels,
                               n_components])
 
-            self._remap_fn = gpu_remap_fn
-        return const_metadata.copy(input_shape=self.output_shape)
+            def gpu_remap_to_layout_fn(data):
+                output = self._get_logical_view(self._output_buffer)
+                strides = tuple(st // output.itemsize for st in output.strides)
+                run_remap_to_layout(
+                    self._layout_grid_size, self._layout_block_size,
+                    [output, data,
+                     self._fcm_frames, self._fcm_channels,
+                     self._fcm_us4oems, self._frame_offsets,
+                     self._n_frames_us4oems,
+                     batch_size, n_frames, n_samples, n_channels,
+                     n_components],
+                    strides=strides)
+
+            if (axes == tuple(range(len(axes))) and dtype == np.int16
+                    and not self.to_real_or_complex):
+                self._remap_fn = gpu_remap_fn
+            else:
+                self._layout_grid_size, self._layout_block_size = \
+                    get_default_grid_block_size(self._fcm_frames, n_samples,
+                                                batch_size)
+                self._remap_fn = gpu_remap_to_layout_fn
+        metadata = const_metadata.copy(input_shape=logical_shape, dtype=dtype)
+        return _get_transposed_metadata(metadata, axes)
 
     def process(self, data):
         self._remap_fn(data)
@@ -3355,6 +5232,8 @@ class ToRealOrComplex(Operation):
       axis).
     """
 
+    _output_buffers = ("_output_buffer",)
+
     def __init__(self, num_pkg=None):
         self._output_buffer = None
         self.xp = num_pkg
@@ -3377,14 +5256,17 @@ class ToRealOrComplex(Operation):
             raise ValueError(f"Unhandled number of components: {n_components},"
                              f"should be 1 (real) or 2 (complex).")
 
-        # get shape, create an array with given shape
-        # create required transfers
+        if n_components == 2:
+            self._output_buffer = self.xp.zeros(output_shape, dtype=output_dtype)
         return const_metadata.copy(input_shape=output_shape,
                                    dtype=output_dtype)
 
     def _process_to_complex(self, data):
-        output = data.astype(self.xp.float32)
-        return output[..., 0] + 1j * output[..., 1]
+        real = self._output_buffer.real
+        imag = self._output_buffer.imag
+        self.xp.copyto(real, data[..., 0], casting="unsafe")
+        self.xp.copyto(imag, data[..., 1], casting="unsafe")
+        return self._output_buffer
 
     def _process_to_real(self, data):
         return data[..., 0]
@@ -3462,10 +5344,17 @@ class ReconstructLri3D(Operation):
     :param z_grid: output image grid points  (OZ coordinates)
     :param rx_tang_limits: RX apodization angle limits (given as the tangent of the angle), \
       a pair of values (min, max). If not provided or None, [-0.5, 0.5] range will be used
+    :param max_tile_size: the maximum number of voxels reconstructed by a single kernel \
+      launch, optional. The volume is reconstructed in OZ slabs (and OX slabs, \
+      if a single OZ plane does not fit), each voxel accumulates all transmits \
+      in a single launch. Use it to bound the size (and run time) of kernel launches \
+      for large grids. None means that the whole volume is reconstructed at once.
     """
 
+    _output_buffers = ("output_buffer",)
+
     def __init__(self, x_grid, y_grid, z_grid, tx_foc, tx_ang_zx, tx_ang_zy,
-                 speed_of_sound, rx_tang_limits=None):
+                 speed_of_sound, rx_tang_limits=None, max_tile_size=None):
         self.tx_ang_zy = tx_ang_zy
         self.tx_ang_zx = tx_ang_zx
         self.tx_foc = tx_foc
@@ -3476,6 +5365,7 @@ class ReconstructLri3D(Operation):
         import cupy as cp
         self.num_pkg = cp
         self.rx_tang_limits = rx_tang_limits
+        self.max_tile_size = max_tile_size
 
     def set_pkgs(self, num_pkg, **kwargs):
         if num_pkg is np:
@@ -3521,13 +5411,20 @@ class ReconstructLri3D(Operation):
         self.z_size = len(self.z_grid)
         output_shape = (self.n_seq, self.y_size, self.x_size, self.z_size)
         self.output_buffer = self.num_pkg.zeros(output_shape, dtype=self.num_pkg.complex64)
-        x_block_size = min(self.z_size, 8)
-        y_block_size = min(self.x_size, 8)
-        z_block_size = min(self.y_size, 8)
-        self.block_size = (x_block_size, y_block_size, z_block_size)
-        self.grid_size = (int((self.z_size - 1) // z_block_size + 1),
-                          int((self.x_size - 1) // x_block_size + 1),
-                          int((self.y_size - 1) // y_block_size + 1))
+        # (tile parameters, block size, grid size) for each kernel launch.
+        self._tiles = []
+        tiles = arrus.utils.memory.get_tiles(
+            (self.y_size, self.x_size, self.z_size), self.max_tile_size)
+        for x_tile, z_tile in tiles:
+            n_x_tile = x_tile.stop - x_tile.start
+            n_z_tile = z_tile.stop - z_tile.start
+            block_size = (min(n_z_tile, 8), min(n_x_tile, 8), min(self.y_size, 8))
+            grid_size = (int((n_z_tile - 1) // block_size[0] + 1),
+                         int((n_x_tile - 1) // block_size[1] + 1),
+                         int((self.y_size - 1) // block_size[2] + 1))
+            tile_params = (self.num_pkg.int32(z_tile.start), self.num_pkg.int32(n_z_tile),
+                           self.num_pkg.int32(x_tile.start), self.num_pkg.int32(n_x_tile))
+            self._tiles.append((tile_params, block_size, grid_size))
 
         self.y_pix = self.num_pkg.asarray(self.y_grid, dtype=self.num_pkg.float32)
         self.x_pix = self.num_pkg.asarray(self.x_grid, dtype=self.num_pkg.float32)
@@ -3676,7 +5573,8 @@ class ReconstructLri3D(Operation):
             self.rx_apod, self.n_rx_apod,
             self.rx_ap_first_elem_x, self.rx_ap_first_elem_y
         )
-        self._kernel(self.grid_size, self.block_size, params)
+        for tile_params, block_size, grid_size in self._tiles:
+            self._kernel(grid_size, block_size, params + tile_params)
         return self.output_buffer
 
 
@@ -3685,6 +5583,8 @@ class Equalize(Operation):
     Equalize means values along a specific axis.
     """
 
+    _output_buffers = ("_output",)
+
     def __init__(self, axis=0, axis_offset=0, num_pkg=None):
         self.axis = axis
         self.axis_offset = axis_offset
@@ -3702,25 +5602,32 @@ class Equalize(Operation):
         self.slice = [slice(None)] * len(self.input_shape)
         self.slice[self.axis] = slice(self.axis_offset, None)
         self.slice = tuple(self.slice)
+        mean_shape = list(self.input_shape)
+        mean_shape[self.axis] = 1
+        mean_dtype = np.mean(np.zeros(1, dtype=self.input_dtype)).dtype
+        self._mean = self.xp.zeros(tuple(mean_shape), dtype=mean_dtype)
+        self._mean_input_dtype = self.xp.zeros(tuple(mean_shape), dtype=self.input_dtype)
+        self._output = self.xp.zeros(self.input_shape, dtype=self.input_dtype)
         return const_metadata.copy()
 
     def process(self, data):
         d = data[self.slice]
-        m = d.mean(axis=self.axis).astype(self.input_dtype)
-        m = self.xp.expand_dims(m, axis=self.axis)
-        return data - m
+        self.xp.mean(d, axis=self.axis, keepdims=True, out=self._mean)
+        self.xp.copyto(self._mean_input_dtype, self._mean, casting="unsafe")
+        return self.xp.subtract(data, self._mean_input_dtype, out=self._output)
 
 
 class DelayAndSumLUT(Operation):
     """
     Delay and sum using look-up tables.
 
-    This operator requires GPU and cupy package installed.
     TODO Note:: the below operator will not work correctly for:
     - start_sample != 0,
     - downsampling_factor != 1.
     """
 
+    _output_buffers = ("output_buffer",)
+
     def __init__(self,
                  tx_delays, tx_apodization,
                  rx_apodization, rx_delays,
@@ -3729,19 +5636,29 @@ class DelayAndSumLUT(Operation):
         self.rx_delays = rx_delays
         self.tx_apodization = tx_apodization
         self.rx_apodization = rx_apodization
-        import cupy as cp
-        self.num_pkg = cp
+        self.num_pkg = None
+        self._executor = None
         self.output_type = output_type if output_type is not None else "hri"
 
     def set_pkgs(self, num_pkg, **kwargs):
-        if num_pkg is np:
-            raise ValueError("ReconstructLri operation is implemented for GPU only.")
+        self.num_pkg = num_pkg
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
 
     def prepare(self, const_metadata):
-        import cupy as cp
-        current_dir = os.path.dirname(os.path.join(os.path.abspath(__file__)))
-        _kernel_source = Path(os.path.join(current_dir, "das_lut.cu")).read_text()
-        self._kernel_module = self.num_pkg.RawModule(code=_kernel_source)
+        if self.num_pkg is None:
+            import cupy as cp
+            self.num_pkg = cp
+        if self.num_pkg is np:
+            self._executor = concurrent.futures.ThreadPoolExecutor()
+            self.process = self._process_cpu
+        else:
+            current_dir = os.path.dirname(os.path.join(os.path.abspath(__file__)))
+            _kernel_source = Path(os.path.join(current_dir, "das_lut.cu")).read_text()
+            self._kernel_module = self.num_pkg.RawModule(code=_kernel_source)
 
         # INPUT PARAMETERS.
         # Input data shape.
@@ -3754,13 +5671,15 @@ class DelayAndSumLUT(Operation):
         probe_model = get_unique_probe_model(const_metadata)
 
         if self.output_type == "hri":
-            self._kernel = self._kernel_module.get_function("delayAndSumLutHri")
+            kernel_name = "delayAndSumLutHri"
             output_shape = (self.n_seq, self.y_size, self.x_size, self.z_size)
         elif self.output_type == "lri":
-            self._kernel = self._kernel_module.get_function("delayAndSumLutLri")
+            kernel_name = "delayAndSumLutLri"
             output_shape = (self.n_seq, self.n_tx, self.y_size, self.x_size, self.z_size)
         else:
             raise ValueError(f"Unsupported output type: {self.output_type}")
+        if self.num_pkg is not np:
+            self._kernel = self._kernel_module.get_function(kernel_name)
 
         downsampling_factor = raw_seq.ops[0].rx.downsampling_factor
         start_sample = raw_seq.ops[0].rx.sample_range[0]
@@ -3809,6 +5728,15 @@ class DelayAndSumLUT(Operation):
         self._kernel(self.grid_size, self.block_size, params)
         return self.output_buffer
 
+    def _process_cpu(self, data):
+        return arrus.utils.beamforming_cpu.delay_and_sum_lut(
+            self.output_buffer, data,
+            tx_delays=self.tx_delays, rx_delays=self.rx_delays,
+            tx_apodization=self.tx_apodization,
+            rx_apodization=self.rx_apodization,
+            init_delay=self.initial_delay, fs=self.fs, fc=self.fn,
+            output_type=self.output_type, executor=self._executor)
+
 
 class RunForDlPackCapsule(Operation):
     """
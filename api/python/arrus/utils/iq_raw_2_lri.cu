@@ -2,42 +2,32 @@
 
 #define CUDART_PI_F 3.141592654f
 
-__constant__ float zElemConst[1024];
-__constant__ float xElemConst[1024];
-__constant__ float tangElemConst[1024];
+// Probe element tables, (3, nElem) arrays: z, x, tang (see ReconstructLri
+// and arrus.utils.const_memory).
+__constant__ float elemConst[3*1024];
 
-extern "C"
-__global__ void
-iqRaw2Lri(complex<float> *iqLri, const complex<float> *iqRaw,
-          const int nElem,
-          const int nSeq, const int nTx, const int nSamp,
-          const float *zPix, const int nZPix,
-          const float *xPix, const int nXPix,
-          float const sos, float const fs, float const fn,
-          const float *txFoc, const float *txAngZX,
-          const float *txApCentZ, const float *txApCentX,
-          const int *txApFstElem, const int *txApLstElem,
-          const int *rxApOrigElem, const int nRx,
-          const float minRxTang, const float maxRxTang,
-          float const initDel,
-          const int zElemConstOffset,
-          const int xElemConstOffset,
-          const int tangElemConstOffset
-) {
-
-    int z = blockIdx.x * blockDim.x + threadIdx.x;
-    int x = blockIdx.y * blockDim.y + threadIdx.y;
-    int iGlobalTx = blockIdx.z * blockDim.z + threadIdx.z;
-
-    if(z >= nZPix || x >= nXPix || iGlobalTx >= nSeq*nTx) {
-        return;
-    }
-    int iTx = iGlobalTx % nTx;
-
-    float *zElemConstLocal = zElemConst + zElemConstOffset;
-    float *xElemConstLocal = xElemConst + xElemConstOffset;
-    float *tangElemConstLocal = tangElemConst + tangElemConstOffset;
+/**
+   Reconstructs a single pixel (x, z) of the low-resolution image for
+   the given transmit.
 
+   @param iqRaw: input data for the given transmit (nRx, nSamp)
+ */
+__forceinline__ __device__ complex<float>
+lriPixel(const complex<float> *iqRaw,
+         const int iTx, const int x, const int z,
+         const int nElem, const int nSamp,
+         const float *zPix, const float *xPix,
+         float const sos, float const fs, float const fn,
+         const float *txFoc, const float *txAngZX,
+         const float *txApCentZ, const float *txApCentX,
+         const int *txApFstElem, const int *txApLstElem,
+         const int *rxApOrigElem, const int nRx,
+         const float minRxTang, const float maxRxTang,
+         float const initDel,
+         const float *zElem,
+         const float *xElem,
+         const float *tangElem
+) {
     int iElem, offset;
     float interpWgh;
     float txDist, rxDist, rxTang, txApod, rxApod, time, iSamp;
@@ -50,8 +40,6 @@ iqRaw2Lri(complex<float> *iqLri, const complex<float> *iqRaw,
     const float centRxTang = (maxRxTang + minRxTang) * 0.5f;
     complex<float> pix(0.0f, 0.0f), samp(0.0f, 0.0f), modFactor;
 
-    int txOffset = iGlobalTx * nSamp * nRx;
-
     if(!isinf(txFoc[iTx])) {
         /* STA */
         float zFoc = txApCentZ[iTx] + txFoc[iTx] * cosf(txAngZX[iTx]);
@@ -77,10 +65,10 @@ iqRaw2Lri(complex<float> *iqLri, const complex<float> *iqRaw,
         // Projections of Foc-Pix vector on the rotated Foc-ApEdge vectors (dot products) ...
         // to determine if the pixel is in the sonified area (dot product >= 0).
         // Foc-ApEdgeFst vector is rotated left, Foc-ApEdgeLst vector is rotated right.
-        txApod = (((-(xElemConstLocal[txApFstElem[iTx]] - xFoc) * (zPix[z] - zFoc) +
-                    (zElemConstLocal[txApFstElem[iTx]] - zFoc) * (xPix[x] - xFoc)) * pixFocArrang >= 0.f) &&
-                  (((xElemConstLocal[txApLstElem[iTx]] - xFoc) * (zPix[z] - zFoc) -
-                    (zElemConstLocal[txApLstElem[iTx]] - zFoc) * (xPix[x] - xFoc)) * pixFocArrang >= 0.f)) ? 1.f : 0.f;
+        txApod = (((-(xElem[txApFstElem[iTx]] - xFoc) * (zPix[z] - zFoc) +
+                    (zElem[txApFstElem[iTx]] - zFoc) * (xPix[x] - xFoc)) * pixFocArrang >= 0.f) &&
+                  (((xElem[txApLstElem[iTx]] - xFoc) * (zPix[z] - zFoc) -
+                    (zElem[txApLstElem[iTx]] - zFoc) * (xPix[x] - xFoc)) * pixFocArrang >= 0.f)) ? 1.f : 0.f;
     } else {
         /* PWI */
         txDist = (zPix[z] - txApCentZ[iTx]) * cosf(txAngZX[iTx]) +
@@ -89,23 +77,21 @@ iqRaw2Lri(complex<float> *iqLri, const complex<float> *iqRaw,
         // Projections of ApEdge-Pix vector on the rotated unit vector of tx direction (dot products) ...
         // to determine if the pixel is in the sonified area (dot product >= 0).
         // For ApEdgeFst, the vector is rotated left, for ApEdgeLst the vector is rotated right.
-        txApod = (((-(zPix[z] - zElemConstLocal[txApFstElem[iTx]]) * sinf(txAngZX[iTx]) +
-                    (xPix[x] - xElemConstLocal[txApFstElem[iTx]]) * cosf(txAngZX[iTx])) >= 0.f) &&
-                  (((zPix[z] - zElemConstLocal[txApLstElem[iTx]]) * sinf(txAngZX[iTx]) -
-                    (xPix[x] - xElemConstLocal[txApLstElem[iTx]]) * cosf(txAngZX[iTx])) >= 0.f)) ? 1.f : 0.f;
+        txApod = (((-(zPix[z] - zElem[txApFstElem[iTx]]) * sinf(txAngZX[iTx]) +
+                    (xPix[x] - xElem[txApFstElem[iTx]]) * cosf(txAngZX[iTx])) >= 0.f) &&
+                  (((zPix[z] - zElem[txApLstElem[iTx]]) * sinf(txAngZX[iTx]) -
+                    (xPix[x] - xElem[txApLstElem[iTx]]) * cosf(txAngZX[iTx])) >= 0.f)) ? 1.f : 0.f;
     }
     pixWgh = 0.0f;
-    pix.real(0.0f);
-    pix.imag(0.0f);
 
     if(txApod != 0.0f) {
         for(int iRx = 0; iRx < nRx; iRx++) {
             iElem = iRx + rxApOrigElem[iTx];
             if(iElem < 0 || iElem >= nElem) continue;
 
-            rxDist = hypotf(xPix[x] - xElemConstLocal[iElem], zPix[z] - zElemConstLocal[iElem]);
-            rxTang = __fdividef(xPix[x] - xElemConstLocal[iElem], zPix[z] - zElemConstLocal[iElem]);
-            rxTang = __fdividef(rxTang - tangElemConstLocal[iElem], 1.f + rxTang * tangElemConstLocal[iElem]);
+            rxDist = hypotf(xPix[x] - xElem[iElem], zPix[z] - zElem[iElem]);
+            rxTang = __fdividef(xPix[x] - xElem[iElem], zPix[z] - zElem[iElem]);
+            rxTang = __fdividef(rxTang - tangElem[iElem], 1.f + rxTang * tangElem[iElem]);
             if(rxTang < minRxTang || rxTang > maxRxTang) continue;
 
             rxApod = (rxTang - centRxTang) * rngRxTangInv;
@@ -116,7 +102,7 @@ iqRaw2Lri(complex<float> *iqLri, const complex<float> *iqRaw,
             if(iSamp < 0.0f || iSamp >= static_cast<float>(nSamp - 1)) {
                 continue;
             }
-            offset = txOffset + iRx * nSamp;
+            offset = iRx * nSamp;
             interpWgh = modff(iSamp, &iSamp);
             int intSamp = int(iSamp);
 
@@ -129,8 +115,255 @@ iqRaw2Lri(complex<float> *iqLri, const complex<float> *iqRaw,
         }
     }
     if(pixWgh == 0.0f) {
-        iqLri[z + x*nZPix + iGlobalTx*nZPix*nXPix] = complex<float>(0.0f, 0.0f);
+        return complex<float>(0.0f, 0.0f);
     } else {
-        iqLri[z + x*nZPix + iGlobalTx*nZPix*nXPix] = pix / pixWgh * txApod;
+        return pix / pixWgh * txApod;
+    }
+}
+
+extern "C"
+__global__ void
+iqRaw2Lri(complex<float> *iqLri, const complex<float> *iqRaw,
+          const int nElem,
+          const int nSeq, const int nTx, const int nSamp,
+          const float *zPix, const int nZPix,
+          const float *xPix, const int nXPix,
+          float const sos, float const fs, float const fn,
+          const float *txFoc, const float *txAngZX,
+          const float *txApCentZ, const float *txApCentX,
+          const int *txApFstElem, const int *txApLstElem,
+          const int *rxApOrigElem, const int nRx,
+          const float minRxTang, const float maxRxTang,
+          float const initDel,
+          const int elemConstOffset,
+          const float *elemGlobal
+) {
+
+    int z = blockIdx.x * blockDim.x + threadIdx.x;
+    int x = blockIdx.y * blockDim.y + threadIdx.y;
+    int iGlobalTx = blockIdx.z * blockDim.z + threadIdx.z;
+
+    if(z >= nZPix || x >= nXPix || iGlobalTx >= nSeq*nTx) {
+        return;
+    }
+    int iTx = iGlobalTx % nTx;
+    const complex<float> *iqTx = iqRaw + iGlobalTx * nSamp * nRx;
+    complex<float> pix;
+    // The element tables are read from the constant memory, unless they
+    // did not fit into it (elemGlobal != nullptr).
+    if(elemGlobal == nullptr) {
+        const float *elem = elemConst + elemConstOffset;
+        pix = lriPixel(
+            iqTx, iTx, x, z, nElem, nSamp, zPix, xPix,
+            sos, fs, fn, txFoc, txAngZX, txApCentZ, txApCentX, txApFstElem, txApLstElem,
+            rxApOrigElem, nRx, minRxTang, maxRxTang, initDel,
+            elem, elem + nElem, elem + 2*nElem);
+    }
+    else {
+        pix = lriPixel(
+            iqTx, iTx, x, z, nElem, nSamp, zPix, xPix,
+            sos, fs, fn, txFoc, txAngZX, txApCentZ, txApCentX, txApFstElem, txApLstElem,
+            rxApOrigElem, nRx, minRxTang, maxRxTang, initDel,
+            elemGlobal, elemGlobal + nElem, elemGlobal + 2*nElem);
+    }
+    iqLri[z + x*nZPix + iGlobalTx*nZPix*nXPix] = pix;
+}
+
+/**
+   The same as iqRaw2Lri, but compounds the low-resolution images
+   of all transmits (weighted sum) into a single high-resolution image.
+
+   @param iqHri: output array (nSeq, nXPix, nZPix)
+   @param txWeights: weights of the transmits (nTx)
+ */
+extern "C"
+__global__ void
+iqRaw2Hri(complex<float> *iqHri, const complex<float> *iqRaw,
+          const int nElem,
+          const int nSeq, const int nTx, const int nSamp,
+          const float *zPix, const int nZPix,
+          const float *xPix, const int nXPix,
+          float const sos, float const fs, float const fn,
+          const float *txFoc, const float *txAngZX,
+          const float *txApCentZ, const float *txApCentX,
+          const int *txApFstElem, const int *txApLstElem,
+          const int *rxApOrigElem, const int nRx,
+          const float minRxTang, const float maxRxTang,
+          float const initDel,
+          const int elemConstOffset,
+          const float *elemGlobal,
+          const float *txWeights
+) {
+
+    int z = blockIdx.x * blockDim.x + threadIdx.x;
+    int x = blockIdx.y * blockDim.y + threadIdx.y;
+    int iSeq = blockIdx.z * blockDim.z + threadIdx.z;
+
+    if(z >= nZPix || x >= nXPix || iSeq >= nSeq) {
+        return;
+    }
+    const bool isConst = elemGlobal == nullptr;
+    const float *elem = elemConst + elemConstOffset;
+    complex<float> hri(0.0f, 0.0f);
+    for(int iTx = 0; iTx < nTx; ++iTx) {
+        if(txWeights[iTx] == 0.0f) continue;
+        int iGlobalTx = iSeq*nTx + iTx;
+        const complex<float> *iqTx = iqRaw + iGlobalTx * nSamp * nRx;
+        complex<float> pix;
+        if(isConst) {
+            pix = lriPixel(
+                iqTx, iTx, x, z, nElem, nSamp, zPix, xPix,
+                sos, fs, fn, txFoc, txAngZX, txApCentZ, txApCentX, txApFstElem, txApLstElem,
+                rxApOrigElem, nRx, minRxTang, maxRxTang, initDel,
+                elem, elem + nElem, elem + 2*nElem);
+        }
+        else {
+            pix = lriPixel(
+                iqTx, iTx, x, z, nElem, nSamp, zPix, xPix,
+                sos, fs, fn, txFoc, txAngZX, txApCentZ, txApCentX, txApFstElem, txApLstElem,
+                rxApOrigElem, nRx, minRxTang, maxRxTang, initDel,
+                elemGlobal, elemGlobal + nElem, elemGlobal + 2*nElem);
+        }
+        hri += txWeights[iTx] * pix;
+    }
+    iqHri[z + x*nZPix + iSeq*nZPix*nXPix] = hri;
+}
+
+
+/**
+   Reconstructs a single pixel of the low-resolution image for
+   the given transmit, using the precomputed look-up tables of delays and
+   apodization weights (see arrus.utils.lut).
+
+   @param iqRaw: input data for the given transmit (nRx, nSamp)
+   @param iPix: pixel number (x*nZPix + z)
+   @param nPix: the number of pixels (nXPix*nZPix)
+ */
+__forceinline__ __device__ complex<float>
+lriPixelLut(const complex<float> *iqRaw,
+            const int iTx, const size_t iPix, const size_t nPix,
+            const int nElem, const int nSamp,
+            float const fs, float const fn,
+            const float *txDelays, const unsigned char *txApodization,
+            const float *rxDelays, const float *rxApodization,
+            const int *rxApOrigElem, const int nRx,
+            float const initDel
+) {
+    int iElem, offset;
+    float interpWgh, rxApod, time, iSamp, modSin, modCos;
+    const float omega = 2 * CUDART_PI_F * fn;
+    float pixWgh = 0.0f;
+    complex<float> pix(0.0f, 0.0f), samp(0.0f, 0.0f);
+
+    if(txApodization[iTx*nPix + iPix] != 0) {
+        float txDel = txDelays[iTx*nPix + iPix] + initDel;
+        for(int iRx = 0; iRx < nRx; iRx++) {
+            iElem = iRx + rxApOrigElem[iTx];
+            if(iElem < 0 || iElem >= nElem) continue;
+
+            rxApod = rxApodization[iElem*nPix + iPix];
+            if(rxApod == 0.0f) continue;
+
+            time = txDel + rxDelays[iElem*nPix + iPix];
+            iSamp = time * fs;
+            if(iSamp < 0.0f || iSamp >= static_cast<float>(nSamp - 1)) {
+                continue;
+            }
+            offset = iRx * nSamp;
+            interpWgh = modff(iSamp, &iSamp);
+            int intSamp = int(iSamp);
+
+            __sincosf(omega * time, &modSin, &modCos);
+            complex<float> modFactor = complex<float>(modCos, modSin);
+
+            samp = iqRaw[offset + intSamp] * (1 - interpWgh) + iqRaw[offset + intSamp + 1] * interpWgh;
+            pix += samp * modFactor * rxApod;
+            pixWgh += rxApod;
+        }
+    }
+    if(pixWgh == 0.0f) {
+        return complex<float>(0.0f, 0.0f);
+    } else {
+        return pix / pixWgh;
+    }
+}
+
+
+/**
+   The same as iqRaw2Lri, but uses the precomputed look-up tables
+   of delays and apodization weights (see arrus.utils.lut).
+
+   @param txDelays: TX delays (nTx, nXPix, nZPix), (s)
+   @param txApodization: TX (binary) apodization (nTx, nXPix, nZPix)
+   @param rxDelays: RX delays (nElem, nXPix, nZPix), (s)
+   @param rxApodization: RX apodization (nElem, nXPix, nZPix)
+ */
+extern "C"
+__global__ void
+iqRaw2LriLut(complex<float> *iqLri, const complex<float> *iqRaw,
+             const int nElem,
+             const int nSeq, const int nTx, const int nSamp,
+             const int nZPix, const int nXPix,
+             float const fs, float const fn,
+             const float *txDelays, const unsigned char *txApodization,
+             const float *rxDelays, const float *rxApodization,
+             const int *rxApOrigElem, const int nRx,
+             float const initDel
+) {
+    int z = blockIdx.x * blockDim.x + threadIdx.x;
+    int x = blockIdx.y * blockDim.y + threadIdx.y;
+    int iGlobalTx = blockIdx.z * blockDim.z + threadIdx.z;
+
+    if(z >= nZPix || x >= nXPix || iGlobalTx >= nSeq*nTx) {
+        return;
+    }
+    int iTx = iGlobalTx % nTx;
+    const size_t nPix = (size_t)nXPix*nZPix;
+    const size_t iPix = (size_t)x*nZPix + z;
+
+    iqLri[iPix + iGlobalTx*nPix] = lriPixelLut(
+        iqRaw + iGlobalTx * nSamp * nRx, iTx, iPix, nPix, nElem, nSamp, fs, fn,
+        txDelays, txApodization, rxDelays, rxApodization, rxApOrigElem, nRx, initDel);
+}
+
+
+/**
+   The same as iqRaw2LriLut, but compounds the low-resolution images
+   of all transmits (weighted sum) into a single high-resolution image.
+
+   @param iqHri: output array (nSeq, nXPix, nZPix)
+   @param txWeights: weights of the transmits (nTx)
+ */
+extern "C"
+__global__ void
+iqRaw2HriLut(complex<float> *iqHri, const complex<float> *iqRaw,
+             const int nElem,
+             const int nSeq, const int nTx, const int nSamp,
+             const int nZPix, const int nXPix,
+             float const fs, float const fn,
+             const float *txDelays, const unsigned char *txApodization,
+             const float *rxDelays, const float *rxApodization,
+             const int *rxApOrigElem, const int nRx,
+             float const initDel,
+             const float *txWeights
+) {
+    int z = blockIdx.x * blockDim.x + threadIdx.x;
+    int x = blockIdx.y * blockDim.y + threadIdx.y;
+    int iSeq = blockIdx.z * blockDim.z + threadIdx.z;
+
+    if(z >= nZPix || x >= nXPix || iSeq >= nSeq) {
+        return;
+    }
+    const size_t nPix = (size_t)nXPix*nZPix;
+    const size_t iPix = (size_t)x*nZPix + z;
+
+    complex<float> hri(0.0f, 0.0f);
+    for(int iTx = 0; iTx < nTx; ++iTx) {
+        if(txWeights[iTx] == 0.0f) continue;
+        int iGlobalTx = iSeq*nTx + iTx;
+        hri += txWeights[iTx] * lriPixelLut(
+            iqRaw + iGlobalTx * nSamp * nRx, iTx, iPix, nPix, nElem, nSamp, fs, fn,
+            txDelays, txApodization, rxDelays, rxApodization, rxApOrigElem, nRx, initDel);
     }
-}
\ No newline at end of file
+    iqHri[iPix + iSeq*nPix] = hri;
+}
@@ -45,12 +45,16 @@ __global__ void iqRaw2Lri3D(complex<float> *iqLri, const complex<float> *input,
                             const float *rxApod, const int nRxApod,
     // list of positions (x, y) of the first element of rx aperture
     // (assuming rectangle aperture, the first element is the one in the top left corner)
-                            const int *rxApFstElemX, const int *rxApFstElemY
+                            const int *rxApFstElemX, const int *rxApFstElemY,
+    // The tile of the output grid reconstructed by this kernel launch:
+    // [zTileOrig, zTileOrig+nZTile) x [xTileOrig, xTileOrig+nXTile) x [0, nYPix)
+                            const int zTileOrig, const int nZTile,
+                            const int xTileOrig, const int nXTile
 ) {
-    int z = blockIdx.x * blockDim.x + threadIdx.x;
-    int x = blockIdx.y * blockDim.y + threadIdx.y;
+    int z = zTileOrig + blockIdx.x * blockDim.x + threadIdx.x;
+    int x = xTileOrig + blockIdx.y * blockDim.y + threadIdx.y;
     int y = blockIdx.z * blockDim.z + threadIdx.z;
-    if (z >= nZPix || x >= nXPix || y >= nYPix) {
+    if (z >= zTileOrig + nZTile || x >= xTileOrig + nXTile || y >= nYPix) {
         return;
     }
     unsigned txOffset, offset;
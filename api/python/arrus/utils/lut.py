@@ -0,0 +1,223 @@
+"""
+Look-up tables (LUTs) of the delays and apodization weights for the
+synthetic aperture image reconstruction (ReconstructLri).
+
+The LUTs depend only on the geometry of the reconstruction (sequence,
+probe model, grid, speed of sound), so they are cached: in memory
+(the most recently used LUTs, up to MEMORY_CACHE_NBYTES bytes in total,
+see set_memory_cache_nbytes and clear_memory_cache) and, optionally,
+in the given directory on disk, under the hash of the geometry.
+"""
+import collections
+import dataclasses
+import hashlib
+import os
+import threading
+import zipfile
+
+import numpy as np
+
+import arrus
+import arrus.logging
+from arrus.utils.beamforming_cpu import (
+    get_lri_tx_geometry, get_lri_rx_geometry, _get_chunks
+)
+
+# Should be incremented each time the LUT computation changes
+# (invalidates the LUTs stored on disk).
+LUT_VERSION = 1
+# The maximum total size of the LUTs kept in memory [bytes].
+MEMORY_CACHE_NBYTES = 512*2**20
+
+_memory_cache = collections.OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+
+@dataclasses.dataclass(frozen=True)
+class LriLut:
+    """
+    Look-up tables for the low-resolution image reconstruction.
+
+    The total delay of the echo from grid point (x, z), received by
+    element e after transmit tx is equal to:
+    tx_delays[tx, x, z] + rx_delays[e, x, z] (+ the initial delay).
+
+    :param tx_delays: TX delays, (n_tx, n_x, n_z) float32 array [s]
+    :param tx_apodization: TX (binary) apodization, (n_tx, n_x, n_z) uint8 array
+    :param rx_delays: RX delays, (n_elements, n_x, n_z) float32 array [s]
+    :param rx_apodization: RX apodization, (n_elements, n_x, n_z) float32 array
+    """
+    tx_delays: np.ndarray
+    tx_apodization: np.ndarray
+    rx_delays: np.ndarray
+    rx_apodization: np.ndarray
+
+    @property
+    def nbytes(self):
+        return sum(v.nbytes for v in dataclasses.astuple(self))
+
+
+def compute_lri_lut(x_pix, z_pix, x_elem, z_elem, tang_elem,
+                    tx_foc, tx_ang_zx, tx_ap_cent_z, tx_ap_cent_x,
+                    tx_ap_first_elem, tx_ap_last_elem,
+                    sos, min_tang, max_tang,
+                    chunk_size=2**20) -> LriLut:
+    """
+    Computes ReconstructLri look-up tables for the given geometry.
+
+    See ReconstructLri and iq_raw_2_lri.cu for the description of
+    the parameters.
+    """
+    x_pix = np.asarray(x_pix, dtype=np.float32)
+    z_pix = np.asarray(z_pix, dtype=np.float32)
+    n_x, n_z = len(x_pix), len(z_pix)
+    x_points = np.repeat(x_pix, n_z)
+    z_points = np.tile(z_pix, n_x)
+    x_elem = np.asarray(x_elem, dtype=np.float32).reshape(-1)
+    z_elem = np.asarray(z_elem, dtype=np.float32).reshape(-1)
+    tang_elem = np.asarray(tang_elem, dtype=np.float32).reshape(-1)
+    n_elements, n_tx = len(x_elem), len(tx_foc)
+    sos = np.float32(sos)
+    n_points = n_x*n_z
+    tx_delays = np.zeros((n_tx, n_points), dtype=np.float32)
+    tx_apodization = np.zeros((n_tx, n_points), dtype=np.uint8)
+    rx_delays = np.zeros((n_elements, n_points), dtype=np.float32)
+    rx_apodization = np.zeros((n_elements, n_points), dtype=np.float32)
+
+    for chunk in _get_chunks(n_points, chunk_size//max(n_elements, 1)):
+        xp, zp = x_points[chunk], z_points[chunk]
+        rx_dist, rx_apod = get_lri_rx_geometry(
+            xp, zp, x_elem=x_elem[:, np.newaxis],
+            z_elem=z_elem[:, np.newaxis],
+            tang_elem=tang_elem[:, np.newaxis],
+            min_tang=min_tang, max_tang=max_tang)
+        rx_delays[:, chunk] = rx_dist/sos
+        rx_apodization[:, chunk] = rx_apod
+        for tx in range(n_tx):
+            tx_dist, tx_apod = get_lri_tx_geometry(
+                xp, zp, x_elem=x_elem, z_elem=z_elem, tx_foc=tx_foc[tx],
+                tx_ang_zx=tx_ang_zx[tx], tx_ap_cent_z=tx_ap_cent_z[tx],
+                tx_ap_cent_x=tx_ap_cent_x[tx],
+                tx_ap_first_elem=tx_ap_first_elem[tx],
+                tx_ap_last_elem=tx_ap_last_elem[tx])
+            tx_delays[tx, chunk] = tx_dist/sos
+            tx_apodization[tx, chunk] = tx_apod
+    # NaN delays (e.g. grid point == element position) are never used
+    # (apodization == 0).
+    rx_delays = np.nan_to_num(rx_delays, copy=False)
+    return LriLut(
+        tx_delays=tx_delays.reshape(n_tx, n_x, n_z),
+        tx_apodization=tx_apodization.reshape(n_tx, n_x, n_z),
+        rx_delays=rx_delays.reshape(n_elements, n_x, n_z),
+        rx_apodization=rx_apodization.reshape(n_elements, n_x, n_z))
+
+
+def get_geometry_hash(**params):
+    """
+    Returns the hash (hex string) of the given geometry parameters.
+
+    The parameters are converted to numpy arrays; the hash depends on
+    the parameter names, values, data types and shapes.
+    """
+    h = hashlib.sha256()
+    h.update(f"lri_lut:{LUT_VERSION}".encode())
+    for name in sorted(params.keys()):
+        value = np.ascontiguousarray(params[name])
+        h.update(f"{name}:{value.dtype.str}:{value.shape}".encode())
+        h.update(value.tobytes())
+    return h.hexdigest()
+
+
+def get_lut(key, compute, cache_dir=None):
+    """
+    Returns the LUT for the given key.
+
+    The LUT is looked up in memory and then in the cache directory
+    (if provided); the LUT is computed (and stored in the cache)
+    only when it is not available in any of them.
+
+    :param key: the geometry hash, see get_geometry_hash
+    :param compute: a function that computes the LUT (no parameters)
+    :param cache_dir: path to the on-disk cache directory; None means
+      that only the memory cache will be used
+    :return: LriLut
+    """
+    with _memory_cache_lock:
+        lut = _memory_cache.get(key, None)
+        if lut is not None:
+            _memory_cache.move_to_end(key)
+            return lut
+    lut = None
+    if cache_dir is not None:
+        lut = _load(_get_path(cache_dir, key))
+    if lut is None:
+        lut = compute()
+        if cache_dir is not None:
+            _save(_get_path(cache_dir, key), lut)
+    with _memory_cache_lock:
+        _memory_cache[key] = lut
+        _shrink_memory_cache()
+    return lut
+
+
+def set_memory_cache_nbytes(nbytes):
+    """
+    Sets the maximum total size of the LUTs kept in memory.
+
+    The least recently used LUTs are removed from the memory cache
+    until it fits in the new limit.
+
+    :param nbytes: the maximum size [bytes]; 0 turns off the memory cache
+    """
+    global MEMORY_CACHE_NBYTES
+    if nbytes < 0:
+        raise ValueError(f"The memory cache size should be non-negative, "
+                         f"got: {nbytes}")
+    with _memory_cache_lock:
+        MEMORY_CACHE_NBYTES = nbytes
+        _shrink_memory_cache()
+
+
+def clear_memory_cache():
+    """
+    Removes all LUTs from the memory cache.
+    """
+    with _memory_cache_lock:
+        _memory_cache.clear()
+
+
+def _shrink_memory_cache():
+    # NOTE: should be called with the _memory_cache_lock acquired.
+    nbytes = sum(lut.nbytes for lut in _memory_cache.values())
+    while nbytes > MEMORY_CACHE_NBYTES:
+        _, lut = _memory_cache.popitem(last=False)
+        nbytes -= lut.nbytes
+
+
+def _get_path(cache_dir, key):
+    return os.path.join(cache_dir, f"lri_lut_{key}.npz")
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as f:
+            return LriLut(**{field.name: f[field.name]
+                             for field in dataclasses.fields(LriLut)})
+    except (OSError, ValueError, KeyError, ImportError, EOFError,
+            zipfile.BadZipFile) as e:
+        arrus.logging.log(arrus.logging.WARNING,
+                          f"Invalid LUT cache file: {path} ({e}), "
+                          f"the LUT will be computed again.")
+        return None
+
+
+def _save(path, lut):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Save to a temporary file first, so the other processes never read
+    # a partially written file.
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **dataclasses.asdict(lut))
+    os.replace(tmp_path, path)
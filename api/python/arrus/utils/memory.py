@@ -0,0 +1,169 @@
+"""
+Planning memory for the intermediate buffers of the processing pipelines.
+"""
+import dataclasses
+from typing import Tuple, Hashable, Sequence
+
+import numpy as np
+
+
+# Offset alignment of the buffers placed in the arena [bytes]
+# (the same as the cupy memory pool allocation unit).
+ALIGNMENT = 512
+
+
+@dataclasses.dataclass(frozen=True)
+class BufferRequest:
+    """
+    A request for a buffer memory.
+
+    :param key: unique identifier of the buffer
+    :param nbytes: buffer size [bytes]
+    :param start: the number of the first step, in which the buffer is used
+    :param end: the number of the last step, in which the buffer is used
+      (inclusive)
+    """
+    key: Hashable
+    nbytes: int
+    start: int
+    end: int
+
+    def overlaps(self, other):
+        return self.start <= other.end and other.start <= self.end
+
+
+@dataclasses.dataclass(frozen=True)
+class MemoryBlock:
+    """
+    A buffer placed in the arena.
+
+    :param request: the request for the buffer
+    :param offset: the offset of the buffer in the arena [bytes]
+    """
+    request: BufferRequest
+    offset: int
+
+    @property
+    def key(self):
+        return self.request.key
+
+    @property
+    def end_offset(self):
+        return self.offset + self.request.nbytes
+
+
+@dataclasses.dataclass(frozen=True)
+class MemoryPlan:
+    """
+    Placement of buffers in a single memory arena.
+
+    Buffers that are not used at the same time can share the same memory.
+
+    :param blocks: placed buffers
+    :param nbytes: the size of the arena, i.e. the planned peak memory
+      footprint of the buffers [bytes]
+    :param unshared_nbytes: the total size of the buffers, i.e. the memory
+      footprint without sharing [bytes]
+    """
+    blocks: Tuple[MemoryBlock]
+    nbytes: int
+    unshared_nbytes: int
+
+    def get_block(self, key):
+        for block in self.blocks:
+            if block.key == key:
+                return block
+        raise ValueError(f"There is no buffer with key: {key}")
+
+
+def _align(nbytes):
+    return (nbytes + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def plan_memory(requests: Sequence[BufferRequest]) -> MemoryPlan:
+    """
+    Places the given buffers in a single memory arena, so that buffers with
+    overlapping lifetimes do not overlap in memory.
+
+    The buffers are placed greedily, starting from the largest one;
+    each buffer is put in the smallest gap between the already placed,
+    simultaneously used buffers it fits in.
+
+    :param requests: buffers to place
+    :return: memory plan
+    """
+    keys = [r.key for r in requests]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Buffer keys should be unique.")
+    for r in requests:
+        if r.nbytes < 0 or r.start > r.end:
+            raise ValueError(f"Invalid buffer request: {r}")
+    ordered = sorted(requests, key=lambda r: (-r.nbytes, r.start))
+    placed = []
+    for request in ordered:
+        size = _align(request.nbytes)
+        conflicts = sorted((b for b in placed if b.request.overlaps(request)),
+                           key=lambda b: b.offset)
+        best_offset, best_gap = None, None
+        offset = 0
+        for block in conflicts:
+            gap = block.offset - offset
+            if gap >= size and (best_gap is None or gap < best_gap):
+                best_offset, best_gap = offset, gap
+            offset = max(offset, _align(block.end_offset))
+        if best_offset is None:
+            best_offset = offset
+        placed.append(MemoryBlock(request=request, offset=best_offset))
+    nbytes = max((_align(b.end_offset) for b in placed), default=0)
+    unshared_nbytes = sum(_align(r.nbytes) for r in requests)
+    # Keep the order of the requests.
+    blocks_by_key = {b.key: b for b in placed}
+    blocks = tuple(blocks_by_key[r.key] for r in requests)
+    return MemoryPlan(blocks=blocks, nbytes=nbytes,
+                      unshared_nbytes=unshared_nbytes)
+
+
+def get_view(arena, block: MemoryBlock, shape, dtype):
+    """
+    Returns the array with the given shape and dtype, stored in the given
+    arena block.
+
+    :param arena: 1-D uint8 array (numpy or cupy)
+    """
+    nbytes = int(np.prod(shape, dtype=np.int64))*np.dtype(dtype).itemsize
+    return (arena[block.offset:block.offset+nbytes]
+            .view(dtype)
+            .reshape(shape))
+
+
+def get_tiles(shape, max_size=None):
+    """
+    Splits a grid with the given shape (..., n_x, n_z) into tiles of at
+    most max_size points.
+
+    The grid is split into slabs along the OZ axis first; the OX axis is
+    split only when a single OZ plane does not fit into max_size.
+    The leading axes are never split, i.e. a tile contains at least
+    prod(shape[:-2]) points.
+
+    :param shape: grid shape, (..., n_x, n_z)
+    :param max_size: the maximum number of grid points in a single tile;
+      None means that the whole grid is a single tile
+    :return: a list of pairs: (OX axis slice, OZ axis slice)
+    """
+    *other, n_x, n_z = shape
+    n_other = int(np.prod(other, dtype=np.int64))
+    if max_size is None:
+        max_size = n_other*n_x*n_z
+    if max_size <= 0:
+        raise ValueError(f"Max tile size should be positive, got: {max_size}")
+    if n_x == 0 or n_z == 0:
+        return []
+    plane_size = max(n_other*n_x, 1)
+    if plane_size <= max_size:
+        x_tile, z_tile = n_x, max_size // plane_size
+    else:
+        x_tile, z_tile = max(1, max_size // max(n_other, 1)), 1
+    return [(slice(x, min(x+x_tile, n_x)), slice(z, min(z+z_tile, n_z)))
+            for x in range(0, n_x, x_tile)
+            for z in range(0, n_z, z_tile)]
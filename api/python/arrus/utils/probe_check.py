@@ -1,14 +1,16 @@
 import collections.abc
+import concurrent.futures
 import dataclasses
 import enum
 import math
+import pickle
 import time
+import warnings
 from abc import ABC, abstractmethod
 from typing import Set, List, Iterable, Tuple, Dict, Any
 import threading
 
 import numpy as np
-from scipy.optimize import curve_fit
 from scipy.signal import butter, sosfiltfilt, hilbert
 
 import arrus.session
@@ -31,6 +33,12 @@ _N_SKIPPED_SAMPLES = 80
 _N_SKIPPED_SEQUENCES = 1
 # pulse excitation amplitude - should be int, and not exceed 15V
 _VOLTAGE = 10
+# The number of frames used to estimate the median in the streaming mode.
+_MEDIAN_RESERVOIR_SIZE = 128
+# The variance of the gaussian part above the half of its maximum,
+# (f(x) - 1/2 where f(x) > 1/2, f(x) = exp(-x**2/2)), relative to
+# the variance of the gaussian.
+_GAUSS_HALF_MAX_VARIANCE = 0.2547
 
 LOGGER = arrus.logging.get_logger()
 
@@ -65,27 +73,25 @@ def _hpfilter(
     return sosfiltfilt(iir, rf, axis=axis)
 
 
-def _normalize(x: np.ndarray) -> np.ndarray:
+def _normalize(x: np.ndarray, axis: int = None) -> np.ndarray:
     """
     Normalizes input np.ndarray (i.e. moves values into [0, 1] range.
     If x contains some np.nans, they are ignored.
     If x contains only np.nans, non-modified x is returned.
+    If x contains a single value, zeros are returned.
 
     :param x: np.ndarray
+    :param axis: axis along which the values should be normalized,
+      None means the whole array
     :return: normalized np.ndarray
     """
-
-    mx = np.nanmax(x)
-    if np.isfinite(mx):
-        mn = np.nanmin(x)
-        if mx != mn:
-            normalized = (x - mn) / (mx - mn)
-        else:
-            normalized = 0
-    else:
-        normalized = x
-
-    return normalized
+    mx = np.nanmax(x, axis=axis, keepdims=True)
+    mn = np.nanmin(x, axis=axis, keepdims=True)
+    is_finite = np.isfinite(mx)
+    is_const = mx == mn
+    scale = np.where(is_finite & ~is_const, mx - mn, 1)
+    normalized = np.where(is_finite, (x - mn) / scale, x)
+    return np.where(is_finite & is_const, 0, normalized)
 
 
 def _envelope(rf: np.ndarray) -> np.ndarray:
@@ -98,6 +104,124 @@ def _envelope(rf: np.ndarray) -> np.ndarray:
     return np.abs(hilbert(rf))
 
 
+def _get_sliding_windows(x: np.ndarray, size: int) -> np.ndarray:
+    """
+    Returns read-only view of all the windows of the given size,
+    sliding along the last axis of the input array.
+
+    :param x: input array (..., n)
+    :param size: window size
+    :return: array (..., n-size+1, size)
+    """
+    shape = x.shape[:-1] + (x.shape[-1]-size+1, size)
+    strides = x.strides + (x.strides[-1], )
+    return np.lib.stride_tricks.as_strided(x, shape=shape, strides=strides,
+                                           writeable=False)
+
+
+def _get_mid_rx_signals(data: np.ndarray) -> np.ndarray:
+    """
+    Returns high-pass filtered signals received by the transmitting channel.
+
+    :param data: numpy array of rf data with the following shape:
+        (number of frames, number of tx, number of samples,
+        number of rx channels)
+    :return: numpy array (number of frames, number of tx, number of samples)
+    """
+    nrx = data.shape[-1]
+    rf = data[:, :, _N_SKIPPED_SAMPLES:, _get_mid_rx(nrx)]
+    return _hpfilter(rf.astype(float), axis=-1)
+
+
+class _RunningMean:
+    """
+    Mean of the values given so far.
+    """
+
+    def __init__(self):
+        self._sum = None
+        self._n = 0
+
+    def update(self, values: np.ndarray):
+        if self._sum is None:
+            self._sum = np.zeros(values.shape, dtype=float)
+        self._sum += values
+        self._n += 1
+
+    def get(self) -> np.ndarray:
+        if self._n == 0:
+            raise ValueError("No values were given.")
+        return self._sum / self._n
+
+
+class _ReservoirMedian:
+    """
+    Running median estimate: the median of a random sample (reservoir)
+    of the given values. The estimate is exact when the number of
+    the given values does not exceed the size of the reservoir.
+
+    :param size: size of the reservoir
+    :param seed: seed of the random number generator
+    """
+
+    def __init__(self, size: int = _MEDIAN_RESERVOIR_SIZE, seed: int = 0):
+        self.size = size
+        self._rng = np.random.default_rng(seed)
+        self._reservoir = None
+        self._n = 0
+
+    def update(self, values: np.ndarray):
+        if self._reservoir is None:
+            self._reservoir = np.zeros((self.size, ) + values.shape,
+                                       dtype=values.dtype)
+        if self._n < self.size:
+            self._reservoir[self._n] = values
+        else:
+            i = self._rng.integers(0, self._n + 1)
+            if i < self.size:
+                self._reservoir[i] = values
+        self._n += 1
+
+    def get(self) -> np.ndarray:
+        if self._n == 0:
+            raise ValueError("No values were given.")
+        return np.median(self._reservoir[:min(self._n, self.size)], axis=0)
+
+
+class PreprocessingCache:
+    """
+    Per-check cache of the intermediate results (e.g. the high-pass filtered
+    signals), shared by the feature extractors that process the same data.
+
+    A single cache should be used for a single data array only.
+    The cache can be pickled together with the extractors
+    (e.g. when the extractors are run in a process pool); the results
+    computed so far are then available in the worker processes.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.RLock()
+
+    def get(self, key, compute):
+        """
+        Returns the value stored for the given key; the value is computed
+        using the given function on the first call.
+        """
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = compute()
+            return self._values[key]
+
+    def __getstate__(self):
+        with self._lock:
+            return {"_values": dict(self._values)}
+
+    def __setstate__(self, state):
+        self._values = state["_values"]
+        self._lock = threading.RLock()
+
+
 class StdoutLogger:
     def __init__(self):
         for func in ("debug", "info", "error", "warning", "warn"):
@@ -173,6 +297,43 @@ class ProbeElementValidatorResult:
     valid_range: tuple
 
 
+@dataclasses.dataclass(frozen=True)
+class ProbeElementValidatorResults:
+    """
+    Contains validation results of all the elements (e.g. of multiple
+    probes), in the form of arrays with the same shape as the validated
+    values.
+
+    :param verdicts: array of ElementValidationVerdict values (int)
+    :param lower_bounds: array of the lower bounds of the valid range,
+      nan when the bound was not determined
+    :param upper_bounds: array of the upper bounds of the valid range,
+      nan when the bound was not determined
+    """
+    verdicts: np.ndarray
+    lower_bounds: np.ndarray
+    upper_bounds: np.ndarray
+
+    def to_list(self) -> List[ProbeElementValidatorResult]:
+        """
+        Converts results of a single probe to the list of
+        ProbeElementValidatorResult.
+        """
+        if self.verdicts.ndim != 1:
+            raise ValueError("Only results of a single probe can be "
+                             "converted to list.")
+        results = []
+        for verdict, lower, upper in zip(self.verdicts, self.lower_bounds,
+                                         self.upper_bounds):
+            lower = None if np.isnan(lower) else lower
+            upper = None if np.isnan(upper) else upper
+            results.append(ProbeElementValidatorResult(
+                verdict=ElementValidationVerdict(int(verdict)),
+                valid_range=(lower, upper)
+            ))
+        return results
+
+
 class ProbeElementValidator(ABC):
     """
     Probe Element validator.
@@ -279,16 +440,66 @@ class ProbeHealthReport:
 class ProbeElementFeatureExtractor(ABC):
     """
     Abstract class used for creation feature extractors.
+
+    The extractors that support the streaming mode, compute the feature
+    values frame by frame: reset, update with each of the frames, and then
+    get the result.
     """
     feature: str
+    supports_streaming = False
 
-    def __init__(self, metadata):
+    def __init__(self, metadata=None, cache: PreprocessingCache = None):
         self.metadata = metadata
+        self.cache = cache
+
+    def preprocess(self, data: np.ndarray):
+        """
+        Computes the intermediate results that can be shared with
+        the other extractors (through the cache).
+        """
+        pass
 
     @abstractmethod
     def extract(self, rf: np.ndarray, *args) -> np.ndarray:
         raise ValueError("Abstract class")
 
+    def reset(self):
+        """
+        Starts the streaming mode computations.
+        """
+        raise ValueError(f"Feature '{self.feature}' can't be extracted "
+                         f"in the streaming mode.")
+
+    def update(self, frame: np.ndarray):
+        """
+        Updates the feature values with the given frame
+        (number of tx, number of samples, number of rx channels).
+        """
+        raise ValueError(f"Feature '{self.feature}' can't be extracted "
+                         f"in the streaming mode.")
+
+    def result(self) -> np.ndarray:
+        """
+        Returns the feature values for the frames given so far.
+        """
+        raise ValueError(f"Feature '{self.feature}' can't be extracted "
+                         f"in the streaming mode.")
+
+    def _get_cached(self, key, compute):
+        if self.cache is None:
+            return compute()
+        else:
+            return self.cache.get(key, compute)
+
+    def _get_mid_rx_signals(self, data):
+        return self._get_cached("mid_rx_signals",
+                                lambda: _get_mid_rx_signals(data))
+
+    def _get_mid_rx_envelope(self, data):
+        return self._get_cached(
+            "mid_rx_envelope",
+            lambda: _envelope(self._get_mid_rx_signals(data)))
+
 
 class MaxAmplitudeExtractor(ProbeElementFeatureExtractor):
     """
@@ -297,23 +508,40 @@ class MaxAmplitudeExtractor(ProbeElementFeatureExtractor):
     Returns vector of length equal to number of transmissions (ntx), where
     each element is a median over the frames of maximum amplitudes (absolute values)
     occurred in each of the transmissions.
+    The signals are high-pass filtered with the cutoff frequency equal to
+    50% of the TX frequency; the signals are not filtered when the metadata
+    is not available.
     """
     feature = "amplitude"
+    supports_streaming = True
 
     def extract(self, rf: np.ndarray) -> np.ndarray:
+        frame_max = self.__get_frame_max(rf)
+        # Choose median of a list of Tx/Rxs sequences.
+        frame_max = np.median(frame_max, axis=0)
+        return frame_max
+
+    def reset(self):
+        self._median = _ReservoirMedian()
+
+    def update(self, frame: np.ndarray):
+        self._median.update(self.__get_frame_max(frame[np.newaxis])[0])
+
+    def result(self) -> np.ndarray:
+        return self._median.get()
+
+    def __get_frame_max(self, rf: np.ndarray) -> np.ndarray:
         # Highpass filter data
         # with cutoff frequency equal 50% of tx_frequency.
-        tx_frequency = self.metadata.context.sequence.pulse.center_frequency
-        cutoff = tx_frequency/2
-        rf = _hpfilter(rf, wn=cutoff, axis=-2)
+        if self.metadata is not None:
+            tx_frequency = self.metadata.context.sequence.pulse.center_frequency
+            cutoff = tx_frequency/2
+            rf = _hpfilter(rf, wn=cutoff, axis=-2)
 
         rf = np.abs(rf[:, :, :, :])
         # Reduce each RF frame into a vector of n elements
         # (where n is the number of probe elements).
-        frame_max = np.max(rf[:, :, _N_SKIPPED_SAMPLES:, :], axis=(2, 3))
-        # Choose median of a list of Tx/Rxs sequences.
-        frame_max = np.median(frame_max, axis=0)
-        return frame_max
+        return np.max(rf[:, :, _N_SKIPPED_SAMPLES:, :], axis=(2, 3))
 
 
 class MaxHVPSCurrentExtractor(ProbeElementFeatureExtractor):
@@ -332,8 +560,8 @@ class MaxHVPSCurrentExtractor(ProbeElementFeatureExtractor):
     """
     feature = "current"
 
-    def __init__(self, metadata, polarity=1, level=0):
-        super().__init__(metadata)
+    def __init__(self, metadata, polarity=1, level=0, cache=None):
+        super().__init__(metadata, cache)
         self.polarity = polarity
         self.level = level
 
@@ -371,6 +599,20 @@ class EnergyExtractor(ProbeElementFeatureExtractor):
     or the signal is long (ringing), the energy is high.
     """
     feature = "energy"
+    supports_streaming = True
+
+    def preprocess(self, data: np.ndarray):
+        self._get_mid_rx_signals(data)
+
+    def reset(self):
+        self._mean = _RunningMean()
+
+    def update(self, frame: np.ndarray):
+        rf = _get_mid_rx_signals(frame[np.newaxis])
+        self._mean.update(self.__get_signal_energy(rf)[0])
+
+    def result(self) -> np.ndarray:
+        return self._mean.get()
 
     def extract(self, data: np.ndarray) -> np.ndarray:
         """
@@ -381,30 +623,21 @@ class EnergyExtractor(ProbeElementFeatureExtractor):
             number of rx channels)
         :return: numpy array of signal energies
         """
-        n_frames, ntx, _, nrx = data.shape
-        energies = []
-        for itx in range(ntx):
-            frames_energies = []
-            for frame in range(n_frames):
-                rf = data[frame, itx, _N_SKIPPED_SAMPLES:, _get_mid_rx(nrx)]
-                rf = rf.astype(float)
-                e = self.__get_signal_energy(np.squeeze(rf))
-                frames_energies.append(e)
-            mean_energy = np.mean(frames_energies)
-            energies.append(mean_energy)
-        return np.array(energies)
-
-    def __get_signal_energy(self, rf: np.ndarray) -> float:
+        # (number of frames, number of tx, number of samples)
+        rf = self._get_mid_rx_signals(data)
+        energies = self.__get_signal_energy(rf)
+        return np.mean(energies, axis=0)
+
+    def __get_signal_energy(self, rf: np.ndarray) -> np.ndarray:
         """
-        Returns normalized and high-pass filtered signal energy.
+        Returns normalized signal energy.
 
-        :param rf: signal
-        :return: signal energy (float)
+        :param rf: high-pass filtered signals, the last axis is time
+        :return: signal energies, an array with the shape rf.shape[:-1]
         """
-        rf = _hpfilter(rf)
         rf = rf ** 2
-        rf = _normalize(rf)
-        return float(np.sum(rf))
+        rf = _normalize(rf, axis=-1)
+        return np.sum(rf, axis=-1)
 
 
 class SignalDurationTimeExtractor(ProbeElementFeatureExtractor):
@@ -415,8 +648,34 @@ class SignalDurationTimeExtractor(ProbeElementFeatureExtractor):
     of a tested transducer.
     The pulse length (signal duration) is estimated via fitting gaussian
     function to _envelope of a high-pass filtered signal.
+
+    All the signals are fitted at once: the initial gaussian parameters are
+    estimated from the moments of the _envelope, then refined with
+    the (batched) Levenberg-Marquardt least squares iterations.
+
+    :param n_refinement_iterations: the number of least squares iterations;
+      0 means that the moment-based estimates will be used
     """
     feature = "signal_duration_time"
+    supports_streaming = True
+
+    def __init__(self, metadata=None, n_refinement_iterations=50,
+                 cache=None):
+        super().__init__(metadata, cache)
+        self.n_refinement_iterations = n_refinement_iterations
+
+    def preprocess(self, data: np.ndarray):
+        self._get_mid_rx_envelope(data)
+
+    def reset(self):
+        self._mean = _RunningMean()
+
+    def update(self, frame: np.ndarray):
+        envelope = _envelope(_get_mid_rx_signals(frame[np.newaxis]))
+        self._mean.update(self.__get_signal_duration(envelope)[0])
+
+    def result(self) -> np.ndarray:
+        return self._mean.get()
 
     def extract(self, data: np.ndarray) -> np.array:
         """
@@ -429,22 +688,12 @@ class SignalDurationTimeExtractor(ProbeElementFeatureExtractor):
          number of rx channels]
         :return: np.array of signal duration times
         """
-        n_frames, ntx, _, nrx = data.shape
-        times = []
-        for itx in range(ntx):
-            frames_times = []
-            for iframe in range(n_frames):
-                rf = data[iframe, itx, _N_SKIPPED_SAMPLES:, _get_mid_rx(nrx)]
-                rf = rf.copy()
-                rf = rf.astype(float)
-                t = self.__get_signal_duration(np.squeeze(rf))
-                frames_times.append(t)
-            mean_time = np.mean(frames_times)
-            times.append(mean_time)
-        result = np.array(times)
-        return result
+        # (number of repetitions, number of tx, number of samples)
+        envelope = self._get_mid_rx_envelope(data)
+        times = self.__get_signal_duration(envelope)
+        return np.mean(times, axis=0)
 
-    def __gauss(self, x: float, a: float, x0: float, sigma: float) -> float:
+    def __gauss(self, x, a, x0, sigma):
         """
         Returns the value of a gaussian function
             f(x)=a*exp(-(x-x0)**2/(2*sigma**2)
@@ -458,42 +707,84 @@ class SignalDurationTimeExtractor(ProbeElementFeatureExtractor):
         """
         return a * np.exp(-(x - x0) ** 2 / (2 * sigma ** 2))
 
-
     def __fitgauss(self, y: np.ndarray) -> tuple:
         """
-        The function fits gauss curve to signal, and returns tuple of curve
-        parameters.
+        The function fits gauss curve to signals, and returns tuple of curve
+        parameters (a, x0, sigma), arrays with shape (number of signals, ).
+
+        :param y: signals, (number of signals, number of samples)
         """
-        if np.all(y == 0):
-            pars = (0, 0, 0)
-        else:
-            bounds = (np.array([0, 0, 1]),
-                      np.array([np.max(y), len(y), len(y) * 0.9]))
-            p0 = [np.max(y) / 2, len(y) / 2, 20]
-            try:
-                pars, _ = curve_fit(self.__gauss, np.arange(y.size), y,
-                                    bounds=bounds, p0=p0)
-            except Exception as e:
-                # When curve_fit() can not fit gauss, sigma is set to 0
-                pars = (0, 0, 0)
-                LOGGER.log(arrus.logging.INFO,
-                    "The expected signal _envelope couldn't be fitted "
-                    "in some signal, probably due to low SNR.")
-
-        return pars
-
-    def __get_signal_duration(self, rf: np.ndarray) -> float:
+        n_samples = y.shape[-1]
+        x = np.arange(n_samples, dtype=float)
+        is_zero = np.all(y == 0, axis=-1)
+        low = np.array([0, 0, 1], dtype=float)
+        high = np.stack(np.broadcast_arrays(
+            np.max(y, axis=-1), n_samples, n_samples*0.9), axis=-1)
+
+        # Initial estimate: the moments of the signal part above the half
+        # of its maximum (i.e. above the noise floor).
+        a = np.max(y, axis=-1)
+        w = np.clip(y - a[:, np.newaxis]/2, 0, None)
+        total = np.sum(w, axis=-1)
+        total = np.where(total > 0, total, 1)
+        x0 = np.sum(x*w, axis=-1)/total
+        variance = np.sum((x-x0[:, np.newaxis])**2*w, axis=-1)/total
+        sigma = np.sqrt(variance/_GAUSS_HALF_MAX_VARIANCE)
+        pars = np.stack((a, x0, sigma), axis=-1)
+        pars = np.clip(pars, low, high)
+
+        # Refinement: Levenberg-Marquardt iterations.
+        def get_residuals(p):
+            a, x0, sigma = (p[:, i, np.newaxis] for i in range(3))
+            return self.__gauss(x, a, x0, sigma) - y
+
+        residuals = get_residuals(pars)
+        cost = np.sum(residuals**2, axis=-1)
+        damping = np.full(len(y), 1e-3)
+        for _ in range(self.n_refinement_iterations):
+            a, x0, sigma = (pars[:, i, np.newaxis] for i in range(3))
+            g = self.__gauss(x, 1, x0, sigma)
+            # Jacobian (number of signals, number of samples, 3)
+            jac = np.stack((g, a*g*(x-x0)/sigma**2,
+                            a*g*(x-x0)**2/sigma**3), axis=-1)
+            jtj = np.einsum("nsi,nsj->nij", jac, jac)
+            jtr = np.einsum("nsi,ns->ni", jac, residuals)
+            diag = np.einsum("nii->ni", jtj)
+            lhs = jtj + damping[:, np.newaxis, np.newaxis]*(
+                diag[:, :, np.newaxis]*np.eye(3))
+            step = -np.einsum("nij,nj->ni", np.linalg.pinv(lhs), jtr)
+            new_pars = np.clip(pars + step, low, high)
+            new_residuals = get_residuals(new_pars)
+            new_cost = np.sum(new_residuals**2, axis=-1)
+            is_better = new_cost < cost
+            pars = np.where(is_better[:, np.newaxis], new_pars, pars)
+            residuals = np.where(is_better[:, np.newaxis], new_residuals,
+                                 residuals)
+            cost = np.where(is_better, new_cost, cost)
+            damping = np.where(is_better, damping/10, damping*10)
+
+        is_invalid = ~np.all(np.isfinite(pars), axis=-1)
+        if np.any(is_invalid & ~is_zero):
+            LOGGER.log(arrus.logging.INFO,
+                "The expected signal _envelope couldn't be fitted "
+                "in some signal, probably due to low SNR.")
+        # When the gauss can not be fitted, sigma is set to 0
+        pars[is_zero | is_invalid] = 0
+        return pars[:, 0], pars[:, 1], pars[:, 2]
+
+    def __get_signal_duration(self, envelope: np.ndarray) -> np.ndarray:
         """
         Returns signal duration estimate.
 
-        :param rf: signal vector
-        :return: signal duration estimate in samples
+        :param envelope: _envelope of the high-pass filtered signals,
+          the last axis is time
+        :return: signal duration estimates in samples, an array with
+          the shape envelope.shape[:-1]
         """
-        rf = _hpfilter(rf)
-        rf = _envelope(rf)
         # for return values, see definition of __gauss
-        _, _, sigma = self.__fitgauss(rf)
-        return round(3 * sigma)
+        _, _, sigma = self.__fitgauss(
+            envelope.reshape(-1, envelope.shape[-1]))
+        return np.round(3 * sigma).reshape(envelope.shape[:-1])
 
 
 class FootprintSimilarityPCCExtractor(ProbeElementFeatureExtractor):
@@ -535,14 +826,18 @@ class FootprintSimilarityPCCExtractor(ProbeElementFeatureExtractor):
         # average frames
         avdat = _hpfilter(rf.mean(axis=0))
         avref = _hpfilter(footprint_rf.mean(axis=0))
-        crs = np.full(ntx, 0).astype(float)
         if smp is None:
             smp = slice(0, nsmp)
-        for itx in range(ntx):
-            dline = avdat[itx, smp, mid_rx]
-            rline = avref[itx, smp, mid_rx]
-            crs[itx] = np.corrcoef(dline, rline)[0,1].round(nround)
-        return crs
+        # (ntx, number of samples)
+        dlines = avdat[:, smp, mid_rx]
+        rlines = avref[:, smp, mid_rx]
+        # Pearson correlation coefficient of each pair of lines.
+        dlines = dlines - np.mean(dlines, axis=-1, keepdims=True)
+        rlines = rlines - np.mean(rlines, axis=-1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            crs = np.sum(dlines*rlines, axis=-1) / np.sqrt(
+                np.sum(dlines**2, axis=-1)*np.sum(rlines**2, axis=-1))
+        return np.clip(crs, -1, 1).round(nround)
 
 
 class ByThresholdValidator(ProbeElementValidator):
@@ -619,73 +914,95 @@ class ByNeighborhoodValidator(ProbeElementValidator):
             active_range: Tuple[float, float],
             masked_range: Tuple[float, float]
     ) -> List[ProbeElementValidatorResult]:
+        values = np.asarray(values)
+        if values.ndim != 1:
+            raise ValueError("Values should be a 1D array.")
+        return self.validate_all(
+            values=values,
+            masked=masked,
+            active_range=active_range,
+            masked_range=masked_range
+        ).to_list()
+
+    def validate_all(
+            self,
+            values: np.ndarray,
+            masked,
+            active_range: Tuple[float, float],
+            masked_range: Tuple[float, float]
+    ) -> ProbeElementValidatorResults:
+        """
+        Validates the feature values of multiple probes at once.
 
-        n_elements = len(values)
-        if n_elements % self.group_size != 0:
-            raise ValueError(
-                "Number of probe elements should be divisible by "
-                "group size.")
-        masked_elements = set(masked)
-
-        # Generate report
-        results = []
-
-        for i, value in enumerate(values):
-            is_masked = i in masked_elements
-
-            lower_bound, upper_bound = None, None
-
-            if is_masked:
-                # Masked elements should be below inactive threshold,
-                # otherwise there is something wrong.
-                thr_min, thr_max = masked_range
-                if value > thr_max:
-                    verdict = ElementValidationVerdict.TOO_HIGH
-                elif value < thr_min:
-                    verdict = ElementValidationVerdict.TOO_LOW
-                else:
-                    verdict = ElementValidationVerdict.VALID
-            else:
-                thr_min, thr_max = active_range
-
-                # get elements from range [l, r)
-                if self.group_size == "all":
-                    l, r = 0, n_elements
-                else:
-                    l = i - (math.ceil(self.group_size / 2) - 1)
-                    l = max(l, 0)
-                    r = i + self.group_size // 2 + 1
-                    r = min(r, n_elements)
-
-                near = values[l:r]
-                active_elements = np.argwhere(
-                    np.logical_and(thr_min <= near, near <= thr_max))
-                # Exclude the current element.
-                near = near[active_elements]
-                num_of_neighbors = len(active_elements)
-
-                if num_of_neighbors < self.min_num_of_neighbors:
-                    verdict = ElementValidationVerdict.INDEFINITE
-                else:
-                    mn, mx = self.feature_range_in_neighborhood
-                    center = np.median(near)
-                    lower_bound = center * mn
-                    upper_bound = center * mx
-                    assert lower_bound <= upper_bound
-
-                    if value > upper_bound:
-                        verdict = ElementValidationVerdict.TOO_HIGH
-                    elif value < lower_bound:
-                        verdict = ElementValidationVerdict.TOO_LOW
-                    else:
-                        verdict = ElementValidationVerdict.VALID
-            results.append(
-                ProbeElementValidatorResult(
-                    verdict=verdict,
-                    valid_range=(lower_bound, upper_bound)
-                )
-            )
-        return results
+        :param values: array of feature values (..., number of elements),
+          e.g. (number of probes, number of elements)
+        :param masked: numbers of the masked elements (the same for all
+          the probes), or a boolean array with the same shape as values
+        :return: ProbeElementValidatorResults
+        """
+        values = np.asarray(values, dtype=float)
+        n_elements = values.shape[-1]
+        if self.group_size == "all":
+            group_size = n_elements
+        else:
+            group_size = self.group_size
+            if n_elements % group_size != 0:
+                raise ValueError(
+                    "Number of probe elements should be divisible by "
+                    "group size.")
+        is_masked = np.asarray(masked)
+        if is_masked.dtype != bool:
+            is_masked = np.zeros(n_elements, dtype=bool)
+            is_masked[np.asarray(masked, dtype=int)] = True
+        is_masked = np.broadcast_to(is_masked, values.shape)
+
+        # Masked elements should be below inactive threshold,
+        # otherwise there is something wrong.
+        verdicts = np.full(values.shape, ElementValidationVerdict.VALID.value)
+        thr_min, thr_max = masked_range
+        is_too_high = is_masked & (values > thr_max)
+        is_too_low = is_masked & ~is_too_high & (values < thr_min)
+        verdicts[is_too_high] = ElementValidationVerdict.TOO_HIGH.value
+        verdicts[is_too_low] = ElementValidationVerdict.TOO_LOW.value
+
+        # Neighborhood of the element i: [l, r), where
+        # l = i - (ceil(group_size/2) - 1), r = i + group_size//2 + 1
+        # (clipped to the probe elements); the whole probe for "all".
+        if self.group_size == "all":
+            near = np.broadcast_to(values[..., np.newaxis, :],
+                                   values.shape + (n_elements, ))
+        else:
+            n_left = math.ceil(group_size / 2) - 1
+            n_right = group_size // 2
+            pad_width = [(0, 0)]*(values.ndim-1) + [(n_left, n_right)]
+            padded = np.pad(values, pad_width, constant_values=np.nan)
+            near = _get_sliding_windows(padded, group_size)
+        # Only the elements with the feature value within the active
+        # range are taken into account (nan padding is excluded here).
+        thr_min, thr_max = active_range
+        is_active = (thr_min <= near) & (near <= thr_max)
+        num_of_neighbors = np.sum(is_active, axis=-1)
+        with warnings.catch_warnings():
+            # All-nan neighborhoods are INDEFINITE anyway.
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            center = np.nanmedian(np.where(is_active, near, np.nan),
+                                  axis=-1)
+
+        is_indefinite = ~is_masked & (num_of_neighbors < self.min_num_of_neighbors)
+        is_defined = ~is_masked & ~is_indefinite
+        mn, mx = self.feature_range_in_neighborhood
+        lower_bounds = np.where(is_defined, center*mn, np.nan)
+        upper_bounds = np.where(is_defined, center*mx, np.nan)
+        is_too_high = is_defined & (values > upper_bounds)
+        is_too_low = is_defined & ~is_too_high & (values < lower_bounds)
+        verdicts[is_indefinite] = ElementValidationVerdict.INDEFINITE.value
+        verdicts[is_too_high] = ElementValidationVerdict.TOO_HIGH.value
+        verdicts[is_too_low] = ElementValidationVerdict.TOO_LOW.value
+        return ProbeElementValidatorResults(
+            verdicts=verdicts,
+            lower_bounds=lower_bounds,
+            upper_bounds=upper_bounds
+        )
 
 
 EXTRACTORS = {
@@ -699,6 +1016,87 @@ EXTRACTORS = {
 }
 
 
+def _extract_feature(
+        extractor: ProbeElementFeatureExtractor,
+        data: np.ndarray,
+        footprint: Footprint = None
+) -> np.ndarray:
+    """
+    Returns feature values extracted by the given extractor.
+    NOTE: this is a module level function, so it can be run
+    in the process pool.
+    """
+    if extractor.feature == FootprintSimilarityPCCExtractor.feature:
+        try:
+            return extractor.extract(data, footprint.rf)
+        except:
+            raise ValueError(
+                "The footprint must by of a class Footprint. "
+                "Check if appropriate footprint is given."
+            )
+    else:
+        return extractor.extract(data)
+
+
+class _StreamingFeatureExtraction:
+    """
+    Extracts the given features frame by frame, during the acquisition.
+    """
+
+    def __init__(self, features: List[FeatureDescriptor], signal_type: str):
+        for feature in features:
+            if not EXTRACTORS[signal_type][feature.name].supports_streaming:
+                raise ValueError(f"Feature '{feature.name}' can't be "
+                                 f"extracted in the streaming mode.")
+        self.features = features
+        self.signal_type = signal_type
+        self._extractors = None
+
+    def start(self, metadata):
+        self._extractors = {}
+        for feature in self.features:
+            extractor = EXTRACTORS[self.signal_type][feature.name](
+                metadata, **feature.params)
+            extractor.reset()
+            self._extractors[feature.name] = extractor
+
+    def update(self, frame: np.ndarray):
+        for extractor in self._extractors.values():
+            extractor.update(frame)
+
+    def get_results(self) -> Dict[str, np.ndarray]:
+        return dict((name, extractor.result())
+                    for name, extractor in self._extractors.items())
+
+
+def load_rf_data(path: str):
+    """
+    Loads the pre-recorded data from the given pickle file.
+
+    The file should contain one of the following:
+    - a dictionary {"report": ProbeHealthReport}
+      (e.g. the output file of the check_probe.py example),
+    - ProbeHealthReport,
+    - Footprint.
+
+    :param path: path to the pickle file
+    :return: a tuple: data, metadata, masked elements
+    """
+    with open(path, "rb") as f:
+        content = pickle.load(f)
+    if isinstance(content, dict) and "report" in content:
+        content = content["report"]
+    if isinstance(content, ProbeHealthReport):
+        masked_elements = tuple(e.element_number for e in content.elements
+                                if e.is_masked)
+        return content.data, content.sequence_metadata, masked_elements
+    elif isinstance(content, Footprint):
+        return content.rf, content.metadata, content.masked_elements
+    else:
+        raise ValueError(f"Unsupported content of the file {path}: "
+                         f"{type(content)}")
+
+
 class ProbeHealthVerifier:
     """
     Probe health verifier class.
@@ -715,12 +1113,13 @@ class ProbeHealthVerifier:
         """
         Creates and returns Footprint object.
         """
-        rfs, metadata, masked_elements = self._acquire_rf_data(
+        rfs, metadata, masked_elements, _ = self._acquire_rf_data(
             cfg_path,
             n,
             tx_frequency,
             nrx,
             voltage,
+            probe_nr=probe_nr,
         )
         footprint = Footprint(
             rf=rfs,
@@ -742,7 +1141,10 @@ class ProbeHealthVerifier:
             footprint: Footprint=None,
             signal_type: str="rf",
             probe_nr: int = 0,
-            hpf_corner_frequency: float = None
+            hpf_corner_frequency: float = None,
+            executor: concurrent.futures.Executor = None,
+            streaming: bool = False,
+            n_stored_frames: int = None
     )-> ProbeHealthReport:
         """
         Checks probe elements by validating selected features
@@ -778,9 +1180,30 @@ class ProbeHealthVerifier:
                            NOTE: hvps is only available for the us4OEM+ rev 1 or later.
         :param probe_nr: number of the probe to verify
         :param hpf_corner_frequency: HPF corner frequency to apply (see Us4R documentation). Doesn't matter when signal_type == 'hvps'
+        :param executor: executor (e.g. concurrent.futures.ProcessPoolExecutor)
+                         in which the features should be extracted;
+                         None means that the features will be extracted
+                         sequentially in the current thread
+        :param streaming: whether the features should be extracted frame by
+                          frame, during the acquisition (only for the rf
+                          signal type; footprint_pcc is not available
+                          in this mode)
+        :param n_stored_frames: the number of the most recent frames to store
+                                in the report data; None means all the frames
+                                when streaming is False, and a single frame
+                                otherwise
 
         :return: an instance of the ProbeHealthReport
         """
+        streaming_extraction = None
+        if streaming:
+            if signal_type != "rf":
+                raise ValueError("The streaming mode is available only for "
+                                 "the rf signal type.")
+            streaming_extraction = _StreamingFeatureExtraction(
+                features, signal_type)
+            if n_stored_frames is None:
+                n_stored_frames = 1
         if signal_type == "rf":
             data, metadata, masked_elements, aux = self._acquire_rf_data(
                 cfg_path=cfg_path,
@@ -790,7 +1213,9 @@ class ProbeHealthVerifier:
                 voltage=voltage,
                 footprint=footprint,
                 probe_nr=probe_nr,
-                hpf_corner_frequency=hpf_corner_frequency
+                hpf_corner_frequency=hpf_corner_frequency,
+                streaming_extraction=streaming_extraction,
+                n_stored_frames=n_stored_frames
             )
         elif signal_type == "hvps":
             data, metadata, masked_elements, aux = self._acquire_hvps_current(
@@ -811,10 +1236,43 @@ class ProbeHealthVerifier:
             features=features,
             validator=validator,
             signal_type=signal_type,
-            aux=aux
+            aux=aux,
+            executor=executor,
+            extractor_results=None if streaming_extraction is None
+                else streaming_extraction.get_results()
         )
         return health_report
 
+    def check_probe_file(
+            self,
+            path: str,
+            features: List[FeatureDescriptor],
+            validator: ProbeElementValidator,
+            footprint: Footprint=None,
+            signal_type: str="rf",
+            executor: concurrent.futures.Executor = None
+    ) -> ProbeHealthReport:
+        """
+        Checks probe elements using the pre-recorded data, i.e. without
+        running the acquisition. See load_rf_data for the supported
+        file content, and check_probe for the description of
+        the parameters.
+
+        :param path: path to the file with the pre-recorded data
+        :return: an instance of the ProbeHealthReport
+        """
+        data, metadata, masked_elements = load_rf_data(path)
+        return self._check_probe_data(
+            data=data,
+            footprint=footprint,
+            metadata=metadata,
+            masked_elements=masked_elements,
+            features=features,
+            validator=validator,
+            signal_type=signal_type,
+            executor=executor
+        )
+
     def _check_probe_data(
             self,
             data: np.ndarray,
@@ -824,31 +1282,34 @@ class ProbeHealthVerifier:
             features: List[FeatureDescriptor],
             validator: ProbeElementValidator,
             signal_type: str="rf",
-            aux: Dict[str, Any]=None
+            aux: Dict[str, Any]=None,
+            executor: concurrent.futures.Executor = None,
+            extractor_results: Dict[str, np.ndarray] = None
     ) -> ProbeHealthReport:
         """
         Creates probe health report.
+
+        :param extractor_results: feature values extracted during
+          the acquisition (streaming mode); None means that the feature
+          values should be extracted from the given data
         """
         if aux is None:
             aux = {}
-        n_repeats, ntx = data.shape[0], data.shape[1]
+        if extractor_results is None:
+            extractor_results = self._extract_features(
+                data=data,
+                metadata=metadata,
+                footprint=footprint,
+                features=features,
+                signal_type=signal_type,
+                executor=executor
+            )
+        ntx = data.shape[1]
 
-        # Compute feature values, verify the values according to given
-        # validator.
+        # Verify the values according to given validator.
         results = {}
         for feature in features:
-            extractor = EXTRACTORS[signal_type][feature.name](metadata, **feature.params)
-            if feature.name == "footprint_pcc":
-                try:
-                    extractor_result = extractor.extract(data, footprint.rf)
-                except:
-                    raise ValueError(
-                        "The footprint must by of a class Footprint. "
-                        "Check if appropriate footprint is given."
-                    )
-            else:
-                extractor_result = extractor.extract(data)
-
+            extractor_result = extractor_results[feature.name]
             validator_result = validator.validate(
                 values=extractor_result,
                 masked=masked_elements,
@@ -898,6 +1359,44 @@ class ProbeHealthVerifier:
         )
         return report
 
+    def _extract_features(
+            self,
+            data: np.ndarray,
+            metadata: arrus.metadata.ConstMetadata,
+            footprint: Footprint,
+            features: List[FeatureDescriptor],
+            signal_type: str="rf",
+            executor: concurrent.futures.Executor = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Returns feature values extracted from the given data
+        [feature name -> values].
+        """
+        # Compute the common intermediate results (e.g. filtered signals)
+        # once, before the extractors are sent to the executor.
+        cache = PreprocessingCache()
+        extractors = {}
+        for feature in features:
+            extractor = EXTRACTORS[signal_type][feature.name](
+                metadata, cache=cache, **feature.params)
+            extractor.preprocess(data)
+            extractors[feature.name] = extractor
+
+        # Compute feature values.
+        extractor_results = {}
+        for name, extractor in extractors.items():
+            extractor_footprint = footprint if name == "footprint_pcc" else None
+            if executor is None:
+                extractor_results[name] = _extract_feature(
+                    extractor, data, extractor_footprint)
+            else:
+                extractor_results[name] = executor.submit(
+                    _extract_feature, extractor, data, extractor_footprint)
+        if executor is not None:
+            extractor_results = dict((name, future.result())
+                                     for name, future in extractor_results.items())
+        return extractor_results
+
     def _acquire_rf_data(
             self,
             cfg_path,
@@ -907,10 +1406,17 @@ class ProbeHealthVerifier:
             voltage,
             footprint=None,
             probe_nr: int = 0,
-            hpf_corner_frequency: float = None
+            hpf_corner_frequency: float = None,
+            streaming_extraction: _StreamingFeatureExtraction = None,
+            n_stored_frames: int = None
     ):
         """
         Acquires rf data. If footprint is given the footprint sequence is used,
+
+        The frames are stored in a preallocated ring buffer of
+        n_stored_frames most recent frames (None means all the frames).
+        If streaming_extraction is given, it is updated with each
+        of the acquired frames.
         """
         with arrus.session.Session(cfg_path) as sess:
             rf_reorder = Pipeline(
@@ -956,7 +1462,12 @@ class ProbeHealthVerifier:
                 work_mode="MANUAL",
             )
             buffer, const_metadata = sess.upload(scheme)
-            rfs = []
+            if n_stored_frames is None:
+                n_stored_frames = n
+            n_stored_frames = min(n_stored_frames, n)
+            if streaming_extraction is not None:
+                streaming_extraction.start(const_metadata)
+            rfs = None
             if voltage > 15:
                 raise ValueError("The voltage can not be higher "
                                  "than 15V for probe check")
@@ -975,9 +1486,16 @@ class ProbeHealthVerifier:
             for i in range(n):
                 LOGGER.log(arrus.logging.DEBUG, f"Performing TX/RX: {i}")
                 sess.run()
-                data = buffer.get()[0]
-                rfs.append(np.squeeze(data.copy()))
-            rfs = np.stack(rfs)
+                data = np.squeeze(buffer.get()[0])
+                if rfs is None:
+                    rfs = np.zeros((n_stored_frames, ) + data.shape,
+                                   dtype=data.dtype)
+                rfs[i % n_stored_frames] = data
+                if streaming_extraction is not None:
+                    streaming_extraction.update(rfs[i % n_stored_frames])
+            if n > n_stored_frames:
+                # The oldest frame first.
+                rfs = np.roll(rfs, -(n % n_stored_frames), axis=0)
         return rfs, const_metadata, masked_elements, {}
 
     def _acquire_hvps_current(
@@ -0,0 +1,274 @@
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+
+import numpy as np
+
+import arrus.exceptions
+
+
+def _get_nbytes(data):
+    """
+    Returns the total number of bytes of the given array(s).
+    """
+    if data is None:
+        return 0
+    if hasattr(data, "nbytes"):
+        return data.nbytes
+    if isinstance(data, (tuple, list, deque)):
+        return sum(_get_nbytes(d) for d in data)
+    if hasattr(data, "arrays"):
+        # Buffer element.
+        return _get_nbytes(data.arrays)
+    return 0
+
+
+class OperationProfiler:
+    """
+    Collects per-operation execution statistics.
+
+    For each operation, the following metrics are collected:
+
+    - ``wall_time``: host time spent in the ``process`` method [s],
+      note: for GPU operations this is mostly the kernel launch time,
+    - ``device_time``: time of the work scheduled on the GPU stream [s]
+      (GPU only; measured with CUDA events, which are read only when they
+      have already completed, so no additional synchronization is added),
+    - ``bytes_in``, ``bytes_out``: size of the input/output arrays [B],
+    - ``queue_wait``: time the input data waited for processing [s]
+      (only for some stages of the ProcessingRunner).
+
+    The statistics are computed over the last ``window_size`` samples.
+
+    :param num_pkg: numerical package used by the profiled operations
+      (numpy or cupy)
+    :param window_size: the number of the most recent samples to keep
+      for each metric
+    :param percentiles: percentiles to report
+    """
+
+    def __init__(self, num_pkg=np, window_size=1000,
+                 percentiles=(50, 90, 99)):
+        self.num_pkg = num_pkg
+        self.window_size = window_size
+        self.percentiles = tuple(percentiles)
+        self._is_gpu = num_pkg is not np
+        self._samples = defaultdict(dict)
+        self._call_times = {}
+        self._pending_events = deque()
+        self._lock = threading.Lock()
+
+    def run(self, name, func, data):
+        """
+        Runs func(data) and collects the statistics for the given
+        operation name.
+
+        :return: the value returned by func
+        """
+        start_event = None
+        if self._is_gpu:
+            start_event = self.num_pkg.cuda.get_current_stream().record()
+        start = time.perf_counter()
+        results = func(data)
+        end = time.perf_counter()
+        end_event = None
+        if self._is_gpu:
+            end_event = self.num_pkg.cuda.get_current_stream().record()
+        with self._lock:
+            if end_event is not None:
+                self._pending_events.append((name, start_event, end_event))
+            self._add_sample(name, "wall_time", end-start)
+            self._add_sample(name, "bytes_in", _get_nbytes(data))
+            self._add_sample(name, "bytes_out", _get_nbytes(results))
+            self._add_call_time(name, start)
+            self._collect_completed_events()
+        return results
+
+    def add_sample(self, name, metric, value):
+        """
+        Adds a single sample of the given metric.
+        """
+        with self._lock:
+            self._add_sample(name, metric, value)
+
+    def get_stats(self):
+        """
+        Returns the statistics collected so far.
+
+        :return: a dictionary: op name -> metric name -> statistics, where
+          statistics is a dictionary with keys: ``count``, ``mean``,
+          ``max`` and ``p{percentile}`` for each of the reported percentiles.
+          Additionally, for each profiled op the ``throughput`` (the number
+          of calls per second) is reported.
+        """
+        with self._lock:
+            self._collect_completed_events()
+            result = {}
+            for name, metrics in self._samples.items():
+                op_stats = {}
+                for metric, samples in metrics.items():
+                    samples = np.asarray(samples, dtype=np.float64)
+                    stats = {
+                        "count": len(samples),
+                        "mean": float(np.mean(samples)),
+                        "max": float(np.max(samples)),
+                    }
+                    values = np.percentile(samples, self.percentiles)
+                    for p, v in zip(self.percentiles, values):
+                        stats[f"p{p}"] = float(v)
+                    op_stats[metric] = stats
+                call_times = self._call_times.get(name, None)
+                if call_times is not None and len(call_times) > 1:
+                    duration = call_times[-1] - call_times[0]
+                    if duration > 0:
+                        op_stats["throughput"] = (len(call_times)-1)/duration
+                result[name] = op_stats
+            return result
+
+    def reset(self):
+        """
+        Removes all the samples collected so far.
+        """
+        with self._lock:
+            self._samples = defaultdict(dict)
+            self._call_times = {}
+            self._pending_events.clear()
+
+    def _add_sample(self, name, metric, value):
+        metrics = self._samples[name]
+        samples = metrics.get(metric, None)
+        if samples is None:
+            samples = deque(maxlen=self.window_size)
+            metrics[metric] = samples
+        samples.append(value)
+
+    def _add_call_time(self, name, t):
+        call_times = self._call_times.get(name, None)
+        if call_times is None:
+            call_times = deque(maxlen=self.window_size)
+            self._call_times[name] = call_times
+        call_times.append(t)
+
+    def _collect_completed_events(self):
+        # NOTE: events are recorded on multiple streams, so the pending
+        # events do not have to complete in the FIFO order; stop on the
+        # first one that is not ready yet to avoid an additional sync.
+        while len(self._pending_events) > 0:
+            name, start_event, end_event = self._pending_events[0]
+            if not end_event.done:
+                if len(self._pending_events) <= self.window_size:
+                    return
+                # Too many pending events (e.g. a stalled stream),
+                # drop the oldest one.
+                self._pending_events.popleft()
+                continue
+            self._pending_events.popleft()
+            elapsed_ms = self.num_pkg.cuda.get_elapsed_time(start_event, end_event)
+            self._add_sample(name, "device_time", elapsed_ms*1e-3)
+
+
+class AllocationChecker:
+    """
+    Verifies that the operations do not allocate memory in the steady state.
+
+    The first ``n_warmup_frames`` calls of each operation are not checked
+    (e.g. some lazily initialized resources can be allocated there).
+    For each subsequent call, the number of bytes allocated by the
+    operation is measured; if it exceeds the given tolerance,
+    IllegalStateError is raised.
+
+    For GPU operations, the allocations made by the cupy memory pool
+    are counted (regardless of whether the pool had to request the memory
+    from the device or not). For CPU operations, the peak memory
+    reported by the tracemalloc module is used (note: tracemalloc
+    significantly slows down the processing, use this mode only for
+    debugging).
+
+    :param num_pkg: numerical package used by the checked operations
+      (numpy or cupy)
+    :param n_warmup_frames: the number of initial calls of each operation
+      that should not be checked
+    :param tolerance: the maximum number of bytes an operation can
+      allocate per single call (e.g. to account for small temporary
+      objects, like array views)
+    """
+
+    def __init__(self, num_pkg=np, n_warmup_frames=2, tolerance=65536):
+        if n_warmup_frames < 0:
+            raise ValueError("The number of warmup frames should be "
+                             "non-negative.")
+        self.num_pkg = num_pkg
+        self.n_warmup_frames = n_warmup_frames
+        self.tolerance = tolerance
+        self._is_gpu = num_pkg is not np
+        self._n_calls = defaultdict(int)
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    def run(self, name, func, data):
+        """
+        Runs func(data) and verifies that it does not allocate memory
+        (when the warm-up phase for the given operation is already done).
+
+        :return: the value returned by func
+        """
+        with self._lock:
+            n_calls = self._n_calls[name]
+            self._n_calls[name] = n_calls + 1
+        if n_calls < self.n_warmup_frames:
+            return func(data)
+        if self._is_gpu:
+            results, nbytes = self._run_gpu(func, data)
+        else:
+            results, nbytes = self._run_cpu(func, data)
+        if nbytes > self.tolerance:
+            raise arrus.exceptions.IllegalStateError(
+                f"Operation '{name}' allocated {nbytes} bytes of memory "
+                f"in the steady state (call no. {n_calls}, "
+                f"tolerance: {self.tolerance} bytes).")
+        return results
+
+    def close(self):
+        """
+        Stops tracing CPU memory allocations (if it was started by
+        this checker).
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _run_gpu(self, func, data):
+        hook = _MemoryAllocationCounter(self.num_pkg)
+        with hook.hook:
+            results = func(data)
+        return results, hook.nbytes
+
+    def _run_cpu(self, func, data):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        results = func(data)
+        _, peak = tracemalloc.get_traced_memory()
+        return results, peak-current
+
+
+class _MemoryAllocationCounter:
+    """
+    Counts the number of bytes allocated by the cupy memory pool.
+    """
+
+    def __init__(self, cp):
+        self.nbytes = 0
+        counter = self
+
+        class _Hook(cp.cuda.MemoryHook):
+            name = "AllocationChecker"
+
+            def malloc_postprocess(self, device_id, size, mem_size,
+                                   mem_ptr, pmem_id):
+                counter.nbytes += mem_size
+
+        self.hook = _Hook()
@@ -2,10 +2,9 @@
 
 #define CUDART_PI_F 3.141592654f
 
-// The below values are stored for ALL probe elements.
-__constant__ float xElemConst[256]; // [m]
-__constant__ float zElemConst[256]; // [m]
-__constant__ float angleElemConst[256]; // [rad]
+// Aperture element tables, (3, nRx) arrays: x [m], z [m], angle [rad]
+// (see RxBeamforming and arrus.utils.const_memory).
+__constant__ float elemConst[3*256];
 
 // Assumptions:
 // - TX and RX apertures have the same center position
@@ -15,7 +14,9 @@ extern "C"
              const float *txAngles, // [rad]
              const float initDelay, const float startTime,
              const float c, const float fs, const float fc, float maxApodTang,
-             const size_t xElemConstOffset, const size_t zElemConstOffset, const size_t angleElemConstOffset) {
+             const size_t elemConstOffset,
+             // The element tables, if they did not fit into the constant memory (nullptr otherwise).
+             const float *elemGlobal) {
     complex<float> a, b;
     float elementX, elementZ, elementAngle;
     float rxAng, rxTang, pixWgh = 0;
@@ -49,9 +50,16 @@ extern "C"
     float cInv = 1/c;
 
     for(int element = 0; element < nRx; ++element) {
-        elementX = xElemConst[xElemConstOffset + element];
-        elementZ = zElemConst[zElemConstOffset + element];
-        elementAngle = angleElemConst[angleElemConstOffset + element];
+        if(elemGlobal == nullptr) {
+            elementX = elemConst[elemConstOffset + element];
+            elementZ = elemConst[elemConstOffset + nRx + element];
+            elementAngle = elemConst[elemConstOffset + 2*nRx + element];
+        }
+        else {
+            elementX = elemGlobal[element];
+            elementZ = elemGlobal[nRx + element];
+            elementAngle = elemGlobal[2*nRx + element];
+        }
 
         // RX apodization.
         rxAng = atan2f(pointX-elementX, pointZ-elementZ);
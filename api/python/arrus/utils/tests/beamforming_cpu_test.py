@@ -0,0 +1,286 @@
+import math
+import unittest
+
+import numpy as np
+
+from arrus.utils.beamforming_cpu import (
+    rx_beamform, reconstruct_lri, delay_and_sum_lut
+)
+
+
+# Reference implementations: direct ports of the CUDA kernels
+# (a single output point at a time).
+
+def rx_beamform_reference(data, tx_angles, init_delay, start_time,
+                          c, fs, fc, max_tang, x_elem, z_elem, angle_elem):
+    n_seq, n_tx, n_rx, n_samples = data.shape
+    output = np.zeros((n_seq, n_tx, n_samples), dtype=np.complex128)
+    for frame in range(n_seq):
+        for scanline in range(n_tx):
+            for sample in range(n_samples):
+                r = (sample/fs + start_time)*c/2
+                point_x = r*math.sin(tx_angles[scanline])
+                point_z = r*math.cos(tx_angles[scanline])
+                result, pix_wgh = 0, 0
+                for element in range(n_rx):
+                    rx_ang = math.atan2(point_x-x_elem[element],
+                                        point_z-z_elem[element])
+                    rx_tang = math.tan(rx_ang-angle_elem[element])
+                    if abs(rx_tang) > max_tang:
+                        continue
+                    rx_distance = math.hypot(x_elem[element]-point_x,
+                                             z_elem[element]-point_z)
+                    time = (r+rx_distance)/c + init_delay
+                    s = time*fs
+                    s_int = int(s)
+                    signal = data[frame, scanline, element]
+                    if 0 <= s_int < n_samples-1:
+                        ratio = s-s_int
+                        value = (1-ratio)*signal[s_int] + ratio*signal[s_int+1]
+                    elif s_int == n_samples-1:
+                        value = signal[s_int]
+                    else:
+                        continue
+                    result += value*np.exp(1j*2*np.pi*fc*time)
+                    pix_wgh += 1
+                if pix_wgh != 0:
+                    output[frame, scanline, sample] = result/pix_wgh
+    return output
+
+
+def reconstruct_lri_reference(data, x_pix, z_pix, x_elem, z_elem, tang_elem,
+                              tx_foc, tx_ang_zx, tx_ap_cent_z, tx_ap_cent_x,
+                              tx_ap_first_elem, tx_ap_last_elem, rx_ap_origin,
+                              sos, fs, fn, min_tang, max_tang, init_delay):
+    n_seq, n_tx, n_rx, n_samples = data.shape
+    n_elements = len(x_elem)
+    output = np.zeros((n_seq, n_tx, len(x_pix), len(z_pix)),
+                      dtype=np.complex128)
+    two_sig_sqr_inv = 3*3*0.5
+    rng_rx_tang_inv = 2/(max_tang-min_tang)
+    cent_rx_tang = (max_tang+min_tang)*0.5
+    for seq in range(n_seq):
+        for tx in range(n_tx):
+            first, last = tx_ap_first_elem[tx], tx_ap_last_elem[tx]
+            ang = tx_ang_zx[tx]
+            cz, cx = tx_ap_cent_z[tx], tx_ap_cent_x[tx]
+            for x, xp in enumerate(x_pix):
+                for z, zp in enumerate(z_pix):
+                    foc = tx_foc[tx]
+                    if not math.isinf(foc):
+                        z_foc = cz + foc*math.cos(ang)
+                        x_foc = cx + foc*math.sin(ang)
+                        if foc <= 0:
+                            arrang = 1
+                        else:
+                            arrang = 1 if ((zp-z_foc)*(z_foc-cz)
+                                           + (xp-x_foc)*(x_foc-cx)) >= 0 else -1
+                        tx_dist = math.hypot(zp-z_foc, xp-x_foc)*arrang + foc
+                        tx_apod = (((-(x_elem[first]-x_foc)*(zp-z_foc)
+                                     + (z_elem[first]-z_foc)*(xp-x_foc))*arrang >= 0)
+                                   and (((x_elem[last]-x_foc)*(zp-z_foc)
+                                         - (z_elem[last]-z_foc)*(xp-x_foc))*arrang >= 0))
+                    else:
+                        tx_dist = (zp-cz)*math.cos(ang) + (xp-cx)*math.sin(ang)
+                        tx_apod = (((-(zp-z_elem[first])*math.sin(ang)
+                                     + (xp-x_elem[first])*math.cos(ang)) >= 0)
+                                   and (((zp-z_elem[last])*math.sin(ang)
+                                         - (xp-x_elem[last])*math.cos(ang)) >= 0))
+                    if not tx_apod:
+                        continue
+                    pix, pix_wgh = 0, 0
+                    for rx in range(n_rx):
+                        elem = rx + rx_ap_origin[tx]
+                        if elem < 0 or elem >= n_elements:
+                            continue
+                        rx_dist = math.hypot(xp-x_elem[elem], zp-z_elem[elem])
+                        rx_tang = (xp-x_elem[elem])/(zp-z_elem[elem])
+                        rx_tang = ((rx_tang-tang_elem[elem])
+                                   / (1+rx_tang*tang_elem[elem]))
+                        if rx_tang < min_tang or rx_tang > max_tang:
+                            continue
+                        rx_apod = (rx_tang-cent_rx_tang)*rng_rx_tang_inv
+                        rx_apod = math.exp(-rx_apod*rx_apod*two_sig_sqr_inv)
+                        time = (tx_dist+rx_dist)/sos + init_delay
+                        i_samp = time*fs
+                        if i_samp < 0 or i_samp >= n_samples-1:
+                            continue
+                        i_int = int(i_samp)
+                        w = i_samp-i_int
+                        signal = data[seq, tx, rx]
+                        samp = signal[i_int]*(1-w) + signal[i_int+1]*w
+                        pix += samp*np.exp(1j*2*np.pi*fn*time)*rx_apod
+                        pix_wgh += rx_apod
+                    if pix_wgh != 0:
+                        output[seq, tx, x, z] = pix/pix_wgh
+    return output
+
+
+def delay_and_sum_lut_reference(data, tx_delays, rx_delays, tx_apodization,
+                                rx_apodization, init_delay, fs, fc,
+                                output_type):
+    n_seq, n_tx, n_rx, n_samples = data.shape
+    _, n_y, n_x, n_z = tx_delays.shape
+    if output_type == "hri":
+        output = np.zeros((n_seq, n_y, n_x, n_z), dtype=np.complex128)
+    else:
+        output = np.zeros((n_seq, n_tx, n_y, n_x, n_z), dtype=np.complex128)
+    for seq in range(n_seq):
+        for y, x, z in np.ndindex(n_y, n_x, n_z):
+            pixel_value, pixel_weight = 0, 0
+            for tx in range(n_tx):
+                if output_type == "lri":
+                    pixel_value = 0
+                if tx_apodization[tx, y, x, z] == 1:
+                    for rx in range(n_rx):
+                        rx_weight = rx_apodization[rx, y, x, z]
+                        if rx_weight == 0:
+                            continue
+                        delay = (init_delay + tx_delays[tx, y, x, z]
+                                 + rx_delays[rx, y, x, z])
+                        sample = delay*fs
+                        sample_int = int(sample)
+                        if sample_int >= n_samples-1:
+                            value = 0
+                        else:
+                            w = sample-sample_int
+                            signal = data[seq, tx, rx]
+                            value = signal[sample_int]*(1-w) + signal[sample_int+1]*w
+                        pixel_value += value*rx_weight*np.exp(1j*2*np.pi*fc*delay)
+                        pixel_weight += rx_weight
+                if output_type == "lri":
+                    output[seq, tx, y, x, z] = pixel_value
+            if output_type == "hri" and pixel_weight != 0:
+                output[seq, y, x, z] = pixel_value/pixel_weight
+    return output
+
+
+def get_random_data(shape, seed=42):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(shape)
+            + 1j*rng.standard_normal(shape)).astype(np.complex64)
+
+
+class BeamformingCpuTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.fs = 65e6/4
+        self.c = 1540
+        self.fc = 6e6
+        self.n_elements = 16
+        self.pitch = 0.3e-3
+        self.x_elem = ((np.arange(self.n_elements) - (self.n_elements-1)/2)
+                       * self.pitch).astype(np.float32)
+        self.z_elem = np.zeros(self.n_elements, dtype=np.float32)
+        self.data = get_random_data((2, 3, self.n_elements, 128))
+
+    def assert_matches(self, actual, expected):
+        # Note: float32 (CPU/GPU) vs float64 (reference) computations.
+        scale = np.max(np.abs(expected))
+        np.testing.assert_allclose(actual, expected, rtol=0,
+                                   atol=5e-3*scale)
+
+    def test_rx_beamform(self):
+        # Given
+        params = dict(
+            tx_angles=np.array([-0.1, 0, 0.1], dtype=np.float32),
+            init_delay=np.float32(-1e-6), start_time=np.float32(0),
+            c=self.c, fs=self.fs, fc=self.fc, max_tang=np.float32(0.8),
+            x_elem=self.x_elem, z_elem=self.z_elem,
+            angle_elem=np.zeros(self.n_elements, dtype=np.float32))
+        output = np.zeros((2, 3, 128), dtype=np.complex64)
+        # Run
+        rx_beamform(output, self.data, chunk_size=100, **params)
+        # Expect
+        expected = rx_beamform_reference(self.data, **params)
+        self.assert_matches(output, expected)
+
+    def test_reconstruct_lri(self):
+        # Given
+        n_tx = self.data.shape[1]
+        x_pix = np.linspace(-2e-3, 2e-3, 9).astype(np.float32)
+        z_pix = np.linspace(1e-3, 5e-3, 11).astype(np.float32)
+        params = dict(
+            x_pix=x_pix, z_pix=z_pix,
+            x_elem=self.x_elem, z_elem=self.z_elem,
+            tang_elem=np.zeros(self.n_elements, dtype=np.float32),
+            # PWI, STA (focused) and diverging wave.
+            tx_foc=np.array([np.inf, 3e-3, -5e-3], dtype=np.float32),
+            tx_ang_zx=np.array([0.1, 0, 0], dtype=np.float32),
+            tx_ap_cent_z=np.zeros(n_tx, dtype=np.float32),
+            tx_ap_cent_x=np.array([0, -0.5e-3, 0.5e-3], dtype=np.float32),
+            tx_ap_first_elem=np.array([0, 2, 4], dtype=np.int32),
+            tx_ap_last_elem=np.array([15, 13, 11], dtype=np.int32),
+            rx_ap_origin=np.array([0, -2, 4], dtype=np.int32),
+            sos=self.c, fs=self.fs, fn=self.fc,
+            min_tang=np.float32(-0.5), max_tang=np.float32(0.5),
+            init_delay=np.float32(0.2e-6))
+        output = np.zeros((2, 3, 9, 11), dtype=np.complex64)
+        # Run
+        reconstruct_lri(output, self.data, chunk_size=500, **params)
+        # Expect
+        expected = reconstruct_lri_reference(self.data, **params)
+        self.assertTrue(np.any(expected != 0))
+        self.assert_matches(output, expected)
+
+    def test_reconstruct_lri_compound(self):
+        # Given
+        n_seq, n_tx = self.data.shape[:2]
+        x_pix = np.linspace(-2e-3, 2e-3, 9).astype(np.float32)
+        z_pix = np.linspace(1e-3, 5e-3, 11).astype(np.float32)
+        params = dict(
+            x_pix=x_pix, z_pix=z_pix,
+            x_elem=self.x_elem, z_elem=self.z_elem,
+            tang_elem=np.zeros(self.n_elements, dtype=np.float32),
+            tx_foc=np.array([np.inf, np.inf, np.inf], dtype=np.float32),
+            tx_ang_zx=np.array([-0.1, 0, 0.1], dtype=np.float32),
+            tx_ap_cent_z=np.zeros(n_tx, dtype=np.float32),
+            tx_ap_cent_x=np.zeros(n_tx, dtype=np.float32),
+            tx_ap_first_elem=np.zeros(n_tx, dtype=np.int32),
+            tx_ap_last_elem=np.full(n_tx, 15, dtype=np.int32),
+            rx_ap_origin=np.zeros(n_tx, dtype=np.int32),
+            sos=self.c, fs=self.fs, fn=self.fc,
+            min_tang=np.float32(-0.5), max_tang=np.float32(0.5),
+            init_delay=np.float32(0.2e-6))
+        tx_weights = np.array([0.25, 0.5, 0.25], dtype=np.float32)
+        lri = np.zeros((n_seq, n_tx, 9, 11), dtype=np.complex64)
+        reconstruct_lri(lri, self.data, **params)
+        output = np.zeros((n_seq, 9, 11), dtype=np.complex64)
+        # Run
+        reconstruct_lri(output, self.data, tx_weights=tx_weights,
+                        chunk_size=500, **params)
+        # Expect
+        expected = np.sum(lri*tx_weights.reshape(1, -1, 1, 1), axis=1)
+        self.assertTrue(np.any(expected != 0))
+        np.testing.assert_allclose(output, expected, rtol=0,
+                                   atol=1e-5*np.max(np.abs(expected)))
+
+    def test_delay_and_sum_lut(self):
+        # Given
+        n_seq, n_tx, n_rx, n_samples = self.data.shape
+        grid_shape = (2, 5, 7)
+        rng = np.random.default_rng(0)
+        tx_delays = rng.uniform(0, 3e-6, (n_tx, ) + grid_shape).astype(np.float32)
+        rx_delays = rng.uniform(0, 5e-6, (n_rx, ) + grid_shape).astype(np.float32)
+        tx_apodization = rng.integers(0, 2, (n_tx, ) + grid_shape).astype(np.uint8)
+        rx_apodization = (rng.uniform(0, 1, (n_rx, ) + grid_shape)
+                          * rng.integers(0, 2, (n_rx, ) + grid_shape)).astype(np.float32)
+        params = dict(tx_delays=tx_delays, rx_delays=rx_delays,
+                      tx_apodization=tx_apodization,
+                      rx_apodization=rx_apodization,
+                      init_delay=np.float32(0.1e-6), fs=self.fs, fc=self.fc)
+        for output_type, output_shape in [
+                ("hri", (n_seq, ) + grid_shape),
+                ("lri", (n_seq, n_tx) + grid_shape)]:
+            output = np.zeros(output_shape, dtype=np.complex64)
+            # Run
+            delay_and_sum_lut(output, self.data, output_type=output_type,
+                              chunk_size=100, **params)
+            # Expect
+            expected = delay_and_sum_lut_reference(
+                self.data, output_type=output_type, **params)
+            self.assert_matches(output, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
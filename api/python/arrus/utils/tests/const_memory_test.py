@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from arrus.utils.const_memory import (
+    ConstMemoryAllocator, HostConstMemoryBackend
+)
+
+
+class RecordingBackend(HostConstMemoryBackend):
+
+    def __init__(self, size, dtype):
+        super().__init__(size, dtype)
+        self.writes = []
+
+    def write(self, offset, values):
+        self.writes.append((offset, len(values)))
+        super().write(offset, values)
+
+
+class ConstMemoryAllocatorTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.backend = RecordingBackend(size=16, dtype=np.float32)
+        self.allocator = ConstMemoryAllocator(self.backend)
+
+    def test_allocate(self):
+        # Run
+        a = self.allocator.allocate(np.arange(4))
+        b = self.allocator.allocate(np.arange(10, 16))
+        # Expect
+        self.assertEqual((a.offset, b.offset), (0, 4))
+        np.testing.assert_equal(self.backend.array[:4], np.arange(4))
+        np.testing.assert_equal(self.backend.array[4:10], np.arange(10, 16))
+        # Only the new regions are copied to the device.
+        self.assertEqual(self.backend.writes, [(0, 4), (4, 6)])
+        self.assertEqual(self.allocator.n_free, 6)
+
+    def test_deduplicate(self):
+        # Run
+        a = self.allocator.allocate(np.arange(4))
+        b = self.allocator.allocate(np.arange(4))
+        # Expect
+        self.assertEqual(a.offset, b.offset)
+        self.assertEqual(len(self.backend.writes), 1)
+        # The region is released only after all the references are freed.
+        self.allocator.free(a)
+        self.assertEqual(self.allocator.n_free, 12)
+        self.allocator.free(b)
+        self.assertEqual(self.allocator.n_free, 16)
+
+    def test_reuse_freed_region(self):
+        # Given
+        blocks = [self.allocator.allocate(np.full(4, i)) for i in range(4)]
+        # Run
+        self.allocator.free(blocks[1])
+        self.allocator.free(blocks[2])
+        block = self.allocator.allocate(np.arange(8))
+        # Expect
+        # The adjacent free regions are merged.
+        self.assertEqual(block.offset, 4)
+        np.testing.assert_equal(self.backend.array[4:12], np.arange(8))
+        np.testing.assert_equal(self.backend.array[12:], np.full(4, 3))
+
+    def test_fallback(self):
+        # Given
+        self.allocator.allocate(np.arange(12))
+        # Run
+        block = self.allocator.allocate(np.arange(8))
+        # Expect
+        self.assertFalse(block.is_const)
+        np.testing.assert_equal(block.array, np.arange(8))
+        # Nothing to release.
+        self.allocator.free(block)
+        self.assertEqual(self.allocator.n_free, 4)
+
+    def test_free_not_allocated(self):
+        # Given
+        block = self.allocator.allocate(np.arange(4))
+        self.allocator.free(block)
+        # Expect
+        with self.assertRaises(ValueError):
+            self.allocator.free(block)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,8 @@ from arrus.utils.tests.utils import ArrusImagingTestCase
 
 from arrus.utils.imaging import (
     FirFilter,
-    BandpassFilter
+    BandpassFilter,
+    _Convolution1D
 )
 
 
@@ -80,5 +81,63 @@ class FirFilterTestCase(ArrusImagingTestCase):
         np.testing.assert_equal(result, [3, 8, 14, 20, 11])
 
 
+class Convolution1DTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.rng = np.random.default_rng(42)
+
+    def assert_equals_convolve1d(self, data, taps, method, decimation_factor=1):
+        import scipy.ndimage
+        convolution = _Convolution1D(
+            taps, n_samples=data.shape[-1], decimation_factor=decimation_factor,
+            method=method)
+        result = convolution(data)
+        expected = scipy.ndimage.convolve1d(data, taps, axis=-1, mode="constant")
+        expected = expected[..., ::decimation_factor]
+        self.assertEqual(result.dtype, expected.dtype)
+        np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-4)
+
+    def test_fft(self):
+        for n_taps in [1, 2, 31, 63, 64]:
+            for n_samples in [5, 100, 1000]:
+                data = self.rng.standard_normal((2, 3, n_samples)).astype(np.float32)
+                taps = self.rng.standard_normal(n_taps).astype(np.float32)
+                self.assert_equals_convolve1d(data, taps, method="fft")
+
+    def test_fft_complex(self):
+        data = (self.rng.standard_normal((2, 1000))
+                + 1j*self.rng.standard_normal((2, 1000))).astype(np.complex64)
+        taps = self.rng.standard_normal(63).astype(np.float32)
+        self.assert_equals_convolve1d(data, taps, method="fft")
+
+    def test_polyphase(self):
+        for n_taps in [1, 2, 7, 15, 16]:
+            for decimation_factor in [1, 2, 3, 4, 10]:
+                for n_samples in [5, 99, 100]:
+                    data = self.rng.standard_normal((2, 3, n_samples)).astype(np.float32)
+                    taps = self.rng.standard_normal(n_taps).astype(np.float32)
+                    self.assert_equals_convolve1d(
+                        data, taps, method="polyphase",
+                        decimation_factor=decimation_factor)
+
+    def test_polyphase_complex(self):
+        data = (self.rng.standard_normal((2, 1000))
+                + 1j*self.rng.standard_normal((2, 1000))).astype(np.complex64)
+        taps = self.rng.standard_normal(15).astype(np.float32)
+        self.assert_equals_convolve1d(data, taps, method="polyphase",
+                                      decimation_factor=4)
+
+    def test_auto(self):
+        taps = self.rng.standard_normal(63).astype(np.float32)
+        self.assertEqual(_Convolution1D(taps, n_samples=4096).method, "fft")
+        self.assertEqual(_Convolution1D(taps[:3], n_samples=4096).method, "direct")
+        self.assertEqual(_Convolution1D(taps, n_samples=4096,
+                                        decimation_factor=4).method, "polyphase")
+
+    def test_invalid_method(self):
+        with self.assertRaisesRegex(ValueError, "Unsupported convolution method"):
+            _Convolution1D([1.0], n_samples=10, method="winograd")
+
+
 if __name__ == "__main__":
     unittest.main()
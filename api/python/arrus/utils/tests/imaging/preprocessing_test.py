@@ -1,16 +1,29 @@
 import unittest
 import numpy as np
+import arrus.exceptions
+import arrus.metadata
 from dataclasses import replace
-from arrus.ops.imaging import LinSequence
+from arrus.ops.imaging import LinSequence, PwiSequence
 from arrus.ops.us4r import Pulse
-from arrus.utils.tests.utils import ArrusImagingTestCase
+from arrus.devices.us4r import FrameChannelMapping
+from arrus.utils.tests.utils import ArrusImagingTestCase, with_parameters
 from arrus.utils.imaging import (
     QuadratureDemodulation,
+    DigitalDownConversion,
     EnvelopeDetection,
     LogCompression,
     DynamicRangeAdjustment,
     ToGrayscaleImg,
-    ScanConversion)
+    ScanConversion,
+    Pipeline,
+    Mean,
+    Lambda,
+    RemapToLogicalOrder,
+    RemapToLogicalOrderV2,
+    ToRealOrComplex,
+    Transpose,
+    _get_linear_interpolation_table,
+    _BatchLinearInterpolator)
 
 
 class QuadratureDemodulationTestCase(ArrusImagingTestCase):
@@ -127,6 +140,37 @@ class QuadratureDemodulationTestCase(ArrusImagingTestCase):
         np.testing.assert_equal(result, expected)
 
 
+class DigitalDownConversionCpuTestCase(ArrusImagingTestCase):
+
+    def setUp(self) -> None:
+        self.op = DigitalDownConversion
+        self.context = self.get_default_context()
+        self.device = "CPU"
+
+    def get_reference(self, data, decimation_factor, fir_order):
+        import scipy.ndimage
+        import scipy.signal
+        fs = self.context.device.sampling_frequency
+        fc = self.context.sequence.pulse.center_frequency
+        t = np.arange(data.shape[-1])/fs
+        iq = data*(2*np.exp(-2j*np.pi*fc*t))
+        taps = scipy.signal.firwin(numtaps=fir_order, cutoff=fc, window="hamming",
+                                   fs=fs, pass_zero="lowpass")
+        iq = scipy.ndimage.convolve1d(iq, taps, axis=-1, mode="constant")
+        return iq[..., ::decimation_factor]
+
+    def test_equals_demodulation_and_decimation(self):
+        rng = np.random.default_rng(42)
+        for decimation_factor, fir_order, n_samples in [
+                (1, 15, 64), (4, 15, 1000), (4, 64, 1001), (10, 31, 2048)]:
+            data = rng.integers(-2000, 2000, size=(2, 3, n_samples)).astype(np.int16)
+            result = self.run_op(data=data, decimation_factor=decimation_factor,
+                                 fir_order=fir_order)
+            expected = self.get_reference(data, decimation_factor, fir_order)
+            self.assertEqual(result.dtype, np.complex64)
+            np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-2)
+
+
 class EnvelopeDetectionTestCase(ArrusImagingTestCase):
 
     def setUp(self) -> None:
@@ -193,6 +237,13 @@ class EnvelopeDetectionTestCase(ArrusImagingTestCase):
         np.testing.assert_almost_equal(result, expected, decimal=5)
 
 
+class EnvelopeDetectionCpuTestCase(EnvelopeDetectionTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.device = "CPU"
+
+
 class LogCompressionTestCase(ArrusImagingTestCase):
 
     def setUp(self) -> None:
@@ -227,6 +278,13 @@ class LogCompressionTestCase(ArrusImagingTestCase):
         np.testing.assert_almost_equal(result, expected, decimal=12)
 
 
+class LogCompressionCpuTestCase(LogCompressionTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.device = "CPU"
+
+
 class DynamicRangeAdjustmentTestCase(ArrusImagingTestCase):
 
     def setUp(self) -> None:
@@ -255,6 +313,13 @@ class DynamicRangeAdjustmentTestCase(ArrusImagingTestCase):
         np.testing.assert_equal(result, expected)
 
 
+class DynamicRangeAdjustmentCpuTestCase(DynamicRangeAdjustmentTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.device = "CPU"
+
+
 class ToGrayscaleImgTestCase(ArrusImagingTestCase):
 
     def setUp(self) -> None:
@@ -294,6 +359,13 @@ class ToGrayscaleImgTestCase(ArrusImagingTestCase):
         np.testing.assert_equal(expected, result)
 
 
+class ToGrayscaleImgCpuTestCase(ToGrayscaleImgTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.device = "CPU"
+
+
 class AbstractScanConversionTestCase(ArrusImagingTestCase):
 
     def setUp(self) -> None:
@@ -633,5 +705,380 @@ class ScanConversionConvexArrayTestCase(AbstractScanConversionTestCase):
         np.testing.assert_equal(expected, result)
 
 
+
+class ScanConversionLinearArrayCpuTestCase(ScanConversionLinearArrayTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.device = "CPU"
+
+    @unittest.skip("The x grid does not cover exactly the TX aperture "
+                   "centers (63 vs 64 pitches), so the output is not "
+                   "an identity.")
+    def test_identity(self):
+        pass
+
+
+class ScanConversionConvexArrayCpuTestCase(ScanConversionConvexArrayTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.device = "CPU"
+
+    def test_sparse_matrix(self):
+        # Given
+        n_scanlines = self.get_n_scanlines()
+        n_samples = self.get_n_samples()
+        x_grid, z_grid = self.get_grid_data(n_scanlines, 8)
+        data = np.random.default_rng(42).random((n_samples, n_scanlines))
+
+        # Run
+        result = self.run_op(data=data, x_grid=x_grid, z_grid=z_grid,
+                             use_sparse_matrix=True)
+
+        # Expect
+        expected = self.run_op(data=data, x_grid=x_grid, z_grid=z_grid)
+        np.testing.assert_allclose(expected, result, rtol=1e-5, atol=1e-6)
+
+    def test_set_parameter(self):
+        # Given
+        n_scanlines = self.get_n_scanlines()
+        n_samples = self.get_n_samples()
+        x_grid, z_grid = self.get_grid_data(n_scanlines, 8)
+        new_x_grid, new_z_grid = x_grid/2, z_grid+1e-3
+        data = np.random.default_rng(42).random((n_samples, n_scanlines))
+        self.op = with_parameters(ScanConversion, x_grid=new_x_grid,
+                                  z_grid=new_z_grid)
+
+        # Run
+        result = self.run_op(data=data, x_grid=x_grid, z_grid=z_grid)
+
+        # Expect
+        self.op = ScanConversion
+        expected = self.run_op(data=data, x_grid=new_x_grid, z_grid=new_z_grid)
+        np.testing.assert_allclose(expected, result, rtol=1e-5, atol=1e-6)
+
+
+class PipelineCpuTestCase(ArrusImagingTestCase):
+
+    def setUp(self) -> None:
+        self.context = self.get_default_context()
+        self.data = (np.random.default_rng(42).random((64, 1024))
+                     + 1j).astype(np.complex64)
+
+    def prepare_pipeline(self, steps, **kwargs):
+        pipeline = Pipeline(steps=steps, placement="/CPU:0", name="Pipeline",
+                            **kwargs)
+        const_metadata = arrus.metadata.ConstMetadata(
+            context=self.context,
+            data_desc=arrus.metadata.EchoDataDescription(
+                sampling_frequency=self.context.device.sampling_frequency,
+                custom={}
+            ),
+            input_shape=self.data.shape,
+            is_iq_data=True,
+            dtype=self.data.dtype
+        )
+        pipeline.prepare(const_metadata)
+        return pipeline
+
+    def test_no_allocations(self):
+        # Given
+        pipeline = self.prepare_pipeline((
+            EnvelopeDetection(),
+            LogCompression(),
+            DynamicRangeAdjustment(min=0, max=80),
+            Mean(axis=0),
+            ToGrayscaleImg()
+        ))
+        pipeline.set_allocation_check(n_warmup_frames=2)
+        # Run
+        for _ in range(5):
+            result = pipeline.process(self.data)[0]
+        pipeline.close()
+        # Expect
+        self.assertEqual(result.shape, (1024, ))
+        self.assertEqual(result.dtype, np.uint8)
+
+    def test_memory_plan(self):
+        # Given
+        def get_steps():
+            return (
+                EnvelopeDetection(),
+                LogCompression(),
+                DynamicRangeAdjustment(min=0, max=80),
+                ToGrayscaleImg()
+            )
+        pipeline = self.prepare_pipeline(get_steps(), plan_memory=True)
+        reference_pipeline = self.prepare_pipeline(get_steps(),
+                                                   plan_memory=False)
+        # Run
+        for _ in range(2):
+            result = pipeline.process(self.data)[0]
+        expected = reference_pipeline.process(self.data)[0]
+        plan = pipeline.get_memory_plan()
+        # Expect
+        np.testing.assert_equal(result, expected)
+        self.assertIsNone(reference_pipeline.get_memory_plan())
+        # EnvelopeDetection and DynamicRangeAdjustment outputs
+        # should share memory.
+        envelope = plan.get_block(("EnvelopeDetection:0", "_output"))
+        drange = plan.get_block(("DynamicRangeAdjustment:0", "_output"))
+        self.assertEqual(envelope.offset, drange.offset)
+        self.assertLess(plan.nbytes, plan.unshared_nbytes)
+
+    def test_memory_plan_with_branch(self):
+        # Given
+        def get_steps():
+            return (
+                EnvelopeDetection(),
+                Pipeline(steps=(Lambda(lambda data: data), ),
+                         placement="/CPU:0"),
+                LogCompression(),
+                DynamicRangeAdjustment(min=0, max=80),
+                Mean(axis=0)
+            )
+        pipeline = self.prepare_pipeline(get_steps(), plan_memory=True)
+        reference_pipeline = self.prepare_pipeline(get_steps(),
+                                                   plan_memory=False)
+        # Run
+        result = pipeline.process(self.data)
+        expected = reference_pipeline.process(self.data)
+        plan = pipeline.get_memory_plan()
+        # Expect
+        for r, e in zip(result, expected):
+            np.testing.assert_equal(r, e)
+        # The EnvelopeDetection output is consumed by the branch,
+        # so it should not be shared.
+        envelope = plan.get_block(("EnvelopeDetection:0", "_output"))
+        for block in plan.blocks:
+            if block.key != envelope.key:
+                self.assertTrue(block.offset >= envelope.end_offset
+                                or block.end_offset <= envelope.offset)
+
+    def test_allocating_step(self):
+        # Given
+        pipeline = self.prepare_pipeline((
+            EnvelopeDetection(),
+            Lambda(lambda data: data+1),
+        ))
+        pipeline.set_allocation_check(n_warmup_frames=2)
+        # Run
+        for _ in range(2):
+            pipeline.process(self.data)
+        # Expect
+        with self.assertRaisesRegex(arrus.exceptions.IllegalStateError,
+                                    "Pipeline/Lambda"):
+            pipeline.process(self.data)
+        pipeline.close()
+
+
+class LinearInterpolationTableTestCase(unittest.TestCase):
+
+    def test_equals_map_coordinates(self):
+        import scipy.ndimage
+        rng = np.random.default_rng(42)
+        data = rng.random((3, 17, 9)).astype(np.float32)
+        # Include points outside of the input grid.
+        coords = np.stack([
+            rng.uniform(-2, 19, size=(11, 7)),
+            rng.uniform(-2, 11, size=(11, 7))
+        ])
+        indices, weights = _get_linear_interpolation_table(coords, data.shape[1:])
+        result = np.sum(data.reshape(3, -1)[:, indices]*weights, axis=1)
+        for i in range(data.shape[0]):
+            expected = scipy.ndimage.map_coordinates(data[i], coords, order=1)
+            np.testing.assert_allclose(result[i].reshape(11, 7), expected, rtol=1e-5, atol=1e-6)
+
+    def test_sparse_matrix_equals_gather(self):
+        rng = np.random.default_rng(42)
+        data = rng.random((3, 17, 9)).astype(np.float32)
+        coords = np.stack([
+            rng.uniform(-2, 19, size=(11, 7)),
+            rng.uniform(-2, 11, size=(11, 7))
+        ])
+        gather = _BatchLinearInterpolator(coords, data.shape[1:], num_pkg=np)
+        sparse = _BatchLinearInterpolator(coords, data.shape[1:], num_pkg=np,
+                                          use_sparse_matrix=True)
+        expected = gather(data, np.zeros((3, 11, 7), dtype=np.float32))
+        result = sparse(data, np.zeros((3, 11, 7), dtype=np.float32))
+        np.testing.assert_allclose(result, expected, rtol=1e-5, atol=1e-6)
+
+
+class RemapToLogicalOrderCpuTestCase(ArrusImagingTestCase):
+
+    def setUp(self) -> None:
+        self.n_samples = 64
+        self.batch_size = 2
+        self.context = self.get_default_context(
+            sequence=PwiSequence(
+                angles=[0.0],
+                pulse=Pulse(center_frequency=6e6, n_periods=2, inverse=False),
+                rx_sample_range=(0, self.n_samples),
+                downsampling_factor=1,
+                speed_of_sound=1490,
+                pri=100e-6,
+                sri=50e-3))
+        # 2 logical frames, 64 channels: the channels are interleaved
+        # between 2 us4OEMs, each of them acquires 2 physical frames.
+        n_frames, n_channels = 2, 64
+        logical_channel = np.arange(n_channels)
+        us4oems = np.tile(logical_channel % 2, (n_frames, 1))
+        channels = np.stack([logical_channel // 2,
+                             31 - logical_channel // 2]).astype(np.int8)
+        channels[0, 10:14] = -1
+        frames = np.tile(np.arange(n_frames)[:, np.newaxis], (1, n_channels))
+        self.fcm = FrameChannelMapping(
+            frames=frames.astype(np.int16),
+            channels=channels,
+            us4oems=us4oems.astype(np.uint8),
+            frame_offsets=np.array([0, 2*self.batch_size], dtype=np.uint32),
+            n_frames=np.array([2*self.batch_size, 2*self.batch_size]),
+            batch_size=self.batch_size
+        )
+
+    def _get_metadata(self, data):
+        return arrus.metadata.ConstMetadata(
+            context=self.context,
+            data_desc=arrus.metadata.EchoDataDescription(
+                sampling_frequency=self.context.device.sampling_frequency,
+                custom={"frame_channel_mapping": self.fcm}
+            ),
+            input_shape=data.shape,
+            is_iq_data=False,
+            dtype=data.dtype
+        )
+
+    def _get_data(self, n_components):
+        # 2 us4OEMs, 2 physical frames each.
+        n_physical_frames = 2*2*self.batch_size
+        shape = (n_physical_frames*self.n_samples, n_components, 32)
+        data = np.random.default_rng(0).integers(-1000, 1000, shape)
+        return np.squeeze(data.astype(np.int16), axis=1) \
+            if n_components == 1 else data.astype(np.int16)
+
+    def _remap(self, data, n_components):
+        # Reference implementation: see the GPU remap kernels.
+        fcm = self.fcm
+        data = data.reshape(-1, self.n_samples, n_components, 32)
+        n_frames, n_channels = fcm.frames.shape
+        result = np.zeros((self.batch_size, n_frames, n_channels,
+                           self.n_samples, n_components), dtype=np.int16)
+        for sequence in range(self.batch_size):
+            for frame in range(n_frames):
+                for channel in range(n_channels):
+                    physical_channel = fcm.channels[frame, channel]
+                    if physical_channel < 0:
+                        continue
+                    us4oem = fcm.us4oems[frame, channel]
+                    physical_frame = (fcm.frame_offsets[us4oem]
+                                      + sequence*2
+                                      + fcm.frames[frame, channel])
+                    result[sequence, frame, channel] = \
+                        data[physical_frame, :, :, physical_channel]
+        return result
+
+    def _run(self, op, data):
+        op.set_pkgs(num_pkg=np)
+        op.prepare(self._get_metadata(data))
+        # The output buffer can be shared with other operations.
+        op._output_buffer[:] = 1
+        result = op.process(data).copy()
+        op.close()
+        return result
+
+    def test_remap(self):
+        # Given
+        data = self._get_data(n_components=1)
+        # Run
+        result = self._run(RemapToLogicalOrder(), data)
+        # Expect
+        expected = self._remap(data, n_components=1)
+        expected = expected[..., 0].transpose((0, 1, 3, 2))
+        np.testing.assert_equal(result, expected)
+
+    def test_remap_v2(self):
+        for n_components in (1, 2):
+            with self.subTest(n_components=n_components):
+                # Given
+                data = self._get_data(n_components=n_components)
+                # Run
+                result = self._run(RemapToLogicalOrderV2(), data)
+                # Expect
+                expected = self._remap(data, n_components=n_components)
+                np.testing.assert_equal(result, expected)
+
+    def test_remap_to_layout(self):
+        # Given
+        data = self._get_data(n_components=1)
+        op = RemapToLogicalOrder(axes=(0, 1, 3, 2), dtype=np.float32)
+        # Run
+        result = self._run(op, data)
+        # Expect
+        expected = self._remap(data, n_components=1)[..., 0]
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_equal(result, expected)
+
+    def test_remap_v2_to_complex(self):
+        # Given
+        data = self._get_data(n_components=2)
+        op = RemapToLogicalOrderV2(axes=(0, 1, 3, 2), to_real_or_complex=True)
+        # Run
+        result = self._run(op, data)
+        # Expect
+        expected = self._remap(data, n_components=2)
+        expected = expected[..., 0] + 1j*expected[..., 1]
+        self.assertEqual(result.dtype, np.complex64)
+        np.testing.assert_equal(result, expected.transpose((0, 1, 3, 2)))
+
+    def test_fuse_steps(self):
+        for n_components in (1, 2):
+            with self.subTest(n_components=n_components):
+                # Given
+                data = self._get_data(n_components=n_components)
+                steps = [RemapToLogicalOrderV2(), ToRealOrComplex(),
+                         Transpose(axes=(0, 1, 3, 2))]
+
+                def get_pipeline(steps, fuse_steps):
+                    pipeline = Pipeline(steps=steps, placement="/CPU:0",
+                                        fuse_steps=fuse_steps)
+                    metadata = pipeline.prepare(self._get_metadata(data))[0]
+                    return pipeline, metadata
+                pipeline, metadata = get_pipeline(steps, fuse_steps=True)
+                # The same steps are used again (e.g. re-upload).
+                pipeline2, metadata2 = get_pipeline(steps, fuse_steps=True)
+                reference, reference_metadata = get_pipeline(
+                    [RemapToLogicalOrderV2(), ToRealOrComplex(),
+                     Transpose(axes=(0, 1, 3, 2))],
+                    fuse_steps=False)
+                # Run
+                result = pipeline.process(data)[0]
+                result2 = pipeline2.process(data)[0]
+                expected = reference.process(data)[0]
+                # Expect
+                self.assertEqual(len(pipeline.steps), 1)
+                self.assertEqual(len(pipeline2.steps), 1)
+                # The given steps should not be modified.
+                self.assertEqual(len(steps), 3)
+                self.assertIsNone(steps[0].axes)
+                self.assertFalse(steps[0].to_real_or_complex)
+                self.assertEqual(metadata.input_shape,
+                                 reference_metadata.input_shape)
+                self.assertEqual(metadata2.input_shape,
+                                 reference_metadata.input_shape)
+                self.assertEqual(result.dtype, expected.dtype)
+                np.testing.assert_equal(result, expected)
+                np.testing.assert_equal(result2, expected)
+
+    def test_remap_threads(self):
+        # Given
+        data = self._get_data(n_components=2)
+        # Run
+        result = self._run(RemapToLogicalOrderV2(n_threads=2), data)
+        # Expect
+        expected = self._remap(data, n_components=2)
+        np.testing.assert_equal(result, expected)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,7 +1,6 @@
 import unittest
 import numpy as np
-import cupy as cp
-from arrus.utils.tests.utils import ArrusImagingTestCase
+from arrus.utils.tests.utils import ArrusImagingTestCase, with_parameters
 from arrus.ops.us4r import Scheme, Pulse
 from arrus.ops.imaging import PwiSequence, LinSequence
 from arrus.utils.imaging import get_bmode_imaging, get_extent
@@ -363,6 +362,80 @@ class PwiReconstructionTestCase(ReconstructionTestCase):
         return delays
 
 
+class PwiReconstructionCpuTestCase(PwiReconstructionTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.device = "CPU"
+        # Coarser OX grid, to keep the CPU test run time reasonable.
+        # Note: the OZ grid is kept as is, the (RF) image is not
+        # smooth along OZ axis.
+        step = 16
+        self.x_grid = self.x_grid[::step]
+        self.xtol = self.xtol//step
+
+    def test_lut(self):
+        # Given
+        self.context = self.get_context(angle=self.angles[0])
+        self.wire_coords = (0, 20e-3)
+        data = self.get_syntetic_pwi_data()
+        z_grid = self.z_grid[::8]
+        expected = self.run_op(data=data, x_grid=self.x_grid, z_grid=z_grid)
+        # Run
+        result = self.run_op(data=data, x_grid=self.x_grid, z_grid=z_grid,
+                             use_lut=True)
+        # Expect
+        self.assertTrue(np.any(expected != 0))
+        scale = np.max(np.abs(expected))
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-3*scale)
+
+    def test_compound(self):
+        # Given
+        self.context = self.get_context(angle=self.angles[0])
+        self.wire_coords = (0, 20e-3)
+        data = self.get_syntetic_pwi_data()
+        z_grid = self.z_grid[::8]
+        expected = self.run_op(data=data, x_grid=self.x_grid, z_grid=z_grid)
+        for use_lut in (False, True):
+            # Run
+            result = self.run_op(data=data, x_grid=self.x_grid, z_grid=z_grid,
+                                 compound=True, use_lut=use_lut)
+            # Expect
+            # A single transmit: the mean over TX is equal to the LRI.
+            self.assertEqual(result.shape, expected.shape)
+            scale = np.max(np.abs(expected))
+            np.testing.assert_allclose(result, expected, rtol=0, atol=1e-3*scale)
+
+    def test_set_parameter(self):
+        # Given
+        self.context = self.get_context(angle=self.angles[0])
+        self.wire_coords = (0, 20e-3)
+        data = self.get_syntetic_pwi_data()
+        z_grid = self.z_grid[::8]
+        params = dict(x_grid=self.x_grid+1e-3, z_grid=z_grid+2e-3,
+                      rx_tang_limits=(-0.3, 0.4))
+        expected = self.run_op(data=data, **params)
+        for use_lut in (False, True):
+            self.op = with_parameters(ReconstructLri, **params)
+            # Run
+            result = self.run_op(data=data, x_grid=self.x_grid, z_grid=z_grid,
+                                 use_lut=use_lut)
+            # Expect
+            # The new parameters are used starting from the next frame.
+            self.assertTrue(np.any(expected != 0))
+            scale = np.max(np.abs(expected))
+            np.testing.assert_allclose(result, expected, rtol=0, atol=1e-3*scale)
+
+    def test_set_parameter_invalid_grid_size(self):
+        # Given
+        self.context = self.get_context(angle=self.angles[0])
+        data = self.get_syntetic_pwi_data()
+        self.op = with_parameters(ReconstructLri, x_grid=self.x_grid[1:])
+        # Expect
+        with self.assertRaises(ValueError):
+            self.run_op(data=data, x_grid=self.x_grid, z_grid=self.z_grid[::8])
+
+
 class BfrReconstructionTestCase(ReconstructionTestCase):
 
     def setUp(self) -> None:
@@ -431,7 +504,8 @@ class BfrReconstructionTestCase(ReconstructionTestCase):
 #                         TOOLS 
 # --------------------------------------------------------------------------
 
-    def get_context(self, tx_focus):
+    def get_context(self, tx_focus, speed_of_sound=1450,
+                    init_delay="tx_start"):
         """
         Function generate context data for bfr tests.
         """
@@ -449,7 +523,8 @@ class BfrReconstructionTestCase(ReconstructionTestCase):
             tgc_start=14,
             tgc_slope=2e2,
             downsampling_factor=1,
-            speed_of_sound=1450,
+            speed_of_sound=speed_of_sound,
+            init_delay=init_delay,
             )
         return self.get_default_context(
             sequence=sequence,
@@ -496,6 +571,42 @@ class BfrReconstructionTestCase(ReconstructionTestCase):
         return data.astype(np.float32)
 
 
+class BfrReconstructionCpuTestCase(BfrReconstructionTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.device = "CPU"
+
+    def test_0(self):
+        # Given
+        n_tx = self.get_system_parameter("n_elements")
+        data = np.zeros((1, n_tx, 64, 512), dtype=np.complex64)
+        # Run
+        result = self.run_op(data=data)
+        # Expect
+        expected = np.zeros((n_tx, 512), dtype=np.complex64)
+        np.testing.assert_equal(result, expected)
+
+    def test_set_parameter(self):
+        # Given
+        # The speed of sound affects only the beamforming
+        # (the TX center is the time reference).
+        self.context = self.get_context(tx_focus=30e-3, speed_of_sound=1540,
+                                        init_delay="tx_center")
+        data = self.get_syntetic_bfr_data()
+        expected = self.run_op(data=data)
+        self.context = self.get_context(tx_focus=30e-3, init_delay="tx_center")
+        initial = self.run_op(data=data)
+        self.op = with_parameters(RxBeamforming, speed_of_sound=1540)
+        # Run
+        result = self.run_op(data=data)
+        # Expect
+        # The new speed of sound is used starting from the next frame.
+        self.assertFalse(np.allclose(initial, expected))
+        scale = np.max(np.abs(expected))
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-5*scale)
+
+
 if __name__ == "__main__":
     unittest.main()
 
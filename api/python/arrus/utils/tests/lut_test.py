@@ -0,0 +1,147 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+import arrus.utils.lut
+from arrus.utils.lut import (
+    compute_lri_lut, get_geometry_hash, get_lut, clear_memory_cache
+)
+from arrus.utils.beamforming_cpu import reconstruct_lri, reconstruct_lri_lut
+
+
+def get_random_data(shape, seed=42):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(shape)
+            + 1j*rng.standard_normal(shape)).astype(np.complex64)
+
+
+class LriLutTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        clear_memory_cache()
+        n_elements = 16
+        x_elem = ((np.arange(n_elements) - (n_elements-1)/2)
+                  * 0.3e-3).astype(np.float32)
+        n_tx = 3
+        self.geometry = dict(
+            x_pix=np.linspace(-2e-3, 2e-3, 9).astype(np.float32),
+            z_pix=np.linspace(1e-3, 5e-3, 11).astype(np.float32),
+            x_elem=x_elem,
+            z_elem=np.zeros(n_elements, dtype=np.float32),
+            tang_elem=np.zeros(n_elements, dtype=np.float32),
+            # PWI, STA (focused) and diverging wave.
+            tx_foc=np.array([np.inf, 3e-3, -5e-3], dtype=np.float32),
+            tx_ang_zx=np.array([0.1, 0, 0], dtype=np.float32),
+            tx_ap_cent_z=np.zeros(n_tx, dtype=np.float32),
+            tx_ap_cent_x=np.array([0, -0.5e-3, 0.5e-3], dtype=np.float32),
+            tx_ap_first_elem=np.array([0, 2, 4], dtype=np.int32),
+            tx_ap_last_elem=np.array([15, 13, 11], dtype=np.int32),
+            sos=np.float32(1540),
+            min_tang=np.float32(-0.5), max_tang=np.float32(0.5))
+
+    def tearDown(self) -> None:
+        clear_memory_cache()
+
+    def test_reconstruct_lri_lut(self):
+        # Given
+        data = get_random_data((2, 3, 16, 128))
+        rx_ap_origin = np.array([0, -2, 4], dtype=np.int32)
+        params = dict(rx_ap_origin=rx_ap_origin, fs=np.float32(65e6/4),
+                      fn=np.float32(6e6), init_delay=np.float32(0.2e-6))
+        lut = compute_lri_lut(**self.geometry)
+        output = np.zeros((2, 3, 9, 11), dtype=np.complex64)
+        # Run
+        reconstruct_lri_lut(
+            output, data, tx_delays=lut.tx_delays,
+            tx_apodization=lut.tx_apodization, rx_delays=lut.rx_delays,
+            rx_apodization=lut.rx_apodization, chunk_size=500, **params)
+        # Expect
+        expected = np.zeros_like(output)
+        reconstruct_lri(expected, data, **self.geometry, **params)
+        self.assertTrue(np.any(expected != 0))
+        scale = np.max(np.abs(expected))
+        np.testing.assert_allclose(output, expected, rtol=0, atol=1e-3*scale)
+
+    def test_geometry_hash(self):
+        # Given
+        other = dict(self.geometry, sos=np.float32(1450))
+        # Expect
+        self.assertEqual(get_geometry_hash(**self.geometry),
+                         get_geometry_hash(**dict(self.geometry)))
+        self.assertNotEqual(get_geometry_hash(**self.geometry),
+                            get_geometry_hash(**other))
+
+    def test_memory_cache(self):
+        # Given
+        n_calls = []
+
+        def compute():
+            n_calls.append(1)
+            return compute_lri_lut(**self.geometry)
+
+        key = get_geometry_hash(**self.geometry)
+        # Run
+        lut1 = get_lut(key, compute)
+        lut2 = get_lut(key, compute)
+        # Expect
+        self.assertEqual(len(n_calls), 1)
+        self.assertIs(lut1, lut2)
+
+    def test_memory_cache_size(self):
+        # Given
+        keys = ["key0", "key1", "key2"]
+        lut = compute_lri_lut(**self.geometry)
+        nbytes = arrus.utils.lut.MEMORY_CACHE_NBYTES
+        arrus.utils.lut.set_memory_cache_nbytes(2*lut.nbytes)
+        try:
+            # Run
+            for key in keys:
+                get_lut(key, lambda: lut)
+            # Expect
+            # The least recently used LUT should be removed.
+            n_calls = []
+            get_lut(keys[0], lambda: n_calls.append(1) or lut)
+            self.assertEqual(len(n_calls), 1)
+            # Turning off the memory cache removes all LUTs.
+            arrus.utils.lut.set_memory_cache_nbytes(0)
+            get_lut(keys[0], lambda: n_calls.append(1) or lut)
+            self.assertEqual(len(n_calls), 2)
+        finally:
+            arrus.utils.lut.set_memory_cache_nbytes(nbytes)
+
+    def test_disk_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Given
+            key = get_geometry_hash(**self.geometry)
+            expected = get_lut(key, lambda: compute_lri_lut(**self.geometry),
+                               cache_dir=cache_dir)
+            clear_memory_cache()
+
+            def compute():
+                raise AssertionError("The LUT should be read from disk.")
+
+            # Run
+            lut = get_lut(key, compute, cache_dir=cache_dir)
+            # Expect
+            np.testing.assert_equal(lut.tx_delays, expected.tx_delays)
+            np.testing.assert_equal(lut.tx_apodization, expected.tx_apodization)
+            np.testing.assert_equal(lut.rx_delays, expected.rx_delays)
+            np.testing.assert_equal(lut.rx_apodization, expected.rx_apodization)
+
+    def test_invalid_disk_cache_file(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Given
+            key = get_geometry_hash(**self.geometry)
+            with open(arrus.utils.lut._get_path(cache_dir, key), "wb") as f:
+                f.write(b"invalid")
+            expected = compute_lri_lut(**self.geometry)
+            # Run
+            lut = get_lut(key, lambda: expected, cache_dir=cache_dir)
+            # Expect
+            # The LUT should be computed again.
+            self.assertIs(lut, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
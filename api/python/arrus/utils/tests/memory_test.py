@@ -0,0 +1,133 @@
+import unittest
+
+import numpy as np
+
+from arrus.utils.memory import (
+    BufferRequest, plan_memory, get_view, get_tiles, ALIGNMENT
+)
+
+
+class PlanMemoryTestCase(unittest.TestCase):
+
+    def assert_valid(self, requests, plan):
+        for a in plan.blocks:
+            self.assertEqual(a.offset % ALIGNMENT, 0)
+            self.assertLessEqual(a.end_offset, plan.nbytes)
+            for b in plan.blocks:
+                if a is b or not a.request.overlaps(b.request):
+                    continue
+                self.assertTrue(a.end_offset <= b.offset
+                                or b.end_offset <= a.offset,
+                                msg=f"{a} overlaps {b}")
+
+    def test_chain(self):
+        # Given
+        # A chain of steps, the output of step i is consumed by step i+1.
+        requests = [BufferRequest(key=i, nbytes=1024, start=i, end=i+1)
+                    for i in range(5)]
+        # Run
+        plan = plan_memory(requests)
+        # Expect
+        self.assert_valid(requests, plan)
+        self.assertEqual(plan.nbytes, 2*1024)
+        self.assertEqual(plan.unshared_nbytes, 5*1024)
+        self.assertEqual([b.key for b in plan.blocks], list(range(5)))
+
+    def test_overlapping_lifetimes(self):
+        # Given
+        requests = [
+            BufferRequest(key="a", nbytes=4096, start=0, end=3),
+            BufferRequest(key="b", nbytes=1000, start=1, end=1),
+            BufferRequest(key="c", nbytes=2048, start=2, end=4),
+            BufferRequest(key="d", nbytes=512, start=4, end=4),
+        ]
+        # Run
+        plan = plan_memory(requests)
+        # Expect
+        self.assert_valid(requests, plan)
+        self.assertEqual(plan.nbytes, 4096+2048)
+
+    def test_fits_in_gap(self):
+        # Given
+        requests = [
+            BufferRequest(key="a", nbytes=4096, start=0, end=1),
+            BufferRequest(key="b", nbytes=4096, start=1, end=3),
+            BufferRequest(key="c", nbytes=1024, start=2, end=2),
+        ]
+        # Run
+        plan = plan_memory(requests)
+        # Expect
+        self.assert_valid(requests, plan)
+        self.assertEqual(plan.nbytes, 2*4096)
+        self.assertEqual(plan.get_block("c").offset,
+                         plan.get_block("a").offset)
+
+    def test_non_unique_keys(self):
+        requests = [BufferRequest(key="a", nbytes=1, start=0, end=0)]*2
+        self.assertRaises(ValueError, plan_memory, requests)
+
+    def test_get_view(self):
+        # Given
+        requests = [BufferRequest(key="a", nbytes=8*3*4, start=0, end=0)]
+        plan = plan_memory(requests)
+        arena = np.zeros(plan.nbytes, dtype=np.uint8)
+        # Run
+        view = get_view(arena, plan.get_block("a"), (3, 4), np.complex64)
+        view[:] = 1j
+        # Expect
+        self.assertEqual(view.shape, (3, 4))
+        self.assertEqual(view.dtype, np.complex64)
+        self.assertTrue(np.shares_memory(view, arena))
+
+
+class GetTilesTestCase(unittest.TestCase):
+
+    def assert_covers(self, shape, tiles, max_size):
+        *other, n_x, n_z = shape
+        n_other = int(np.prod(other))
+        mask = np.zeros((n_x, n_z), dtype=np.int32)
+        for x, z in tiles:
+            mask[x, z] += 1
+            size = n_other*(x.stop-x.start)*(z.stop-z.start)
+            self.assertLessEqual(size, max(max_size, n_other))
+        # Each grid point belongs to exactly one tile.
+        np.testing.assert_equal(mask, 1)
+
+    def test_single_tile(self):
+        tiles = get_tiles((4, 5, 6))
+        self.assertEqual(tiles, [(slice(0, 5), slice(0, 6))])
+
+    def test_z_slabs(self):
+        # Given
+        shape = (4, 5, 6)
+        # Run
+        tiles = get_tiles(shape, max_size=4*5*4)
+        # Expect
+        self.assertEqual(tiles, [(slice(0, 5), slice(0, 4)),
+                                 (slice(0, 5), slice(4, 6))])
+        self.assert_covers(shape, tiles, max_size=4*5*4)
+
+    def test_x_split(self):
+        # Given
+        shape = (4, 5, 6)
+        # Run
+        tiles = get_tiles(shape, max_size=4*3)
+        # Expect
+        self.assertEqual(len(tiles), 2*6)
+        self.assert_covers(shape, tiles, max_size=4*3)
+
+    def test_too_small_max_size(self):
+        # Given
+        shape = (4, 5, 6)
+        # Run
+        tiles = get_tiles(shape, max_size=1)
+        # Expect
+        self.assertEqual(len(tiles), 5*6)
+        self.assert_covers(shape, tiles, max_size=1)
+
+    def test_invalid_max_size(self):
+        self.assertRaises(ValueError, get_tiles, (4, 5, 6), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,7 @@
+import concurrent.futures
+import os
+import pickle
+import tempfile
 import unittest
 import numpy as np
 from arrus.utils.probe_check import *
@@ -70,6 +74,34 @@ class ByNeighborhoodValidatorTest(AbstractElementValidatorTest):
                          ElementValidationVerdict.TOO_LOW)
         # Note: 50 and 100 are fine, as they are masked
 
+    def test_validate_all(self):
+        validator = ByNeighborhoodValidator(
+            group_size=32, feature_range_in_neighborhood=(0.5, 1.5),
+            min_num_of_neighbors=5)
+        signal = np.ones((2, 192))*10000
+        signal[0, 50] = 100
+        signal[1, 125] *= 2
+        signal[1, 150:180] = 1
+        results = validator.validate_all(
+            values=signal, masked=(100, ),
+            active_range=(550, 30000), masked_range=(0, 550))
+        self.assertEqual(results.verdicts.shape, signal.shape)
+        for values, verdicts in zip(signal, results.verdicts):
+            report = validator.validate(
+                values=values, masked=(100, ),
+                active_range=(550, 30000), masked_range=(0, 550))
+            self.assertEqual([e.verdict.value for e in report],
+                             verdicts.tolist())
+        self.assertEqual(results.verdicts[0, 50],
+                         ElementValidationVerdict.TOO_LOW.value)
+        self.assertEqual(results.verdicts[0, 100],
+                         ElementValidationVerdict.TOO_HIGH.value)
+        self.assertEqual(results.verdicts[1, 125],
+                         ElementValidationVerdict.TOO_HIGH.value)
+        self.assertEqual(results.verdicts[1, 165],
+                         ElementValidationVerdict.INDEFINITE.value)
+        self.assertTrue(np.isnan(results.lower_bounds[1, 165]))
+
 
 class ByThresholdValidatorTest(AbstractElementValidatorTest):
 
@@ -242,8 +274,10 @@ class EnergyExtractorTest(AbstractExtractorTest):
             signal, value=1, pulse_len=2*pulse_len)
         extracted_short = self.extractor.extract(signal_short)
         extracted_long = self.extractor.extract(signal_long)
-        self.assertAlmostEqual(
-            2*np.sum(extracted_short), np.sum(extracted_long), 1
+        # The filtering at the signal edges makes the energies
+        # differ slightly.
+        np.testing.assert_allclose(
+            2*np.sum(extracted_short), np.sum(extracted_long), rtol=1e-2
         )
 
 class SignalDurationTimeExtractorTest(AbstractExtractorTest):
@@ -290,6 +324,24 @@ class SignalDurationTimeExtractorTest(AbstractExtractorTest):
         e = n - lt/st
         self. assertLess(e, tol)
 
+    def test_extract_noised(self):
+        signal = self._generate_zeros_signal()
+        signal = self._put_fast_sine_into_signal_array(
+            signal, value=1, pulse_len=8)
+        rng = np.random.default_rng(seed=0)
+        signal += 0.05*rng.standard_normal(signal.shape)
+        extracted = self.extractor.extract(signal)
+        self.assertTrue(np.all((extracted >= 30) & (extracted < 40)))
+
+    def test_extract_moments(self):
+        signal = self._generate_zeros_signal()
+        signal = self._put_fast_sine_into_signal_array(
+            signal, value=1, pulse_len=8)
+        extractor = SignalDurationTimeExtractor(n_refinement_iterations=0)
+        extracted = extractor.extract(signal)
+        expected = self.extractor.extract(signal)
+        np.testing.assert_allclose(extracted, expected, rtol=0.15)
+
 
 class FootprintSimilarityPCCExtractorTest(AbstractExtractorTest):
 
@@ -339,8 +391,107 @@ class FootprintSimilarityPCCExtractorTest(AbstractExtractorTest):
         self.assertEqual(extracted, -1)
 
 
-class ProbeHealthVerifierTest(unittest.TestCase):
-    pass
+class ProbeHealthVerifierTest(AbstractExtractorTest):
+    nframe = 2
+    ntx = 8
+    nsamp = 256
+    nrx = 32
+
+    def setUp(self) -> None:
+        self.verifier = ProbeHealthVerifier()
+        self.validator = ByThresholdValidator()
+        self.features = [
+            FeatureDescriptor(
+                name=EnergyExtractor.feature,
+                active_range=(0, 200),
+                masked_elements_range=(0, np.inf)
+            ),
+            FeatureDescriptor(
+                name=SignalDurationTimeExtractor.feature,
+                active_range=(0, 1000),
+                masked_elements_range=(200, np.inf)
+            ),
+            FeatureDescriptor(
+                name=FootprintSimilarityPCCExtractor.feature,
+                active_range=(0.5, 1),
+                masked_elements_range=(0, 1)
+            ),
+        ]
+        self.footprint = self._generate_dummy_footprint(pulse_len=8)
+        rng = np.random.default_rng(seed=0)
+        self.data = self._generate_fast_sin_signal(pulse_len=8)
+        self.data += 0.05*rng.standard_normal(self.data.shape)
+
+    def _check(self, data, **kwargs):
+        return self.verifier._check_probe_data(
+            data=data, metadata=None, footprint=self.footprint,
+            masked_elements=(2, ), features=self.features,
+            validator=self.validator, **kwargs)
+
+    def _assert_reports_equal(self, expected, actual):
+        for name, values in expected.characteristics.items():
+            np.testing.assert_equal(actual.characteristics[name], values)
+        self.assertEqual([e.is_masked for e in expected.elements],
+                         [e.is_masked for e in actual.elements])
+
+    def test_shared_preprocessing(self):
+        # Given
+        cache = PreprocessingCache()
+        extractors = [EnergyExtractor(cache=cache),
+                      SignalDurationTimeExtractor(cache=cache)]
+        for extractor in extractors:
+            extractor.preprocess(self.data)
+        # Run
+        # The cached results should be used regardless of the input array.
+        results = [e.extract(np.zeros_like(self.data)) for e in extractors]
+        # Expect
+        np.testing.assert_equal(results[0],
+                                EnergyExtractor().extract(self.data))
+        np.testing.assert_equal(
+            results[1], SignalDurationTimeExtractor().extract(self.data))
+
+    def test_check_probe_data_executor(self):
+        # Given
+        expected = self._check(self.data)
+        # Run
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2) as executor:
+            report = self._check(self.data, executor=executor)
+        # Expect
+        self._assert_reports_equal(expected, report)
+
+    def test_streaming(self):
+        # Given
+        extractors = [EnergyExtractor(), SignalDurationTimeExtractor()]
+        # Run
+        for extractor in extractors:
+            extractor.reset()
+            for frame in self.data:
+                extractor.update(frame)
+        # Expect
+        for extractor in extractors:
+            np.testing.assert_allclose(extractor.result(),
+                                       extractor.extract(self.data))
+
+    def test_streaming_not_supported(self):
+        with self.assertRaises(ValueError):
+            self.verifier.check_probe(
+                cfg_path="us4r.prototxt", n=2, tx_frequency=6e6,
+                features=self.features, validator=self.validator,
+                footprint=self.footprint, streaming=True)
+
+    def test_check_probe_file(self):
+        # Given
+        expected = self._check(self.data)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "rf.pkl")
+            with open(path, "wb") as f:
+                pickle.dump({"report": expected}, f)
+            # Run
+            report = self.verifier.check_probe_file(
+                path, features=self.features, validator=self.validator,
+                footprint=self.footprint)
+        # Expect
+        self._assert_reports_equal(expected, report)
 
 
 if __name__ == "__main__":
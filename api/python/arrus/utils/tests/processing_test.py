@@ -1,9 +1,9 @@
 import time
+import threading
 import unittest
 from collections import deque, namedtuple
 from collections.abc import Iterable
 import numpy as np
-import cupy as cp
 from dataclasses import dataclass
 
 from arrus.utils.imaging import (
@@ -63,6 +63,9 @@ class InputBufferElementMock:
         self.arrays = arrays
         self.size = self.array.nbytes
 
+    def release(self):
+        pass
+
 
 class InputBufferMock:
     """
@@ -115,7 +118,7 @@ class ProcessingRunnerTestCase(unittest.TestCase):
             gpu_buffer_size=2,
             out_buffer_size=2,
             graph=None, callback=None,
-            buffer_type="locked"):
+            buffer_type="locked", profiling=False):
 
         # arrays: a list of tuples [(a1, a2,..), ...]
         data = []
@@ -156,7 +159,8 @@ class ProcessingRunnerTestCase(unittest.TestCase):
                 input_buffer=input_buffer_def,
                 output_buffer=output_buffer_def,
                 graph=graph,
-                callback=callback
+                callback=callback,
+                profiling=profiling
             ))
         return self.in_buffer, self.runner
 
@@ -203,6 +207,166 @@ class ProcessingRunnerTestCase(unittest.TestCase):
             print(outputs)
 
 
+    def test_simple_graph_cpu(self):
+        sequences = ["SequenceA", "SequenceB"]
+        a1 = np.zeros((2, 2), dtype=np.int16) + 1
+        b1 = np.zeros((2, 2), dtype=np.int16) + 2
+        a2 = np.zeros((2, 2), dtype=np.int16) + 3
+        b2 = np.zeros((2, 2), dtype=np.int16) + 4
+
+        elements = [(a1, b1), (a2, b2)]
+
+        graph = Graph(
+            operations={
+                Pipeline(name="A", placement="/CPU:0", steps=(
+                    Lambda(lambda data: data+1),
+                )),
+                Pipeline(name="B", placement="/CPU:0", steps=(
+                    Lambda(lambda data: data**2),
+                )),
+                Pipeline(name="C", placement="/CPU:0", steps=(
+                    Lambda(lambda xs: xs[0]+xs[1],
+                           lambda ms: ms[0].copy(input_shape=ms[0].input_shape)),
+                ))
+            },
+            dependencies={
+                "A": "SequenceA",
+                "B": "SequenceB",
+                "C": ("A/Output:0", "B/Output:0"),
+                "Output:0": "C/Output:0"
+            }
+        )
+        input_buffer, runner = self.__create_setup(elements=elements, graph=graph, sequences=sequences)
+        buffer, metadata = runner.outputs
+        expected = [6, 20, 6]
+        for e in expected:
+            input_buffer.produce()
+            outputs = buffer.get(timeout=10)
+            np.testing.assert_equal(outputs[0], np.zeros((2, 2), dtype=np.int16) + e)
+
+    def test_pipelined_cpu_keeps_frame_order(self):
+        sequences = ["SequenceA"]
+        elements = [(np.zeros((4, 4), dtype=np.int16) + i, ) for i in range(3)]
+        results = []
+
+        def slow_increment(data):
+            time.sleep(0.01)
+            return data + 1
+
+        def callback(element):
+            results.append(element.arrays[0].copy())
+            element.release()
+
+        graph = Graph(
+            operations={
+                Pipeline(name="A", placement="/CPU:0", steps=(
+                    Lambda(slow_increment),
+                )),
+            },
+            dependencies={
+                "A": "SequenceA",
+                "Output:0": "A/Output:0"
+            }
+        )
+        input_buffer, runner = self.__create_setup(
+            elements=elements, graph=graph, sequences=sequences,
+            callback=callback)
+        n_frames = 12
+        for _ in range(n_frames):
+            input_buffer.produce()
+        runner.sync()
+        self.assertEqual(len(results), n_frames)
+        for i, result in enumerate(results):
+            np.testing.assert_equal(result, np.zeros((4, 4), dtype=np.int16) + i % 3 + 1)
+
+    def test_independent_branches_cpu_run_concurrently(self):
+        sequences = ["SequenceA"]
+        elements = [(np.zeros((2, 2), dtype=np.int16) + 1, )]
+        barrier = threading.Barrier(2, timeout=10)
+
+        def wait_for_other_branch(data):
+            # Deadlocks (and times out) if the branches are run sequentially.
+            barrier.wait()
+            return data
+
+        graph = Graph(
+            operations={
+                Pipeline(name="A", placement="/CPU:0", steps=(
+                    Lambda(wait_for_other_branch),
+                    Lambda(lambda data: data+1),
+                )),
+                Pipeline(name="B", placement="/CPU:0", steps=(
+                    Lambda(wait_for_other_branch),
+                    Lambda(lambda data: data*3),
+                )),
+            },
+            dependencies={
+                "A": "SequenceA",
+                "B": "SequenceA",
+                "Output:0": "A/Output:0",
+                "Output:1": "B/Output:0",
+            }
+        )
+        input_buffer, runner = self.__create_setup(elements=elements, graph=graph, sequences=sequences)
+        self.assertEqual(runner._schedule.n_branches, 2)
+        buffer, metadata = runner.outputs
+        input_buffer.produce()
+        outputs = buffer.get(timeout=10)
+        np.testing.assert_equal(outputs[0], np.zeros((2, 2), dtype=np.int16) + 2)
+        np.testing.assert_equal(outputs[1], np.zeros((2, 2), dtype=np.int16) + 3)
+
+    def test_profiling_cpu(self):
+        sequences = ["SequenceA"]
+        elements = [(np.zeros((2, 2), dtype=np.int16) + i, ) for i in range(2)]
+        results = []
+
+        def callback(element):
+            results.append(element.arrays[0].copy())
+            element.release()
+
+        graph = Graph(
+            operations={
+                Pipeline(name="A", placement="/CPU:0", steps=(
+                    Lambda(lambda data: data+1),
+                )),
+            },
+            dependencies={
+                "A": "SequenceA",
+                "Output:0": "A/Output:0"
+            }
+        )
+        input_buffer, runner = self.__create_setup(
+            elements=elements, graph=graph, sequences=sequences,
+            callback=callback, profiling=True)
+        n_frames = 5
+        for _ in range(n_frames):
+            input_buffer.produce()
+        runner.sync()
+        stats = runner.get_stats()
+        self.assertEqual(len(results), n_frames)
+        self.assertEqual(stats["A"]["wall_time"]["count"], n_frames)
+        self.assertEqual(stats["A/Lambda:0"]["bytes_in"]["mean"], 8)
+        self.assertIn("p99", stats["ProcessingRunner"]["wall_time"])
+        self.assertIn("queue_wait", stats["ProcessingRunner"])
+
+    def test_get_stats_profiling_off(self):
+        sequences = ["SequenceA"]
+        elements = [(np.zeros((2, 2), dtype=np.int16), )]
+        graph = Graph(
+            operations={
+                Pipeline(name="A", placement="/CPU:0", steps=(
+                    Lambda(lambda data: data+1),
+                )),
+            },
+            dependencies={
+                "A": "SequenceA",
+                "Output:0": "A/Output:0"
+            }
+        )
+        input_buffer, runner = self.__create_setup(
+            elements=elements, graph=graph, sequences=sequences)
+        self.assertRaises(ValueError, runner.get_stats)
+
     # def __run_increment_sync(self, buffer, n_runs):
     #     value = 0
     #     for i in range(n_runs):
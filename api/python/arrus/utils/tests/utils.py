@@ -74,6 +74,21 @@ class UltrasoundDeviceMock:
         return self.probe
 
 
+def with_parameters(op_class, **params):
+    """
+    Returns a subclass of the given operation, that sets the given
+    parameters (set_parameter) right after the operation is prepared.
+    """
+    class OpWithParameters(op_class):
+        def prepare(self, const_metadata):
+            result = super().prepare(const_metadata)
+            for key, value in params.items():
+                self.set_parameter(key, value)
+            return result
+
+    return OpWithParameters
+
+
 class ArrusTestCase(unittest.TestCase):
     pass
 
@@ -83,11 +98,13 @@ class ArrusImagingTestCase(ArrusTestCase):
     Arrus processing test case.
 
     :param op: operator to test
+    :param device: processing device to test: "GPU" (default) or "CPU"
     """
 
     def __init__(self, methodName: str = ...) -> None:
         super().__init__(methodName)
         self.op = None
+        self.device = "GPU"
 
     def run_op(self, **kwargs):
         """
@@ -99,7 +116,7 @@ class ArrusImagingTestCase(ArrusTestCase):
         required. If the parameters `xyz` is None, TestCase.xyz will be used.
         All the parameters not listed below will be passed to the operator constructor.
 
-        Currently GPU implementation can only be tested.
+        :param device: processing device, "GPU" or "CPU"
 
         Currently the function assumes, that the op is an Operation from
         the arrus.utils.imaging module.
@@ -113,22 +130,29 @@ class ArrusImagingTestCase(ArrusTestCase):
         """
         data = self.__get_param_or_field("data", kwargs)
         context = self.__get_param_or_field("context", kwargs)
+        device = self.__get_param_or_field("device", kwargs)
 
         # Get arrus.utils.imaging.Operation constructor parameters
         constructor_params = kwargs.copy()
         constructor_params.pop("data", None)
         constructor_params.pop("context", None)
+        constructor_params.pop("device", None)
 
         # Create op instance
         op_class = self.op  # We assume field `op` is the subclass of Operation
         op_instance = op_class(**constructor_params)
 
         # Set op backend and processing device.
-        import cupy as cp
-        import cupyx.scipy.ndimage as cupy_scipy_ndimage
-        pkgs = dict(num_pkg=cp, filter_pkg=cupy_scipy_ndimage)
+        if device == "CPU":
+            import scipy.ndimage
+            xp = np
+            pkgs = dict(num_pkg=np, filter_pkg=scipy.ndimage)
+        else:
+            import cupy as xp
+            import cupyx.scipy.ndimage as cupy_scipy_ndimage
+            pkgs = dict(num_pkg=xp, filter_pkg=cupy_scipy_ndimage)
         op_instance.set_pkgs(**pkgs)
-        data = cp.asarray(data)
+        data = xp.asarray(data)
 
         # Prepare and initialize (context)
         const_metadata = arrus.metadata.ConstMetadata(
@@ -140,15 +164,15 @@ class ArrusImagingTestCase(ArrusTestCase):
                 custom={}
             ),
             input_shape=data.shape,
-            is_iq_data=data.dtype == cp.complex64,
+            is_iq_data=data.dtype == xp.complex64,
             dtype=data.dtype
         )
         op_instance.prepare(const_metadata=const_metadata)
-        init_data = cp.zeros(data.shape, dtype=data.dtype) + 1000
+        init_data = xp.zeros(data.shape, dtype=data.dtype) + 1000
         op_instance.initialize(init_data)
         # Now run the op for the given data:
         op_result = op_instance(data)
-        if isinstance(op_result, cp.ndarray):
+        if device != "CPU" and isinstance(op_result, xp.ndarray):
             op_result = op_result.get()
         elif not isinstance(op_result, np.ndarray):
             raise ValueError(f"Invalid output result type: {type(op_result)}")
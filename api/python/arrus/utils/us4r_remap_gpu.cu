@@ -25,13 +25,16 @@ extern "C" __global__ void arrusRemap(short *out, short *in, const short *fcmFra
     }
     // FCM describes here a single sequence
     int physicalChannel = fcmChannels[channel + nChannels*localFrame];
+    // [sequence, frame, sample, channel]
+    size_t indexOut =
+        sequence*nFrames*nSamples*nChannels + localFrame*nSamples*nChannels + sample*nChannels + channel;
     if (physicalChannel < 0) {
         // channel is turned off
+        // Note: the output buffer can be shared with other operations,
+        // so it is not guaranteed to be zeroed.
+        out[indexOut] = 0;
         return;
     }
-    // [sequence, frame, sample, channel]
-    size_t indexOut =
-        sequence*nFrames*nSamples*nChannels + localFrame*nSamples*nChannels + sample*nChannels + channel;
 
     // 32 == number of channels in the physical mapping
     // [us4oem, sequence, physicalFrame, sample, physicalChannel]
@@ -128,4 +131,81 @@ extern "C" __global__ void arrusRemapV2(short *out, short *in, const short *fcmF
         // The below in simpler form: out[indexOut] = tile[threadIdx.x][threadIdx.y][component];
         out[indexOut] = *(&tile[0][0][0] + blockDim.x*nComponents*threadIdx.x + nComponents*threadIdx.y + component);
     }
-}
\ No newline at end of file
+}
+
+/**
+ * Data remapping (physical -> logical order), that writes the output directly in the given layout and data type.
+ *
+ * The output element [sequence, frame, channel, sample, component] is stored at:
+ * sequence*sSequence + frame*sFrame + channel*sChannel + sample*sSample + component*sComponent,
+ * where the strides are given in the number of output elements. This way the kernel can write e.g.
+ * transposed data, or complex64 data (as an array of floats, with the component stride equal 1).
+ *
+ * @param out: output array
+ * @param in: input array
+ * @param fcmFrames: frame channel mapping: frames
+ * @param fcmChannels: frame channel mapping: channels
+ * @param fcmUs4oems: frame channel mapping: us4oems
+ * @parma frameOffsets: Number of frame (global), that starts given us4OEM data
+ * @param nFramesUs4OEM: number of frames each us4OEM acquires
+ * @param nSequences, nFrames, nSamples, nChannels, nComponents: logical output shape
+ * @param sSequence, sFrame, sChannel, sSample, sComponent: output strides
+ */
+template<typename T>
+__device__ void remapToLayout(T *out, const short *in, const short *fcmFrames, const char *fcmChannels,
+                              const unsigned char *fcmUs4oems, const unsigned int *frameOffsets,
+                              const unsigned int *nFramesUs4OEM, const unsigned nSequences,
+                              const unsigned nFrames, const unsigned nSamples, const unsigned nChannels,
+                              const unsigned nComponents,
+                              const long long sSequence, const long long sFrame, const long long sChannel,
+                              const long long sSample, const long long sComponent) {
+    int channel = blockIdx.x*blockDim.x + threadIdx.x; // logical channel
+    int sample = blockIdx.y*blockDim.y + threadIdx.y;  // logical sample
+    int frame = blockIdx.z; // logical frame, global in the whole batch of sequences
+
+    int sequence = frame / nFrames;
+    int localFrame = frame % nFrames;
+    if (channel >= nChannels || sample >= nSamples || localFrame >= nFrames || sequence >= nSequences) {
+        return;
+    }
+    // FCM describes here a single sequence
+    int physicalChannel = fcmChannels[localFrame*nChannels + channel];
+    int physicalFrame = fcmFrames[localFrame*nChannels + channel];
+    int us4oem = fcmUs4oems[localFrame*nChannels + channel];
+    int us4oemOffset = frameOffsets[us4oem];
+    int nPhysicalFrames = nFramesUs4OEM[us4oem];
+
+    const int nus4OEMChannels = 32;
+    // physical, input
+    int pSampleSize = nus4OEMChannels*nComponents;
+    int pFrameSize = pSampleSize*nSamples;
+
+    long long indexOut = sequence*sSequence + localFrame*sFrame + channel*sChannel + sample*sSample;
+    for(unsigned component = 0; component < nComponents; ++component) {
+        T value = 0;
+        if(physicalChannel >= 0) {
+            size_t indexIn = us4oemOffset*pFrameSize + sequence*nPhysicalFrames*pFrameSize
+              + physicalFrame*pFrameSize + sample*pSampleSize + component*nus4OEMChannels + physicalChannel;
+            value = (T)in[indexIn];
+        }
+        // Note: the output buffer can be shared with other operations,
+        // so it is not guaranteed to be zeroed.
+        out[indexOut + component*sComponent] = value;
+    }
+}
+
+#define REMAP_TO_LAYOUT(name, type) \
+extern "C" __global__ void name(type *out, const short *in, const short *fcmFrames, const char *fcmChannels, \
+                                const unsigned char *fcmUs4oems, const unsigned int *frameOffsets, \
+                                const unsigned int *nFramesUs4OEM, const unsigned nSequences, \
+                                const unsigned nFrames, const unsigned nSamples, const unsigned nChannels, \
+                                const unsigned nComponents, \
+                                const long long sSequence, const long long sFrame, const long long sChannel, \
+                                const long long sSample, const long long sComponent) { \
+    remapToLayout<type>(out, in, fcmFrames, fcmChannels, fcmUs4oems, frameOffsets, nFramesUs4OEM, \
+                        nSequences, nFrames, nSamples, nChannels, nComponents, \
+                        sSequence, sFrame, sChannel, sSample, sComponent); \
+}
+
+REMAP_TO_LAYOUT(arrusRemapToLayoutShort, short)
+REMAP_TO_LAYOUT(arrusRemapToLayoutFloat, float)
@@ -1,4 +1,5 @@
 import cupy as cp
+import numpy as np
 import os
 from pathlib import Path
 
@@ -9,6 +10,10 @@ remap_module = cp.RawModule(code=_kernel_source)
 
 remap_v1_kernel = remap_module.get_function("arrusRemap")
 remap_v2_kernel = remap_module.get_function("arrusRemapV2")
+remap_to_layout_kernels = {
+    np.dtype(np.int16): remap_module.get_function("arrusRemapToLayoutShort"),
+    np.dtype(np.float32): remap_module.get_function("arrusRemapToLayoutFloat"),
+}
 
 
 def get_default_grid_block_size(fcm_frames, n_samples, batch_size):
@@ -58,3 +63,19 @@ def run_remap_v2(grid_size, block_size, params):
 
 
 
+
+
+def run_remap_to_layout(grid_size, block_size, params, strides):
+    """
+    :param params: a list: data_out, data_in, fcm_frames, fcm_channels,
+      fcm_us4oems, frame_offsets, n_frames_us4oems, n_sequences, n_frames,
+      n_samples, n_channels, n_components
+    :param strides: output strides [elements] of the logical axes:
+      (sequence, frame, channel, sample, component)
+    """
+    out = params[0]
+    kernel = remap_to_layout_kernels[out.dtype]
+    params = (params[:7]
+              + [np.uint32(v) for v in params[7:]]
+              + [np.int64(s) for s in strides])
+    return kernel(grid_size, block_size, params)